@@ -26,7 +26,11 @@ from django.utils.translation import ugettext_lazy as _
 from pipeline.exceptions import PipelineException
 from rest_framework import serializers
 
-from bkflow.constants import MAX_LEN_OF_TASK_NAME, USER_NAME_MAX_LENGTH
+from bkflow.constants import (
+    BATCH_CREATE_TASK_MAX_NUM,
+    MAX_LEN_OF_TASK_NAME,
+    USER_NAME_MAX_LENGTH,
+)
 from bkflow.label.models import Label
 from bkflow.pipeline_web.parser.validator import validate_web_pipeline_tree
 from bkflow.template.models import TemplateMockData
@@ -119,6 +123,23 @@ class CreateTaskSerializer(CredentialsValidationMixin, serializers.Serializer):
         return attrs
 
 
+class BatchCreateTaskItemSerializer(CreateTaskSerializer):
+    def validate(self, attrs):
+        # 标签在 BatchCreateTaskSerializer 中统一校验
+        return attrs
+
+
+class BatchCreateTaskSerializer(serializers.Serializer):
+    tasks = BatchCreateTaskItemSerializer(help_text=_("待创建的任务列表"), many=True, allow_empty=False)
+
+    def validate_tasks(self, value):
+        if len(value) > BATCH_CREATE_TASK_MAX_NUM:
+            raise serializers.ValidationError(_("单次最多创建 {max_num} 个任务").format(max_num=BATCH_CREATE_TASK_MAX_NUM))
+        label_ids = list(dict.fromkeys(label_id for task in value for label_id in task.get("label_ids") or []))
+        _validate_task_label_ids(label_ids, self.context.get("space_id"))
+        return value
+
+
 class CreateTaskByAppSerializer(serializers.Serializer):
     """创建任务序列化器（用于基于 bk_app_code 的接口，creator 从网关认证用户获取）"""
 
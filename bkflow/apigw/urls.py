@@ -26,6 +26,7 @@ urlpatterns = []
 if settings.BKFLOW_MODULE.type == BKFLOWModuleType.interface:
     from bkflow.apigw.views.apply_token import apply_token
     from bkflow.apigw.views.apply_webhook_configs import apply_webhook_configs
+    from bkflow.apigw.views.batch_create_task import batch_create_task
     from bkflow.apigw.views.batch_delete_template import batch_delete_template
     from bkflow.apigw.views.create_credential import create_credential
     from bkflow.apigw.views.create_label import create_label
@@ -106,6 +107,7 @@ if settings.BKFLOW_MODULE.type == BKFLOWModuleType.interface:
         url(r"^space/(?P<space_id>\d+)/template/(?P<template_id>\d+)/update_labels/$", update_template_labels),
         url(r"^space/(?P<space_id>\d+)/delete_template/(?P<template_id>\d+)/$", delete_template),
         url(r"^space/(?P<space_id>\d+)/create_task/$", create_task),
+        url(r"^space/(?P<space_id>\d+)/batch_create_task/$", batch_create_task),
         url(r"^space/(?P<space_id>\d+)/create_mock_task/$", create_mock_task),
         url(r"^space/(?P<space_id>\d+)/create_task_without_template/$", create_task_without_template),
         url(r"^space/(?P<space_id>\d+)/validate_pipeline_tree/$", validate_pipeline_tree),
@@ -0,0 +1,134 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+
+import json
+from copy import deepcopy
+
+from apigw_manager.apigw.decorators import apigw_require
+from blueapps.account.decorators import login_exempt
+from django.db import transaction
+from django.utils.translation import ugettext_lazy as _
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from bkflow.apigw.decorators import check_jwt_and_space, return_json_response
+from bkflow.apigw.serializers.task import BatchCreateTaskSerializer
+from bkflow.constants import TaskTriggerMethod, WebhookEventType, WebhookScopeType
+from bkflow.contrib.api.collections.task import TaskComponentClient
+from bkflow.exceptions import ValidationError
+from bkflow.label.models import Label
+from bkflow.label.serializers import LabelSerializer
+from bkflow.plugin.services.open_plugin_snapshot import OpenPluginSnapshotService
+from bkflow.space.tasks import dispatch_webhook_events
+from bkflow.template.models import Template
+from bkflow.utils.trace import CallFrom, trace_view
+from bkflow.utils.webhook import enqueue_webhook_event
+
+DEFAULT_NOTIFY_CONFIG = {
+    "notify_type": {"fail": [], "success": []},
+    "notify_receivers": {"more_receiver": "", "receiver_group": []},
+}
+
+
+@login_exempt
+@csrf_exempt
+@require_POST
+@apigw_require
+@trace_view(attr_keys=["space_id"], call_from=CallFrom.APIGW.value)
+@check_jwt_and_space
+@return_json_response
+def batch_create_task(request, space_id):
+    data = json.loads(request.body)
+    ser = BatchCreateTaskSerializer(data=data, context={"space_id": int(space_id)})
+    ser.is_valid(raise_exception=True)
+    tasks = ser.validated_data["tasks"]
+
+    template_ids = {task["template_id"] for task in tasks}
+    templates = Template.objects.filter(id__in=template_ids, space_id=space_id, is_deleted=False).in_bulk()
+    missing_template_ids = template_ids - set(templates.keys())
+    if missing_template_ids:
+        raise ValidationError(
+            _("模版不存在，space_id={space_id}, template_id={template_id}").format(
+                space_id=space_id,
+                template_id=",".join(str(template_id) for template_id in sorted(missing_template_ids)),
+            )
+        )
+
+    # 同一模板的流程树及开放插件快照只计算一次，各任务使用副本
+    template_task_data = {}
+    for template_id, template in templates.items():
+        pipeline_tree = template.pipeline_tree
+        extra_info = OpenPluginSnapshotService.prepare_task_extra_info(
+            space_id=int(space_id),
+            pipeline_tree=pipeline_tree,
+            extra_info={"notify_config": template.notify_config or DEFAULT_NOTIFY_CONFIG},
+            username=request.user.username,
+            scope_type=template.scope_type,
+            scope_id=template.scope_value,
+        )
+        template_task_data[template_id] = {
+            "scope_type": template.scope_type,
+            "scope_value": template.scope_value,
+            "pipeline_tree": pipeline_tree,
+            "extra_info": extra_info,
+        }
+
+    create_tasks_data = []
+    for task in tasks:
+        create_task_data = dict(task)
+        create_task_data.update(deepcopy(template_task_data[task["template_id"]]))
+        create_task_data["space_id"] = space_id
+        create_task_data["trigger_method"] = TaskTriggerMethod.api.name
+
+        custom_context = {}
+        if task.get("credentials"):
+            custom_context["credentials"] = task["credentials"]
+        if task.get("custom_span_attributes"):
+            custom_context["custom_span_attributes"] = task["custom_span_attributes"]
+        if custom_context:
+            create_task_data["extra_info"].setdefault("custom_context", {}).update(custom_context)
+        create_tasks_data.append(create_task_data)
+
+    client = TaskComponentClient(space_id=space_id)
+    result = client.batch_create_tasks({"tasks": create_tasks_data})
+
+    if result.get("result") and isinstance(result.get("data"), list):
+        label_ids = list(dict.fromkeys(label_id for task in tasks for label_id in task.get("label_ids") or []))
+        labels = {
+            label["id"]: label for label in LabelSerializer(Label.objects.filter(id__in=label_ids), many=True).data
+        }
+        # 所有任务的创建事件在同一事务中写入待分发队列，提交后只触发一次分发
+        with transaction.atomic():
+            for task, task_data in zip(tasks, result["data"]):
+                task_label_ids = list(dict.fromkeys(task.get("label_ids") or []))
+                task_data["labels"] = [labels[label_id] for label_id in task_label_ids if label_id in labels]
+                enqueue_webhook_event(
+                    WebhookEventType.TASK_CREATE.value,
+                    WebhookScopeType.SPACE.value,
+                    space_id,
+                    {
+                        "task_id": task_data["id"],
+                        "task_name": task_data["name"],
+                        "template_id": task_data["template_id"],
+                        "parameters": task_data["parameters"],
+                        "trigger_source": TaskTriggerMethod.api.name,
+                    },
+                )
+            transaction.on_commit(dispatch_webhook_events.delay)
+    return result
@@ -24,7 +24,6 @@ from blueapps.account.decorators import login_exempt
 from django.utils.translation import ugettext_lazy as _
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
-from webhook.signals import event_broadcast_signal
 
 from bkflow.apigw.decorators import check_jwt_and_space, return_json_response
 from bkflow.apigw.serializers.task import CreateTaskSerializer
@@ -36,6 +35,7 @@ from bkflow.label.serializers import LabelSerializer
 from bkflow.plugin.services.open_plugin_snapshot import OpenPluginSnapshotService
 from bkflow.template.models import Template
 from bkflow.utils.trace import CallFrom, trace_view
+from bkflow.utils.webhook import broadcast_webhook_event
 
 
 @login_exempt
@@ -108,9 +108,9 @@ def create_task(request, space_id):
             result["data"]["labels"] = []
 
         task_data = result["data"]
-        event_broadcast_signal.send(
-            sender=WebhookEventType.TASK_CREATE.value,
-            scopes=[(WebhookScopeType.SPACE.value, str(space_id))],
+        broadcast_webhook_event(
+            WebhookEventType.TASK_CREATE.value,
+            [(WebhookScopeType.SPACE.value, str(space_id))],
             extra_info={
                 "task_id": task_data["id"],
                 "task_name": task_data["name"],
@@ -23,7 +23,6 @@ from apigw_manager.apigw.decorators import apigw_require
 from blueapps.account.decorators import login_exempt
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
-from webhook.signals import event_broadcast_signal
 
 from bkflow.apigw.decorators import check_template_bk_app_code, return_json_response
 from bkflow.apigw.serializers.task import CreateTaskByAppSerializer
@@ -31,6 +30,7 @@ from bkflow.constants import TaskTriggerMethod, WebhookEventType, WebhookScopeTy
 from bkflow.contrib.api.collections.task import TaskComponentClient
 from bkflow.plugin.services.open_plugin_snapshot import OpenPluginSnapshotService
 from bkflow.utils.trace import CallFrom, trace_view
+from bkflow.utils.webhook import broadcast_webhook_event
 
 
 @login_exempt
@@ -99,9 +99,9 @@ def create_task_by_app(request, template_id):
     result = client.create_task(create_task_data)
 
     task_data = result["data"]
-    event_broadcast_signal.send(
-        sender=WebhookEventType.TASK_CREATE.value,
-        scopes=[(WebhookScopeType.SPACE.value, str(space_id))],
+    broadcast_webhook_event(
+        WebhookEventType.TASK_CREATE.value,
+        [(WebhookScopeType.SPACE.value, str(space_id))],
         extra_info={
             "task_id": task_data["id"],
             "task_name": task_data["name"],
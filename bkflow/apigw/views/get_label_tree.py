@@ -25,21 +25,10 @@ def _expand_with_ancestors(space_id, label_ids):
         return set()
 
     all_ids = set(label_ids)
-    frontier = set(label_ids)
-
-    # iterative parent walk to avoid N+1
-    while frontier:
-        parents = (
-            Label.objects.filter(id__in=frontier, space_id__in=[-1, int(space_id)])
-            .exclude(parent_id__isnull=True)
-            .values_list("parent_id", flat=True)
-        )
-        parent_set = {pid for pid in parents if pid is not None}
-        new_parents = parent_set - all_ids
-        if not new_parents:
-            break
-        all_ids |= new_parents
-        frontier = new_parents
+    # 祖先ID已物化在 path 中，一次查询即可
+    paths = Label.objects.filter(id__in=all_ids, space_id__in=[-1, int(space_id)]).values_list("path", flat=True)
+    for path in paths:
+        all_ids.update(int(ancestor_id) for ancestor_id in path.split("/") if ancestor_id)
 
     return all_ids
 
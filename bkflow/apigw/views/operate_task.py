@@ -23,7 +23,6 @@ from apigw_manager.apigw.decorators import apigw_require
 from blueapps.account.decorators import login_exempt
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
-from webhook.signals import event_broadcast_signal
 
 from bkflow.apigw.decorators import check_jwt_and_space, return_json_response
 from bkflow.apigw.serializers.task import (
@@ -33,6 +32,7 @@ from bkflow.apigw.serializers.task import (
 from bkflow.constants import OPERATE_EVENT_MAP, WebhookScopeType
 from bkflow.contrib.api.collections.task import TaskComponentClient
 from bkflow.utils.trace import CallFrom, append_attributes, start_trace
+from bkflow.utils.webhook import broadcast_webhook_event
 
 
 @login_exempt
@@ -53,9 +53,9 @@ def operate_task(request, space_id, task_id, operation):
         result = client.operate_task(task_id, operation, data=ser.data)
 
         if operation in ["pause", "resume", "revoke"]:
-            event_broadcast_signal.send(
-                sender=OPERATE_EVENT_MAP[operation],
-                scopes=[(WebhookScopeType.SPACE.value, str(space_id))],
+            broadcast_webhook_event(
+                OPERATE_EVENT_MAP[operation],
+                [(WebhookScopeType.SPACE.value, str(space_id))],
                 extra_info={"task_id": task_id, "operation": operation, "username": request.user.username},
             )
         return result
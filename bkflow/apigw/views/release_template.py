@@ -25,7 +25,6 @@ from django.db import transaction
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
-from webhook.signals import event_broadcast_signal
 
 from bkflow.apigw.decorators import check_jwt_and_space, return_json_response
 from bkflow.constants import (
@@ -40,6 +39,7 @@ from bkflow.template.models import Template, TemplateOperationRecord, TemplateSn
 from bkflow.template.serializers.template import TemplateReleaseSerializer
 from bkflow.utils import err_code
 from bkflow.utils.version import bump_custom
+from bkflow.utils.webhook import broadcast_webhook_event
 
 logger = logging.getLogger("root")
 
@@ -87,9 +87,9 @@ def release_template(request, space_id, template_id):
         extra_info={"version": new_version},
     )
 
-    event_broadcast_signal.send(
-        sender=WebhookEventType.TEMPLATE_RELEASE.value,
-        scopes=[(WebhookScopeType.SPACE.value, str(space_id))],
+    broadcast_webhook_event(
+        WebhookEventType.TEMPLATE_RELEASE.value,
+        [(WebhookScopeType.SPACE.value, str(space_id))],
         extra_info={
             "template_id": template_id,
             "version": new_version,
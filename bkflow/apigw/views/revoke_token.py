@@ -58,7 +58,11 @@ def revoke_token(request, space_id):
     filter_kwargs = ser.validated_data
 
     now_time = timezone.now()
-    revoke_num = Token.objects.filter(space_id=space_id).filter(**filter_kwargs).update(expired_time=now_time)
+    tokens = Token.objects.filter(space_id=space_id).filter(**filter_kwargs)
+    revoke_tokens = list(tokens.values_list("token", flat=True))
+    revoke_num = tokens.update(expired_time=now_time)
+    # 批量更新不会触发信号，需要手动清理校验缓存
+    Token.invalidate_verify_cache(revoke_tokens)
 
     logger.info(f"[revoke tokens] params: {filter_kwargs}, expired_time: {now_time}, revoke numbers: {revoke_num}")
 
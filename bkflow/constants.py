@@ -28,6 +28,8 @@ USER_NAME_MAX_LENGTH = 32
 ALL_SPACE = "*"
 WHITE_LIST = "white_list"
 BK_PLUGIN_SYNC_NUM = 100
+# 单次批量创建任务的数量上限
+BATCH_CREATE_TASK_MAX_NUM = 100
 TEMPLATE_MD5SUM_LENGTH = 32
 
 formatted_key_pattern = re.compile(r"^\${(.*?)}$")
@@ -155,3 +157,10 @@ class VariableType(Enum):
 
 
 VARIABLE_TYPES = [VariableType.SPACE.value, VariableType.SCOPE.value]
+
+
+class SpaceCacheResource(Enum):
+    """引擎侧缓存的空间级数据，interface 侧数据变更后通知引擎失效"""
+
+    VARIABLE = "variable"
+    OPEN_PLUGIN = "open_plugin"
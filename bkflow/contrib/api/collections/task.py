@@ -81,9 +81,17 @@ class TaskComponentClient(BaseComponentClient):
     def create_task(self, data):
         return self._request(method="post", url=self._get_task_url("task/"), data=data)
 
+    def batch_create_tasks(self, data):
+        return self._request(method="post", url=self._get_task_url("task/batch_create_tasks/"), data=data)
+
     def get_task_detail(self, task_id, data=None):
         return self._request(method="get", url=self._get_task_url("task/{}/".format(task_id)), data=data)
 
+    def get_task_ancestors(self, task_id):
+        return self._request(
+            method="get", url=self._get_task_url("task/{}/get_task_ancestors/".format(task_id)), data=None
+        )
+
     def delete_task(self, task_id):
         return self._request(method="delete", url=self._get_task_url("task/{}/".format(task_id)), data=None)
 
@@ -112,6 +120,11 @@ class TaskComponentClient(BaseComponentClient):
             data=data,
         )
 
+    def get_task_nodes_detail(self, task_id, data=None):
+        return self._request(
+            method="post", url=self._get_task_url("task/{}/get_task_nodes_detail/".format(task_id)), data=data
+        )
+
     def node_operate(self, task_id, node_id, operation, data):
         return self._request(
             method="post",
@@ -178,3 +191,17 @@ class TaskComponentClient(BaseComponentClient):
 
     def delete_engine_config(self, data):
         return self._request(method="delete", url=self._get_task_url("task/delete_engine_config/"), data=data)
+
+    def invalidate_decision_table(self, data):
+        return self._request(
+            method="post",
+            url=self._get_task_url("task/invalidate_decision_table/"),
+            data=data,
+        )
+
+    def invalidate_space_cache(self, data):
+        return self._request(
+            method="post",
+            url=self._get_task_url("task/invalidate_space_cache/"),
+            data=data,
+        )
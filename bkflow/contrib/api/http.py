@@ -18,14 +18,29 @@ to the current version of the project delivered to anyone in the future.
 """
 
 import logging
+import os
+import random
+import threading
 
 import curlify
 import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.compat import cookielib
+from urllib3.util.retry import Retry
 
 from bkflow.utils.handlers import handle_plain_log
 
 logger = logging.getLogger("component")
 
+# 仅对幂等方法在读超时/网关错误时重试，连接阶段失败时请求未发出，所有方法均可安全重试
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "PUT", "DELETE", "OPTIONS"])
+RETRY_STATUS_FORCELIST = (502, 503, 504)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
 # 敏感字段关键词列表，用于日志脱敏
 SENSITIVE_KEYWORDS = ["credential", "password", "secret", "token", "api_key", "apikey", "access_key", "accesskey"]
 
@@ -59,6 +74,87 @@ def _sanitize_sensitive_data(data, max_depth=10):
         return data
 
 
+class _JitteredRetry(Retry):
+    """
+    在 urllib3 指数退避的基础上增加随机抖动（full jitter），避免大量请求同时重试
+    """
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        if backoff <= 0:
+            return 0
+        return random.uniform(0, min(backoff, settings.BKFLOW_HTTP_RETRY_BACKOFF_MAX))
+
+
+class _BlockAllCookiePolicy(cookielib.DefaultCookiePolicy):
+    """
+    共享 session 不保存响应中的 cookie，避免不同请求之间互相串扰
+    """
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+
+def _build_session():
+    retry = _JitteredRetry(
+        total=settings.BKFLOW_HTTP_MAX_RETRIES,
+        connect=settings.BKFLOW_HTTP_MAX_RETRIES,
+        read=settings.BKFLOW_HTTP_MAX_RETRIES,
+        status=settings.BKFLOW_HTTP_MAX_RETRIES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        status_forcelist=RETRY_STATUS_FORCELIST,
+        backoff_factor=settings.BKFLOW_HTTP_RETRY_BACKOFF_FACTOR,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.BKFLOW_HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.BKFLOW_HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.cookies.set_policy(_BlockAllCookiePolicy())
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """
+    获取当前进程共享的连接池 session，fork 后的子进程会重新创建，避免复用父进程的连接
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            _session = _build_session()
+            _session_pid = pid
+    return _session
+
+
+def _resolve_timeout(url, timeout):
+    """
+    调用方未指定超时时间时，优先使用按接口配置的超时时间，否则使用默认的 (连接超时, 读超时)
+    """
+    if timeout is not None:
+        return timeout
+
+    matched_pattern = None
+    for pattern in settings.BKFLOW_HTTP_ENDPOINT_TIMEOUTS:
+        if pattern in url and (matched_pattern is None or len(pattern) > len(matched_pattern)):
+            matched_pattern = pattern
+    if matched_pattern is not None:
+        return settings.BKFLOW_HTTP_ENDPOINT_TIMEOUTS[matched_pattern]
+
+    return settings.BKFLOW_HTTP_CONNECT_TIMEOUT, settings.BKFLOW_HTTP_READ_TIMEOUT
+
+
 def _gen_header():
     headers = {
         "Content-Type": "application/json",
@@ -78,10 +174,12 @@ def _http_request(
 ):
     resp = requests.Response()
     request_id = None
+    session = get_session()
+    timeout = _resolve_timeout(url, timeout)
 
     try:
         if method == "GET":
-            resp = requests.get(
+            resp = session.get(
                 url=url,
                 headers=headers,
                 params=data,
@@ -91,7 +189,7 @@ def _http_request(
                 cookies=cookies,
             )
         elif method == "HEAD":
-            resp = requests.head(
+            resp = session.head(
                 url=url,
                 headers=headers,
                 verify=verify,
@@ -100,7 +198,7 @@ def _http_request(
                 cookies=cookies,
             )
         elif method == "POST":
-            resp = requests.post(
+            resp = session.post(
                 url=url,
                 headers=headers,
                 json=data,
@@ -110,7 +208,7 @@ def _http_request(
                 cookies=cookies,
             )
         elif method == "DELETE":
-            resp = requests.delete(
+            resp = session.delete(
                 url=url,
                 headers=headers,
                 json=data,
@@ -120,7 +218,7 @@ def _http_request(
                 cookies=cookies,
             )
         elif method == "PUT":
-            resp = requests.put(
+            resp = session.put(
                 url=url,
                 headers=headers,
                 json=data,
@@ -175,7 +273,7 @@ def _http_request(
                         "response": resp.text,
                     }
                 )
-            else:
+            elif logger.isEnabledFor(logging.DEBUG):
                 logger.debug(
                     log_message
                     % {
@@ -192,14 +290,16 @@ def _http_request(
 
         return json_resp
     finally:
-        if resp.request is None:
-            resp.request = requests.Request(method, url, headers=headers, data=data, cookies=cookies).prepare()
+        # curl 命令的拼装开销较大，仅在开启 debug 日志时生成
+        if logger.isEnabledFor(logging.DEBUG):
+            if resp.request is None:
+                resp.request = requests.Request(method, url, headers=headers, data=data, cookies=cookies).prepare()
 
-        logger.debug(
-            "the request_id: `%s`. curl: `%s`",
-            request_id,
-            handle_plain_log(curlify.to_curl(resp.request, verify=False)),
-        )
+            logger.debug(
+                "the request_id: `%s`. curl: `%s`",
+                request_id,
+                handle_plain_log(curlify.to_curl(resp.request, verify=False)),
+            )
 
 
 def get(url, data, headers=None, verify=False, cert=None, timeout=None, cookies=None):
@@ -0,0 +1,292 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import datetime
+import json
+from copy import deepcopy
+from functools import partial
+
+from bamboo_engine import states as bamboo_engine_states
+from bamboo_engine.eri import ScheduleType
+from django.apps import apps
+from django.conf import settings
+from django.test import override_settings
+from django.utils import timezone
+from pipeline.utils.uniqid import node_uniqid
+
+from bkflow.constants import TEMPLATE_MD5SUM_LENGTH
+from bkflow.contrib.benchmark.pipeline import build_pipeline_tree, iter_tree_node_ids
+from bkflow.pipeline_web.constants import PWE
+from bkflow.pipeline_web.drawing_new.drawing import draw_pipeline
+from bkflow.pipeline_web.drawing_new.generator import generate_pipeline_tree
+from bkflow.pipeline_web.parser.format import format_web_data_to_pipeline
+
+BENCHMARK_SPACE_ID = 0
+BENCHMARK_USER = "benchmark"
+# 过期数据清理用例中的过期任务数量
+EXPIRED_TASK_COUNT = 5
+# 批量创建任务用例中每批的任务数量
+BATCH_CREATE_TASK_COUNT = 20
+# 状态树中失败节点和运行中节点的间隔
+FAILED_NODE_INTERVAL = 10
+RUNNING_NODE_INTERVAL = 7
+# 每多少个任务节点替换为一个子流程节点
+NODES_PER_SUBPROCESS = 10
+SUBPROCESS_VERSION_COUNT = 3
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class BenchmarkCase:
+    def __init__(self, name, description, setup, required_apps=()):
+        """
+        @param setup: 接收流程树节点数量，准备数据后返回需要计时的无参函数
+        @param required_apps: 依赖的 app，未安装时（如 engine 与 interface 模块分别部署）跳过该用例
+        """
+        self.name = name
+        self.description = description
+        self.setup = setup
+        self.required_apps = required_apps
+
+    @property
+    def available(self):
+        return all(apps.is_installed(app) for app in self.required_apps)
+
+
+BENCHMARK_CASES = {}
+
+
+def register_case(name, description, setup, required_apps=()):
+    BENCHMARK_CASES[name] = BenchmarkCase(name, description, setup, required_apps)
+
+
+def create_task(size):
+    from bkflow.task.models import TaskInstance
+
+    return TaskInstance.objects.create_instance(
+        space_id=BENCHMARK_SPACE_ID,
+        pipeline_tree=build_pipeline_tree(size),
+        name="benchmark",
+        creator=BENCHMARK_USER,
+    )
+
+
+def create_executed_task(size):
+    """创建已执行的任务，并按固定间隔写入失败节点（带异常输出）和运行中节点（带调度）"""
+    from pipeline.eri.models import ExecutionData, Schedule, State
+
+    from bkflow.task.models import TaskInstance
+
+    task_instance = create_task(size)
+    TaskInstance.objects.filter(id=task_instance.id).update(is_started=True, start_time=timezone.now())
+    task_instance.refresh_from_db()
+
+    now = timezone.now()
+    root_id = task_instance.instance_id
+    states = [
+        State(
+            node_id=root_id,
+            root_id=root_id,
+            parent_id="",
+            name=bamboo_engine_states.FAILED,
+            version=node_uniqid(),
+            started_time=now,
+        )
+    ]
+    execution_data = []
+    schedules = []
+    for index, node_id in enumerate(iter_tree_node_ids(task_instance.execution_data)):
+        state = State(
+            node_id=node_id,
+            root_id=root_id,
+            parent_id=root_id,
+            name=bamboo_engine_states.FINISHED,
+            version=node_uniqid(),
+            started_time=now,
+            archived_time=now,
+        )
+        if index % FAILED_NODE_INTERVAL == 0:
+            state.name = bamboo_engine_states.FAILED
+            execution_data.append(
+                ExecutionData(
+                    node_id=node_id,
+                    inputs_serializer="json",
+                    outputs_serializer="json",
+                    inputs="{}",
+                    outputs=json.dumps({"ex_data": "benchmark error {}".format(index)}),
+                )
+            )
+        elif index % RUNNING_NODE_INTERVAL == 0:
+            state.name = bamboo_engine_states.RUNNING
+            state.archived_time = None
+            schedules.append(Schedule(type=ScheduleType.POLL.value, node_id=node_id, version=state.version))
+        states.append(state)
+    State.objects.bulk_create(states)
+    ExecutionData.objects.bulk_create(execution_data)
+    Schedule.objects.bulk_create(schedules)
+    return task_instance
+
+
+def setup_create_instance(size):
+    from bkflow.task.models import TaskInstance
+
+    pipeline_tree = build_pipeline_tree(size)
+    return partial(
+        TaskInstance.objects.create_instance,
+        space_id=BENCHMARK_SPACE_ID,
+        pipeline_tree=pipeline_tree,
+        name="benchmark",
+        creator=BENCHMARK_USER,
+    )
+
+
+def setup_batch_create_instances(size):
+    from bkflow.task.models import TaskInstance
+
+    pipeline_tree = build_pipeline_tree(size)
+
+    def target():
+        TaskInstance.objects.batch_create_instances(
+            [
+                {
+                    "space_id": BENCHMARK_SPACE_ID,
+                    "pipeline_tree": deepcopy(pipeline_tree),
+                    "name": "benchmark",
+                    "creator": BENCHMARK_USER,
+                }
+                for _ in range(BATCH_CREATE_TASK_COUNT)
+            ]
+        )
+
+    return target
+
+
+def setup_task_start(size):
+    from bkflow.task.operations import TaskOperation
+
+    operation = TaskOperation(create_task(size), queue=settings.BKFLOW_MODULE.code or "")
+
+    def target():
+        result = operation.start(operator=BENCHMARK_USER)
+        if not result.result:
+            raise BenchmarkError("start task failed: {}".format(result.message))
+
+    return target
+
+
+def setup_get_task_states(size, **kwargs):
+    from bkflow.task.operations import TaskOperation
+
+    operation = TaskOperation(create_executed_task(size))
+
+    def target():
+        result = operation.get_task_states(**kwargs)
+        if not result.result:
+            raise BenchmarkError("get task states failed: {}".format(result.message))
+
+    return target
+
+
+def setup_format_web_data_to_pipeline(size):
+    return partial(format_web_data_to_pipeline, build_pipeline_tree(size))
+
+
+def setup_draw_pipeline(size):
+    return partial(draw_pipeline, generate_pipeline_tree(size))
+
+
+def setup_replace_subprocess_version(size):
+    from bkflow.template.models import TemplateSnapshot
+    from bkflow.utils.pipeline import replace_subprocess_version
+
+    pipeline_tree = build_pipeline_tree(size)
+    activities = list(pipeline_tree[PWE.activities].values())[::NODES_PER_SUBPROCESS]
+    snapshots = []
+    for template_id, act in enumerate(activities, start=1):
+        for version_index in range(SUBPROCESS_VERSION_COUNT):
+            snapshots.append(
+                TemplateSnapshot(
+                    template_id=template_id,
+                    version="1.0.{}".format(version_index),
+                    md5sum="{:0{}x}".format(
+                        template_id * SUBPROCESS_VERSION_COUNT + version_index, TEMPLATE_MD5SUM_LENGTH
+                    ),
+                    data={},
+                )
+            )
+        act.pop("component")
+        act.update({PWE.type: PWE.SubProcess, "template_id": template_id, "version": snapshots[-1].md5sum})
+    TemplateSnapshot.objects.bulk_create(snapshots)
+    return partial(replace_subprocess_version, pipeline_tree, True)
+
+
+def setup_delete_expired_data(size):
+    from bkflow.contrib.expired_cleaner.utils import delete_expired_data
+    from bkflow.task.models import TaskInstance
+
+    # 过期时间远早于真实数据，只清理本用例创建的任务
+    expired_time = datetime.datetime(2000, 1, 2, tzinfo=datetime.timezone.utc)
+    task_ids = [create_executed_task(size).id for _ in range(EXPIRED_TASK_COUNT)]
+    TaskInstance.objects.filter(id__in=task_ids).update(create_time=expired_time - datetime.timedelta(days=1))
+
+    def target():
+        with override_settings(CLEAN_TASK_DELETE_INTERVAL=0, CLEAN_TASK_CALLBACK_SCAN_NUM=0, redis_inst=None):
+            delete_expired_data(expired_time)
+
+    return target
+
+
+register_case("task.create_instance", "TaskInstanceManager.create_instance", setup_create_instance, ("bkflow.task",))
+register_case(
+    "task.batch_create_instances",
+    "TaskInstanceManager.batch_create_instances({} tasks)".format(BATCH_CREATE_TASK_COUNT),
+    setup_batch_create_instances,
+    ("bkflow.task",),
+)
+register_case("task.start", "TaskOperation.start", setup_task_start, ("bkflow.task",))
+register_case("task.get_task_states", "TaskOperation.get_task_states", setup_get_task_states, ("bkflow.task",))
+register_case(
+    "task.get_task_states.include_schedule",
+    "TaskOperation.get_task_states(include_schedule=True)",
+    partial(setup_get_task_states, include_schedule=True),
+    ("bkflow.task",),
+)
+register_case(
+    "task.get_task_states.with_ex_data",
+    "TaskOperation.get_task_states(with_ex_data=True)",
+    partial(setup_get_task_states, with_ex_data=True),
+    ("bkflow.task",),
+)
+register_case(
+    "pipeline_web.format_web_data_to_pipeline", "format_web_data_to_pipeline", setup_format_web_data_to_pipeline
+)
+register_case("pipeline_web.draw_pipeline", "draw_pipeline", setup_draw_pipeline)
+register_case(
+    "template.replace_subprocess_version",
+    "replace_subprocess_version",
+    setup_replace_subprocess_version,
+    ("bkflow.template",),
+)
+register_case(
+    "expired_cleaner.delete_expired_data",
+    "expired_cleaner.delete_expired_data",
+    setup_delete_expired_data,
+    ("bkflow.task", "bkflow.contrib.expired_cleaner"),
+)
@@ -0,0 +1,115 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bkflow.contrib.benchmark.cases import BENCHMARK_CASES
+from bkflow.contrib.benchmark.runner import (
+    compare_result,
+    load_baseline,
+    result_key,
+    run_case,
+    save_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = "在当前配置的数据库（SQLite 或本地 MySQL）上运行热点路径基准测试，输出耗时、SQL 数量和内存分配并与基线对比，数据会回滚，请勿在生产库上执行"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cases", nargs="+", default=None, help="需要运行的用例，默认运行当前模块可用的全部用例")
+        parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200], help="流程树任务节点数量，可指定多个")
+        parser.add_argument("--repeat", type=int, default=5, help="计时运行次数，取最小耗时")
+        parser.add_argument("--baseline", default=None, help="基线文件路径，文件存在时与其对比")
+        parser.add_argument("--save-baseline", action="store_true", default=False, help="将本次结果写入基线文件")
+        parser.add_argument("--time-threshold", type=float, default=0.2, help="耗时超出基线的比例阈值")
+        parser.add_argument("--memory-threshold", type=float, default=0.2, help="内存峰值超出基线的比例阈值")
+        parser.add_argument("--fail-on-regression", action="store_true", default=False, help="存在退化时返回错误")
+        parser.add_argument("--list", action="store_true", default=False, help="列出所有用例")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for case in BENCHMARK_CASES.values():
+                status = "" if case.available else " (unavailable in this module)"
+                self.stdout.write(f"{case.name:<45} {case.description}{status}")
+            return
+
+        cases = self.get_cases(options["cases"])
+        baseline_path = options["baseline"]
+        if options["save_baseline"] and not baseline_path:
+            raise CommandError("--save-baseline requires --baseline")
+        baseline_results = {}
+        if baseline_path and os.path.exists(baseline_path) and not options["save_baseline"]:
+            baseline_results = load_baseline(baseline_path)["results"]
+
+        repeat = max(options["repeat"], 1)
+        results = {}
+        regressions = {}
+        self.stdout.write(
+            f"{'case':<45} {'size':>6} {'best(ms)':>10} {'avg(ms)':>10} {'queries':>8} {'peak(KiB)':>10} "
+            f"{'retained(KiB)':>14} {'vs baseline':>20}"
+        )
+        for case in cases:
+            for size in options["sizes"]:
+                key = result_key(case.name, size)
+                result = run_case(case, size, repeat)
+                results[key] = result
+                comparison = ""
+                if key in baseline_results:
+                    baseline_result = baseline_results[key]
+                    comparison = "{:+.1%} {:+d}q".format(
+                        result["time"] / baseline_result["time"] - 1 if baseline_result["time"] else 0,
+                        result["queries"] - baseline_result["queries"],
+                    )
+                    regressed = compare_result(
+                        result, baseline_result, options["time_threshold"], options["memory_threshold"]
+                    )
+                    if regressed:
+                        regressions[key] = regressed
+                        comparison += " !"
+                self.stdout.write(
+                    f"{case.name:<45} {size:>6} {result['time'] * 1000:>10.2f} {result['avg_time'] * 1000:>10.2f} "
+                    f"{result['queries']:>8} {result['peak_memory'] / 1024:>10.1f} {result['memory'] / 1024:>14.1f} "
+                    f"{comparison:>20}"
+                )
+
+        if options["save_baseline"]:
+            save_baseline(baseline_path, results)
+            self.stdout.write(f"baseline saved to {baseline_path}")
+
+        for key, regressed in regressions.items():
+            self.stdout.write(self.style.WARNING(f"regression: {key} {', '.join(regressed)}"))
+        if regressions and options["fail_on_regression"]:
+            raise CommandError(f"{len(regressions)} benchmark(s) regressed against {baseline_path}")
+
+    @staticmethod
+    def get_cases(names):
+        if not names:
+            return [case for case in BENCHMARK_CASES.values() if case.available]
+
+        cases = []
+        for name in names:
+            case = BENCHMARK_CASES.get(name)
+            if case is None:
+                raise CommandError(f"unknown benchmark case: {name}, use --list to see all cases")
+            if not case.available:
+                raise CommandError(f"benchmark case {name} requires apps: {', '.join(case.required_apps)}")
+            cases.append(case)
+        return cases
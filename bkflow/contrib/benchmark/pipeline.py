@@ -0,0 +1,130 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+from pipeline.utils.uniqid import node_uniqid
+
+from bkflow.pipeline_web.constants import PWE
+from bkflow.pipeline_web.drawing_new.generator import generate_pipeline_tree
+
+# 每多少个任务节点生成一个全局变量
+NODES_PER_CONSTANT = 10
+
+LOCATION_TYPES = {
+    PWE.EmptyStartEvent: "startpoint",
+    PWE.EmptyEndEvent: "endpoint",
+    PWE.ServiceActivity: "tasknode",
+    PWE.ParallelGateway: "parallelgateway",
+    PWE.ConvergeGateway: "convergegateway",
+    PWE.ExclusiveGateway: "branchgateway",
+}
+
+
+def build_constant(key, index, value):
+    return {
+        "custom_type": "input",
+        "desc": "",
+        "form_schema": {},
+        "index": index,
+        "key": key,
+        "name": key[2:-1],
+        "show_type": "show",
+        "source_info": {},
+        "source_tag": "input.input",
+        "source_type": "custom",
+        "validation": "^.+$",
+        "validator": [],
+        "value": value,
+        "version": "legacy",
+        "pre_render_mako": False,
+    }
+
+
+def build_pipeline_tree(node_count, seed=0, branch_prob=0.2):
+    """
+    @summary: 生成可创建、可执行的基准测试流程树，节点为引用全局变量的消息展示插件，不包含回环
+    @param node_count: 任务节点数量
+    @param seed: 随机种子，相同参数生成的流程树一致
+    @param branch_prob: 每个位置生成并行网关的概率
+    @return:
+    """
+    pipeline_tree = generate_pipeline_tree(node_count, seed=seed, branch_prob=branch_prob, loop_prob=0)
+    pipeline_tree[PWE.id] = node_uniqid()
+
+    constant_count = max(node_count // NODES_PER_CONSTANT, 1)
+    for index in range(constant_count):
+        key = "${{var_{}}}".format(index)
+        pipeline_tree[PWE.constants][key] = build_constant(key, index, "value_{}".format(index))
+
+    for index, act in enumerate(pipeline_tree[PWE.activities].values()):
+        act.update(
+            {
+                "component": {
+                    "code": "bk_display",
+                    "version": "v1.0",
+                    "data": {
+                        "bk_display_message": {
+                            "hook": False,
+                            "need_render": True,
+                            "value": "${{var_{}}}".format(index % constant_count),
+                        }
+                    },
+                },
+                "name": "node_{}".format(index),
+                "stage_name": "",
+                "error_ignorable": False,
+                "optional": True,
+                "skippable": True,
+                "retryable": True,
+                "loop": None,
+                "auto_retry": {"enable": False, "interval": 0, "times": 1},
+                "timeout_config": {"enable": False, "seconds": 10, "action": "forced_fail"},
+                "labels": [],
+            }
+        )
+
+    # 画布坐标不参与计算，按节点顺序平铺即可
+    pipeline_tree[PWE.location] = []
+    for index, node_id in enumerate(iter_tree_node_ids(pipeline_tree)):
+        node = get_node(pipeline_tree, node_id)
+        pipeline_tree[PWE.location].append(
+            {PWE.id: node_id, PWE.type: LOCATION_TYPES[node[PWE.type]], "x": 40 + index * 200, "y": 150}
+        )
+    pipeline_tree[PWE.line] = [
+        {
+            PWE.id: flow_id,
+            PWE.source: {"arrow": "Right", PWE.id: flow[PWE.source]},
+            PWE.target: {"arrow": "Left", PWE.id: flow[PWE.target]},
+        }
+        for flow_id, flow in pipeline_tree[PWE.flows].items()
+    ]
+    return pipeline_tree
+
+
+def get_node(pipeline_tree, node_id):
+    for event_key in (PWE.start_event, PWE.end_event):
+        if pipeline_tree[event_key][PWE.id] == node_id:
+            return pipeline_tree[event_key]
+    return pipeline_tree[PWE.activities].get(node_id) or pipeline_tree[PWE.gateways][node_id]
+
+
+def iter_tree_node_ids(pipeline_tree):
+    """遍历流程树中的所有节点 ID，不包括子流程内部节点"""
+    yield pipeline_tree[PWE.start_event][PWE.id]
+    yield pipeline_tree[PWE.end_event][PWE.id]
+    yield from pipeline_tree[PWE.activities].keys()
+    yield from pipeline_tree[PWE.gateways].keys()
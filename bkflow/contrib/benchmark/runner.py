@@ -0,0 +1,127 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import json
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+from unittest import mock
+
+from celery.app.task import Task
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from bkflow.contrib.api.collections.interface import InterfaceModuleClient
+
+BASELINE_FORMAT_VERSION = 1
+
+
+@contextmanager
+def isolate_remote_calls():
+    """屏蔽投递 celery 任务和请求 interface 模块的调用，只测量本模块内的处理"""
+    with mock.patch.object(Task, "apply_async"), mock.patch.object(
+        InterfaceModuleClient, "get_variable", return_value={"result": True, "data": {}}
+    ):
+        yield
+
+
+def run_case(case, size, repeat):
+    """
+    @summary: 执行单个基准用例，每次运行都在独立事务中准备数据并在结束后回滚，不会留下测试数据
+    @param case: BenchmarkCase
+    @param size: 流程树任务节点数量
+    @param repeat: 计时运行次数
+    @return: {"time": 最小耗时, "avg_time": 平均耗时, "queries": SQL 数量, "peak_memory": 内存峰值, "memory": 运行后残留内存}
+    """
+    with isolate_remote_calls():
+        return _run_case(case, size, repeat)
+
+
+def _run_case(case, size, repeat):
+    # 首次运行统计 SQL 和内存分配，tracemalloc 会明显拖慢执行，所以不参与计时
+    with transaction.atomic():
+        target = case.setup(size)
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as ctx:
+                target()
+            memory, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        transaction.set_rollback(True)
+
+    elapsed = []
+    for _ in range(repeat):
+        with transaction.atomic():
+            target = case.setup(size)
+            start = time.perf_counter()
+            target()
+            elapsed.append(time.perf_counter() - start)
+            transaction.set_rollback(True)
+
+    return {
+        "time": min(elapsed),
+        "avg_time": sum(elapsed) / len(elapsed),
+        "queries": len(ctx.captured_queries),
+        "peak_memory": peak_memory,
+        "memory": memory,
+    }
+
+
+def result_key(case_name, size):
+    return "{}@{}".format(case_name, size)
+
+
+def build_baseline(results):
+    return {
+        "version": BASELINE_FORMAT_VERSION,
+        "created_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def load_baseline(path):
+    with open(path) as fp:
+        baseline = json.load(fp)
+    if baseline.get("version") != BASELINE_FORMAT_VERSION:
+        raise ValueError("unsupported benchmark baseline version: {}".format(baseline.get("version")))
+    return baseline
+
+
+def save_baseline(path, results):
+    with open(path, "w") as fp:
+        json.dump(build_baseline(results), fp, indent=2, sort_keys=True)
+
+
+def compare_result(result, baseline_result, time_threshold, memory_threshold):
+    """
+    @summary: 与基线对比，耗时、内存峰值超出阈值比例或 SQL 数量增加都视为退化
+    @return: 退化的指标列表
+    """
+    regressions = []
+    if result["time"] > baseline_result["time"] * (1 + time_threshold):
+        regressions.append("time")
+    if result["queries"] > baseline_result["queries"]:
+        regressions.append("queries")
+    if result["peak_memory"] > baseline_result["peak_memory"] * (1 + memory_threshold):
+        regressions.append("peak_memory")
+    return regressions
@@ -19,9 +19,10 @@ to the current version of the project delivered to anyone in the future.
 """
 
 import logging
+import time
 
 from django.conf import settings
-from django.db import transaction
+from pipeline.core.constants import PE
 from pipeline.eri.models import (
     CallbackData,
     ContextOutputs,
@@ -47,14 +48,113 @@ from bkflow.task.models import (
 
 logger = logging.getLogger("celery")
 
+# CallbackData 扫描进度，保存在 redis 中，下次清理从该位置继续
+CALLBACK_DATA_CHECKPOINT_KEY = "bkflow:expired_cleaner:callback_data_checkpoint"
+
+NODE_RELATED_MODELS = (
+    ("nodes_list", Node),
+    ("data_list", Data),
+    ("states_list", State),
+    ("execution_history_list", ExecutionHistory),
+    ("execution_data_list", ExecutionData),
+    ("schedules_list", Schedule),
+    ("retry_node_list", AutoRetryNodeStrategy),
+    ("timeout_node_list", TimeoutNodeConfig),
+)
+
+
+class DeleteRateLimiter:
+    """
+    单次清理的删除限流：每批删除独立提交，批次之间休眠，单次清理删除总行数有上限
+    """
+
+    def __init__(self, batch_size, interval, max_rows):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.remaining = max_rows
+
+    @property
+    def exhausted(self):
+        return self.remaining <= 0
+
+    def delete(self, queryset):
+        """
+        按主键分批删除 queryset 中的数据
+        :return: 是否已全部删除，额度用尽时返回 False
+        """
+        model = queryset.model
+        while not self.exhausted:
+            pks = list(queryset.values_list("pk", flat=True)[: min(self.batch_size, self.remaining)])
+            if not pks:
+                return True
+            model.objects.filter(pk__in=pks).delete()
+            self.remaining -= len(pks)
+            if self.interval:
+                time.sleep(self.interval)
+        return False
+
 
 def chunk_data(data, chunk_size, func, *args, **kwargs):
     return [(func)(data[i : i + chunk_size], *args, **kwargs) for i in range(0, len(data), chunk_size)]
 
 
-def get_expired_data(expired_time):
+def get_pipeline_node_ids(pipeline_tree):
+    """获取流程树（包括子流程）中的所有节点 ID"""
+    node_ids = set()
+    if not pipeline_tree:
+        return node_ids
+    if pipeline_tree.get("id"):
+        node_ids.add(pipeline_tree["id"])
+    for event_key in (PE.start_event, PE.end_event):
+        event = pipeline_tree.get(event_key) or {}
+        if event.get("id"):
+            node_ids.add(event["id"])
+    node_ids.update((pipeline_tree.get(PE.gateways) or {}).keys())
+    for act_id, act in (pipeline_tree.get(PE.activities) or {}).items():
+        node_ids.add(act_id)
+        if act.get("type") == PE.SubProcess and act.get(PE.pipeline):
+            node_ids.update(get_pipeline_node_ids(act[PE.pipeline]))
+    return node_ids
+
+
+def get_task_node_ids(task_instance_ids, execution_snapshot_ids):
+    """
+    通过根流程 ID 收集任务的所有节点 ID：
+    1. State 表中根流程下所有执行过的节点（root_id 有索引）
+    2. 执行快照中的流程树节点，覆盖未执行但已经写入 Node/Data 的节点
+    3. Process 当前所在节点
+    """
+    node_ids = set(task_instance_ids)
+    node_ids.update(State.objects.filter(root_id__in=task_instance_ids).values_list("node_id", flat=True))
+    snapshots = TaskExecutionSnapshot.objects.filter(id__in=execution_snapshot_ids).only("data")
+    for snapshot in snapshots.iterator():
+        node_ids.update(get_pipeline_node_ids(snapshot.data))
+    node_ids.update(
+        Process.objects.filter(root_pipeline_id__in=task_instance_ids)
+        .exclude(current_node_id="")
+        .values_list("current_node_id", flat=True)
+    )
+    return sorted(node_ids)
+
+
+def get_unreferenced_snapshot_ids(field, snapshot_ids, task_ids):
+    """
+    快照按 md5 去重，可能被多个任务共用，只返回没有被其他任务引用的快照 ID
+    """
+    if not snapshot_ids:
+        return []
+    referenced_ids = set(
+        TaskInstance.objects.filter(**{f"{field}__in": snapshot_ids})
+        .exclude(id__in=task_ids)
+        .values_list(field, flat=True)
+    )
+    return [snapshot_id for snapshot_id in snapshot_ids if snapshot_id not in referenced_ids]
+
 
-    tasks = TaskInstance.objects.filter(create_time__lt=expired_time).order_by("-id")[: settings.CLEAN_TASK_BATCH_NUM]
+def get_expired_data(expired_time):
+    tasks = TaskInstance.objects.filter(create_time__lt=expired_time).order_by("-id")[
+        : int(settings.CLEAN_TASK_BATCH_NUM)
+    ]
     # 查询这段时间内的 task_instance_ids
     if not tasks:
         logger.info("no cleaning task, exit...")
@@ -63,83 +163,92 @@ def get_expired_data(expired_time):
     logger.info(f"batch cleaning task_instances {task_instance_ids}")
     task_ids = [instance.id for instance in tasks]
     # 快照 id 可能为空
-    snapshot_ids = [instance.snapshot_id for instance in tasks if instance.snapshot_id]
-    execution_snapshot_ids = [instance.execution_snapshot_id for instance in tasks if instance.execution_snapshot_id]
-
-    # task_ids -> 其他任务关联资源 一对一
-    context_value = ContextValue.objects.filter(pipeline_id__in=task_instance_ids)
-    context_outputs = ContextOutputs.objects.filter(pipeline_id__in=task_instance_ids)
-
-    task_operation_record = TaskOperationRecord.objects.filter(instance_id__in=task_ids)
-    task_mock_data = TaskMockData.objects.filter(taskflow_id__in=task_ids)
-
-    task_execution_snapshot = TaskExecutionSnapshot.objects.filter(id__in=execution_snapshot_ids)
-    task_snapshot = TaskSnapshot.objects.filter(id__in=snapshot_ids)
-
-    # task_ids -> node_ids
-    node_query = (
-        Process.objects.filter(root_pipeline_id__in=task_instance_ids)
-        .values_list("current_node_id", flat=True)
-        .distinct()
+    snapshot_ids = list({instance.snapshot_id for instance in tasks if instance.snapshot_id})
+    execution_snapshot_ids = list(
+        {instance.execution_snapshot_id for instance in tasks if instance.execution_snapshot_id}
     )
-    node_ids = list(node_query)
-    logger.info(f"batch cleaning node_ids {node_ids}")
 
-    # 重构 node_query task_query 避免因前序查询导致结构变化无法执行操作
-    nodes = Process.objects.filter(root_pipeline_id__in=task_instance_ids)
-    tasks = TaskInstance.objects.filter(instance_id__in=task_instance_ids)
-    callbackdata = CallbackData.objects.filter(node_id__in=node_ids)  # callbackdata 没有索引 走全表扫描
+    node_ids = get_task_node_ids(task_instance_ids, execution_snapshot_ids)
+    logger.info(f"batch cleaning {len(node_ids)} node_ids, e.x.: {node_ids[:10]}...")
+
+    # task_ids -> 其他任务关联资源 一对一，任务实例放在最后删除，中途退出时下次清理会重新选中这批任务
     expired_data = {
-        "task_execution_snapshot": task_execution_snapshot,
-        "task_snapshot": task_snapshot,
-        "callbackdata": callbackdata,
-        "context_value": context_value,
-        "context_outputs": context_outputs,
-        "task_operation_record": task_operation_record,
-        "task_mock_data": task_mock_data,
-        "node_ids": nodes,
-        "task_instance": tasks,
+        "task_execution_snapshot": TaskExecutionSnapshot.objects.filter(
+            id__in=get_unreferenced_snapshot_ids("execution_snapshot_id", execution_snapshot_ids, task_ids)
+        ),
+        "task_snapshot": TaskSnapshot.objects.filter(
+            id__in=get_unreferenced_snapshot_ids("snapshot_id", snapshot_ids, task_ids)
+        ),
+        "context_value": ContextValue.objects.filter(pipeline_id__in=task_instance_ids),
+        "context_outputs": ContextOutputs.objects.filter(pipeline_id__in=task_instance_ids),
+        "task_operation_record": TaskOperationRecord.objects.filter(instance_id__in=task_ids),
+        "task_mock_data": TaskMockData.objects.filter(taskflow_id__in=task_ids),
+        "process": Process.objects.filter(root_pipeline_id__in=task_instance_ids),
+        "task_instance": TaskInstance.objects.filter(id__in=task_ids),
     }
 
-    chunk_size = settings.CLEAN_TASK_NODE_BATCH_NUM
-    # node_ids -> 其他节点关联资源 一对多
-    nodes_list = chunk_data(node_ids, chunk_size, lambda x: Node.objects.filter(node_id__in=x))
-    data_list = chunk_data(node_ids, chunk_size, lambda x: Data.objects.filter(node_id__in=x))
-    states_list = chunk_data(node_ids, chunk_size, lambda x: State.objects.filter(node_id__in=x))
-    execution_history_list = chunk_data(node_ids, chunk_size, lambda x: ExecutionHistory.objects.filter(node_id__in=x))
-    execution_data_list = chunk_data(node_ids, chunk_size, lambda x: ExecutionData.objects.filter(node_id__in=x))
-    schedules_list = chunk_data(node_ids, chunk_size, lambda x: Schedule.objects.filter(node_id__in=x))
-
-    retry_node_list = chunk_data(node_ids, chunk_size, lambda x: AutoRetryNodeStrategy.objects.filter(node_id__in=x))
-    timeout_node_list = chunk_data(node_ids, chunk_size, lambda x: TimeoutNodeConfig.objects.filter(node_id__in=x))
-
-    # 将一对一 和 一对多的分开返回 便于删除时区分
+    # node_ids -> 其他节点关联资源 一对多，将一对一 和 一对多的分开返回 便于删除时区分
+    chunk_size = int(settings.CLEAN_TASK_NODE_BATCH_NUM)
     expired_batch_data = {
-        "nodes_list": nodes_list,
-        "data_list": data_list,
-        "states_list": states_list,
-        "execution_history_list": execution_history_list,
-        "execution_data_list": execution_data_list,
-        "schedules_list": schedules_list,
-        "retry_node_list": retry_node_list,
-        "timeout_node_list": timeout_node_list,
+        field: chunk_data(node_ids, chunk_size, lambda x, model=model: model.objects.filter(node_id__in=x))
+        for field, model in NODE_RELATED_MODELS
     }
     return expired_data, expired_batch_data
 
 
-def delete_expired_data(expired_time):
+def clean_orphan_callback_data(limiter):
+    """
+    CallbackData 的 node_id 没有索引，按主键从上次的扫描位置分批向后扫描，
+    删除节点状态已经不存在的回调数据，扫描到表尾后从头开始
+    """
+    redis_inst = getattr(settings, "redis_inst", None)
+    checkpoint = 0
+    if redis_inst is not None:
+        checkpoint = int(redis_inst.get(CALLBACK_DATA_CHECKPOINT_KEY) or 0)
+
+    scan_num = int(settings.CLEAN_TASK_CALLBACK_SCAN_NUM)
+    while scan_num > 0 and not limiter.exhausted:
+        rows = list(
+            CallbackData.objects.filter(id__gt=checkpoint)
+            .order_by("id")
+            .values_list("id", "node_id")[: min(limiter.batch_size, scan_num)]
+        )
+        if not rows:
+            checkpoint = 0
+            break
+        scan_num -= len(rows)
+        checkpoint = rows[-1][0]
+        alive_node_ids = set(
+            State.objects.filter(node_id__in={node_id for _, node_id in rows}).values_list("node_id", flat=True)
+        )
+        orphan_ids = [pk for pk, node_id in rows if node_id not in alive_node_ids]
+        if orphan_ids:
+            limiter.delete(CallbackData.objects.filter(id__in=orphan_ids))
+
+    if redis_inst is not None:
+        redis_inst.set(CALLBACK_DATA_CHECKPOINT_KEY, checkpoint)
+
 
+def delete_expired_data(expired_time):
+    limiter = DeleteRateLimiter(
+        batch_size=int(settings.CLEAN_TASK_DELETE_BATCH_SIZE),
+        interval=settings.CLEAN_TASK_DELETE_INTERVAL,
+        max_rows=int(settings.CLEAN_TASK_MAX_DELETE_ROWS),
+    )
     expired_data, expired_batch_data = get_expired_data(expired_time)
-    with transaction.atomic():
-        # 清理无分块内容
-        for field, qs in expired_data.items():
-            logger.info(f"clean no batch {field} querySet ids : {qs.values_list('pk', flat=True)[:10]}...")
-            qs.delete()
-        # 清理分块内容
-        for field, qs in expired_batch_data.items():
-            logger.info(
-                f"clean {field} {len(qs)} batch data, "
-                f"e.x.: {qs[0].values_list('pk', flat=True)[:10] if len(qs) > 0 else None}..."
-            )
-            [q.delete() for q in qs]
-        logger.info("clean task done...")
+
+    # 先清理节点数据，再清理任务数据，每批删除独立提交，避免长事务锁表
+    for field, qs_list in expired_batch_data.items():
+        logger.info(f"clean {field} {len(qs_list)} batch data...")
+        for qs in qs_list:
+            if not limiter.delete(qs):
+                logger.info(f"clean task reaches delete limit at {field}, continue next time...")
+                return
+    for field, qs in expired_data.items():
+        logger.info(f"clean no batch {field} querySet ids : {qs.values_list('pk', flat=True)[:10]}...")
+        if not limiter.delete(qs):
+            logger.info(f"clean task reaches delete limit at {field}, continue next time...")
+            return
+
+    clean_orphan_callback_data(limiter)
+    logger.info("clean task done...")
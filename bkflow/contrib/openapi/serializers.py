@@ -46,9 +46,26 @@ class GetNodeDetailQuerySerializer(serializers.Serializer):
         return subprocess_stack
 
 
+class GetNodesDetailBodySerializer(serializers.Serializer):
+    node_ids = serializers.ListField(required=True, child=serializers.CharField(), max_length=500)
+    username = serializers.CharField(required=False, default="")
+    include_data = serializers.BooleanField(required=False, default=True)
+
+
 class GetNodeLogDetailSerializer(serializers.Serializer):
-    page = serializers.IntegerField(required=False, default=1)
-    page_size = serializers.IntegerField(required=False, default=30)
+    page = serializers.IntegerField(required=False, default=1, min_value=1)
+    page_size = serializers.IntegerField(required=False, default=30, min_value=1, max_value=1000)
+    cursor = serializers.IntegerField(required=False, min_value=0, help_text="读取该日志 ID 之后的日志")
+    tail = serializers.IntegerField(required=False, min_value=1, max_value=1000, help_text="读取最后 N 条日志")
+    start_time = serializers.DateTimeField(required=False)
+    end_time = serializers.DateTimeField(required=False)
+    stream = serializers.BooleanField(required=False, default=False, help_text="以纯文本流的形式返回全部日志")
+
+    def validate(self, attrs):
+        # 流式返回全部日志，不支持按游标或最后 N 条读取
+        if attrs.get("stream") and ("cursor" in attrs or "tail" in attrs):
+            raise serializers.ValidationError("stream can not be used with cursor or tail")
+        return attrs
 
 
 class GetTasksStatesBodySerializer(serializers.Serializer):
@@ -24,3 +24,8 @@ from django.apps import AppConfig
 class DecisionTableConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "bkflow.decision_table"
+
+    def ready(self):
+        from bkflow.decision_table.handlers import (  # noqa
+            decision_table_post_save_handler,
+        )
@@ -0,0 +1,55 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bkflow.contrib.api.collections.task import TaskComponentClient
+from bkflow.decision_table.models import DecisionTable
+
+logger = logging.getLogger(__name__)
+
+
+def _invalidate_engine_decision_table(space_id, table_id):
+    try:
+        result = TaskComponentClient(space_id=space_id).invalidate_decision_table(
+            data={"space_id": space_id, "table_id": table_id}
+        )
+    except Exception:
+        logger.exception("[invalidate_decision_table] space_id=%s, table_id=%s", space_id, table_id)
+        return
+    if not result.get("result", True):
+        logger.error("[invalidate_decision_table] failed: %s", result.get("message"))
+
+
+@receiver(post_save, sender=DecisionTable)
+def decision_table_post_save_handler(sender, instance, created, **kwargs):
+    # 新建的决策表在引擎侧不会有缓存
+    if created:
+        return
+    transaction.on_commit(lambda: _invalidate_engine_decision_table(instance.space_id, instance.id))
+
+
+@receiver(post_delete, sender=DecisionTable)
+def decision_table_post_delete_handler(sender, instance, **kwargs):
+    # 删除完成后实例主键会被置空，需提前取出
+    space_id, table_id = instance.space_id, instance.id
+    transaction.on_commit(lambda: _invalidate_engine_decision_table(space_id, table_id))
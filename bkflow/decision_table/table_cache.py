@@ -0,0 +1,145 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+
+from django.conf import settings
+from pipeline.core.constants import PE
+
+from bkflow.contrib.api.collections.interface import InterfaceModuleClient
+from bkflow.decision_table.table_parser import DecisionTableParser
+
+logger = logging.getLogger(__name__)
+
+DMN_PLUGIN_CODE = "dmn_plugin"
+DECISION_TABLE_CACHE_KEY_PREFIX = "bkflow_dmn_table"
+
+# 进程内编译结果缓存，以决策表内容哈希为 key，内容变化即自然失效
+_compiled_tables = OrderedDict()
+_compiled_tables_lock = threading.Lock()
+
+
+def get_table_cache_key(space_id, table_id):
+    return f"{DECISION_TABLE_CACHE_KEY_PREFIX}:{space_id}:{table_id}"
+
+
+def get_table_content_hash(table):
+    content = json.dumps({"name": table["name"], "data": table["data"]}, sort_keys=True, ensure_ascii=False)
+    return hashlib.md5(content.encode("utf-8")).hexdigest()
+
+
+def _get_redis_inst():
+    if not getattr(settings, "DMN_TABLE_CACHE_TTL", 0):
+        return None
+    return getattr(settings, "redis_inst", None)
+
+
+def compile_decision_table(table):
+    """
+    将接口返回的决策表解析为 bkflow_dmn 可执行的结构，相同内容的决策表只解析一次
+    :param table: {"name": xxx, "data": {...}}
+    """
+    content_hash = get_table_content_hash(table)
+    with _compiled_tables_lock:
+        compiled = _compiled_tables.get(content_hash)
+        if compiled is not None:
+            _compiled_tables.move_to_end(content_hash)
+            return deepcopy(compiled)
+
+    compiled = DecisionTableParser(title=table["name"], decision_table=table["data"]).parse()
+    with _compiled_tables_lock:
+        _compiled_tables[content_hash] = compiled
+        _compiled_tables.move_to_end(content_hash)
+        while len(_compiled_tables) > getattr(settings, "DMN_COMPILED_TABLE_CACHE_SIZE", 256):
+            _compiled_tables.popitem(last=False)
+    return deepcopy(compiled)
+
+
+def clear_compiled_tables():
+    with _compiled_tables_lock:
+        _compiled_tables.clear()
+
+
+def get_decision_table(space_id, table_id):
+    """
+    获取决策表，优先读取 redis 缓存，未命中时请求 interface 并回填
+    :return: 与 InterfaceModuleClient.get_decision_table 一致的结果
+    """
+    redis_inst = _get_redis_inst()
+    cache_key = get_table_cache_key(space_id, table_id)
+    if redis_inst is not None:
+        try:
+            cached = redis_inst.get(cache_key)
+        except Exception:
+            logger.exception("[get_decision_table] read cache %s failed", cache_key)
+            cached = None
+        if cached:
+            return {"result": True, "data": json.loads(cached), "message": "success"}
+
+    result = InterfaceModuleClient().get_decision_table(decision_table_id=table_id, data={"space_id": space_id})
+    if redis_inst is not None and result.get("result"):
+        table = result["data"]
+        table["version"] = get_table_content_hash(table)
+        try:
+            redis_inst.set(cache_key, json.dumps(table), ex=settings.DMN_TABLE_CACHE_TTL)
+        except Exception:
+            logger.exception("[get_decision_table] write cache %s failed", cache_key)
+    return result
+
+
+def invalidate_decision_table(space_id, table_id):
+    redis_inst = _get_redis_inst()
+    if redis_inst is None:
+        return
+    redis_inst.delete(get_table_cache_key(space_id, table_id))
+
+
+def collect_decision_table_ids(pipeline_tree):
+    """收集流程（包括独立子流程）中决策插件引用的决策表 ID"""
+    table_ids = set()
+    for act in pipeline_tree.get(PE.activities, {}).values():
+        if act.get("type") == PE.SubProcess:
+            if act.get(PE.pipeline):
+                table_ids.update(collect_decision_table_ids(act[PE.pipeline]))
+            continue
+        component = act.get("component") or {}
+        if component.get("code") != DMN_PLUGIN_CODE:
+            continue
+        table_id = (component.get("data") or {}).get("table_id", {}).get("value")
+        if table_id:
+            table_ids.add(table_id)
+    return table_ids
+
+
+def warm_decision_tables(space_id, pipeline_tree):
+    """任务启动时预热流程引用的决策表，预热失败不影响任务执行"""
+    redis_inst = _get_redis_inst()
+    if redis_inst is None:
+        return
+    for table_id in collect_decision_table_ids(pipeline_tree):
+        try:
+            result = get_decision_table(space_id, table_id)
+            if result.get("result"):
+                compile_decision_table(result["data"])
+        except Exception:
+            logger.exception("[warm_decision_tables] warm decision table %s failed", table_id)
@@ -270,7 +270,9 @@ class TaskInterfaceViewSet(GenericViewSet):
     def get_task_node_log(self, request, task_id, node_id, version, *args, **kwargs):
         space_id = self.get_space_id(request)
         client = TaskComponentClient(space_id=space_id, from_superuser=request.user.is_superuser)
-        result = client.get_task_node_log(task_id, node_id, version, data=request.query_params)
+        # 流式日志仅供引擎直接下载，经接口层转发时始终按分页 JSON 返回
+        query_params = {key: value for key, value in request.query_params.items() if key != "stream"}
+        result = client.get_task_node_log(task_id, node_id, version, data=query_params)
         return Response(result)
 
     @action(methods=["GET"], detail=False, url_path="render_current_constants/(?P<task_id>\\d+)")
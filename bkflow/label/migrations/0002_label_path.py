@@ -0,0 +1,69 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+from django.db import migrations, models
+
+
+def fill_label_paths(apps, schema_editor):
+    """根据 parent_id 回填已有标签的物化路径"""
+    Label = apps.get_model("label", "Label")
+    labels = {label.id: label for label in Label.objects.all()}
+    computed = {}
+
+    def compute(label_id, visiting):
+        if label_id in computed:
+            return computed[label_id]
+        label = labels[label_id]
+        parent_id = label.parent_id
+        # 父标签不存在或存在循环引用时按根标签处理
+        if not parent_id or parent_id not in labels or parent_id in visiting:
+            computed[label_id] = ("/", label.name)
+        else:
+            parent_path, parent_full_path = compute(parent_id, visiting | {label_id})
+            computed[label_id] = (f"{parent_path}{parent_id}/", f"{parent_full_path}/{label.name}")
+        return computed[label_id]
+
+    for label_id, label in labels.items():
+        label.path, label.full_path = compute(label_id, {label_id})
+    Label.objects.bulk_update(list(labels.values()), ["path", "full_path"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("label", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="label",
+            name="path",
+            field=models.CharField(
+                db_index=True,
+                default="/",
+                help_text="祖先标签ID路径（如/1/5/，根标签为/）",
+                max_length=255,
+                verbose_name="祖先路径",
+            ),
+        ),
+        migrations.AddField(
+            model_name="label",
+            name="full_path",
+            field=models.CharField(default="", help_text="从根标签到当前标签的名称路径", max_length=1024, verbose_name="完整路径"),
+        ),
+        migrations.RunPython(fill_label_paths, migrations.RunPython.noop),
+    ]
@@ -21,10 +21,12 @@ from collections import defaultdict
 
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Q
+from django.db.models import CharField, Q, Value
+from django.db.models.functions import Concat, Substr
 from django.utils.translation import ugettext_lazy as _
 
 LABEL_SCOPE_MAX_ITEMS = 3
+LABEL_PATH_SEPARATOR = "/"
 
 
 def build_label_scope_filter(*scopes):
@@ -64,12 +66,8 @@ class LabelManager(models.Manager):
             # 非递归：直接过滤parent_id等于目标ID
             return self.filter(parent_id=parent_id).order_by("name")
 
-        # 递归查询：手动遍历子标签，累计所有子孙
-        sub_labels = list(self.filter(parent_id=parent_id).order_by("name"))
-        for label in sub_labels:
-            # 递归查询当前标签的子标签，并入结果
-            sub_labels.extend(self.get_sub_labels(label.id, recursive=True))
-        return sub_labels
+        # 递归查询：通过祖先路径一次查出所有子孙
+        return list(self.filter(path__contains=f"/{parent_id}/").order_by("path", "name"))
 
     def get_parent_label(self, label_id):
         """通过标签ID获取其父标签（手动查询parent_id对应的记录）"""
@@ -85,12 +83,8 @@ class LabelManager(models.Manager):
 
     def get_labels_map(self, label_ids):
         """通过标签ID获取其完整信息"""
-        labels = Label.objects.filter(id__in=label_ids)
-        labels_map = {}
-        for label in labels:
-            label_dict = {"id": label.id, "name": label.name, "color": label.color, "full_path": label.full_path}
-            labels_map[label.id] = label_dict
-        return labels_map
+        labels = Label.objects.filter(id__in=label_ids).values("id", "name", "color", "full_path")
+        return {label["id"]: label for label in labels}
 
 
 class Label(models.Model):
@@ -114,6 +108,9 @@ class Label(models.Model):
 
     # 核心修改：用IntegerField存储父标签ID，替代外键
     parent_id = models.IntegerField(_("父标签ID"), null=True, blank=True, default=None, help_text="父标签ID（根标签填null或留空）")
+    # 物化路径，保存时维护，避免逐级查询父标签
+    path = models.CharField(_("祖先路径"), max_length=255, default="/", db_index=True, help_text="祖先标签ID路径（如/1/5/，根标签为/）")
+    full_path = models.CharField(_("完整路径"), max_length=1024, default="", help_text="从根标签到当前标签的名称路径")
 
     created_at = models.DateTimeField(_("创建时间"), auto_now_add=True)
     updated_at = models.DateTimeField(_("更新时间"), auto_now=True)
@@ -145,31 +142,55 @@ class Label(models.Model):
 
     def clean(self):
         """数据验证：保持原有约束，适配手动关联"""
+        self._validate_parent(self.get_parent_label())
+
+    def _validate_parent(self, parent_label):
+        if not self.parent_id:
+            return
         # 1. 子标签的space_id必须与父标签一致（如果有父标签）
-        if self.parent_id:
-            parent_label = self.get_parent_label()
-            if not parent_label:
-                raise ValidationError(_("父标签不存在（父ID：{}）".format(self.parent_id)))
-            if self.space_id != parent_label.space_id:
-                raise ValidationError(_("子标签的空间ID必须与父标签一致"))
-        # 2. 禁止循环引用（如A→B→C→A）
-        if self.parent_id:
-            current_parent_id = self.parent_id
-            # 遍历所有祖先标签，检查是否包含自身ID
-            while current_parent_id:
-                if current_parent_id == self.id:
-                    raise ValidationError(_("禁止循环引用：标签不能作为自身的祖先"))
-                # 手动获取上一级父标签ID
-                try:
-                    ancestor = Label.objects.get(id=current_parent_id)
-                    current_parent_id = ancestor.parent_id
-                except Label.DoesNotExist:
-                    break  # 父标签不存在，终止检查
+        if not parent_label:
+            raise ValidationError(_("父标签不存在（父ID：{}）".format(self.parent_id)))
+        if self.space_id != parent_label.space_id:
+            raise ValidationError(_("子标签的空间ID必须与父标签一致"))
+        # 2. 禁止循环引用（如A→B→C→A），父标签的祖先路径中不能包含自身ID
+        if self.id and (parent_label.id == self.id or f"/{self.id}/" in parent_label.path):
+            raise ValidationError(_("禁止循环引用：标签不能作为自身的祖先"))
 
     def save(self, *args, **kwargs):
-        """保存前执行验证"""
-        self.clean()
+        """保存前执行验证，并维护物化路径"""
+        parent_label = self.get_parent_label()
+        self._validate_parent(parent_label)
+
+        if parent_label:
+            self.path = f"{parent_label.path}{parent_label.id}{LABEL_PATH_SEPARATOR}"
+            self.full_path = f"{parent_label.full_path}{LABEL_PATH_SEPARATOR}{self.name}"
+        else:
+            self.path = LABEL_PATH_SEPARATOR
+            self.full_path = self.name
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | {"path", "full_path"}
+
+        old = None
+        if self.pk:
+            old = Label.objects.filter(pk=self.pk).values("path", "full_path").first()
         super().save(*args, **kwargs)
+        if old and (old["path"] != self.path or old["full_path"] != self.full_path):
+            self._update_descendant_paths(old["path"], old["full_path"])
+
+    def _update_descendant_paths(self, old_path, old_full_path):
+        """标签改名或移动后，单条 UPDATE 替换所有子孙标签的路径前缀"""
+        old_prefix = f"{old_path}{self.pk}{LABEL_PATH_SEPARATOR}"
+        new_prefix = f"{self.path}{self.pk}{LABEL_PATH_SEPARATOR}"
+        old_full_prefix = f"{old_full_path}{LABEL_PATH_SEPARATOR}"
+        new_full_prefix = f"{self.full_path}{LABEL_PATH_SEPARATOR}"
+        Label.objects.filter(path__startswith=old_prefix).update(
+            path=Concat(Value(new_prefix), Substr("path", len(old_prefix) + 1), output_field=CharField()),
+            full_path=Concat(
+                Value(new_full_prefix), Substr("full_path", len(old_full_prefix) + 1), output_field=CharField()
+            ),
+        )
 
     @staticmethod
     def get_label_ids_by_names(names, space_id):
@@ -189,17 +210,6 @@ class Label(models.Model):
 
         return label_ids
 
-    @property
-    def full_path(self):
-        """获取标签完整路径（手动递归查询父标签）"""
-        path = [self.name]
-        current_parent = self.get_parent_label()
-        while current_parent:
-            path.insert(0, current_parent.name)
-            # 继续查询上一级父标签
-            current_parent = current_parent.get_parent_label()
-        return "/".join(path)
-
     def is_root(self):
         """判断是否为根标签（parent_id为null或无对应父标签）"""
         return not self.parent_id or not self.get_parent_label()
@@ -21,8 +21,11 @@ import logging
 import uuid
 from enum import Enum
 
+from django.conf import settings
 from django.db import models
 from django.db.models.query import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from pytimeparse import parse
@@ -31,6 +34,7 @@ from bkflow.contrib.api.collections.task import TaskComponentClient
 from bkflow.space.configs import TokenAutoRenewalConfig, TokenExpirationConfig
 from bkflow.space.models import SpaceConfig
 from bkflow.template.models import Template
+from bkflow.utils import redis_cache
 
 logger = logging.getLogger("root")
 
@@ -158,10 +162,67 @@ class Token(models.Model):
     def generate_token(cls):
         return uuid.uuid3(uuid.uuid1(), uuid.uuid4().hex).hex
 
+    @staticmethod
+    def _get_verify_cache_key(token):
+        return f"token_verify:{token}"
+
+    @classmethod
+    def invalidate_verify_cache(cls, tokens):
+        """清理 token 的校验结果缓存，token 撤销或变更时调用"""
+        redis_cache.delete(*[cls._get_verify_cache_key(token) for token in set(tokens)])
+
     @classmethod
     def verify(cls, space_id, user, resource_type, resource_id, permission_type, token) -> bool:
+        """
+        校验权限，校验结果按 token 缓存在 redis hash 中，每个字段对应一组校验参数
+        """
+        ttl = settings.TOKEN_VERIFY_CACHE_TTL
+        if ttl <= 0:
+            return cls._verify(space_id, user, resource_type, resource_id, permission_type, token)[0]
+
+        cache_key = cls._get_verify_cache_key(token)
+        resource_key = f"{space_id}:{user}:{resource_type}:{resource_id}:{permission_type}"
+        now = timezone.now().timestamp()
+        cached = redis_cache.hget_json(cache_key, resource_key)
+        if cached is not None:
+            result, valid_until = cached
+            if valid_until > now:
+                return result
+
+        result, db_token = cls._verify(space_id, user, resource_type, resource_id, permission_type, token)
+        # token 不存在时不缓存，避免无效 token 占用缓存；
+        # 同一 token 的其他字段写入会刷新整个 key 的过期时间，因此每个字段单独记录失效时间，且不超过 token 本身的有效期
+        if db_token is not None:
+            valid_until = min(db_token.expired_time.timestamp(), now + ttl)
+            redis_cache.hset_json(cache_key, resource_key, [result, valid_until], ttl)
+        return result
+
+    @staticmethod
+    def _get_ancestor_task_ids(space_id, task_id):
+        """获取任务的所有祖先任务ID，祖先关系不会变化，按任务缓存"""
+        cache_key = f"task_ancestors:{space_id}:{task_id}"
+        ttl = settings.TASK_ANCESTORS_CACHE_TTL
+        if ttl > 0:
+            ancestor_task_ids = redis_cache.get_json(cache_key)
+            if ancestor_task_ids is not None:
+                return ancestor_task_ids
+
+        client = TaskComponentClient(space_id=space_id)
+        result = client.get_task_ancestors(task_id)
+        if not result.get("result"):
+            logger.warning(f"[Token->verify] Failed to get task ancestors, task_id={task_id}, space_id={space_id}")
+            return []
+
+        ancestor_task_ids = [str(ancestor_task_id) for ancestor_task_id in result["data"]]
+        if ttl > 0:
+            redis_cache.set_json(cache_key, ancestor_task_ids, ttl)
+        return ancestor_task_ids
+
+    @classmethod
+    def _verify(cls, space_id, user, resource_type, resource_id, permission_type, token):
         """
         校验权限
+        :return: (是否有权限, 匹配到的 token 记录)
         """
 
         query_params = {
@@ -181,32 +242,10 @@ class Token(models.Model):
                 "[Token->verify] the token does not exist, space_id={}, user={},resource_type={},"
                 "resource_id={},permission_type={}".format(space_id, user, resource_type, resource_id, permission_type)
             )
-            return False
+            return False, None
 
         if db_token.has_expired():
-            return False
-
-        # todo: 此处在递归中查询接口，如果出现子流程嵌套多层导致性能问题，需要优化
-        def check_parent_task_id(db_token, current_task_id):
-            client = TaskComponentClient(space_id=db_token.space_id)
-            result = client.get_task_detail(current_task_id)
-
-            if not result.get("result"):
-                logger.warning(
-                    f"[Token->verify] Failed to get task detail, task_id={current_task_id}, "
-                    f"space_id={db_token.space_id}"
-                )
-                return False
-
-            parent_task_info = result["data"].get("parent_task_info")
-            if not parent_task_info:
-                return False
-
-            parent_task_id = parent_task_info["task_id"]
-            if db_token.resource_id == str(parent_task_id):
-                return True
-
-            return check_parent_task_id(db_token, parent_task_id)
+            return False, db_token
 
         if db_token.resource_id != str(resource_id):
             if resource_type == ResourceType.SCOPE.value:
@@ -214,7 +253,7 @@ class Token(models.Model):
                 scope_type, scope_value = scope_parts[0], scope_parts[1]
                 try:
                     resource_obj = Template.objects.get(id=resource_id, space_id=db_token.space_id)
-                    return resource_obj.scope_type == scope_type and resource_obj.scope_value == scope_value
+                    return resource_obj.scope_type == scope_type and resource_obj.scope_value == scope_value, db_token
                 except Template.DoesNotExist:
                     client = TaskComponentClient(space_id=db_token.space_id)
                     result = client.get_task_detail(resource_id)
@@ -223,11 +262,21 @@ class Token(models.Model):
                             f"[Token->verify] Failed to get task detail, task_id={resource_id}, "
                             f"space_id={db_token.space_id}"
                         )
-                        return False
+                        return False, db_token
                     resource_data = result["data"]
-                    return resource_data["scope_type"] == scope_type and resource_data["scope_value"] == scope_value
+                    return (
+                        resource_data["scope_type"] == scope_type and resource_data["scope_value"] == scope_value,
+                        db_token,
+                    )
             elif resource_type == ResourceType.TEMPLATE.value:
-                return False
-            elif not check_parent_task_id(db_token, resource_id):
-                return False
-        return True
+                return False, db_token
+            # 子流程任务：token 授权给任一祖先任务即可
+            elif db_token.resource_id not in cls._get_ancestor_task_ids(db_token.space_id, resource_id):
+                return False, db_token
+        return True, db_token
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed_handler(sender, instance, **kwargs):
+    Token.invalidate_verify_cache([instance.token])
@@ -22,8 +22,7 @@ from django.utils.translation import ugettext_lazy as _
 from pipeline.component_framework.component import Component
 from pipeline.core.flow.io import ObjectItemSchema
 
-from bkflow.contrib.api.collections.interface import InterfaceModuleClient
-from bkflow.decision_table.table_parser import DecisionTableParser
+from bkflow.decision_table.table_cache import compile_decision_table, get_decision_table
 from bkflow.pipeline_plugins.components.collections.base import BKFlowBaseService
 
 __group_name__ = _("蓝鲸服务(BK)")
@@ -60,8 +59,7 @@ class DmnPluginService(BKFlowBaseService):
         facts = {fact_id: fact["value"] for fact_id, fact in raw_facts.items()}
 
         # 获取决策表数据
-        interface_client = InterfaceModuleClient()
-        result = interface_client.get_decision_table(decision_table_id=table_id, data={"space_id": space_id})
+        result = get_decision_table(space_id=space_id, table_id=table_id)
         if not result["result"]:
             message = handle_plain_log("[get decision table] error: {}".format(result["message"]))
             self.logger.error(message)
@@ -70,8 +68,7 @@ class DmnPluginService(BKFlowBaseService):
 
         table = result["data"]
         try:
-            parser = DecisionTableParser(title=table["name"], decision_table=table["data"])
-            decision_table = parser.parse()
+            decision_table = compile_decision_table(table)
             self.logger.info(f"parsed decision table: {decision_table}")
             table_outputs = decide_single_table(decision_table, facts)
         except Exception as e:
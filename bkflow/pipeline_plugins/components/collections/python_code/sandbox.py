@@ -0,0 +1,285 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+from celery.signals import celeryd_after_setup
+
+try:
+    import resource
+
+    HAS_RESOURCE = True
+except ImportError:
+    HAS_RESOURCE = False
+
+logger = logging.getLogger(__name__)
+
+# 沙箱进程由单线程的 forkserver 进程 fork 产生，避免在多线程的 worker 进程中直接 fork 复制锁状态；
+# 不支持 forkserver 的系统调用方需要降级为进程内执行
+HAS_FORKSERVER = "forkserver" in multiprocessing.get_all_start_methods()
+
+# 沙箱进程创建失败后，在该时间（秒）内不再尝试创建，直接由调用方降级执行
+SPAWN_RETRY_INTERVAL = 60
+
+# 当前 celery worker 的并发数，worker 启动时记录
+_worker_concurrency = None
+
+
+@celeryd_after_setup.connect
+def _record_worker_concurrency(sender, instance, **kwargs):
+    global _worker_concurrency
+    _worker_concurrency = getattr(instance, "concurrency", None)
+
+
+def get_worker_concurrency(default):
+    """获取当前 celery worker 的并发数，非 worker 进程返回 default"""
+    return _worker_concurrency or default
+
+
+class SandboxTimeoutError(Exception):
+    """任务执行超过墙钟时间，沙箱进程已被终止"""
+
+    pass
+
+
+class SandboxUnavailableError(Exception):
+    """无法创建沙箱进程（如运行在不允许创建子进程的 daemon 进程中），调用方需要降级执行"""
+
+    pass
+
+
+class SandboxCrashedError(Exception):
+    """沙箱进程在执行过程中退出（如 CPU 时间超限被系统终止）"""
+
+    def __init__(self, exitcode):
+        super().__init__(f"sandbox process exited with code {exitcode}")
+        self.exitcode = exitcode
+
+    @property
+    def cpu_limit_exceeded(self):
+        return self.exitcode == -signal.SIGXCPU
+
+
+def _get_vm_size():
+    """读取当前进程虚拟内存大小（字节），无法获取时返回 0"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmSize:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def _set_memory_limit(memory_limit_mb):
+    """
+    在沙箱进程内设置内存限制，以从 forkserver 继承的地址空间为基线，只限制任务新增的内存
+    """
+    if not HAS_RESOURCE or not memory_limit_mb:
+        return
+    limit = _get_vm_size() + memory_limit_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _set_cpu_limit(cpu_limit):
+    """设置本次任务可用的 CPU 时间，超限后进程会收到 SIGXCPU 并退出"""
+    if not HAS_RESOURCE or not cpu_limit:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    limit = int(usage.ru_utime + usage.ru_stime) + int(cpu_limit) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+
+
+def _sandbox_worker_main(conn, job_handler, memory_limit_mb):
+    """沙箱进程主循环：接收任务、执行并回传结果，父进程关闭管道后退出"""
+    # 不继承 worker 进程的信号处理逻辑
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _set_memory_limit(memory_limit_mb)
+
+    while True:
+        try:
+            job, cpu_limit = conn.recv()
+        except (EOFError, OSError):
+            break
+        _set_cpu_limit(cpu_limit)
+        # job_handler 需要保证返回值可以被 pickle 序列化
+        conn.send(job_handler(job))
+
+
+class SandboxWorker:
+    """预创建的沙箱进程，通过管道串行执行任务"""
+
+    def __init__(self, context, job_handler, memory_limit_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_sandbox_worker_main, args=(child_conn, job_handler, memory_limit_mb), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def run(self, job, timeout, cpu_limit=None):
+        self.jobs += 1
+        self.conn.send((job, cpu_limit))
+        if not self.conn.poll(timeout):
+            self.kill()
+            raise SandboxTimeoutError(f"sandbox job timeout after {timeout}s")
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self.process.join(1)
+            exitcode = self.process.exitcode
+            self.kill()
+            raise SandboxCrashedError(exitcode)
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+def get_sandbox_context(preload_modules=()):
+    """
+    获取 forkserver 上下文，forkserver 进程全局唯一，预加载模块只在首次创建沙箱进程前设置有效
+    """
+    context = multiprocessing.get_context("forkserver")
+    if preload_modules:
+        context.set_forkserver_preload(list(preload_modules))
+    return context
+
+
+class SandboxPool:
+    """
+    沙箱进程池，预先创建 size 个进程并复用，超时或异常的进程直接终止并由新进程替换；
+    同时执行的任务数不超过 max_size，等待执行的时间同样计入任务超时时间
+    """
+
+    def __init__(
+        self, job_handler, size=2, max_size=None, memory_limit_mb=None, max_jobs_per_worker=100, preload_modules=()
+    ):
+        self.job_handler = job_handler
+        self.size = size
+        self.max_size = max(max_size or size, size)
+        self.memory_limit_mb = memory_limit_mb
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._context = get_sandbox_context(preload_modules)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._unavailable_until = 0
+
+    def _spawn(self):
+        if time.monotonic() < self._unavailable_until:
+            raise SandboxUnavailableError("sandbox spawn failed recently")
+        try:
+            return SandboxWorker(self._context, self.job_handler, self.memory_limit_mb)
+        except Exception as e:
+            self._unavailable_until = time.monotonic() + SPAWN_RETRY_INTERVAL
+            raise SandboxUnavailableError(f"spawn sandbox worker failed: {e}") from e
+
+    def warm_up(self):
+        with self._lock:
+            while len(self._idle) < self.size:
+                self._idle.append(self._spawn())
+
+    def _acquire(self):
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.is_alive():
+                    return worker
+                worker.kill()
+        return self._spawn()
+
+    def _release(self, worker, reusable):
+        with self._lock:
+            keep = len(self._idle) < self.size
+            if keep and reusable and worker.is_alive() and worker.jobs < self.max_jobs_per_worker:
+                self._idle.append(worker)
+                return
+        worker.kill()
+        if not keep:
+            return
+        # 补充被回收的进程，保证下一个任务不需要等待进程创建
+        try:
+            replacement = self._spawn()
+        except SandboxUnavailableError:
+            logger.exception("[SandboxPool] spawn sandbox worker failed")
+            return
+        with self._lock:
+            self._idle.append(replacement)
+
+    def execute(self, job, timeout, cpu_limit=None):
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=timeout):
+            raise SandboxTimeoutError(f"sandbox job timeout after {timeout}s waiting for a free sandbox")
+        try:
+            worker = self._acquire()
+            reusable = False
+            try:
+                result = worker.run(job, timeout=max(timeout - (time.monotonic() - start), 0), cpu_limit=cpu_limit)
+                reusable = True
+                return result
+            finally:
+                self._release(worker, reusable)
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.kill()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_sandbox_pool(name, job_handler, **options):
+    """获取当前进程的沙箱进程池，fork 出的子进程会重新创建自己的进程池"""
+    key = (os.getpid(), name)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = SandboxPool(job_handler, **options)
+                try:
+                    pool.warm_up()
+                except SandboxUnavailableError:
+                    logger.exception("[SandboxPool] warm up sandbox pool failed")
+                _pools[key] = pool
+    return pool
@@ -0,0 +1,27 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+# 沙箱 forkserver 进程的预加载模块，在 forkserver 中初始化 Django 并导入执行函数，
+# 之后由 forkserver fork 出的沙箱进程直接复用已加载的模块
+import django
+
+django.setup()
+
+from bkflow.pipeline_plugins.components.collections.python_code import (  # noqa: E402,F401
+    v1_0_0,
+)
@@ -16,19 +16,17 @@ We undertake not to change the open source license (MIT license) applicable
 
 to the current version of the project delivered to anyone in the future.
 """
+import hashlib
+import logging
+import marshal
+import pickle
 import re
 import sys
 import threading
+from collections import OrderedDict
 from io import StringIO
 from typing import Any, Dict
 
-try:
-    import resource
-
-    HAS_RESOURCE = True
-except ImportError:
-    HAS_RESOURCE = False
-
 from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 from pipeline.component_framework.component import Component
@@ -36,6 +34,14 @@ from pipeline.core.flow.io import ObjectItemSchema, StringItemSchema
 from pipeline.eri.runtime import BambooDjangoRuntime
 
 from bkflow.pipeline_plugins.components.collections.base import BKFlowBaseService
+from bkflow.pipeline_plugins.components.collections.python_code.sandbox import (
+    HAS_FORKSERVER,
+    SandboxCrashedError,
+    SandboxTimeoutError,
+    SandboxUnavailableError,
+    get_sandbox_pool,
+    get_worker_concurrency,
+)
 
 try:
     # RestrictedPython 8.1: 使用 safe_globals 包含所有必需的守卫函数
@@ -49,6 +55,8 @@ except ImportError:
     rp_safe_globals = None
     HAS_RESTRICTED_PYTHON = False
 
+logger = logging.getLogger(__name__)
+
 __group_name__ = _("蓝鲸服务(BK)")
 
 # 默认执行超时时间（秒）
@@ -60,6 +68,27 @@ MAX_CODE_LENGTH = getattr(settings, "PYTHON_CODE_PLUGIN_MAX_LENGTH", 10240)
 # 默认最大内存限制（MB，仅Unix系统）
 DEFAULT_MEMORY_LIMIT_MB = getattr(settings, "PYTHON_CODE_PLUGIN_MEMORY_LIMIT_MB", 256)
 
+# 默认单次执行可用的CPU时间（秒，仅Unix系统）
+DEFAULT_CPU_LIMIT = getattr(settings, "PYTHON_CODE_PLUGIN_CPU_LIMIT", DEFAULT_TIMEOUT)
+
+# 是否在预创建的沙箱进程中执行代码，不支持 forkserver 或无法创建沙箱进程时降级为线程执行
+SANDBOX_ENABLED = getattr(settings, "PYTHON_CODE_SANDBOX_ENABLED", True) and HAS_FORKSERVER
+
+# 每个 worker 进程预创建的沙箱进程数量，以及单个沙箱进程最多执行的任务数
+SANDBOX_POOL_SIZE = getattr(settings, "PYTHON_CODE_SANDBOX_POOL_SIZE", 2)
+SANDBOX_MAX_JOBS_PER_WORKER = getattr(settings, "PYTHON_CODE_SANDBOX_MAX_JOBS_PER_WORKER", 100)
+
+# 每个 worker 进程同时执行的沙箱任务数上限，未配置时与 celery worker 并发数一致，避免任务排队等待沙箱
+SANDBOX_MAX_SIZE = getattr(settings, "PYTHON_CODE_SANDBOX_MAX_SIZE", None)
+
+# forkserver 进程预加载的模块，沙箱进程 fork 后无需再初始化 Django 及导入执行函数
+SANDBOX_PRELOAD_MODULE = "bkflow.pipeline_plugins.components.collections.python_code.sandbox_preload"
+
+# 字节码缓存数量，以源码哈希为 key
+BYTECODE_CACHE_SIZE = getattr(settings, "PYTHON_CODE_BYTECODE_CACHE_SIZE", 128)
+_bytecode_cache = OrderedDict()
+_bytecode_cache_lock = threading.Lock()
+
 # 允许的安全内置函数和模块
 SAFE_BUILTINS = {
     # 基本类型
@@ -148,6 +177,12 @@ class TimeoutError(Exception):
     pass
 
 
+class CodeCompileError(Exception):
+    """代码编译或加载失败"""
+
+    pass
+
+
 def execute_with_timeout(func, timeout_seconds, *args, **kwargs):
     """在子线程中执行函数，支持超时控制"""
     import queue
@@ -194,11 +229,13 @@ class PythonCodeExecutor:
         timeout=DEFAULT_TIMEOUT,
         max_code_length=MAX_CODE_LENGTH,
         memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+        cpu_limit=DEFAULT_CPU_LIMIT,
     ):
         self.service = service
         self.timeout = timeout
         self.max_code_length = max_code_length
         self.memory_limit_mb = memory_limit_mb
+        self.cpu_limit = cpu_limit
         self._check_restricted_python()
 
     def _check_restricted_python(self):
@@ -206,30 +243,6 @@ class PythonCodeExecutor:
         if compile_restricted is None:
             raise ImportError("RestrictedPython未安装。请运行: pip install RestrictedPython")
 
-    def _set_memory_limit(self, memory_limit_mb: int):
-        """
-        设置内存限制（仅Unix系统）
-
-        Args:
-            memory_limit_mb: 内存限制（MB）
-
-        Returns:
-            (success, error_message)
-        """
-        if not HAS_RESOURCE:
-            return False, "resource模块不可用（仅Unix系统支持）"
-
-        try:
-            # 将MB转换为字节
-            memory_limit_bytes = memory_limit_mb * 1024 * 1024
-
-            # 设置内存限制（RLIMIT_AS = 虚拟内存限制）
-            # 软限制和硬限制都设置为相同值
-            resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
-            return True, ""
-        except (ValueError, OSError) as e:
-            return False, f"设置内存限制失败: {str(e)}"
-
     def _validate_code(self, code: str):
         """验证代码安全性"""
         if not code or not isinstance(code, str):
@@ -252,7 +265,8 @@ class PythonCodeExecutor:
 
         return True, ""
 
-    def _create_safe_builtins(self) -> Dict[str, Any]:
+    @classmethod
+    def _create_safe_builtins(cls) -> Dict[str, Any]:
         """创建安全的builtins"""
         # RestrictedPython 8.1+: 使用 safe_globals 中的 __builtins__
         # 它已经包含了部分守卫函数（如 _getattr_ 等）
@@ -292,7 +306,8 @@ class PythonCodeExecutor:
         }
         return safe_builtins_dict
 
-    def _create_safe_globals(self, context_vars: Dict[str, Any]) -> Dict[str, Any]:
+    @classmethod
+    def _create_safe_globals(cls, context_vars: Dict[str, Any]) -> Dict[str, Any]:
         """创建安全的全局命名空间"""
         # 导入安全的内置模块
         import base64 as base64_module
@@ -316,8 +331,8 @@ class PythonCodeExecutor:
         import jsonschema as jsonschema_module
 
         safe_globals_dict = {
-            **self._create_safe_builtins(),
-            "__builtins__": self._create_safe_builtins()["__builtins__"],
+            **cls._create_safe_builtins(),
+            "__builtins__": cls._create_safe_builtins()["__builtins__"],
             # 数据格式
             "json_dumps": json_module.dumps,
             "json_loads": json_module.loads,
@@ -350,211 +365,192 @@ class PythonCodeExecutor:
 
         return safe_globals_dict
 
-    def compile_code(self, code: str, timeout: int = None):
+    def _get_bytecode(self, code: str) -> bytes:
         """
-        编译Python代码并返回main函数
+        编译受限代码并返回序列化后的字节码，相同源码只编译一次
+
+        Raises:
+            SyntaxError: 代码存在语法错误
+            CodeCompileError: RestrictedPython 编译检查未通过
+        """
+        code_hash = hashlib.sha256(code.encode("utf-8")).hexdigest()
+        with _bytecode_cache_lock:
+            bytecode = _bytecode_cache.get(code_hash)
+            if bytecode is not None:
+                _bytecode_cache.move_to_end(code_hash)
+                return bytecode
+
+        byte_code = compile_restricted(code, filename="<inline>", mode="exec")
+
+        # RestrictedPython 8.1: 检查返回对象是否有 errors 属性
+        if hasattr(byte_code, "errors") and byte_code.errors:
+            error_msgs = "\n".join(byte_code.errors)
+            raise CodeCompileError(f"代码编译错误: {error_msgs}")
+
+        # RestrictedPython 8.1: byte_code 可能是 code 对象本身，也可能是包装对象
+        code_to_exec = byte_code.code if hasattr(byte_code, "code") else byte_code
+        bytecode = marshal.dumps(code_to_exec)
+
+        with _bytecode_cache_lock:
+            _bytecode_cache[code_hash] = bytecode
+            _bytecode_cache.move_to_end(code_hash)
+            while len(_bytecode_cache) > BYTECODE_CACHE_SIZE:
+                _bytecode_cache.popitem(last=False)
+        return bytecode
+
+    def compile_code(self, code: str):
+        """
+        校验并编译Python代码
 
         Args:
             code: 要编译的Python代码
-            timeout: 超时时间（秒），None使用默认值
 
         Returns:
-            (success, main_func, error_message)
+            (success, bytecode, error_message)
         """
         # 验证代码
         is_valid, error_msg = self._validate_code(code)
         if not is_valid:
             return False, None, error_msg
 
-        # 设置超时
-        exec_timeout = timeout if timeout is not None else self.timeout
-
         try:
-            # 编译代码
-            byte_code = compile_restricted(code, filename="<inline>", mode="exec")
-
-            # RestrictedPython 8.1: 检查返回对象是否有 errors 属性
-            if hasattr(byte_code, "errors") and byte_code.errors:
-                error_msgs = "\n".join(byte_code.errors)
-                return False, None, f"代码编译错误: {error_msgs}"
-
-            # 准备执行环境（不注入context_vars，因为main函数参数由用户配置）
-            safe_globals = self._create_safe_globals({})
-            safe_locals = {}
-
-            # 定义编译函数
-            def _compile_in_thread():
-                # 重定向标准输出
-                stdout_capture = StringIO()
-                stderr_capture = StringIO()
-
-                # 设置内存限制（仅Unix系统）
-                old_memory_limit = None
-                if HAS_RESOURCE:
-                    try:
-                        # 保存当前内存限制
-                        old_memory_limit = resource.getrlimit(resource.RLIMIT_AS)
-                        # 设置新的内存限制
-                        success, error_msg = self._set_memory_limit(self.memory_limit_mb)
-                        if not success:
-                            self.service.logger.warning(f"无法设置内存限制: {error_msg}")
-                    except Exception as e:
-                        self.service.logger.warning(f"设置内存限制时出错: {e}")
-
-                try:
-                    # 重定向输出
-                    old_stdout = sys.stdout
-                    old_stderr = sys.stderr
-                    sys.stdout = stdout_capture
-                    sys.stderr = stderr_capture
-
-                    # 执行代码（定义main函数）
-                    # RestrictedPython 8.1: byte_code 可能是 code 对象本身，也可能是包装对象
-                    code_to_exec = byte_code.code if hasattr(byte_code, "code") else byte_code
-                    exec(code_to_exec, safe_globals, safe_locals)
-
-                    # 恢复输出
-                    sys.stdout = old_stdout
-                    sys.stderr = old_stderr
-
-                    # 获取输出
-                    stdout_output = stdout_capture.getvalue()
-                    stderr_output = stderr_capture.getvalue()
-
-                    # 查找main函数
-                    if "main" not in safe_locals:
-                        raise ValueError("代码中必须定义main函数")
-
-                    main_func = safe_locals["main"]
-                    if not callable(main_func):
-                        raise ValueError("main必须是一个可调用的函数")
-
-                    # 合并输出信息
-                    output_info = ""
-                    if stdout_output:
-                        output_info += f"标准输出:\n{stdout_output}\n"
-                    if stderr_output:
-                        output_info += f"标准错误:\n{stderr_output}\n"
-
-                    return main_func, output_info
-
-                finally:
-                    # 恢复内存限制
-                    if HAS_RESOURCE and old_memory_limit:
-                        try:
-                            resource.setrlimit(resource.RLIMIT_AS, old_memory_limit)
-                        except Exception as e:
-                            self.service.logger.warning(f"恢复内存限制时出错: {e}")
-
-            # 使用线程超时控制执行编译
-            success, result, exception = execute_with_timeout(_compile_in_thread, exec_timeout)
-
-            if not success:
-                if isinstance(exception, TimeoutError):
-                    return False, None, f"代码编译超时（{exec_timeout}秒）"
-                else:
-                    return False, None, f"编译错误: {str(exception)}"
-
-            main_func, output_info = result
-            return True, main_func, output_info
-
+            return True, self._get_bytecode(code), ""
+        except CodeCompileError as e:
+            return False, None, str(e)
         except Exception as e:
             return False, None, f"执行器错误: {str(e)}"
 
-    def execute_main(self, main_func, input_args: Dict[str, Any] = None, timeout: int = None):
+    def _run_in_sandbox(self, job: Dict[str, Any], timeout: int):
+        """在预创建的沙箱进程中执行，超时或超出 CPU 时间的进程会被直接终止"""
+        pool = get_sandbox_pool(
+            f"python_code_{self.memory_limit_mb}",
+            run_compiled_code,
+            size=SANDBOX_POOL_SIZE,
+            max_size=SANDBOX_MAX_SIZE or get_worker_concurrency(SANDBOX_POOL_SIZE),
+            memory_limit_mb=self.memory_limit_mb,
+            max_jobs_per_worker=SANDBOX_MAX_JOBS_PER_WORKER,
+            preload_modules=[SANDBOX_PRELOAD_MODULE],
+        )
+        try:
+            return True, pool.execute(job, timeout=timeout, cpu_limit=self.cpu_limit), ""
+        except SandboxUnavailableError:
+            logger.warning("[PythonCodeExecutor] sandbox unavailable, fallback to thread executor")
+            return self._run_in_thread(job, timeout)
+        except SandboxTimeoutError:
+            return False, None, f"main函数执行超时（{timeout}秒）"
+        except SandboxCrashedError as e:
+            if e.cpu_limit_exceeded:
+                return False, None, f"CPU时间超出限制（{self.cpu_limit}秒）"
+            return False, None, f"沙箱进程异常退出（exitcode={e.exitcode}）"
+
+    def _run_in_thread(self, job: Dict[str, Any], timeout: int):
+        """无法使用沙箱进程时降级为线程执行，超时的线程无法被终止"""
+        success, outcome, exception = execute_with_timeout(run_compiled_code, timeout, job)
+        if success:
+            return True, outcome, ""
+        if isinstance(exception, TimeoutError):
+            return False, None, f"main函数执行超时（{timeout}秒）"
+        return False, None, f"执行错误: {str(exception)}"
+
+    def execute_main(self, bytecode: bytes, input_args: Dict[str, Any] = None, timeout: int = None):
         """
-        执行main函数
+        加载编译后的代码并执行main函数
 
         Args:
-            main_func: main函数对象
+            bytecode: compile_code 返回的字节码
             input_args: 输入参数字典
             timeout: 超时时间（秒），None使用默认值
 
         Returns:
             (success, result, error_message)
+
+        Raises:
+            CodeCompileError: 代码加载失败，如未定义main函数
         """
-        if input_args is None:
-            input_args = {}
+        job = {
+            "bytecode": bytecode,
+            "input_args": input_args or {},
+            "memory_limit_mb": self.memory_limit_mb,
+        }
 
         # 设置超时
         exec_timeout = timeout if timeout is not None else self.timeout
 
         try:
-            # 定义执行函数
-            def _execute_in_thread():
-                # 重定向标准输出
-                stdout_capture = StringIO()
-                stderr_capture = StringIO()
-
-                # 设置内存限制（仅Unix系统）
-                old_memory_limit = None
-                if HAS_RESOURCE:
-                    try:
-                        # 保存当前内存限制
-                        old_memory_limit = resource.getrlimit(resource.RLIMIT_AS)
-                        # 设置新的内存限制
-                        success, error_msg = self._set_memory_limit(self.memory_limit_mb)
-                        if not success:
-                            self.service.logger.warning(f"无法设置内存限制: {error_msg}")
-                    except Exception as e:
-                        self.service.logger.warning(f"设置内存限制时出错: {e}")
-
-                try:
-                    # 重定向输出
-                    old_stdout = sys.stdout
-                    old_stderr = sys.stderr
-                    sys.stdout = stdout_capture
-                    sys.stderr = stderr_capture
-
-                    # 调用main函数
-                    result = main_func(**input_args)
-
-                    # 恢复输出
-                    sys.stdout = old_stdout
-                    sys.stderr = old_stderr
-
-                    # 获取输出
-                    stdout_output = stdout_capture.getvalue()
-                    stderr_output = stderr_capture.getvalue()
-
-                    # 验证返回值 - 不做类型限制，由用户自行决定
-                    # if not isinstance(result, dict):
-                    #     raise ValueError("main函数必须返回一个字典")
-
-                    # 合并输出信息
-                    output_info = ""
-                    if stdout_output:
-                        output_info += f"标准输出:\n{stdout_output}\n"
-                    if stderr_output:
-                        output_info += f"标准错误:\n{stderr_output}\n"
-
-                    return result, output_info
-
-                finally:
-                    # 恢复内存限制
-                    if HAS_RESOURCE and old_memory_limit:
-                        try:
-                            resource.setrlimit(resource.RLIMIT_AS, old_memory_limit)
-                        except Exception as e:
-                            self.service.logger.warning(f"恢复内存限制时出错: {e}")
-
-            # 使用线程超时控制执行main函数
-            success, result, exception = execute_with_timeout(_execute_in_thread, exec_timeout)
-
-            if not success:
-                if isinstance(exception, MemoryError):
-                    return False, None, f"内存使用超出限制（{self.memory_limit_mb}MB）"
-                elif isinstance(exception, TimeoutError):
-                    return False, None, f"main函数执行超时（{exec_timeout}秒）"
-                else:
-                    return False, None, f"执行错误: {str(exception)}"
-
-            main_result, output_info = result
-            return True, main_result, output_info
-
+            if SANDBOX_ENABLED:
+                success, outcome, error_msg = self._run_in_sandbox(job, exec_timeout)
+            else:
+                success, outcome, error_msg = self._run_in_thread(job, exec_timeout)
         except Exception as e:
             return False, None, f"执行器错误: {str(e)}"
 
+        if not success:
+            return False, None, error_msg
+
+        if not outcome["success"]:
+            if outcome["phase"] == "compile":
+                raise CodeCompileError(outcome["error"])
+            return False, None, outcome["error"]
+
+        return True, outcome["result"], outcome["output_info"]
+
+
+def _format_output_info(stdout_output: str, stderr_output: str) -> str:
+    output_info = ""
+    if stdout_output:
+        output_info += f"标准输出:\n{stdout_output}\n"
+    if stderr_output:
+        output_info += f"标准错误:\n{stderr_output}\n"
+    return output_info
+
+
+def run_compiled_code(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    加载字节码并调用main函数，运行在沙箱进程中，返回值需要能够被 pickle 序列化
+
+    Returns:
+        {"success": bool, "phase": "compile" | "execute", "result": Any, "output_info": str, "error": str}
+    """
+    stdout_capture = StringIO()
+    stderr_capture = StringIO()
+    old_stdout, old_stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = stdout_capture, stderr_capture
+
+    phase = "compile"
+    error = ""
+    result = None
+    try:
+        safe_globals = PythonCodeExecutor._create_safe_globals({})
+        safe_locals = {}
+        exec(marshal.loads(job["bytecode"]), safe_globals, safe_locals)
+
+        # 查找main函数
+        if "main" not in safe_locals:
+            raise ValueError("代码中必须定义main函数")
+        main_func = safe_locals["main"]
+        if not callable(main_func):
+            raise ValueError("main必须是一个可调用的函数")
+
+        phase = "execute"
+        result = main_func(**job["input_args"])
+        pickle.dumps(result)
+    except MemoryError:
+        error = f"内存使用超出限制（{job['memory_limit_mb']}MB）"
+    except Exception as e:
+        error = f"{'编译错误' if phase == 'compile' else '执行错误'}: {str(e)}"
+    finally:
+        sys.stdout, sys.stderr = old_stdout, old_stderr
+
+    if error:
+        return {"success": False, "phase": phase, "result": None, "output_info": "", "error": error}
+    return {
+        "success": True,
+        "phase": phase,
+        "result": result,
+        "output_info": _format_output_info(stdout_capture.getvalue(), stderr_capture.getvalue()),
+        "error": "",
+    }
+
 
 class PythonCodeService(BKFlowBaseService):
     """Python代码执行服务"""
@@ -616,9 +612,9 @@ class PythonCodeService(BKFlowBaseService):
             data.outputs.ex_data = error_msg
             return False
 
-        # 编译代码获取main函数
+        # 编译代码
         try:
-            success, main_func, compile_info = self.executor.compile_code(python_code)
+            success, bytecode, compile_info = self.executor.compile_code(python_code)
             if not success:
                 error_msg = compile_info or "代码编译失败"
                 self.logger.error(f"Python代码编译失败: {error_msg}")
@@ -647,7 +643,7 @@ class PythonCodeService(BKFlowBaseService):
 
         # 执行main函数
         try:
-            success, result, output_info = self.executor.execute_main(main_func, input_args=input_args)
+            success, result, output_info = self.executor.execute_main(bytecode, input_args=input_args)
 
             if success:
                 # 根据output_key提取结果
@@ -678,6 +674,11 @@ class PythonCodeService(BKFlowBaseService):
                 data.outputs.ex_data = error_msg
                 return False
 
+        except CodeCompileError as e:
+            error_msg = str(e)
+            self.logger.error(f"Python代码编译失败: {error_msg}")
+            data.outputs.ex_data = error_msg
+            return False
         except Exception as e:
             error_msg = f"执行器异常: {str(e)}"
             self.logger.exception(error_msg)
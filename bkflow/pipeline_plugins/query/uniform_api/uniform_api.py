@@ -31,7 +31,6 @@ from bkflow.pipeline_plugins.query.uniform_api.utils import (
     resolve_meta_url,
 )
 from bkflow.pipeline_plugins.query.utils import query_response_handler
-from bkflow.plugin.models import OpenPluginCatalogIndex
 from bkflow.plugin.services.open_plugin_catalog import OpenPluginCatalogService
 from bkflow.space.configs import (
     ApiGatewayCredentialConfig,
@@ -72,6 +71,7 @@ class UniformAPIListSerializer(UniformAPIBaseSerializer):
     category = serializers.CharField(required=False)
     key = serializers.CharField(required=False)
     api_name = serializers.CharField(required=False)
+    cursor = serializers.CharField(required=False, help_text="本地目录游标分页，传入上一页返回的 next_cursor")
 
 
 class UniformAPIMetaSerializer(UniformAPIBaseSerializer):
@@ -167,62 +167,43 @@ def _attach_source_key(response_data, config_key, source_key):
     }
 
 
-def _build_cached_catalog_data(plugins, request_data, config_key, plugin_source=None):
-    visible_plugins = [
-        plugin
-        for plugin in plugins
-        if plugin.get("status") == OpenPluginCatalogIndex.Status.AVAILABLE
-        and plugin.get("enabled") is True
-        and (not plugin_source or plugin.get("plugin_source") == plugin_source)
-    ]
+def _format_cached_plugin(plugin):
+    return {
+        "id": plugin.plugin_id,
+        "name": plugin.plugin_name,
+        "plugin_source": plugin.plugin_source,
+        "plugin_code": plugin.plugin_code,
+        "wrapper_version": plugin.wrapper_version,
+        "default_version": plugin.default_version,
+        "latest_version": plugin.latest_version,
+        "versions": plugin.versions,
+        "meta_url_template": plugin.meta_url_template,
+        "source_key": plugin.source_key,
+        "category": plugin.group_name,
+        "category_name": plugin.group_display_name or plugin.group_name,
+        "description": plugin.description,
+    }
 
+
+def _build_cached_catalog_data(space_id, source_key, request_data, config_key, plugin_source=None):
+    """从本地目录索引读取插件分组或列表，过滤、关键字检索和分页均在数据库中完成"""
     if config_key == UniformApiConfig.Keys.API_CATEGORIES.value:
-        categories = {
-            plugin["group_name"]: plugin.get("group_display_name") or plugin["group_name"]
-            for plugin in visible_plugins
-            if plugin.get("group_name")
-        }
-        return [{"id": "all", "name": "全部"}] + [
-            {"id": category, "name": categories[category]} for category in sorted(categories)
-        ]
-
-    category = request_data.get("category")
-    if category and category != "all":
-        visible_plugins = [plugin for plugin in visible_plugins if plugin.get("group_name") == category]
-
-    keyword = str(request_data.get("key") or "").strip().casefold()
-    if keyword:
-        visible_plugins = [
-            plugin
-            for plugin in visible_plugins
-            if any(
-                keyword in str(plugin.get(field) or "").casefold()
-                for field in ("plugin_id", "plugin_name", "plugin_code")
-            )
-        ]
-
-    api_list = [
-        {
-            "id": plugin["plugin_id"],
-            "name": plugin["plugin_name"],
-            "plugin_source": plugin["plugin_source"],
-            "plugin_code": plugin["plugin_code"],
-            "wrapper_version": plugin["wrapper_version"],
-            "default_version": plugin["default_version"],
-            "latest_version": plugin["latest_version"],
-            "versions": plugin["versions"],
-            "meta_url_template": plugin["meta_url_template"],
-            "source_key": plugin["source_key"],
-            "category": plugin.get("group_name", ""),
-            "category_name": plugin.get("group_display_name") or plugin.get("group_name", ""),
-            "description": plugin.get("description", ""),
-        }
-        for plugin in visible_plugins
-    ]
-    total = len(api_list)
-    offset = max(request_data.get("offset", 0), 0)
-    limit = max(request_data.get("limit", 50), 0)
-    return {"total": total, "apis": api_list[offset : offset + limit]}
+        categories = OpenPluginCatalogService.list_visible_categories(
+            space_id=space_id, source_key=source_key, plugin_source=plugin_source
+        )
+        return [{"id": "all", "name": "全部"}] + [{"id": group, "name": name} for group, name in categories]
+
+    plugins, total, next_cursor = OpenPluginCatalogService.search_visible_plugins(
+        space_id=space_id,
+        source_key=source_key,
+        plugin_source=plugin_source,
+        category=request_data.get("category"),
+        keyword=request_data.get("key"),
+        limit=request_data.get("limit", 50),
+        offset=request_data.get("offset", 0),
+        cursor=request_data.get("cursor"),
+    )
+    return {"total": total, "apis": [_format_cached_plugin(plugin) for plugin in plugins], "next_cursor": next_cursor}
 
 
 def _request_remote_uniform_api_data(
@@ -303,8 +284,22 @@ def _get_space_uniform_api_list_info(
         raise ValidationError("对应API未配置, 请联系对应接入平台管理员")
 
     source_key = api_entry.source_key or api_name
+    plugin_source = _extract_plugin_source(url)
 
     if api_entry.catalog_mode == UniformAPICatalogMode.REMOTE:
+        # 本地目录在同步有效期内直接读取，否则回源远端并触发一次同步
+        if OpenPluginCatalogService.is_catalog_fresh(
+            space_id=space_id, source_key=source_key
+        ) and OpenPluginCatalogService.is_catalog_initialized(
+            space_id=space_id, source_key=source_key, plugin_source=plugin_source
+        ):
+            return _build_cached_catalog_data(
+                space_id=space_id,
+                source_key=source_key,
+                request_data=request_data,
+                config_key=config_key,
+                plugin_source=plugin_source,
+            )
         response_data = _request_remote_uniform_api_data(
             space_id=space_id,
             request_data=request_data,
@@ -314,19 +309,19 @@ def _get_space_uniform_api_list_info(
             template_id=template_id,
             task_id=task_id,
         )
+        _dispatch_catalog_sync(space_id=space_id, source_key=source_key)
         return _attach_source_key(response_data, config_key, source_key)
 
     request_scope = _get_request_scope(space_id=space_id, template_id=template_id, task_id=task_id)
-    plugin_source = _extract_plugin_source(url)
 
     if OpenPluginCatalogService.is_catalog_initialized(
         space_id=space_id,
         source_key=source_key,
         plugin_source=plugin_source,
     ):
-        plugins = OpenPluginCatalogService.list_space_plugins(space_id=space_id, source_key=source_key)
         return _build_cached_catalog_data(
-            plugins=plugins,
+            space_id=space_id,
+            source_key=source_key,
             request_data=request_data,
             config_key=config_key,
             plugin_source=plugin_source,
@@ -102,8 +102,9 @@ def compute_sorted_list_by_order(orders, dummy_nums_dict):
     # 根据orders 的顺序得到, 得到节点和网关的排序
     result = []
     for _, nodes in orders.items():
+        layer_nodes = set(nodes)
         for node_id in dummy_nums_dict.keys():
-            if node_id in nodes:
+            if node_id in layer_nodes:
                 result.append(node_id)
     return result
 
@@ -0,0 +1,105 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import random
+
+from bkflow.pipeline_web.constants import PWE
+from bkflow.pipeline_web.drawing_new.utils import add_flow_id_to_node_io
+
+# 单个串行片段的最大节点数
+MAX_SEQUENCE_LENGTH = 6
+# 并行网关的最大嵌套层数
+MAX_BRANCH_DEPTH = 4
+
+
+def generate_pipeline_tree(node_count, seed=0, branch_prob=0.2, loop_prob=0.05):
+    """
+    @summary: 生成用于自动排版基准测试的流程树，由串行节点、嵌套的并行网关和带回环的分支网关组成
+    @param node_count: 任务节点数量
+    @param seed: 随机种子，相同参数生成的流程树一致
+    @param branch_prob: 每个位置生成并行网关的概率
+    @param loop_prob: 每个任务节点后生成回环分支网关的概率
+    @return:
+    """
+    rnd = random.Random(seed)
+    pipeline = {
+        PWE.activities: {},
+        PWE.gateways: {},
+        PWE.flows: {},
+        PWE.constants: {},
+        PWE.outputs: [],
+    }
+    nodes = {}
+    counter = [0]
+    remaining = [node_count]
+    history = []
+
+    def uniqid(prefix):
+        counter[0] += 1
+        return "{}{:028d}".format(prefix, counter[0])
+
+    def add_node(node_type, category, incoming, outgoing, **kwargs):
+        node = {PWE.id: uniqid("node"), PWE.type: node_type, PWE.name: "", PWE.incoming: incoming}
+        node[PWE.outgoing] = outgoing
+        node.update(kwargs)
+        nodes[node[PWE.id]] = node
+        if category:
+            pipeline[category][node[PWE.id]] = node
+        return node[PWE.id]
+
+    def add_flow(source, target):
+        flow_id = uniqid("line")
+        pipeline[PWE.flows][flow_id] = {PWE.id: flow_id, PWE.source: source, PWE.target: target, "is_default": False}
+        add_flow_id_to_node_io(nodes[source], flow_id, PWE.outgoing)
+        add_flow_id_to_node_io(nodes[target], flow_id, PWE.incoming)
+
+    def add_sequence(prev, depth):
+        for _ in range(rnd.randint(1, MAX_SEQUENCE_LENGTH)):
+            if remaining[0] <= 0:
+                break
+            if depth < MAX_BRANCH_DEPTH and remaining[0] > 4 and rnd.random() < branch_prob:
+                converge_id = add_node(PWE.ConvergeGateway, PWE.gateways, [], "")
+                parallel_id = add_node(PWE.ParallelGateway, PWE.gateways, [], [], converge_gateway_id=converge_id)
+                add_flow(prev, parallel_id)
+                for _ in range(rnd.randint(2, 4)):
+                    add_flow(add_sequence(parallel_id, depth + 1), converge_id)
+                prev = converge_id
+                continue
+
+            remaining[0] -= 1
+            act_id = add_node(PWE.ServiceActivity, PWE.activities, [], "", component={"code": "pause_node", "data": {}})
+            add_flow(prev, act_id)
+            prev = act_id
+            if history and rnd.random() < loop_prob:
+                gateway_id = add_node(PWE.ExclusiveGateway, PWE.gateways, [], [], conditions={})
+                add_flow(act_id, gateway_id)
+                add_flow(gateway_id, rnd.choice(history))
+                prev = gateway_id
+            history.append(act_id)
+        return prev
+
+    start_id = add_node(PWE.EmptyStartEvent, None, "", "")
+    end_id = add_node(PWE.EmptyEndEvent, None, [], "")
+    prev = start_id
+    while remaining[0] > 0:
+        prev = add_sequence(prev, 0)
+    add_flow(prev, end_id)
+
+    pipeline[PWE.start_event] = nodes[start_id]
+    pipeline[PWE.end_event] = nodes[end_id]
+    return pipeline
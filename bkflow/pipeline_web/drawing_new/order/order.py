@@ -19,8 +19,6 @@ to the current version of the project delivered to anyone in the future.
 """
 
 
-from copy import deepcopy
-
 from pipeline.validators.utils import format_to_list
 
 from bkflow.pipeline_web.constants import PWE
@@ -39,11 +37,14 @@ def ordering(pipeline, ranks):
     @return:
     """
     orders = init_order(pipeline, ranks)
-    best = deepcopy(orders)
-    best_count = crossing_count(pipeline, best)
+    # wmedian 只会替换层级列表而不会原地修改，浅拷贝即可保存当前排序
+    best = dict(orders)
+    # 迭代过程中每层包含的顶点不变，相邻层之间的边只需要计算一次
+    layer_flows = get_layer_flows(pipeline, orders)
+    best_count = count_layer_flows_crossing(layer_flows, best)
     for loop in range(MAX_ORDERING_LOOP):
         wmedian(pipeline, orders, loop, ranks)
-        if crossing_count(pipeline, orders) < best_count:
+        if count_layer_flows_crossing(layer_flows, orders) < best_count:
             best = orders
         elif loop % 2 == 0:
             break
@@ -59,24 +60,40 @@ def init_order(pipeline, ranks):
     """
     orders = {rk: [] for rk in set(ranks.values())}
     rk = min_rank(ranks)
+    max_rk = max_rank(ranks)
     orders[rk] = [node_id for node_id, node_rk in ranks.items() if node_rk == rk]
 
-    while rk < max_rank(ranks):
+    while rk < max_rk:
         next_layer_rk = rk + MIN_LEN
+        next_layer = orders[next_layer_rk]
+        next_layer_nodes = set(next_layer)
         for node_id in orders[rk]:
             node = pipeline["all_nodes"][node_id]
             for flow_id in format_to_list(node[PWE.outgoing]):
                 flow = pipeline[PWE.flows][flow_id]
-                if flow[PWE.target] not in orders[next_layer_rk]:
+                if flow[PWE.target] not in next_layer_nodes:
+                    next_layer_nodes.add(flow[PWE.target])
                     if flow.get("type") == "DummyFlow":
-                        orders[next_layer_rk].insert(0, flow[PWE.target])
+                        next_layer.insert(0, flow[PWE.target])
                     else:
-                        orders[next_layer_rk].append(flow[PWE.target])
+                        next_layer.append(flow[PWE.target])
         rk = next_layer_rk
 
     return orders
 
 
+def layer_positions(layer_order):
+    """
+    @summary: 生成层级内顶点到位置的映射，顶点重复出现时取第一次出现的位置
+    @param layer_order:
+    @return:
+    """
+    positions = {}
+    for index, node_id in enumerate(layer_order):
+        positions.setdefault(node_id, index)
+    return positions
+
+
 def wmedian(pipeline, orders, loop, ranks):
     """
     @summary: 启发式加权中位数算法计算相邻层级内顶点权重
@@ -90,17 +107,17 @@ def wmedian(pipeline, orders, loop, ranks):
     max_rk = max_rank(ranks)
     if loop % 2 == 0:
         for r in range(min_rk + MIN_LEN, max_rk + MIN_LEN, MIN_LEN):
-            median_r = []
-            for node_id in orders[r]:
-                refer_nodes = refer_node_ids(pipeline, node_id, PWE.incoming)
-                median_r.append(median_value(refer_nodes, orders[r - MIN_LEN]))
+            refer_positions = layer_positions(orders[r - MIN_LEN])
+            median_r = [
+                _median_value(refer_node_ids(pipeline, node_id, PWE.incoming), refer_positions) for node_id in orders[r]
+            ]
             orders[r] = sort_layer(orders[r], median_r)
     else:
         for r in range(max_rk - MIN_LEN, min_rk - MIN_LEN, -MIN_LEN):
-            median_r = []
-            for node_id in orders[r]:
-                refer_nodes = refer_node_ids(pipeline, node_id, PWE.outgoing)
-                median_r.append(median_value(refer_nodes, orders[r + MIN_LEN]))
+            refer_positions = layer_positions(orders[r + MIN_LEN])
+            median_r = [
+                _median_value(refer_node_ids(pipeline, node_id, PWE.outgoing), refer_positions) for node_id in orders[r]
+            ]
             orders[r] = sort_layer(orders[r], median_r)
 
 
@@ -120,7 +137,11 @@ def median_value(refer_nodes, refer_layer_orders):
     @param refer_layer_orders:
     @return:
     """
-    layer_orders_index = sorted([refer_layer_orders.index(ref) for ref in refer_nodes])
+    return _median_value(refer_nodes, layer_positions(refer_layer_orders))
+
+
+def _median_value(refer_nodes, refer_positions):
+    layer_orders_index = sorted([refer_positions[ref] for ref in refer_nodes])
     refer_len = len(layer_orders_index)
     # 没有相邻顶点的节点中位数值被设置为-1，让这些节点维持原来位置
     if refer_len == 0:
@@ -156,26 +177,63 @@ def sort_layer(layer_order, weight):
 
 
 def crossing_count(pipeline, orders):
+    return count_layer_flows_crossing(get_layer_flows(pipeline, orders), orders)
+
+
+def get_layer_flows(pipeline, orders):
+    """
+    @summary: 获取每一层到下一层的边，只与每层包含哪些顶点有关，与层级内顺序无关
+    @param pipeline:
+    @param orders:
+    @return: {rk: [(source, target)]}
+    """
+    min_rk = min(orders.keys())
+    max_rk = max(orders.keys())
+    node_layers = {}
+    for rk, layer_order in orders.items():
+        for node_id in layer_order:
+            node_layers.setdefault(node_id, set()).add(rk)
+
+    layer_flows = {rk: [] for rk in range(min_rk, max_rk, MIN_LEN)}
+    for flow in pipeline[PWE.flows].values():
+        target_layers = node_layers.get(flow[PWE.target])
+        if not target_layers:
+            continue
+        for rk in node_layers.get(flow[PWE.source], ()):
+            if rk in layer_flows and rk + MIN_LEN in target_layers:
+                layer_flows[rk].append((flow[PWE.source], flow[PWE.target]))
+    return layer_flows
+
+
+def count_layer_flows_crossing(layer_flows, orders):
+    """
+    @summary: 使用累加树计算相邻层之间边的交叉数，复杂度 O(E log V)
+        参考《Simple and Efficient Bilayer Cross Counting》
+    @param layer_flows: get_layer_flows 的返回
+    @param orders:
+    @return:
+    """
     count = 0
-    for rk in range(min(list(orders.keys())), max(list(orders.keys())), MIN_LEN):
-        current_layer_nodes = orders[rk]
-        next_layer_nodes = orders[rk + MIN_LEN]
-        current_layer_flows = [
-            flow
-            for flow in pipeline[PWE.flows].values()
-            if flow[PWE.source] in current_layer_nodes and flow[PWE.target] in next_layer_nodes
-        ]
-        if len(current_layer_flows) >= 2:
-            for flow_index in range(len(current_layer_flows) - 1):
-                first_flow = current_layer_flows[flow_index]
-                first_source_index = current_layer_nodes.index(first_flow[PWE.source])
-                first_target_index = next_layer_nodes.index(first_flow[PWE.target])
-
-                for next_flow_index in range(flow_index + 1, len(current_layer_flows)):
-                    next_flow = current_layer_flows[next_flow_index]
-                    next_source_index = current_layer_nodes.index(next_flow[PWE.source])
-                    next_target_index = next_layer_nodes.index(next_flow[PWE.target])
-                    # 起始点次序不一致说明有交叉
-                    if (first_source_index - next_source_index) * (first_target_index - next_target_index) < 0:
-                        count += 1
+    for rk, flows in layer_flows.items():
+        if len(flows) < 2:
+            continue
+        source_positions = layer_positions(orders[rk])
+        target_positions = layer_positions(orders[rk + MIN_LEN])
+        # 按起点位置排序后，终点位置的逆序对即为交叉的边，起点或终点相同的边不算交叉
+        edges = sorted((source_positions[source], target_positions[target]) for source, target in flows)
+
+        first_index = 1
+        while first_index < len(target_positions):
+            first_index *= 2
+        tree = [0] * (2 * first_index - 1)
+        first_index -= 1
+        for _, target_index in edges:
+            index = target_index + first_index
+            tree[index] += 1
+            while index > 0:
+                # 左子节点的累加值对应终点位置更小的边，右子节点则是终点位置更大的边
+                if index % 2:
+                    count += tree[index + 1]
+                index = (index - 1) // 2
+                tree[index] += 1
     return count
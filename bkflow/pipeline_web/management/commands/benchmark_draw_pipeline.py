@@ -0,0 +1,67 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import time
+from copy import deepcopy
+
+from django.core.management.base import BaseCommand
+
+from bkflow.pipeline_web.drawing_new.drawing import draw_pipeline
+from bkflow.pipeline_web.drawing_new.generator import generate_pipeline_tree
+
+
+class Command(BaseCommand):
+    help = "使用生成的流程树测试自动排版 draw_pipeline 的耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[50, 100, 300, 500],
+            help="任务节点数量，可指定多个",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="随机种子",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="每种规模的重复次数，取最小耗时",
+        )
+
+    def handle(self, *args, **options):
+        repeat = max(options["repeat"], 1)
+        self.stdout.write(f"{'activities':>10} {'nodes':>8} {'flows':>8} {'best(s)':>10} {'avg(s)':>10}")
+        for size in options["sizes"]:
+            pipeline = generate_pipeline_tree(size, seed=options["seed"])
+            elapsed = []
+            for _ in range(repeat):
+                pipeline_copy = deepcopy(pipeline)
+                start = time.perf_counter()
+                draw_pipeline(pipeline_copy)
+                elapsed.append(time.perf_counter() - start)
+            node_count = len(pipeline["activities"]) + len(pipeline["gateways"]) + 2
+            self.stdout.write(
+                f"{size:>10} {node_count:>8} {len(pipeline['flows']):>8} "
+                f"{min(elapsed):>10.3f} {sum(elapsed) / repeat:>10.3f}"
+            )
@@ -38,10 +38,25 @@ def format_web_data_to_pipeline(web_pipeline: dict, is_subprocess: bool = False)
     :param is_subprocess: 是否是子流程的 tree
     :return: bamboo pipeline tree
     """
+    # 只在入口复制一次，子流程在副本上原地格式化，不再重复复制
     pipeline_tree = copy.deepcopy(web_pipeline)
+    _format_pipeline_tree(pipeline_tree, is_subprocess, reference_cache={})
+    return pipeline_tree
+
+
+def _format_pipeline_tree(pipeline_tree: dict, is_subprocess: bool, reference_cache: dict):
+    """
+    原地将 pipeline web tree 格式化为 bamboo pipeline tree
+
+    :param pipeline_tree: pipeline web tree 的副本
+    :param is_subprocess: 是否是子流程的 tree
+    :param reference_cache: 变量引用解析结果缓存，整棵树（包括子流程）共享
+    """
     constants = pipeline_tree.pop("constants")
     # classify inputs and outputs
-    classification = classify_constants(constants, is_subprocess)
+    classification = classify_constants(constants, is_subprocess, reference_cache=reference_cache)
+    data_inputs = classification["data_inputs"]
+    data_inputs_order = {key: index for index, key in enumerate(data_inputs)}
 
     pipeline_tree["data"] = {
         "inputs": classification["data_inputs"],
@@ -60,8 +75,7 @@ def format_web_data_to_pipeline(web_pipeline: dict, is_subprocess: bool = False)
                     "need_render": False,
                 }
 
-            all_inputs = format_data_to_pipeline_inputs(act_data, classification["data_inputs"])
-            act["component"]["inputs"] = {key: value for key, value in list(all_inputs.items()) if key in act_data}
+            act["component"]["inputs"] = _format_act_inputs(act_data, data_inputs, data_inputs_order, reference_cache)
             act["component"]["global_outputs"] = classification["acts_outputs"].get(act_id, {})
 
             # old web field process
@@ -126,7 +140,7 @@ def format_web_data_to_pipeline(web_pipeline: dict, is_subprocess: bool = False)
                     # 注入处理need_render
                     parent_params[key]["need_render"] = info.get("need_render", True)
             act["params"] = parent_params
-            act["pipeline"] = format_web_data_to_pipeline(act["pipeline"], is_subprocess=True)
+            _format_pipeline_tree(act["pipeline"], is_subprocess=True, reference_cache=reference_cache)
         else:
             raise exceptions.FlowTypeError("Unknown Activity type: %s" % act["type"])
 
@@ -138,7 +152,53 @@ def format_web_data_to_pipeline(web_pipeline: dict, is_subprocess: bool = False)
 
     format_node_io_to_list(pipeline_tree["end_event"], o=False)
 
-    return pipeline_tree
+
+def _format_act_inputs(act_data: dict, data_inputs: dict, data_inputs_order: dict, reference_cache: dict) -> dict:
+    """
+    将节点数据转换成节点 inputs，与 format_data_to_pipeline_inputs 结果一致，但只复制节点用到的全局变量
+
+    :param act_data: 节点数据
+    :param data_inputs: 流程的 data inputs
+    :param data_inputs_order: data inputs 中各个 key 的顺序
+    :param reference_cache: 变量引用解析结果缓存
+    """
+    shared_keys = []
+    act_inputs = {}
+    for key, info in act_data.items():
+        # is_param和need_render禁止同时为True
+        if info.get("is_param") and info.get("need_render"):
+            raise exceptions.DataException("is_param and need_render cannot be selected at the same time")
+        if key in data_inputs_order:
+            shared_keys.append(key)
+            continue
+        act_inputs[key] = {
+            "type": get_constant_type(info["value"], reference_cache),
+            "value": info["value"],
+            "is_param": info.get("is_param", False),
+            "need_render": info.get("need_render", True),
+        }
+
+    if not shared_keys:
+        return act_inputs
+    # 与全局变量同名的 key 使用全局变量的定义，并排在前面
+    inputs = {key: copy.deepcopy(data_inputs[key]) for key in sorted(shared_keys, key=data_inputs_order.get)}
+    inputs.update(act_inputs)
+    return inputs
+
+
+def get_constant_type(value, reference_cache: dict = None) -> str:
+    """
+    根据变量值是否引用了其他变量判断变量类型
+
+    :param value: 变量值
+    :param reference_cache: 解析结果缓存，只缓存字符串类型的值
+    :return: splice 或 plain
+    """
+    if reference_cache is None or not isinstance(value, str):
+        return "splice" if Template(value).get_reference() else "plain"
+    if value not in reference_cache:
+        reference_cache[value] = "splice" if Template(value).get_reference() else "plain"
+    return reference_cache[value]
 
 
 def get_pre_render_mako_keys(constants: dict) -> set:
@@ -160,13 +220,14 @@ def get_pre_render_mako_keys(constants: dict) -> set:
     return pre_render_inputs_keys
 
 
-def classify_constants(constants: dict, is_subprocess: bool):
+def classify_constants(constants: dict, is_subprocess: bool, reference_cache: dict = None):
     """
     将 pipeline web tree 中的 constants 字段转换成
     bamboo pipeline tree 中的 data inputs 和节点输出的<节点ID:key -> data key>信息
 
     :param constants: pipeline web tree
     :param is_subprocess: 是否是子流程的 tree
+    :param reference_cache: 变量引用解析结果缓存
     :return: bamboo pipeline tree 中的 data inputs 和节点输出的<节点ID:key -> data key>信息
     """
     # pipeline tree inputs
@@ -218,8 +279,7 @@ def classify_constants(constants: dict, is_subprocess: bool):
                 "is_param": info["is_param"],
             }
         else:
-            ref = Template(info["value"]).get_reference()
-            constant_type = "splice" if ref else "plain"
+            constant_type = get_constant_type(info["value"], reference_cache)
             is_param = info["show_type"] == "show" and is_subprocess
             data_inputs[key] = {"type": constant_type, "value": info["value"], "is_param": is_param}
 
@@ -238,8 +298,7 @@ def format_data_to_pipeline_inputs(data: dict, pipeline_inputs: dict, change_pip
     """
     ret = copy.deepcopy(pipeline_inputs) if not change_pipeline_inputs else pipeline_inputs
     for key, info in list(data.items()):
-        ref = Template(info["value"]).get_reference()
-        constant_type = "splice" if ref else "plain"
+        constant_type = get_constant_type(info["value"])
         # is_param和need_render禁止同时为True
         if info.get("is_param") and info.get("need_render"):
             raise exceptions.DataException("is_param and need_render cannot be selected at the same time")
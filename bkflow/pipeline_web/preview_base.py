@@ -128,7 +128,6 @@ class PipelineTemplateWebPreviewer:
 
     @staticmethod
     def _try_to_ignore_parallel(parallel, converge_id, lines, locations, pipeline_tree):
-
         ignore_whole_parallel = True
         converge = pipeline_tree[PE.gateways][converge_id]
         parallel_outgoing = deepcopy(parallel[PE.outgoing])
@@ -197,7 +196,6 @@ class PipelineTemplateWebPreviewer:
 
     @staticmethod
     def _ignore_act(act, locations, lines, pipeline_tree):
-
         # change next_node's incoming: task node、control node is different
         # change incoming_flow's target to next node
         # delete outgoing_flow
@@ -324,13 +322,10 @@ class PipelineTemplateWebPreviewer:
         converges = validate_gateways(copy_tree)
 
         while True:
-
             gateway_count = len(pipeline_tree[PE.gateways])
 
             for converge_id, converged_list in list(converges.items()):
-
                 for converged in converged_list:
-
                     gateway = pipeline_tree[PE.gateways].get(converged)
 
                     if not gateway:  # had been removed
@@ -355,13 +350,14 @@ class PipelineTemplateWebPreviewer:
                 break
 
     @staticmethod
-    def is_circular_reference(pipeline_tree, current_template_id, space_id, scope_type, scope_value):
+    def load_reference_graph(root_template_ids, space_id, scope_type, scope_value, exclude_template_ids=None):
         """
-        检查子流程模板是否存在循环依赖
+        从给定模板出发逐层加载可达的子流程引用关系，每层只查询当前层模板的引用，不扫描整个空间
+        @param root_template_ids: 起始模板 ID 列表
+        @param exclude_template_ids: 不需要展开引用关系的模板 ID，如正在编辑的模板
+        @return: {template_id: [subprocess_template_id, ...]}
         """
-
         templates = Template.objects.filter(space_id=space_id, is_deleted=False)
-
         if scope_type is not None:
             templates = templates.filter(scope_type=scope_type)
         if scope_value is not None:
@@ -369,48 +365,76 @@ class PipelineTemplateWebPreviewer:
         if scope_type is None and scope_value is None:
             templates = templates.filter(scope_type__isnull=True, scope_value__isnull=True)
 
-        template_ids = list(templates.values_list("id", flat=True))
-        template_refs = TemplateReference.objects.filter(root_template_id__in=template_ids).values(
-            "root_template_id", "subprocess_template_id"
+        graph = {template_id: [] for template_id in exclude_template_ids or []}
+        frontier = {int(template_id) for template_id in root_template_ids} - set(graph)
+        while frontier:
+            for template_id in frontier:
+                graph[template_id] = []
+            scoped_ids = templates.filter(id__in=frontier).values_list("id", flat=True)
+            template_refs = TemplateReference.objects.filter(
+                root_template_id__in=[str(template_id) for template_id in scoped_ids]
+            ).values_list("root_template_id", "subprocess_template_id")
+            next_frontier = set()
+            for root_id, sub_id in template_refs:
+                graph[int(root_id)].append(int(sub_id))
+                if int(sub_id) not in graph:
+                    next_frontier.add(int(sub_id))
+            frontier = next_frontier
+        return graph
+
+    @staticmethod
+    def is_circular_reference(pipeline_tree, current_template_id, space_id, scope_type, scope_value):
+        """
+        检查子流程模板是否存在循环依赖
+        """
+        subprocess_nodes = [
+            (act_key, act_value)
+            for act_key, act_value in pipeline_tree.get("activities", {}).items()
+            if act_value.get(PWE.type) == PWE.SubProcess
+        ]
+        if not subprocess_nodes:
+            return {"has_cycle": False}
+
+        current_template_id = int(current_template_id) if current_template_id else None
+        sub_template_map = PipelineTemplateWebPreviewer.load_reference_graph(
+            [act_value["template_id"] for _, act_value in subprocess_nodes],
+            space_id,
+            scope_type,
+            scope_value,
+            exclude_template_ids=[current_template_id] if current_template_id else None,
         )
 
-        sub_template_map = {}
-        for ref in template_refs:
-            root_id = ref["root_template_id"]
-            sub_id = int(ref["subprocess_template_id"])
-            if root_id not in sub_template_map:
-                sub_template_map[root_id] = []
-            sub_template_map[root_id].append(sub_id)
+        # 已确认不会回到访问路径上的模板，避免在共享子流程较多时重复遍历
+        acyclic_templates = set()
 
-        def has_cycle_from_template(disclose_template_id, visited):
-            if disclose_template_id in visited:
+        def has_cycle_from_template(disclose_template_id, visiting):
+            if disclose_template_id in visiting:
                 return True
-            visited.add(disclose_template_id)
+            if disclose_template_id in acyclic_templates:
+                return False
+            visiting.add(disclose_template_id)
 
-            sub_refs = sub_template_map.get(str(disclose_template_id), [])
-
-            for sub_id in sub_refs:
-                if has_cycle_from_template(sub_id, visited):
+            for sub_id in sub_template_map.get(disclose_template_id, []):
+                if has_cycle_from_template(sub_id, visiting):
                     return True
-            visited.remove(disclose_template_id)
+            visiting.remove(disclose_template_id)
+            acyclic_templates.add(disclose_template_id)
 
             return False
 
-        activities = pipeline_tree.get("activities", {})
-        visited_templates = set()
+        visiting_templates = set()
         if current_template_id:
-            visited_templates.add(current_template_id)
-
-        for act_key, act_value in activities.items():
-            if act_value.get(PWE.type) == PWE.SubProcess:
-                template_id = act_value["template_id"]
-                if has_cycle_from_template(template_id, visited_templates):
-                    return {
-                        "has_cycle": True,
-                        "node_key": act_key,
-                        "node_name": act_value.get("name"),
-                        "template_id": template_id,
-                    }
+            visiting_templates.add(current_template_id)
+
+        for act_key, act_value in subprocess_nodes:
+            template_id = act_value["template_id"]
+            if has_cycle_from_template(int(template_id), visiting_templates):
+                return {
+                    "has_cycle": True,
+                    "node_key": act_key,
+                    "node_name": act_value.get("name"),
+                    "template_id": template_id,
+                }
 
         return {"has_cycle": False}
 
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:32
+
+from django.db import migrations, models
+
+
+def fill_search_text(apps, schema_editor):
+    OpenPluginCatalogIndex = apps.get_model("plugin", "OpenPluginCatalogIndex")
+    to_update = []
+    for item in OpenPluginCatalogIndex.objects.only("id", "plugin_id", "plugin_name", "plugin_code").iterator():
+        item.search_text = "\n".join(
+            str(value or "").casefold() for value in (item.plugin_id, item.plugin_name, item.plugin_code)
+        )
+        to_update.append(item)
+    OpenPluginCatalogIndex.objects.bulk_update(to_update, ["search_text"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plugin", "0007_add_catalog_group_display_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="openplugincatalogindex",
+            name="search_text",
+            field=models.TextField(blank=True, default="", verbose_name="关键字检索内容"),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="openplugincatalogindex",
+            index=models.Index(
+                fields=["space_id", "source_key", "status", "plugin_name", "id"], name="plugin_open_catalog_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="openplugincatalogindex",
+            index=models.Index(
+                fields=["space_id", "source_key", "status", "group_name", "plugin_name", "id"],
+                name="plugin_open_catalog_group_idx",
+            ),
+        ),
+    ]
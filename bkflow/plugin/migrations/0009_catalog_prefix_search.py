@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("plugin", "0008_catalog_search_index"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="openplugincatalogindex",
+            name="search_text",
+        ),
+        migrations.AddIndex(
+            model_name="openplugincatalogindex",
+            index=models.Index(fields=["space_id", "source_key", "plugin_code"], name="plugin_open_catalog_code_idx"),
+        ),
+    ]
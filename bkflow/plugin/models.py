@@ -99,6 +99,16 @@ class OpenPluginCatalogIndex(models.Model):
         indexes = [
             models.Index(fields=["space_id", "source_key"], name="plugin_open_space_i_7102c4_idx"),
             models.Index(fields=["space_id", "status"], name="plugin_open_space_i_2c81d6_idx"),
+            # 插件选择器按名称排序分页，分别覆盖全部分组与指定分组两种查询
+            models.Index(
+                fields=["space_id", "source_key", "status", "plugin_name", "id"], name="plugin_open_catalog_name_idx"
+            ),
+            models.Index(
+                fields=["space_id", "source_key", "status", "group_name", "plugin_name", "id"],
+                name="plugin_open_catalog_group_idx",
+            ),
+            # 关键字按插件编码前缀检索，插件 ID 前缀检索由唯一索引覆盖
+            models.Index(fields=["space_id", "source_key", "plugin_code"], name="plugin_open_catalog_code_idx"),
         ]
 
     def __str__(self):
@@ -17,10 +17,16 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 
+import base64
+import json
 import logging
 
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
 
+from bkflow.constants import SpaceCacheResource
 from bkflow.exceptions import APIResponseError, ValidationError
 from bkflow.pipeline_plugins.query.uniform_api.utils import UniformAPIClient
 from bkflow.plugin.models import (
@@ -34,9 +40,33 @@ from bkflow.space.configs import (
     UniformAPIConfigHandler,
 )
 from bkflow.space.models import Credential, SpaceConfig
+from bkflow.space.utils import invalidate_engine_space_cache
+from bkflow.utils import redis_cache
 
 logger = logging.getLogger(__name__)
 
+# 目录刷新时单条批量 SQL 写入的记录数上限
+CATALOG_WRITE_BATCH_SIZE = 500
+
+# 同步时需要与来源保持一致的目录字段
+CATALOG_SYNC_FIELDS = (
+    "plugin_code",
+    "plugin_name",
+    "plugin_source",
+    "group_name",
+    "group_display_name",
+    "wrapper_version",
+    "default_version",
+    "latest_version",
+    "versions",
+    "meta_url_template",
+    "description",
+    "status",
+)
+
+# 来源目录最近一次同步完成的标记，remote 模式据此判断本地目录是否足够新
+CATALOG_SYNCED_CACHE_KEY = "open_plugin_catalog_synced:{space_id}:{source_key}"
+
 
 class OpenPluginCatalogService:
     @classmethod
@@ -46,6 +76,19 @@ class OpenPluginCatalogService:
             catalog_qs = catalog_qs.filter(plugin_source=plugin_source)
         return catalog_qs.exists()
 
+    @classmethod
+    def is_catalog_fresh(cls, space_id, source_key):
+        """来源目录是否在有效期内同步过，未配置 redis 或读取失败时视为不新鲜"""
+        return bool(redis_cache.get_json(CATALOG_SYNCED_CACHE_KEY.format(space_id=space_id, source_key=source_key)))
+
+    @classmethod
+    def mark_catalog_synced(cls, space_id, source_key):
+        redis_cache.set_json(
+            CATALOG_SYNCED_CACHE_KEY.format(space_id=space_id, source_key=source_key),
+            int(timezone.now().timestamp()),
+            ttl=settings.OPEN_PLUGIN_CATALOG_FRESH_TTL,
+        )
+
     @classmethod
     def sync_space_plugins(cls, space_id, source_key=None, username="admin"):
         source_plugins = {}
@@ -65,6 +108,7 @@ class OpenPluginCatalogService:
                 source_key=current_source_key,
                 api_list=list(plugins_by_id.values()),
             )
+            cls.mark_catalog_synced(space_id=space_id, source_key=current_source_key)
         return list(source_plugins.keys())
 
     @classmethod
@@ -101,6 +145,94 @@ class OpenPluginCatalogService:
             for item in catalog_qs
         ]
 
+    @classmethod
+    def visible_plugins_queryset(cls, space_id, source_key, plugin_source=None):
+        """空间内可见（可用且已开启）的插件，过滤条件全部下推到数据库"""
+        enabled_qs = SpaceOpenPluginAvailability.objects.filter(
+            space_id=space_id,
+            source_key=source_key,
+            plugin_id=OuterRef("plugin_id"),
+            enabled=True,
+        )
+        catalog_qs = OpenPluginCatalogIndex.objects.filter(
+            Exists(enabled_qs),
+            space_id=space_id,
+            source_key=source_key,
+            status=OpenPluginCatalogIndex.Status.AVAILABLE,
+        )
+        if plugin_source:
+            catalog_qs = catalog_qs.filter(plugin_source=plugin_source)
+        return catalog_qs
+
+    @classmethod
+    def list_visible_categories(cls, space_id, source_key, plugin_source=None):
+        """可见插件的分组列表，按分组名排序：[(group_name, group_display_name)]"""
+        groups = (
+            cls.visible_plugins_queryset(space_id=space_id, source_key=source_key, plugin_source=plugin_source)
+            .exclude(group_name="")
+            .values_list("group_name", "group_display_name")
+            .distinct()
+        )
+        categories = {group_name: display_name or group_name for group_name, display_name in groups}
+        return [(group_name, categories[group_name]) for group_name in sorted(categories)]
+
+    @classmethod
+    def search_visible_plugins(
+        cls,
+        space_id,
+        source_key,
+        plugin_source=None,
+        category=None,
+        keyword=None,
+        limit=50,
+        offset=0,
+        cursor=None,
+    ):
+        """
+        检索可见插件，按插件名称排序分页
+        关键字按插件名称、编码或 ID 前缀匹配（忽略大小写）
+        传入 cursor 时使用游标分页（忽略 offset），返回的 next_cursor 为空表示没有更多数据
+        :return: (plugins, total, next_cursor)
+        """
+        catalog_qs = cls.visible_plugins_queryset(space_id=space_id, source_key=source_key, plugin_source=plugin_source)
+        if category and category != "all":
+            catalog_qs = catalog_qs.filter(group_name=category)
+        keyword = str(keyword or "").strip()
+        if keyword:
+            # 前缀匹配才能走索引，大小写由 istartswith 处理
+            catalog_qs = catalog_qs.filter(
+                Q(plugin_name__istartswith=keyword)
+                | Q(plugin_code__istartswith=keyword)
+                | Q(plugin_id__istartswith=keyword)
+            )
+
+        total = catalog_qs.count()
+        page_qs = catalog_qs.order_by("plugin_name", "id")
+        limit = max(limit, 0)
+        if cursor:
+            plugin_name, last_id = cls._decode_cursor(cursor)
+            page_qs = page_qs.filter(Q(plugin_name__gt=plugin_name) | Q(plugin_name=plugin_name, id__gt=last_id))
+            plugins = list(page_qs[:limit])
+        else:
+            offset = max(offset, 0)
+            plugins = list(page_qs[offset : offset + limit])
+
+        next_cursor = cls._encode_cursor(plugins[-1]) if plugins and len(plugins) == limit else None
+        return plugins, total, next_cursor
+
+    @staticmethod
+    def _encode_cursor(plugin):
+        raw = json.dumps([plugin.plugin_name, plugin.id], ensure_ascii=False)
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        try:
+            plugin_name, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+            return str(plugin_name), int(last_id)
+        except Exception:
+            raise ValidationError("无效的分页游标: {}".format(cursor))
+
     @classmethod
     def toggle_plugin(cls, space_id, source_key, plugin_id, enabled):
         availability, _ = SpaceOpenPluginAvailability.objects.update_or_create(
@@ -109,6 +241,9 @@ class OpenPluginCatalogService:
             plugin_id=plugin_id,
             defaults={"enabled": enabled},
         )
+        # 引擎侧只缓存预检通过的结果，只有会让插件变为不可用的变更需要通知引擎
+        if not enabled:
+            invalidate_engine_space_cache(space_id, SpaceCacheResource.OPEN_PLUGIN.value)
         return availability
 
     @classmethod
@@ -134,6 +269,7 @@ class OpenPluginCatalogService:
     @classmethod
     def disable_source_plugins(cls, space_id, source_key):
         SpaceOpenPluginAvailability.objects.filter(space_id=space_id, source_key=source_key).update(enabled=False)
+        invalidate_engine_space_cache(space_id, SpaceCacheResource.OPEN_PLUGIN.value)
 
     @classmethod
     def _get_sources(cls, space_id, source_key=None):
@@ -209,43 +345,88 @@ class OpenPluginCatalogService:
         client.validate_response_data(response_data, client.UNIFORM_API_LIST_RESPONSE_DATA_SCHEMA)
         return response_data["apis"]
 
+    @classmethod
+    def _build_catalog_fields(cls, api_item):
+        return {
+            "plugin_code": api_item.get("plugin_code", ""),
+            "plugin_name": api_item.get("name", ""),
+            "plugin_source": api_item.get("plugin_source", ""),
+            "group_name": api_item.get("category", ""),
+            "group_display_name": api_item.get("category_name") or api_item.get("category", ""),
+            "wrapper_version": api_item.get("wrapper_version", ""),
+            "default_version": api_item.get("default_version", ""),
+            "latest_version": api_item.get("latest_version", ""),
+            "versions": api_item.get("versions", []),
+            "meta_url_template": api_item.get("meta_url_template", api_item.get("meta_url", "")),
+            "description": api_item.get("description", ""),
+            "status": OpenPluginCatalogIndex.Status.AVAILABLE,
+        }
+
     @classmethod
     def _refresh_catalog_index(cls, space_id, source_key, api_list):
-        current_ids = set()
+        """
+        以差量方式刷新来源目录：一次取回已有记录，在内存中计算新增、变更和下线，再批量写入
+        """
+        catalog_fields = {}
         for api_item in api_list:
             if api_item.get("wrapper_version") != OPEN_PLUGIN_WRAPPER_VERSION:
                 continue
-            current_ids.add(api_item["id"])
-            OpenPluginCatalogIndex.objects.update_or_create(
-                space_id=space_id,
-                source_key=source_key,
-                plugin_id=api_item["id"],
-                defaults={
-                    "plugin_code": api_item.get("plugin_code", ""),
-                    "plugin_name": api_item.get("name", ""),
-                    "plugin_source": api_item.get("plugin_source", ""),
-                    "group_name": api_item.get("category", ""),
-                    "group_display_name": api_item.get("category_name") or api_item.get("category", ""),
-                    "wrapper_version": api_item.get("wrapper_version", ""),
-                    "default_version": api_item.get("default_version", ""),
-                    "latest_version": api_item.get("latest_version", ""),
-                    "versions": api_item.get("versions", []),
-                    "meta_url_template": api_item.get("meta_url_template", api_item.get("meta_url", "")),
-                    "description": api_item.get("description", ""),
-                    "status": OpenPluginCatalogIndex.Status.AVAILABLE,
-                },
-            )
-            # 只对首次入目录的插件生效，管理员手动关闭过的记录不会被同步覆盖。
-            SpaceOpenPluginAvailability.objects.get_or_create(
-                space_id=space_id,
-                source_key=source_key,
-                plugin_id=api_item["id"],
-                defaults={"enabled": True},
-            )
+            catalog_fields[api_item["id"]] = cls._build_catalog_fields(api_item)
+
+        existing_catalogs = {
+            catalog.plugin_id: catalog
+            for catalog in OpenPluginCatalogIndex.objects.filter(space_id=space_id, source_key=source_key)
+        }
+        now = timezone.now()
+        to_create, to_update, to_offline = [], [], []
+        for plugin_id, fields in catalog_fields.items():
+            catalog = existing_catalogs.get(plugin_id)
+            if catalog is None:
+                to_create.append(
+                    OpenPluginCatalogIndex(space_id=space_id, source_key=source_key, plugin_id=plugin_id, **fields)
+                )
+                continue
+            if any(getattr(catalog, field) != value for field, value in fields.items()):
+                for field, value in fields.items():
+                    setattr(catalog, field, value)
+                catalog.update_time = now
+                to_update.append(catalog)
+        for plugin_id, catalog in existing_catalogs.items():
+            if plugin_id not in catalog_fields and catalog.status != OpenPluginCatalogIndex.Status.UNAVAILABLE:
+                catalog.status = OpenPluginCatalogIndex.Status.UNAVAILABLE
+                catalog.update_time = now
+                to_offline.append(catalog)
+
+        # 只对首次入目录的插件默认开启，管理员手动关闭过的记录不会被同步覆盖。
+        existing_availability = set(
+            SpaceOpenPluginAvailability.objects.filter(
+                space_id=space_id, source_key=source_key, plugin_id__in=list(catalog_fields)
+            ).values_list("plugin_id", flat=True)
+        )
+        new_availability = [
+            SpaceOpenPluginAvailability(space_id=space_id, source_key=source_key, plugin_id=plugin_id, enabled=True)
+            for plugin_id in catalog_fields
+            if plugin_id not in existing_availability
+        ]
 
-        OpenPluginCatalogIndex.objects.filter(space_id=space_id, source_key=source_key).exclude(
-            plugin_id__in=current_ids
-        ).update(status=OpenPluginCatalogIndex.Status.UNAVAILABLE)
+        batch_size = CATALOG_WRITE_BATCH_SIZE
+        with transaction.atomic():
+            OpenPluginCatalogIndex.objects.bulk_create(to_create, batch_size=batch_size)
+            if to_update:
+                OpenPluginCatalogIndex.objects.bulk_update(
+                    to_update,
+                    fields=[*CATALOG_SYNC_FIELDS, "update_time"],
+                    batch_size=batch_size,
+                )
+            if to_offline:
+                OpenPluginCatalogIndex.objects.bulk_update(
+                    to_offline, fields=["status", "update_time"], batch_size=batch_size
+                )
+            SpaceOpenPluginAvailability.objects.bulk_create(
+                new_availability, batch_size=batch_size, ignore_conflicts=True
+            )
+            if to_update or to_offline:
+                invalidate_engine_space_cache(space_id, SpaceCacheResource.OPEN_PLUGIN.value)
 
     @classmethod
     def _get_apigw_credential(cls, space_id):
@@ -50,22 +50,18 @@ class OpenPluginSnapshotService:
     @classmethod
     def get_snapshot_node_statuses(cls, space_id, extra_info):
         statuses = {}
-        for ref in cls.get_reference_snapshot(extra_info):
-            catalog = cls._get_catalog_entry(
-                space_id=space_id,
-                plugin_id=ref.get("plugin_id"),
-                source_key=ref.get("source_key"),
-            )
+        refs = cls.get_reference_snapshot(extra_info)
+        catalogs = cls._get_catalog_entries(
+            space_id=space_id, lookups=[(ref.get("plugin_id"), ref.get("source_key")) for ref in refs]
+        )
+        enabled_keys = cls._get_enabled_plugin_keys(space_id=space_id, catalogs=catalogs.values())
+        for ref in refs:
+            catalog = catalogs.get(cls._catalog_lookup_key(ref.get("plugin_id"), ref.get("source_key")))
             if catalog is None or catalog.status != OpenPluginCatalogIndex.Status.AVAILABLE:
                 statuses[ref["node_id"]] = OpenPluginCatalogIndex.Status.UNAVAILABLE
                 continue
 
-            is_enabled = SpaceOpenPluginAvailability.objects.filter(
-                space_id=space_id,
-                source_key=catalog.source_key,
-                plugin_id=catalog.plugin_id,
-                enabled=True,
-            ).exists()
+            is_enabled = (catalog.source_key, catalog.plugin_id) in enabled_keys
             statuses[ref["node_id"]] = (
                 OpenPluginCatalogIndex.Status.AVAILABLE if is_enabled else OpenPluginCatalogIndex.Status.UNAVAILABLE
             )
@@ -94,23 +90,19 @@ class OpenPluginSnapshotService:
     @classmethod
     def validate_reference_snapshot(cls, space_id, snapshot):
         """按任务 extra_info 中的开放插件快照做可用性校验。"""
-        for ref in snapshot or []:
+        snapshot = snapshot or []
+        catalogs = cls._get_catalog_entries(
+            space_id=space_id, lookups=[(ref.get("plugin_id"), ref.get("source_key")) for ref in snapshot]
+        )
+        enabled_keys = cls._get_enabled_plugin_keys(space_id=space_id, catalogs=catalogs.values())
+        for ref in snapshot:
             plugin_id = ref.get("plugin_id")
-            plugin_version = ref.get("plugin_version")
-            catalog = cls._get_catalog_entry(space_id=space_id, plugin_id=plugin_id, source_key=ref.get("source_key"))
-            enabled = False
-            if catalog is not None:
-                enabled = SpaceOpenPluginAvailability.objects.filter(
-                    space_id=space_id,
-                    source_key=catalog.source_key,
-                    plugin_id=catalog.plugin_id,
-                    enabled=True,
-                ).exists()
+            catalog = catalogs.get(cls._catalog_lookup_key(plugin_id, ref.get("source_key")))
             cls._validate_resolved_reference(
                 plugin_id=plugin_id,
-                plugin_version=plugin_version,
+                plugin_version=ref.get("plugin_version"),
                 catalog=catalog,
-                enabled=enabled,
+                enabled=catalog is not None and (catalog.source_key, catalog.plugin_id) in enabled_keys,
             )
 
     @classmethod
@@ -296,29 +288,30 @@ class OpenPluginSnapshotService:
             if not plugin_id:
                 continue
 
-            catalog = cls._get_catalog_entry(space_id=space_id, plugin_id=plugin_id, source_key=source_key)
-
-            enabled = False
-            if catalog is not None:
-                enabled = SpaceOpenPluginAvailability.objects.filter(
-                    space_id=space_id,
-                    source_key=catalog.source_key,
-                    plugin_id=catalog.plugin_id,
-                    enabled=True,
-                ).exists()
-
             references.append(
                 {
                     "node_id": node_id,
                     "plugin_id": plugin_id,
                     "plugin_version": plugin_version,
-                    "source_key": source_key or (catalog.source_key if catalog else ""),
+                    "source_key": source_key,
                     "wrapper_version": wrapper_version,
-                    "catalog": catalog,
-                    "enabled": enabled,
                 }
             )
 
+        # 所有节点的目录记录与空间开放状态各用一次查询取回
+        catalogs = {}
+        enabled_keys = set()
+        if references:
+            catalogs = cls._get_catalog_entries(
+                space_id=space_id, lookups=[(ref["plugin_id"], ref["source_key"]) for ref in references]
+            )
+            enabled_keys = cls._get_enabled_plugin_keys(space_id=space_id, catalogs=catalogs.values())
+        for ref in references:
+            catalog = catalogs.get(cls._catalog_lookup_key(ref["plugin_id"], ref["source_key"]))
+            ref["source_key"] = ref["source_key"] or (catalog.source_key if catalog else "")
+            ref["catalog"] = catalog
+            ref["enabled"] = catalog is not None and (catalog.source_key, catalog.plugin_id) in enabled_keys
+
         if include_unmatched:
             return references
         return [ref for ref in references if ref["catalog"] is not None]
@@ -333,22 +326,67 @@ class OpenPluginSnapshotService:
         return extract_data_value(data, key)
 
     @staticmethod
-    def _get_catalog_entry(space_id, plugin_id, source_key=None):
-        query = OpenPluginCatalogIndex.objects.filter(space_id=space_id, plugin_id=plugin_id)
-        if source_key:
-            query = query.filter(source_key=source_key)
-        return query.order_by("-update_time", "-id").first()
+    def _catalog_lookup_key(plugin_id, source_key=None):
+        return plugin_id, source_key or ""
+
+    @classmethod
+    def _get_catalog_entries(cls, space_id, lookups):
+        """
+        一次查询批量解析目录记录，同一引用命中多条时取最近更新的一条
+        :param lookups: [(plugin_id, source_key)]，source_key 为空时取该插件最新的一条记录
+        :return: {(plugin_id, source_key): catalog}，找不到的引用不会出现在结果中
+        """
+        lookup_keys = {cls._catalog_lookup_key(plugin_id, source_key) for plugin_id, source_key in lookups if plugin_id}
+        if not lookup_keys:
+            return {}
+
+        # 按更新时间倒序遍历，每个键首次命中的即为最新记录
+        latest = {}
+        query = OpenPluginCatalogIndex.objects.filter(
+            space_id=space_id, plugin_id__in={plugin_id for plugin_id, _ in lookup_keys}
+        ).order_by("-update_time", "-id")
+        for catalog in query:
+            latest.setdefault((catalog.plugin_id, catalog.source_key), catalog)
+            latest.setdefault((catalog.plugin_id, ""), catalog)
+        return {key: latest[key] for key in lookup_keys if key in latest}
+
+    @staticmethod
+    def _get_enabled_plugin_keys(space_id, catalogs):
+        """批量查询目录记录在空间内的开放状态，返回已开启的 {(source_key, plugin_id)}"""
+        catalog_keys = {(catalog.source_key, catalog.plugin_id) for catalog in catalogs}
+        if not catalog_keys:
+            return set()
+        enabled_qs = SpaceOpenPluginAvailability.objects.filter(
+            space_id=space_id,
+            source_key__in={source_key for source_key, _ in catalog_keys},
+            plugin_id__in={plugin_id for _, plugin_id in catalog_keys},
+            enabled=True,
+        ).values_list("source_key", "plugin_id")
+        return {key for key in enabled_qs if key in catalog_keys}
+
+    @classmethod
+    def _resolve_wrapper_versions(cls, space_id, reference_snapshot):
+        """批量解析快照中缺失的包装器版本，返回 {node_id: wrapper_version}"""
+        missing_refs = [ref for ref in reference_snapshot if not ref.get("wrapper_version")]
+        catalogs = cls._get_catalog_entries(
+            space_id=space_id, lookups=[(ref.get("plugin_id"), ref.get("source_key")) for ref in missing_refs]
+        )
+        wrapper_versions = {}
+        for ref in reference_snapshot:
+            wrapper_version = ref.get("wrapper_version")
+            if not wrapper_version:
+                catalog = catalogs.get(cls._catalog_lookup_key(ref.get("plugin_id"), ref.get("source_key")))
+                wrapper_version = catalog.wrapper_version if catalog else ""
+            wrapper_versions[ref["node_id"]] = wrapper_version or ""
+        return wrapper_versions
 
     @classmethod
     def _fill_reference_wrapper_versions(cls, space_id, reference_snapshot):
         changed = False
         wrapper_version_map = {}
+        resolved_versions = cls._resolve_wrapper_versions(space_id=space_id, reference_snapshot=reference_snapshot)
         for ref in reference_snapshot:
-            wrapper_version = ref.get("wrapper_version") or cls._resolve_wrapper_version(
-                space_id=space_id,
-                plugin_id=ref.get("plugin_id"),
-                source_key=ref.get("source_key"),
-            )
+            wrapper_version = resolved_versions[ref["node_id"]]
             if wrapper_version and not ref.get("wrapper_version"):
                 ref["wrapper_version"] = wrapper_version
                 changed = True
@@ -358,15 +396,7 @@ class OpenPluginSnapshotService:
     @classmethod
     def _fill_schema_wrapper_versions(cls, space_id, reference_snapshot, schema_snapshot):
         changed = False
-        reference_wrapper_map = {
-            ref["node_id"]: ref.get("wrapper_version")
-            or cls._resolve_wrapper_version(
-                space_id=space_id,
-                plugin_id=ref.get("plugin_id"),
-                source_key=ref.get("source_key"),
-            )
-            for ref in reference_snapshot
-        }
+        reference_wrapper_map = cls._resolve_wrapper_versions(space_id=space_id, reference_snapshot=reference_snapshot)
         for node_id, schema in schema_snapshot.items():
             if not schema.get("schema_protocol_version"):
                 schema["schema_protocol_version"] = cls.SCHEMA_PROTOCOL_VERSION
@@ -376,10 +406,3 @@ class OpenPluginSnapshotService:
                 schema["wrapper_version"] = wrapper_version
                 changed = True
         return changed
-
-    @classmethod
-    def _resolve_wrapper_version(cls, space_id, plugin_id, source_key=None):
-        catalog = cls._get_catalog_entry(space_id=space_id, plugin_id=plugin_id, source_key=source_key)
-        if catalog is None:
-            return ""
-        return catalog.wrapper_version or ""
@@ -0,0 +1,91 @@
+"""TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+# Generated by Django 3.2.25 on 2026-10-18 13:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("space", "0011_set_credential_type"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WebhookOutboxEvent",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False, verbose_name="ID")),
+                ("event_code", models.CharField(max_length=255, verbose_name="事件编码")),
+                ("scope_type", models.CharField(max_length=64, verbose_name="范围类型")),
+                ("scope_code", models.CharField(max_length=64, verbose_name="范围编码")),
+                ("delivery_id", models.CharField(max_length=64, verbose_name="投递ID")),
+                ("extra_info", models.JSONField(blank=True, null=True, verbose_name="事件信息")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("PENDING", "待分发"), ("PROCESSING", "分发中"), ("DISPATCHED", "已分发")],
+                        default="PENDING",
+                        max_length=32,
+                        verbose_name="状态",
+                    ),
+                ),
+                ("claim_token", models.CharField(db_index=True, default="", max_length=32, verbose_name="领取标识")),
+                ("claimed_at", models.DateTimeField(blank=True, null=True, verbose_name="领取时间")),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="创建时间")),
+            ],
+            options={
+                "verbose_name": "Webhook 事件队列",
+                "verbose_name_plural": "Webhook 事件队列",
+                "index_together": {("status", "id")},
+            },
+        ),
+        migrations.CreateModel(
+            name="WebhookDelivery",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False, verbose_name="ID")),
+                ("event_id", models.BigIntegerField(db_index=True, verbose_name="事件ID")),
+                ("event_code", models.CharField(max_length=255, verbose_name="事件编码")),
+                ("delivery_id", models.CharField(max_length=64, verbose_name="投递ID")),
+                ("webhook_code", models.CharField(max_length=255, verbose_name="Webhook 编码")),
+                ("scope_type", models.CharField(max_length=64, verbose_name="范围类型")),
+                ("scope_code", models.CharField(max_length=64, verbose_name="范围编码")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("PENDING", "待投递"), ("PROCESSING", "投递中"), ("SUCCESS", "投递成功"), ("FAILED", "投递失败")],
+                        default="PENDING",
+                        max_length=32,
+                        verbose_name="状态",
+                    ),
+                ),
+                ("retry_times", models.IntegerField(default=0, verbose_name="已重试次数")),
+                ("next_retry_at", models.DateTimeField(default=django.utils.timezone.now, verbose_name="下次投递时间")),
+                ("claim_token", models.CharField(db_index=True, default="", max_length=32, verbose_name="领取标识")),
+                ("claimed_at", models.DateTimeField(blank=True, null=True, verbose_name="领取时间")),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="创建时间")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="更新时间")),
+            ],
+            options={
+                "verbose_name": "Webhook 投递记录",
+                "verbose_name_plural": "Webhook 投递记录",
+                "unique_together": {("event_id", "scope_type", "scope_code", "webhook_code")},
+                "index_together": {("status", "next_retry_at")},
+            },
+        ),
+    ]
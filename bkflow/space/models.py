@@ -18,7 +18,11 @@ to the current version of the project delivered to anyone in the future.
 """
 from enum import Enum
 
+from django.conf import settings
 from django.db import connections, models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 import env
@@ -32,6 +36,7 @@ from bkflow.space.configs import (
 )
 from bkflow.space.credential import CredentialDispatcher
 from bkflow.space.exceptions import SpaceNotExists
+from bkflow.utils import redis_cache
 from bkflow.utils.models import CommonModel, SecretSingleJsonField
 
 
@@ -209,6 +214,8 @@ class SpaceConfigManager(models.Manager):
 
         SpaceConfig.objects.bulk_update(existing_space_configs, ["text_value", "json_value"])
         SpaceConfig.objects.bulk_create(create_space_configs)
+        # 批量操作不会触发信号，需要手动清理缓存
+        SpaceConfig.invalidate_cache(space_id)
 
 
 class SpaceConfig(models.Model):
@@ -248,16 +255,62 @@ class SpaceConfig(models.Model):
     def exists(cls, space_id, config_name):
         return cls.objects.filter(space_id=space_id, name=config_name).exists()
 
+    @staticmethod
+    def _get_cache_key(space_id):
+        return f"space_config:{space_id}"
+
     @classmethod
-    def get_config(cls, space_id, config_name, *args, **kwargs):
-        try:
-            config: SpaceConfig = cls.objects.get(space_id=space_id, name=config_name)
+    def invalidate_cache(cls, space_id):
+        cache_key = cls._get_cache_key(space_id)
+        redis_cache.delete(cache_key)
+        # 事务提交前其他请求可能读到旧数据并回填，提交后再清理一次
+        transaction.on_commit(lambda: redis_cache.delete(cache_key))
+
+    @classmethod
+    def _get_space_configs(cls, space_id):
+        """
+        获取空间下的所有配置，按空间整体缓存在 redis 中，各进程共享同一份缓存及失效
+        :return: {config_name: SpaceConfig}
+        """
+        ttl = settings.SPACE_CONFIG_CACHE_TTL
+        cache_key = cls._get_cache_key(space_id)
+        rows = redis_cache.get_json(cache_key) if ttl > 0 else None
+        if rows is None:
+            rows = list(
+                cls.objects.filter(space_id=space_id).values("id", "name", "value_type", "text_value", "json_value")
+            )
+            if ttl > 0:
+                redis_cache.set_json(cache_key, rows, ttl)
+        return {row["name"]: cls(space_id=space_id, **row) for row in rows}
+
+    @classmethod
+    def _get_value(cls, configs, config_name, *args, **kwargs):
+        config = configs.get(config_name)
+        if config is not None:
             return SpaceConfigHandler.get_config(config_name).get_value(config, *args, **kwargs)
-        except cls.DoesNotExist:
-            config: BaseSpaceConfig = SpaceConfigHandler.get_config(config_name)
-            if not config:
-                raise ValidationError(_("不存在该配置项"))
-            return config.default_value
+        config_cls: BaseSpaceConfig = SpaceConfigHandler.get_config(config_name)
+        if not config_cls:
+            raise ValidationError(_("不存在该配置项"))
+        return config_cls.default_value
+
+    @classmethod
+    def get_config(cls, space_id, config_name, *args, **kwargs):
+        return cls._get_value(cls._get_space_configs(space_id), config_name, *args, **kwargs)
+
+    @classmethod
+    def get_configs(cls, space_id, config_names, *args, **kwargs):
+        """
+        批量获取空间配置，只读取一次空间配置
+        :return: {config_name: value}
+        """
+        configs = cls._get_space_configs(space_id)
+        return {config_name: cls._get_value(configs, config_name, *args, **kwargs) for config_name in config_names}
+
+
+@receiver(post_save, sender=SpaceConfig)
+@receiver(post_delete, sender=SpaceConfig)
+def space_config_changed_handler(sender, instance, **kwargs):
+    SpaceConfig.invalidate_cache(instance.space_id)
 
 
 class CredentialType(Enum):
@@ -439,3 +492,74 @@ class CredentialScope(models.Model):
         indexes = [
             models.Index(fields=["credential_id", "scope_type", "scope_value"]),
         ]
+
+
+class WebhookOutboxStatus(Enum):
+    # 待分发/待投递
+    PENDING = "PENDING"
+    # 已被 worker 领取
+    PROCESSING = "PROCESSING"
+    # 事件已分发为投递记录
+    DISPATCHED = "DISPATCHED"
+    # 投递成功
+    SUCCESS = "SUCCESS"
+    # 重试次数耗尽
+    FAILED = "FAILED"
+
+
+class WebhookOutboxEvent(models.Model):
+    """待分发的 webhook 事件，接口只负责落库，由 worker 异步分发"""
+
+    STATUS = (
+        (WebhookOutboxStatus.PENDING.value, _("待分发")),
+        (WebhookOutboxStatus.PROCESSING.value, _("分发中")),
+        (WebhookOutboxStatus.DISPATCHED.value, _("已分发")),
+    )
+
+    id = models.BigAutoField(_("ID"), primary_key=True)
+    event_code = models.CharField(_("事件编码"), max_length=255)
+    scope_type = models.CharField(_("范围类型"), max_length=64)
+    scope_code = models.CharField(_("范围编码"), max_length=64)
+    delivery_id = models.CharField(_("投递ID"), max_length=64)
+    extra_info = models.JSONField(_("事件信息"), null=True, blank=True)
+    status = models.CharField(_("状态"), max_length=32, choices=STATUS, default=WebhookOutboxStatus.PENDING.value)
+    claim_token = models.CharField(_("领取标识"), max_length=32, default="", db_index=True)
+    claimed_at = models.DateTimeField(_("领取时间"), null=True, blank=True)
+    created_at = models.DateTimeField(_("创建时间"), auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _("Webhook 事件队列")
+        verbose_name_plural = _("Webhook 事件队列")
+        index_together = [("status", "id")]
+
+
+class WebhookDelivery(models.Model):
+    """单个订阅方的一次 webhook 投递，按订阅方批量投递并支持退避重试"""
+
+    STATUS = (
+        (WebhookOutboxStatus.PENDING.value, _("待投递")),
+        (WebhookOutboxStatus.PROCESSING.value, _("投递中")),
+        (WebhookOutboxStatus.SUCCESS.value, _("投递成功")),
+        (WebhookOutboxStatus.FAILED.value, _("投递失败")),
+    )
+
+    id = models.BigAutoField(_("ID"), primary_key=True)
+    event_id = models.BigIntegerField(_("事件ID"), db_index=True)
+    event_code = models.CharField(_("事件编码"), max_length=255)
+    delivery_id = models.CharField(_("投递ID"), max_length=64)
+    webhook_code = models.CharField(_("Webhook 编码"), max_length=255)
+    scope_type = models.CharField(_("范围类型"), max_length=64)
+    scope_code = models.CharField(_("范围编码"), max_length=64)
+    status = models.CharField(_("状态"), max_length=32, choices=STATUS, default=WebhookOutboxStatus.PENDING.value)
+    retry_times = models.IntegerField(_("已重试次数"), default=0)
+    next_retry_at = models.DateTimeField(_("下次投递时间"), default=timezone.now)
+    claim_token = models.CharField(_("领取标识"), max_length=32, default="", db_index=True)
+    claimed_at = models.DateTimeField(_("领取时间"), null=True, blank=True)
+    created_at = models.DateTimeField(_("创建时间"), auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(_("更新时间"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Webhook 投递记录")
+        verbose_name_plural = _("Webhook 投递记录")
+        unique_together = ("event_id", "scope_type", "scope_code", "webhook_code")
+        index_together = [("status", "next_retry_at")]
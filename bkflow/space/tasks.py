@@ -0,0 +1,57 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+to the current version of the project delivered to anyone in the future.
+"""
+
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from bkflow.utils.webhook import clean_webhook_outbox as clean_outbox
+from bkflow.utils.webhook import deliver_webhooks as deliver_due_webhooks
+from bkflow.utils.webhook import dispatch_webhook_events as dispatch_outbox_events
+
+logger = logging.getLogger("celery")
+
+
+@shared_task(ignore_result=True)
+def dispatch_webhook_events():
+    """将待分发的 webhook 事件展开为投递记录，并触发投递"""
+    dispatched_count = dispatch_outbox_events()
+    if dispatched_count:
+        deliver_webhooks.delay()
+    # 未处理完的事件继续分发，避免积压到下一个周期
+    if dispatched_count >= settings.WEBHOOK_DELIVERY_BATCH_SIZE:
+        dispatch_webhook_events.delay()
+    return dispatched_count
+
+
+@shared_task(ignore_result=True)
+def deliver_webhooks():
+    """投递到期的 webhook 请求，同时兜底分发遗漏的事件，由周期任务定时触发"""
+    dispatch_outbox_events()
+    delivered_count = deliver_due_webhooks()
+    if delivered_count >= settings.WEBHOOK_DELIVERY_BATCH_SIZE:
+        deliver_webhooks.delay()
+    return delivered_count
+
+
+@shared_task(ignore_result=True)
+def clean_webhook_outbox():
+    """清理过期的 webhook 事件和投递记录"""
+    event_count, delivery_count = clean_outbox()
+    logger.info("[clean_webhook_outbox] events: %s, deliveries: %s", event_count, delivery_count)
@@ -17,11 +17,38 @@ We undertake not to change the open source license (MIT license) applicable
 
 to the current version of the project delivered to anyone in the future.
 """
+import logging
+
+from django.db import transaction
+
+from bkflow.contrib.api.collections.task import TaskComponentClient
 from bkflow.space.configs import CanvasModeConfig
 from bkflow.space.models import SpaceConfig
 from bkflow.utils.pipeline import build_default_pipeline_tree
 
+logger = logging.getLogger("root")
+
 
 def build_default_pipeline_tree_with_space_id(space_id: int):
     canvas_mode = SpaceConfig.get_config(space_id, CanvasModeConfig.name)
     return build_default_pipeline_tree(canvas_mode)
+
+
+def _invalidate_engine_space_cache(space_id, resource):
+    try:
+        result = TaskComponentClient(space_id=space_id).invalidate_space_cache(
+            data={"space_id": space_id, "resource": resource}
+        )
+    except Exception:
+        logger.exception("[invalidate_space_cache] space_id=%s, resource=%s", space_id, resource)
+        return
+    if not result.get("result", True):
+        logger.error("[invalidate_space_cache] failed: %s", result.get("message"))
+
+
+def invalidate_engine_space_cache(space_id, resource):
+    """
+    空间级数据变更提交后通知引擎清理缓存，通知失败时引擎缓存会在过期后刷新
+    :param resource: SpaceCacheResource 的值
+    """
+    transaction.on_commit(lambda: _invalidate_engine_space_cache(space_id, resource))
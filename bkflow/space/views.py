@@ -31,8 +31,6 @@ from rest_framework.decorators import action
 from rest_framework.exceptions import APIException, PermissionDenied
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from webhook.base_models import Scope
-from webhook.signals import event_broadcast_signal
 
 from bkflow.apigw.serializers.credential import (
     CreateCredentialSerializer,
@@ -75,10 +73,12 @@ from bkflow.space.serializers import (
     SpaceOpenPluginToggleSerializer,
     SpaceSerializer,
 )
+from bkflow.space.tasks import dispatch_webhook_events
 from bkflow.utils.api_client import ApiGwClient, HttpRequestResult
 from bkflow.utils.mixins import BKFLOWDefaultPagination, BKFlowOrderingFilter
 from bkflow.utils.permissions import AdminPermission, AppInternalPermission
 from bkflow.utils.views import AdminModelViewSet, SimpleGenericViewSet
+from bkflow.utils.webhook import enqueue_webhook_event
 
 logger = logging.getLogger("root")
 
@@ -315,14 +315,19 @@ class SpaceInternalViewSet(AdminModelViewSet):
     @action(detail=False, methods=["POST"])
     def broadcast_task_events(self, request, *args, **kwargs):
         data = request.data
-        # 触发空间级别回调
-        scopes = [Scope(type=WebhookScopeType.SPACE.value, code=str(data["space_id"]))]
-        event_broadcast_signal.send(sender=data["event"], scopes=scopes, extra_info=data.get("extra_info"))
-        # 触发流程级别回调
-        scopes = [Scope(type=WebhookScopeType.TEMPLATE.value, code=str(data["template_id"]))]
         extra_info = data.get("extra_info") or {}
-        extra_info["delivery_id"] = data["task_id"]
-        event_broadcast_signal.send(sender=data["event"], scopes=scopes, extra_info=extra_info)
+        # 事件写入待分发队列后由 webhook worker 异步投递，避免慢回调阻塞请求
+        with transaction.atomic():
+            # 触发空间级别回调
+            enqueue_webhook_event(data["event"], WebhookScopeType.SPACE.value, data["space_id"], extra_info)
+            # 触发流程级别回调
+            enqueue_webhook_event(
+                data["event"],
+                WebhookScopeType.TEMPLATE.value,
+                data["template_id"],
+                {**extra_info, "delivery_id": data["task_id"]},
+            )
+            transaction.on_commit(dispatch_webhook_events.delay)
         return Response("success")
 
     def get_credential_config(self, config, space_id, scope):
@@ -343,14 +348,19 @@ class SpaceInternalViewSet(AdminModelViewSet):
     @action(detail=False, methods=["GET"])
     def get_space_infos(self, request, *args, **kwargs):
         data = request.query_params
+        config_names = data.get("config_names", "").split(",")
+        # 普通配置项批量读取，只查询一次空间配置
+        space_configs = SpaceConfig.get_configs(
+            space_id=data["space_id"], config_names=[name for name in config_names if name != "credential"]
+        )
         configs = {}
-        for config_name in data.get("config_names", "").split(","):
+        for config_name in config_names:
             if config_name == "credential":
                 value = SpaceConfig.get_config(data["space_id"], ApiGatewayCredentialConfig.name)
                 scope = data.get("scope", self.CREDENTIAL_CONFIG_KEY)
                 value = self.get_credential_config(config=value, space_id=data["space_id"], scope=scope)
             else:
-                value = SpaceConfig.get_config(space_id=data["space_id"], config_name=config_name)
+                value = space_configs[config_name]
             configs[config_name] = value
         infos = {
             "configs": configs,
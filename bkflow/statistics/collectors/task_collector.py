@@ -29,9 +29,36 @@ from pipeline.core.constants import PE
 from bkflow.statistics.collectors.base import BaseStatisticsCollector
 from bkflow.statistics.conf import StatisticsSettings
 from bkflow.statistics.models import TaskflowExecutedNodeStatistics, TaskflowStatistics
+from bkflow.statistics.rollups import (
+    apply_node_statistics_delta,
+    apply_task_statistics_delta,
+)
 
 logger = logging.getLogger("celery")
 
+# 增量汇总依赖的明细字段
+TASK_ROLLUP_FIELDS = (
+    "space_id",
+    "scope_type",
+    "scope_value",
+    "create_time",
+    "is_finished",
+    "final_state",
+    "elapsed_time",
+)
+NODE_ROLLUP_FIELDS = (
+    "space_id",
+    "plugin_source",
+    "component_code",
+    "component_name",
+    "version",
+    "plugin_type",
+    "started_time",
+    "elapsed_time",
+    "status",
+    "is_retry",
+)
+
 
 class TaskStatisticsCollector(BaseStatisticsCollector):
     """任务统计数据采集器，支持通过 task_id 或 instance_id 定位任务"""
@@ -74,25 +101,28 @@ class TaskStatisticsCollector(BaseStatisticsCollector):
             pipeline_tree = self.task.execution_data or {}
             atom_total, subprocess_total, gateways_total = self.count_pipeline_tree_nodes(pipeline_tree)
 
-            TaskflowStatistics.objects.using(self.db_alias).update_or_create(
-                task_id=self.task.id,
-                defaults={
-                    "space_id": self.task.space_id,
-                    "scope_type": self.task.scope_type or "",
-                    "scope_value": self.task.scope_value or "",
-                    "template_id": self.task.template_id,
-                    "engine_id": self.engine_id,
-                    "atom_total": atom_total,
-                    "subprocess_total": subprocess_total,
-                    "gateways_total": gateways_total,
-                    "create_time": self.task.create_time,
-                    "create_method": self.task.create_method,
-                    "trigger_method": getattr(self.task, "trigger_method", "manual"),
-                    "is_started": self.task.is_started,
-                    "is_finished": False,
-                    "final_state": bamboo_states.CREATED,
-                },
-            )
+            with transaction.atomic(using=self.db_alias):
+                old_stat = self._get_task_rollup_values(for_update=True)
+                TaskflowStatistics.objects.using(self.db_alias).update_or_create(
+                    task_id=self.task.id,
+                    defaults={
+                        "space_id": self.task.space_id,
+                        "scope_type": self.task.scope_type or "",
+                        "scope_value": self.task.scope_value or "",
+                        "template_id": self.task.template_id,
+                        "engine_id": self.engine_id,
+                        "atom_total": atom_total,
+                        "subprocess_total": subprocess_total,
+                        "gateways_total": gateways_total,
+                        "create_time": self.task.create_time,
+                        "create_method": self.task.create_method,
+                        "trigger_method": getattr(self.task, "trigger_method", "manual"),
+                        "is_started": self.task.is_started,
+                        "is_finished": False,
+                        "final_state": bamboo_states.CREATED,
+                    },
+                )
+                self._apply_rollup(apply_task_statistics_delta, old_stat, self._get_task_rollup_values())
             return True
         except Exception as e:
             logger.exception(f"[TaskStatisticsCollector] collect_on_create error: {e}")
@@ -122,14 +152,32 @@ class TaskStatisticsCollector(BaseStatisticsCollector):
         if self.task.start_time and self.task.finish_time:
             elapsed_time = int((self.task.finish_time - self.task.start_time).total_seconds())
 
-        TaskflowStatistics.objects.using(self.db_alias).filter(task_id=self.task.id).update(
-            start_time=self.task.start_time,
-            finish_time=self.task.finish_time,
-            elapsed_time=elapsed_time,
-            is_started=self.task.is_started,
-            is_finished=self.task.is_finished,
-            final_state=final_state,
-        )
+        with transaction.atomic(using=self.db_alias):
+            old_stat = self._get_task_rollup_values(for_update=True)
+            TaskflowStatistics.objects.using(self.db_alias).filter(task_id=self.task.id).update(
+                start_time=self.task.start_time,
+                finish_time=self.task.finish_time,
+                elapsed_time=elapsed_time,
+                is_started=self.task.is_started,
+                is_finished=self.task.is_finished,
+                final_state=final_state,
+            )
+            if old_stat:
+                self._apply_rollup(apply_task_statistics_delta, old_stat, self._get_task_rollup_values())
+
+    def _get_task_rollup_values(self, for_update=False):
+        queryset = TaskflowStatistics.objects.using(self.db_alias).filter(task_id=self.task.id)
+        if for_update:
+            queryset = queryset.select_for_update()
+        return queryset.values(*TASK_ROLLUP_FIELDS).first()
+
+    def _apply_rollup(self, apply_func, *args):
+        """增量更新汇总数据，失败时不影响明细采集，可通过 backfill_statistics 重新计算修复"""
+        try:
+            with transaction.atomic(using=self.db_alias):
+                apply_func(*args, using=self.db_alias)
+        except Exception as e:
+            logger.exception(f"[TaskStatisticsCollector] apply rollup error: {e}")
 
     def _collect_node_statistics(self):
         """通过 bamboo_engine API 获取节点执行状态，采集已执行节点的统计信息"""
@@ -154,11 +202,17 @@ class TaskStatisticsCollector(BaseStatisticsCollector):
             executed_nodes = self._extract_executed_nodes(pipeline_tree, root_data)
 
             with transaction.atomic(using=self.db_alias):
-                TaskflowExecutedNodeStatistics.objects.using(self.db_alias).filter(task_id=self.task.id).delete()
+                node_queryset = TaskflowExecutedNodeStatistics.objects.using(self.db_alias).filter(task_id=self.task.id)
+                old_nodes = list(node_queryset.select_for_update().values(*NODE_ROLLUP_FIELDS))
+                node_queryset.delete()
                 if executed_nodes:
                     TaskflowExecutedNodeStatistics.objects.using(self.db_alias).bulk_create(
                         executed_nodes, batch_size=100
                     )
+                new_nodes = [{field: getattr(node, field) for field in NODE_ROLLUP_FIELDS} for node in executed_nodes]
+                self._apply_rollup(
+                    apply_node_statistics_delta, self.task.scope_type, self.task.scope_value, old_nodes, new_nodes
+                )
         except ImportError:
             logger.warning("bamboo_engine not available, skip node statistics collection")
         except Exception as e:
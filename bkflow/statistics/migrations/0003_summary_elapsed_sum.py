@@ -0,0 +1,50 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:00
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Round
+
+
+def backfill_elapsed_sum(apps, schema_editor):
+    """根据已有的平均耗时回填总耗时，历史数据按完成任务数/执行次数近似"""
+    db_alias = schema_editor.connection.alias
+    DailyStatisticsSummary = apps.get_model("statistics", "DailyStatisticsSummary")
+    PluginExecutionSummary = apps.get_model("statistics", "PluginExecutionSummary")
+    DailyStatisticsSummary.objects.using(db_alias).update(
+        task_elapsed_count=F("task_finished_count"),
+        task_elapsed_time_sum=Round(F("avg_task_elapsed_time") * F("task_finished_count")),
+    )
+    PluginExecutionSummary.objects.using(db_alias).update(
+        elapsed_count=F("execution_count"),
+        elapsed_time_sum=Round(F("avg_elapsed_time") * F("execution_count")),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("statistics", "0002_auto_20260421_1127"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailystatisticssummary",
+            name="task_elapsed_count",
+            field=models.IntegerField(default=0, verbose_name="有耗时的任务数"),
+        ),
+        migrations.AddField(
+            model_name="dailystatisticssummary",
+            name="task_elapsed_time_sum",
+            field=models.BigIntegerField(default=0, verbose_name="任务总耗时(秒)"),
+        ),
+        migrations.AddField(
+            model_name="pluginexecutionsummary",
+            name="elapsed_count",
+            field=models.IntegerField(default=0, verbose_name="有耗时的执行次数"),
+        ),
+        migrations.AddField(
+            model_name="pluginexecutionsummary",
+            name="elapsed_time_sum",
+            field=models.BigIntegerField(default=0, verbose_name="总耗时(秒)"),
+        ),
+        migrations.RunPython(backfill_elapsed_sum, migrations.RunPython.noop),
+    ]
@@ -204,6 +204,9 @@ class DailyStatisticsSummary(StatisticsBaseModel):
 
     avg_task_elapsed_time = models.FloatField("平均任务耗时(秒)", default=0)
     max_task_elapsed_time = models.IntegerField("最大任务耗时(秒)", default=0)
+    # 增量汇总时用于重新计算平均耗时
+    task_elapsed_time_sum = models.BigIntegerField("任务总耗时(秒)", default=0)
+    task_elapsed_count = models.IntegerField("有耗时的任务数", default=0)
 
     created_at = models.DateTimeField("记录创建时间", auto_now_add=True)
     updated_at = models.DateTimeField("记录更新时间", auto_now=True)
@@ -242,6 +245,9 @@ class PluginExecutionSummary(StatisticsBaseModel):
 
     avg_elapsed_time = models.FloatField("平均耗时(秒)", default=0)
     max_elapsed_time = models.IntegerField("最大耗时(秒)", default=0)
+    # 增量汇总时用于重新计算平均耗时
+    elapsed_time_sum = models.BigIntegerField("总耗时(秒)", default=0)
+    elapsed_count = models.IntegerField("有耗时的执行次数", default=0)
 
     created_at = models.DateTimeField("记录创建时间", auto_now_add=True)
     updated_at = models.DateTimeField("记录更新时间", auto_now=True)
@@ -0,0 +1,286 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import logging
+from collections import defaultdict
+
+from bamboo_engine import states as bamboo_states
+from django.db import connections
+from django.utils import timezone
+
+from bkflow.statistics.models import DailyStatisticsSummary, PluginExecutionSummary
+
+logger = logging.getLogger("celery")
+
+UPSERT_BATCH_SIZE = 500
+
+DAILY_UNIQUE_FIELDS = ("date", "space_id", "scope_type", "scope_value")
+DAILY_TASK_COUNTER_FIELDS = (
+    "task_created_count",
+    "task_finished_count",
+    "task_success_count",
+    "task_failed_count",
+    "task_revoked_count",
+    "task_elapsed_time_sum",
+    "task_elapsed_count",
+)
+DAILY_NODE_COUNTER_FIELDS = ("node_executed_count", "node_success_count", "node_failed_count")
+DAILY_COUNTER_FIELDS = DAILY_TASK_COUNTER_FIELDS + DAILY_NODE_COUNTER_FIELDS
+DAILY_AVG_FIELDS = {"avg_task_elapsed_time": ("task_elapsed_time_sum", "task_elapsed_count")}
+
+PLUGIN_UNIQUE_FIELDS = ("period_type", "period_start", "space_id", "plugin_source", "component_code", "version")
+PLUGIN_COUNTER_FIELDS = ("execution_count", "success_count", "failed_count", "elapsed_time_sum", "elapsed_count")
+PLUGIN_AVG_FIELDS = {"avg_elapsed_time": ("elapsed_time_sum", "elapsed_count")}
+
+
+def _avg(total, count):
+    return total / count if count > 0 else 0
+
+
+def bulk_upsert(
+    model,
+    rows,
+    unique_fields,
+    increment_fields=(),
+    max_fields=(),
+    replace_fields=(),
+    avg_fields=None,
+    using="default",
+    batch_size=UPSERT_BATCH_SIZE,
+):
+    """
+    批量 upsert 汇总数据，冲突时：
+    increment_fields 累加，max_fields 取较大值，replace_fields 直接覆盖，
+    avg_fields 根据累加后的 (总和, 数量) 重新计算平均值
+
+    MySQL 使用 INSERT ... ON DUPLICATE KEY UPDATE，SQLite/PostgreSQL 使用 INSERT ... ON CONFLICT DO UPDATE
+    """
+    if not rows:
+        return
+    avg_fields = avg_fields or {}
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    now = timezone.now()
+    # 未指定的字段插入时使用模型默认值，冲突时保持不变
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    columns = [field.column for field in fields]
+
+    if connection.vendor == "mysql":
+
+        def new_value(column):
+            return f"VALUES({quote(column)})"
+
+        greatest = "GREATEST"
+        conflict_clause = "ON DUPLICATE KEY UPDATE"
+    else:
+
+        def new_value(column):
+            return f"excluded.{quote(column)}"
+
+        greatest = "MAX" if connection.vendor == "sqlite" else "GREATEST"
+        conflict_clause = f"ON CONFLICT ({', '.join(quote(field) for field in unique_fields)}) DO UPDATE SET"
+
+    def old_value(column):
+        return f"{table}.{quote(column)}"
+
+    # MySQL 按顺序赋值，后面的表达式会读到前面已更新的值，所以平均值需要最先计算
+    assignments = []
+    for avg_field, (sum_field, count_field) in avg_fields.items():
+        if sum_field in increment_fields:
+            total = f"({old_value(sum_field)} + {new_value(sum_field)})"
+            count = f"({old_value(count_field)} + {new_value(count_field)})"
+        else:
+            total, count = new_value(sum_field), new_value(count_field)
+        assignments.append(f"{quote(avg_field)} = CASE WHEN {count} > 0 THEN {total} * 1.0 / {count} ELSE 0 END")
+    assignments += [f"{quote(field)} = {old_value(field)} + {new_value(field)}" for field in increment_fields]
+    assignments += [f"{quote(field)} = {greatest}({old_value(field)}, {new_value(field)})" for field in max_fields]
+    assignments += [f"{quote(field)} = {new_value(field)}" for field in replace_fields]
+    assignments.append(f"{quote('updated_at')} = {new_value('updated_at')}")
+
+    placeholder = f"({', '.join(['%s'] * len(columns))})"
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i : i + batch_size]
+            params = []
+            for row in batch:
+                values = dict(row)
+                for avg_field, (sum_field, count_field) in avg_fields.items():
+                    values[avg_field] = _avg(values[sum_field], values[count_field])
+                values["created_at"] = values["updated_at"] = now
+                params.extend(
+                    field.get_db_prep_save(
+                        values[field.name] if field.name in values else field.get_default(), connection
+                    )
+                    for field in fields
+                )
+            sql = (
+                f"INSERT INTO {table} ({', '.join(quote(column) for column in columns)}) "
+                f"VALUES {', '.join([placeholder] * len(batch))} {conflict_clause} {', '.join(assignments)}"
+            )
+            cursor.execute(sql, params)
+
+
+def _local_date(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+def get_task_contribution(stat):
+    """
+    计算单个任务统计对每日汇总的贡献，与按天重算时的聚合口径一致
+    :param stat: TaskflowStatistics 字段字典
+    :return: (汇总维度, 计数字典, 任务耗时)
+    """
+    key = (_local_date(stat["create_time"]), stat["space_id"], stat["scope_type"] or "", stat["scope_value"] or "")
+    is_finished = stat["is_finished"]
+    final_state = stat["final_state"]
+    elapsed_time = stat["elapsed_time"]
+    counters = {
+        "task_created_count": 1,
+        "task_finished_count": int(is_finished),
+        "task_success_count": int(final_state == bamboo_states.FINISHED),
+        "task_failed_count": int(is_finished and final_state != bamboo_states.FINISHED),
+        "task_revoked_count": int(final_state == bamboo_states.REVOKED),
+        "task_elapsed_time_sum": elapsed_time or 0,
+        "task_elapsed_count": int(elapsed_time is not None),
+    }
+    return key, counters, elapsed_time or 0
+
+
+def _merge_counters(target, counters, sign):
+    for field, value in counters.items():
+        target[field] += sign * value
+
+
+def _to_daily_rows(deltas, max_elapsed):
+    rows = []
+    for key, counters in deltas.items():
+        if not any(counters.values()) and not max_elapsed.get(key):
+            continue
+        row = dict(zip(DAILY_UNIQUE_FIELDS, key))
+        row.update({field: counters.get(field, 0) for field in DAILY_COUNTER_FIELDS})
+        row["max_task_elapsed_time"] = max_elapsed.get(key, 0)
+        rows.append(row)
+    return rows
+
+
+def apply_task_statistics_delta(old_stat, new_stat, using="default"):
+    """
+    任务统计变化时，将新旧记录的差值增量写入每日汇总
+    :param old_stat: 变化前的 TaskflowStatistics 字段字典，首次采集时为 None
+    :param new_stat: 变化后的 TaskflowStatistics 字段字典
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    max_elapsed = {}
+    if old_stat:
+        key, counters, _ = get_task_contribution(old_stat)
+        _merge_counters(deltas[key], counters, -1)
+    key, counters, elapsed_time = get_task_contribution(new_stat)
+    _merge_counters(deltas[key], counters, 1)
+    max_elapsed[key] = elapsed_time
+
+    bulk_upsert(
+        DailyStatisticsSummary,
+        _to_daily_rows(deltas, max_elapsed),
+        unique_fields=DAILY_UNIQUE_FIELDS,
+        increment_fields=DAILY_COUNTER_FIELDS,
+        max_fields=("max_task_elapsed_time",),
+        avg_fields=DAILY_AVG_FIELDS,
+        using=using,
+    )
+
+
+def apply_node_statistics_delta(scope_type, scope_value, old_nodes, new_nodes, using="default"):
+    """
+    任务节点统计重新采集时，将新旧节点记录的差值增量写入每日汇总和插件日汇总
+    :param old_nodes: 重新采集前的 TaskflowExecutedNodeStatistics 字段字典列表
+    :param new_nodes: 重新采集后的 TaskflowExecutedNodeStatistics 字段字典列表
+    """
+    daily_deltas = defaultdict(lambda: defaultdict(int))
+    plugin_deltas = defaultdict(lambda: defaultdict(int))
+    plugin_attrs = {}
+    plugin_max_elapsed = {}
+
+    for nodes, sign in ((old_nodes, -1), (new_nodes, 1)):
+        for node in nodes:
+            if node["is_retry"]:
+                continue
+            started_date = _local_date(node["started_time"])
+            elapsed_time = node["elapsed_time"]
+            status = node["status"]
+            daily_key = (started_date, node["space_id"], scope_type or "", scope_value or "")
+            _merge_counters(
+                daily_deltas[daily_key],
+                {"node_executed_count": 1, "node_success_count": int(status), "node_failed_count": int(not status)},
+                sign,
+            )
+            plugin_key = (
+                "day",
+                started_date,
+                node["space_id"],
+                node["plugin_source"],
+                node["component_code"],
+                node["version"],
+            )
+            _merge_counters(
+                plugin_deltas[plugin_key],
+                {
+                    "execution_count": 1,
+                    "success_count": int(status),
+                    "failed_count": int(not status),
+                    "elapsed_time_sum": elapsed_time or 0,
+                    "elapsed_count": int(elapsed_time is not None),
+                },
+                sign,
+            )
+            # 插件类型等属性以新记录为准
+            plugin_attrs[plugin_key] = {"plugin_type": node["plugin_type"], "component_name": node["component_name"]}
+            if sign > 0:
+                plugin_max_elapsed[plugin_key] = max(plugin_max_elapsed.get(plugin_key, 0), elapsed_time or 0)
+
+    bulk_upsert(
+        DailyStatisticsSummary,
+        _to_daily_rows(daily_deltas, {}),
+        unique_fields=DAILY_UNIQUE_FIELDS,
+        increment_fields=DAILY_COUNTER_FIELDS,
+        max_fields=("max_task_elapsed_time",),
+        avg_fields=DAILY_AVG_FIELDS,
+        using=using,
+    )
+
+    plugin_rows = []
+    for key, counters in plugin_deltas.items():
+        if not any(counters.values()):
+            continue
+        row = dict(zip(PLUGIN_UNIQUE_FIELDS, key))
+        row.update({field: counters.get(field, 0) for field in PLUGIN_COUNTER_FIELDS})
+        row.update(plugin_attrs[key])
+        row["max_elapsed_time"] = plugin_max_elapsed.get(key, 0)
+        plugin_rows.append(row)
+    bulk_upsert(
+        PluginExecutionSummary,
+        plugin_rows,
+        unique_fields=PLUGIN_UNIQUE_FIELDS,
+        increment_fields=PLUGIN_COUNTER_FIELDS,
+        max_fields=("max_elapsed_time",),
+        replace_fields=("plugin_type", "component_name"),
+        avg_fields=PLUGIN_AVG_FIELDS,
+        using=using,
+    )
@@ -22,7 +22,8 @@ from datetime import date, timedelta
 
 from bamboo_engine import states as bamboo_states
 from celery import shared_task
-from django.db.models import Avg, Count, Max, Q
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
 
 from bkflow.statistics.conf import StatisticsSettings, date_to_datetime_range
 from bkflow.statistics.models import (
@@ -32,13 +33,28 @@ from bkflow.statistics.models import (
     TaskflowStatistics,
     TemplateStatistics,
 )
+from bkflow.statistics.rollups import (
+    DAILY_AVG_FIELDS,
+    DAILY_COUNTER_FIELDS,
+    DAILY_NODE_COUNTER_FIELDS,
+    DAILY_TASK_COUNTER_FIELDS,
+    DAILY_UNIQUE_FIELDS,
+    PLUGIN_AVG_FIELDS,
+    PLUGIN_COUNTER_FIELDS,
+    PLUGIN_UNIQUE_FIELDS,
+    UPSERT_BATCH_SIZE,
+    bulk_upsert,
+)
 
 logger = logging.getLogger("celery")
 
 
 @shared_task(bind=True, ignore_result=True)
-def generate_daily_summary_task(self, target_date: str = None):
-    """按天汇总各空间的任务和节点执行统计，默认汇总前一天的数据"""
+def generate_daily_summary_task(self, target_date: str = None, reconcile: bool = False):
+    """
+    每日汇总由采集器增量写入，定时任务只为没有任务的活跃空间补零值记录，默认处理前一天的数据
+    reconcile=True 时根据明细数据重新计算当天的汇总，用于修复增量数据
+    """
     if not StatisticsSettings.is_enabled():
         return
 
@@ -48,13 +64,17 @@ def generate_daily_summary_task(self, target_date: str = None):
         summary_date = date.today() - timedelta(days=1)
 
     try:
-        _generate_daily_summary(summary_date)
-        logger.info(f"[daily_summary] date={summary_date} generated successfully")
+        if reconcile:
+            _generate_daily_summary(summary_date)
+        else:
+            _fill_empty_daily_summary(summary_date)
+        logger.info(f"[daily_summary] date={summary_date} reconcile={reconcile} generated successfully")
     except Exception as e:
         logger.exception(f"[daily_summary] date={summary_date} error: {e}")
 
 
 def _generate_daily_summary(summary_date: date):
+    """根据明细数据重新计算指定日期的每日汇总，覆盖增量写入的结果"""
     db_alias = StatisticsSettings.get_db_alias()
     day_start, day_end = date_to_datetime_range(summary_date)
 
@@ -68,75 +88,108 @@ def _generate_daily_summary(summary_date: date):
             task_success=Count("id", filter=Q(final_state=bamboo_states.FINISHED)),
             task_failed=Count("id", filter=Q(is_finished=True) & ~Q(final_state=bamboo_states.FINISHED)),
             task_revoked=Count("id", filter=Q(final_state=bamboo_states.REVOKED)),
-            avg_elapsed=Avg("elapsed_time", filter=Q(elapsed_time__isnull=False)),
+            elapsed_sum=Sum("elapsed_time"),
+            elapsed_count=Count("elapsed_time"),
             max_elapsed=Max("elapsed_time"),
         )
     )
 
-    node_stats_by_space = {}
-    for ns in (
+    rows = {}
+    for stat in task_stats:
+        key = (stat["space_id"], stat["scope_type"] or "", stat["scope_value"] or "")
+        rows[key] = {
+            "task_created_count": stat["task_created"],
+            "task_finished_count": stat["task_finished"],
+            "task_success_count": stat["task_success"],
+            "task_failed_count": stat["task_failed"],
+            "task_revoked_count": stat["task_revoked"],
+            "task_elapsed_time_sum": stat["elapsed_sum"] or 0,
+            "task_elapsed_count": stat["elapsed_count"],
+            "max_task_elapsed_time": stat["max_elapsed"] or 0,
+        }
+
+    # 节点统计归属到所在任务的范围，与增量汇总口径一致
+    node_stats = (
         TaskflowExecutedNodeStatistics.objects.using(db_alias)
         .filter(started_time__gte=day_start, started_time__lt=day_end, is_retry=False)
-        .values("space_id")
+        .values("space_id", "task_id")
         .annotate(
             node_executed=Count("id"),
             node_success=Count("id", filter=Q(status=True)),
             node_failed=Count("id", filter=Q(status=False)),
         )
-    ):
-        node_stats_by_space[ns["space_id"]] = ns
-
-    processed_spaces = set()
-
-    for stat in task_stats:
-        space_id = stat["space_id"]
-        node_stats = node_stats_by_space.get(space_id, {})
-        space_key = (space_id, stat["scope_type"] or "", stat["scope_value"] or "")
-
-        is_first_scope_for_space = space_id not in {k[0] for k in processed_spaces}
-        processed_spaces.add(space_key)
-
-        DailyStatisticsSummary.objects.using(db_alias).update_or_create(
-            date=summary_date,
-            space_id=space_id,
-            scope_type=stat["scope_type"] or "",
-            scope_value=stat["scope_value"] or "",
-            defaults={
-                "task_created_count": stat["task_created"],
-                "task_finished_count": stat["task_finished"],
-                "task_success_count": stat["task_success"],
-                "task_failed_count": stat["task_failed"],
-                "task_revoked_count": stat["task_revoked"],
-                "avg_task_elapsed_time": stat["avg_elapsed"] or 0,
-                "max_task_elapsed_time": stat["max_elapsed"] or 0,
-                "node_executed_count": (node_stats.get("node_executed") or 0) if is_first_scope_for_space else 0,
-                "node_success_count": (node_stats.get("node_success") or 0) if is_first_scope_for_space else 0,
-                "node_failed_count": (node_stats.get("node_failed") or 0) if is_first_scope_for_space else 0,
-            },
+    )
+    node_stats = list(node_stats)
+    task_scopes = {}
+    task_ids = list({ns["task_id"] for ns in node_stats})
+    for i in range(0, len(task_ids), UPSERT_BATCH_SIZE):
+        for task_id, scope_type, scope_value in (
+            TaskflowStatistics.objects.using(db_alias)
+            .filter(task_id__in=task_ids[i : i + UPSERT_BATCH_SIZE])
+            .values_list("task_id", "scope_type", "scope_value")
+        ):
+            task_scopes[task_id] = (scope_type or "", scope_value or "")
+
+    for ns in node_stats:
+        key = (ns["space_id"],) + task_scopes.get(ns["task_id"], ("", ""))
+        row = rows.setdefault(key, {field: 0 for field in DAILY_TASK_COUNTER_FIELDS + ("max_task_elapsed_time",)})
+        row["node_executed_count"] = row.get("node_executed_count", 0) + ns["node_executed"]
+        row["node_success_count"] = row.get("node_success_count", 0) + ns["node_success"]
+        row["node_failed_count"] = row.get("node_failed_count", 0) + ns["node_failed"]
+
+    summary_rows = []
+    for (space_id, scope_type, scope_value), row in rows.items():
+        for field in DAILY_NODE_COUNTER_FIELDS:
+            row.setdefault(field, 0)
+        row.update(date=summary_date, space_id=space_id, scope_type=scope_type, scope_value=scope_value)
+        summary_rows.append(row)
+
+    # 明细中已不存在的维度清零，避免残留旧的增量数据
+    with transaction.atomic(using=db_alias):
+        DailyStatisticsSummary.objects.using(db_alias).filter(date=summary_date).update(
+            **{field: 0 for field in DAILY_COUNTER_FIELDS}, avg_task_elapsed_time=0, max_task_elapsed_time=0
         )
+        bulk_upsert(
+            DailyStatisticsSummary,
+            summary_rows,
+            unique_fields=DAILY_UNIQUE_FIELDS,
+            replace_fields=DAILY_COUNTER_FIELDS + ("max_task_elapsed_time",),
+            avg_fields=DAILY_AVG_FIELDS,
+            using=db_alias,
+        )
+    _fill_empty_daily_summary(summary_date)
+
 
-    # 为当天没有任务的活跃空间填充零值记录，确保趋势图数据连续
+def _fill_empty_daily_summary(summary_date: date):
+    """为当天没有任务的活跃空间填充零值记录，确保趋势图数据连续，已存在的记录不受影响"""
+    db_alias = StatisticsSettings.get_db_alias()
     active_spaces = (
         TemplateStatistics.objects.using(db_alias).values_list("space_id", "scope_type", "scope_value").distinct()
     )
-
-    for space_id, scope_type, scope_value in active_spaces:
-        space_key = (space_id, scope_type or "", scope_value or "")
-        if space_key not in processed_spaces:
-            DailyStatisticsSummary.objects.using(db_alias).get_or_create(
-                date=summary_date,
-                space_id=space_id,
-                scope_type=scope_type or "",
-                scope_value=scope_value or "",
+    DailyStatisticsSummary.objects.using(db_alias).bulk_create(
+        [
+            DailyStatisticsSummary(
+                date=summary_date, space_id=space_id, scope_type=scope_type or "", scope_value=scope_value or ""
             )
+            for space_id, scope_type, scope_value in active_spaces
+        ],
+        batch_size=UPSERT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
 
 
 @shared_task(bind=True, ignore_result=True)
-def generate_plugin_summary_task(self, period_type: str = "day", target_date: str = None):
-    """按指定周期（day/week/month）汇总各插件的执行次数、成功率和耗时"""
+def generate_plugin_summary_task(self, period_type: str = "day", target_date: str = None, reconcile: bool = False):
+    """
+    按指定周期（day/week/month）汇总各插件的执行次数、成功率和耗时
+    日汇总由采集器增量写入，仅在 reconcile=True 时根据明细重新计算；周/月汇总由日汇总聚合得到
+    """
     if not StatisticsSettings.is_enabled():
         return
 
+    if period_type == "day" and not reconcile:
+        return
+
     if target_date:
         period_start = date.fromisoformat(target_date)
     else:
@@ -153,45 +206,67 @@ def _generate_plugin_summary(period_type: str, period_start: date):
     db_alias = StatisticsSettings.get_db_alias()
 
     if period_type == "day":
-        period_end_date = period_start + timedelta(days=1)
-    elif period_type == "week":
-        period_end_date = period_start + timedelta(weeks=1)
+        range_start, range_end = date_to_datetime_range(period_start)
+        stats = (
+            TaskflowExecutedNodeStatistics.objects.using(db_alias)
+            .filter(started_time__gte=range_start, started_time__lt=range_end, is_retry=False)
+            .values("space_id", "plugin_source", "component_code", "version")
+            .annotate(
+                plugin_type=Max("plugin_type"),
+                component_name=Max("component_name"),
+                execution=Count("id"),
+                success=Count("id", filter=Q(status=True)),
+                failed=Count("id", filter=Q(status=False)),
+                elapsed_sum=Sum("elapsed_time"),
+                elapsed_count=Count("elapsed_time"),
+                max_elapsed=Max("elapsed_time"),
+            )
+        )
     else:
-        period_end_date = period_start + timedelta(days=30)
-
-    range_start, _ = date_to_datetime_range(period_start)
-    _, range_end = date_to_datetime_range(period_end_date - timedelta(days=1))
-
-    node_stats = (
-        TaskflowExecutedNodeStatistics.objects.using(db_alias)
-        .filter(started_time__gte=range_start, started_time__lt=range_end, is_retry=False)
-        .values("space_id", "plugin_source", "component_code", "version", "plugin_type")
-        .annotate(
-            execution=Count("id"),
-            success=Count("id", filter=Q(status=True)),
-            failed=Count("id", filter=Q(status=False)),
-            avg_elapsed=Avg("elapsed_time", filter=Q(elapsed_time__isnull=False)),
-            max_elapsed=Max("elapsed_time"),
+        period_end_date = period_start + (timedelta(weeks=1) if period_type == "week" else timedelta(days=30))
+        stats = (
+            PluginExecutionSummary.objects.using(db_alias)
+            .filter(period_type="day", period_start__gte=period_start, period_start__lt=period_end_date)
+            .values("space_id", "plugin_source", "component_code", "version")
+            .annotate(
+                plugin_type=Max("plugin_type"),
+                component_name=Max("component_name"),
+                execution=Sum("execution_count"),
+                success=Sum("success_count"),
+                failed=Sum("failed_count"),
+                elapsed_sum=Sum("elapsed_time_sum"),
+                elapsed_count=Sum("elapsed_count"),
+                max_elapsed=Max("max_elapsed_time"),
+            )
         )
-    )
 
-    for stat in node_stats:
-        PluginExecutionSummary.objects.using(db_alias).update_or_create(
-            period_type=period_type,
-            period_start=period_start,
-            space_id=stat["space_id"],
-            plugin_source=stat["plugin_source"],
-            component_code=stat["component_code"],
-            version=stat["version"],
-            defaults={
-                "plugin_type": stat["plugin_type"],
-                "execution_count": stat["execution"],
-                "success_count": stat["success"],
-                "failed_count": stat["failed"],
-                "avg_elapsed_time": stat["avg_elapsed"] or 0,
-                "max_elapsed_time": stat["max_elapsed"] or 0,
-            },
-        )
+    rows = [
+        {
+            "period_type": period_type,
+            "period_start": period_start,
+            "space_id": stat["space_id"],
+            "plugin_source": stat["plugin_source"],
+            "component_code": stat["component_code"],
+            "version": stat["version"],
+            "plugin_type": stat["plugin_type"],
+            "component_name": stat["component_name"] or "",
+            "execution_count": stat["execution"] or 0,
+            "success_count": stat["success"] or 0,
+            "failed_count": stat["failed"] or 0,
+            "elapsed_time_sum": stat["elapsed_sum"] or 0,
+            "elapsed_count": stat["elapsed_count"] or 0,
+            "max_elapsed_time": stat["max_elapsed"] or 0,
+        }
+        for stat in stats
+    ]
+    bulk_upsert(
+        PluginExecutionSummary,
+        rows,
+        unique_fields=PLUGIN_UNIQUE_FIELDS,
+        replace_fields=PLUGIN_COUNTER_FIELDS + ("plugin_type", "component_name", "max_elapsed_time"),
+        avg_fields=PLUGIN_AVG_FIELDS,
+        using=db_alias,
+    )
 
 
 @shared_task(bind=True, ignore_result=True)
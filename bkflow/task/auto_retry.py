@@ -36,8 +36,8 @@ class AutoRetryNodeStrategyCreator:
         self.taskflow_id = taskflow_id
         self.root_pipeline_id = root_pipeline_id
 
-    def batch_create_strategy(self, pipeline_tree: dict):
-        """批量创建自动重试策略
+    def build_strategies(self, pipeline_tree: dict) -> list:
+        """构造自动重试策略对象，不写入数据库
 
         Args:
             pipeline_tree (dict): 经过子流程展开后的 pipeline 描述结构
@@ -82,5 +82,14 @@ class AutoRetryNodeStrategyCreator:
             return strategies
 
         strategy_model = apps.get_model("task", "AutoRetryNodeStrategy")
-        strategies = _initiate_strategy(pipeline_tree)
+        return _initiate_strategy(pipeline_tree)
+
+    def batch_create_strategy(self, pipeline_tree: dict):
+        """批量创建自动重试策略
+
+        Args:
+            pipeline_tree (dict): 经过子流程展开后的 pipeline 描述结构
+        """
+        strategy_model = apps.get_model("task", "AutoRetryNodeStrategy")
+        strategies = self.build_strategies(pipeline_tree)
         strategy_model.objects.bulk_create(strategies, batch_size=self.TASKFLOW_NODE_AUTO_RETRY_BATCH_CREATE_COUNT)
@@ -0,0 +1,149 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import logging
+from collections import defaultdict
+from copy import deepcopy
+
+from pipeline.eri.models import State as DBState
+
+from bkflow.constants import TaskStates
+from bkflow.task.operations import TaskOperation
+from bkflow.task.utils import format_task_states
+
+logger = logging.getLogger("root")
+
+# 单次 IN 查询的根节点数量上限，避免 SQL 过长
+STATE_QUERY_BATCH_SIZE = 200
+
+STATE_FIELDS = (
+    "node_id",
+    "root_id",
+    "parent_id",
+    "name",
+    "version",
+    "loop",
+    "retry",
+    "skip",
+    "error_ignored",
+    "created_time",
+    "started_time",
+    "archived_time",
+)
+
+
+def _state_to_node(state):
+    return {
+        "id": state["node_id"],
+        "state": state["name"],
+        "root_id:": state["root_id"],
+        "parent_id": state["parent_id"],
+        "version": state["version"],
+        "loop": state["loop"],
+        "retry": state["retry"],
+        "skip": state["skip"],
+        "error_ignorable": state["error_ignored"],
+        "error_ignored": state["error_ignored"],
+        "created_time": state["created_time"],
+        "started_time": state["started_time"],
+        "archived_time": state["archived_time"],
+        "children": {},
+    }
+
+
+def build_state_tree(root_id, states):
+    """
+    根据同一个根节点下的所有 State 记录在内存中组装状态树，结构与 bamboo_engine get_pipeline_states(flat_children=False) 一致
+    """
+    root_state = None
+    nodes = {}
+    for state in states:
+        if state["node_id"] == root_id:
+            root_state = state
+        else:
+            nodes[state["node_id"]] = _state_to_node(state)
+
+    if root_state is None:
+        return None
+
+    children = {}
+    for node_id, node in nodes.items():
+        parent_id = node["parent_id"]
+        if parent_id in nodes:
+            nodes[parent_id]["children"][node_id] = node
+        elif parent_id == root_id:
+            children[node_id] = node
+
+    tree = _state_to_node(root_state)
+    tree["parent_id"] = root_state["root_id"]
+    tree["children"] = children
+    return tree
+
+
+def get_pipeline_state_trees(root_ids):
+    """
+    批量获取多个 pipeline 的状态树，按批次查询 State 表，查询次数与根节点数量无关
+    :return: {root_id: state_tree}，没有状态记录的 root_id 不会出现在结果中
+    """
+    root_ids = list(set(root_ids))
+    grouped_states = defaultdict(list)
+    for i in range(0, len(root_ids), STATE_QUERY_BATCH_SIZE):
+        batch_root_ids = root_ids[i : i + STATE_QUERY_BATCH_SIZE]
+        for state in DBState.objects.filter(root_id__in=batch_root_ids).values(*STATE_FIELDS):
+            grouped_states[state["root_id"]].append(state)
+
+    state_trees = {}
+    for root_id, states in grouped_states.items():
+        tree = build_state_tree(root_id, states)
+        if tree is not None:
+            state_trees[root_id] = tree
+    return state_trees
+
+
+def batch_get_task_states(task_instances):
+    """
+    批量获取任务状态树，返回格式与 TaskOperation.get_task_states 保持一致
+    :return: {task_id: state_tree}，获取失败的任务对应值为 None
+    """
+    task_states = {}
+    running_instances = []
+    for task_instance in task_instances:
+        if task_instance.is_expired:
+            task_states[task_instance.id] = {"state": TaskStates.EXPIRED.value}
+        elif not task_instance.is_started:
+            task_states[task_instance.id] = deepcopy(TaskOperation.CREATED_STATUS)
+        else:
+            running_instances.append(task_instance)
+
+    if not running_instances:
+        return task_states
+
+    state_trees = get_pipeline_state_trees([task_instance.instance_id for task_instance in running_instances])
+    for task_instance in running_instances:
+        tree = state_trees.get(task_instance.instance_id)
+        if tree is None:
+            task_states[task_instance.id] = {"state": TaskStates.CREATED.value}
+            continue
+        try:
+            format_task_states(tree)
+        except Exception:
+            logger.exception("[batch_get_task_states] format task states failed, task_id=%s", task_instance.id)
+            task_states[task_instance.id] = None
+            continue
+        task_states[task_instance.id] = tree
+    return task_states
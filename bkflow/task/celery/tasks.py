@@ -226,9 +226,11 @@ def send_task_message(task_id, node_id, msg_type):
 
 
 @current_app.task(acks_late=True)
-def dispatch_timeout_nodes(record_id: int):
-    record = TimeoutNodesRecord.objects.get(id=record_id)
-    nodes = json.loads(record.timeout_nodes)
+def dispatch_timeout_nodes(record_id: int = None, nodes: list = None):
+    # 兼容历史通过 TimeoutNodesRecord 传递超时节点的消息
+    if nodes is None:
+        record = TimeoutNodesRecord.objects.get(id=record_id)
+        nodes = json.loads(record.timeout_nodes)
     for node in nodes:
         node_id, version = node.split("_")
         execute_node_timeout_strategy.apply_async(
@@ -20,18 +20,15 @@ to the current version of the project delivered to anyone in the future.
 
 # -*- coding: utf-8 -*-
 
-import datetime
-import json
 import logging
 import signal
 import time
 
 from django.conf import settings
 from django.core.management import BaseCommand
-from django.db import connections
 
 from bkflow.task.celery.tasks import dispatch_timeout_nodes
-from bkflow.task.models import TimeoutNodesRecord
+from bkflow.task.node_timeout import NodeTimeoutScheduler
 from bkflow.task.utils import redis_inst_check
 
 logger = logging.getLogger("root")
@@ -44,47 +41,26 @@ class Command(BaseCommand):
     @redis_inst_check
     def handle(self, *args, **options):
         signal.signal(signal.SIGTERM, self._graceful_exit)
-        redis_inst = settings.redis_inst
-        nodes_pool = settings.EXECUTING_NODE_POOL
+        scheduler = NodeTimeoutScheduler(redis_inst=settings.redis_inst, dispatcher=self.dispatch_timeout_nodes)
         while not self.has_killed:
             try:
-                start = time.time()
-                self._pop_timeout_nodes(redis_inst, nodes_pool)
-                end = time.time()
-                # 预期扫描时间在0.2秒以内
-                if end - start > 0.2:
-                    logger.warning(f"[node_timeout_process] time consuming: {end-start}")
+                if scheduler.pubsub is None:
+                    scheduler.subscribe()
+                scheduler.run_once()
             except Exception as e:
                 logger.exception(e)
-            time.sleep(1)
+                # 连接异常时重建订阅，避免异常情况下空转
+                scheduler.close()
+                time.sleep(1)
+        scheduler.close()
 
     def _graceful_exit(self, *args):
         self.has_killed = True
 
-    def _pop_timeout_nodes(self, redis_inst, nodes_pool) -> list:
-        now = datetime.datetime.now().timestamp()
-        timeout_nodes = [
-            node.decode("utf-8") if isinstance(node, bytes) else node
-            for node in redis_inst.zrangebyscore(nodes_pool, "-inf", now)
-        ]
-        if timeout_nodes:
-            node_num = len(timeout_nodes)
-            logger.info(f"[node_timeout_process] {node_num} nodes timeout")
-            record_id = self.record_timeout_nodes(timeout_nodes)
-            logger.info(f"[node_timeout_process] {node_num} has been recorded with id: {record_id}")
-            redis_inst.zrem(nodes_pool, *timeout_nodes)
-        return timeout_nodes
-
     @staticmethod
-    def record_timeout_nodes(timeout_nodes: list):
-        # 处理因为过长时间没有访问导致的链接失效问题
-        for conn in connections.all():
-            conn.close_if_unusable_or_obsolete()
-
-        record = TimeoutNodesRecord.objects.create(timeout_nodes=json.dumps(timeout_nodes))
+    def dispatch_timeout_nodes(timeout_nodes: list):
         dispatch_timeout_nodes.apply_async(
-            kwargs={"record_id": record.id},
+            kwargs={"nodes": timeout_nodes},
             queue=f"timeout_node_record_{settings.BKFLOW_MODULE.code}",
             routing_key=f"timeout_node_record_{settings.BKFLOW_MODULE.code}",
         )
-        return record.id
@@ -17,6 +17,7 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 
+import hashlib
 import json
 import logging
 from collections import defaultdict
@@ -24,6 +25,7 @@ from collections import defaultdict
 from bamboo_engine import states
 from django.conf import settings
 from django.db import transaction
+from django.db.models.signals import post_save
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django_celery_beat.models import CrontabSchedule as DjangoCeleryBeatCrontabSchedule
@@ -49,10 +51,14 @@ from bkflow.pipeline_plugins.components.collections.subprocess_plugin.converter
 )
 from bkflow.task.auto_retry import AutoRetryNodeStrategyCreator
 from bkflow.task.utils import parse_node_timeout_configs
+from bkflow.utils import redis_cache
 from bkflow.utils.models import CommonSnapshot, CommonSnapshotManager
 
 logger = logging.getLogger("root")
 
+# 批量创建任务时单条批量 SQL 写入的记录数上限
+TASK_BATCH_CREATE_SIZE = 100
+
 
 class TaskTreeInfo(models.Model):
     id = models.BigAutoField(primary_key=True)
@@ -85,6 +91,29 @@ class TaskExecutionSnapshot(CommonSnapshot):
         ordering = ["-id"]
 
 
+def get_cached_snapshot(snapshot_cls, snapshot_id):
+    """
+    获取快照，快照写入后不会再修改，开启 TASK_SNAPSHOT_CACHE_ENABLED 后会以快照 id 为 key 在 redis 中跨请求缓存，
+    命中时不查询数据库，返回的实例只包含 id、md5sum 及 data
+    """
+    if not snapshot_id:
+        return None
+    if not settings.TASK_SNAPSHOT_CACHE_ENABLED:
+        return snapshot_cls.objects.filter(id=snapshot_id).first()
+
+    cache_key = "{}:{}".format(snapshot_cls._meta.db_table, snapshot_id)
+    cached = redis_cache.get_json(cache_key)
+    if cached is not None:
+        return snapshot_cls(id=snapshot_id, md5sum=cached["md5sum"], data=cached["data"])
+
+    snapshot = snapshot_cls.objects.filter(id=snapshot_id).first()
+    if snapshot is not None:
+        redis_cache.set_json(
+            cache_key, {"md5sum": snapshot.md5sum, "data": snapshot.data}, settings.TASK_SNAPSHOT_CACHE_TTL
+        )
+    return snapshot
+
+
 class TaskInstanceManager(models.Manager):
     def set_finished(self, instance_id: str):
         self.filter(instance_id=instance_id).update(finish_time=timezone.now(), is_finished=True)
@@ -101,6 +130,21 @@ class TaskInstanceManager(models.Manager):
             for node_id, node in pipeline_tree.get(node_type, {}).items():
                 node["template_node_id"] = node.get("template_node_id") or node_id
 
+    @staticmethod
+    def build_mock_data(mock_data: dict, act_mappings: dict):
+        """
+        将 mock 数据中的节点 ID 替换为任务中的节点 ID
+        """
+        new_mock_data = {
+            "nodes": [act_mappings[node_id] for node_id in mock_data.get("nodes", [])],
+            "outputs": {act_mappings[node_id]: outputs for node_id, outputs in mock_data.get("outputs", {}).items()},
+        }
+        if mock_data.get("fail_nodes"):
+            new_mock_data["fail_nodes"] = [act_mappings[nid] for nid in mock_data["fail_nodes"]]
+        if mock_data.get("errors"):
+            new_mock_data["errors"] = {act_mappings[nid]: msg for nid, msg in mock_data["errors"].items()}
+        return new_mock_data
+
     def create_instance(self, *args, **kwargs):
         """
         创建任务实例
@@ -126,18 +170,10 @@ class TaskInstanceManager(models.Manager):
             )
             # create task mock data
             if kwargs.get("create_method") in ("MOCK", "DEBUG"):
-                new_mock_data = {}
-                act_mappings = node_mappings[PE.activities]
-                new_mock_data["nodes"] = [act_mappings[node_id] for node_id in mock_data.get("nodes", [])]
-                new_mock_data["outputs"] = {
-                    act_mappings[node_id]: outputs for node_id, outputs in mock_data.get("outputs", {}).items()
-                }
-                if mock_data.get("fail_nodes"):
-                    new_mock_data["fail_nodes"] = [act_mappings[nid] for nid in mock_data["fail_nodes"]]
-                if mock_data.get("errors"):
-                    new_mock_data["errors"] = {act_mappings[nid]: msg for nid, msg in mock_data["errors"].items()}
                 TaskMockData.objects.create(
-                    taskflow_id=instance.id, data=new_mock_data, mock_data_ids=mock_data.get("mock_data_ids", {})
+                    taskflow_id=instance.id,
+                    data=self.build_mock_data(mock_data, node_mappings[PE.activities]),
+                    mock_data_ids=mock_data.get("mock_data_ids", {}),
                 )
             # create auto retry strategy
             arn_creator = AutoRetryNodeStrategyCreator(taskflow_id=instance.id, root_pipeline_id=instance.instance_id)
@@ -151,6 +187,111 @@ class TaskInstanceManager(models.Manager):
 
         return instance
 
+    @staticmethod
+    def _get_snapshot_ids(snapshot_model, md5sums):
+        snapshot_ids = {}
+        for snapshot_id, md5sum in (
+            snapshot_model.objects.filter(md5sum__in=set(md5sums)).order_by("id").values_list("id", "md5sum")
+        ):
+            snapshot_ids.setdefault(md5sum, snapshot_id)
+        return snapshot_ids
+
+    def _bulk_get_or_create_snapshots(self, snapshot_model, trees):
+        """
+        以 md5 去重批量写入快照，每棵树只序列化一次，数据写入前不能再修改
+        :return: 与 trees 顺序一致的快照 ID 列表
+        """
+        md5sums = [hashlib.md5(json.dumps(tree).encode("utf-8")).hexdigest() for tree in trees]
+        snapshot_ids = self._get_snapshot_ids(snapshot_model, md5sums)
+        to_create = {}
+        for md5sum, tree in zip(md5sums, trees):
+            if md5sum not in snapshot_ids and md5sum not in to_create:
+                to_create[md5sum] = snapshot_model(md5sum=md5sum, data=tree)
+        if to_create:
+            snapshot_model.objects.bulk_create(to_create.values(), batch_size=TASK_BATCH_CREATE_SIZE)
+            snapshot_ids.update(self._get_snapshot_ids(snapshot_model, to_create.keys()))
+        return [snapshot_ids[md5sum] for md5sum in md5sums]
+
+    def batch_create_instances(self, tasks_kwargs: list):
+        """
+        批量创建任务实例，快照、任务、mock 数据、自动重试策略及超时配置均批量写入
+        :param tasks_kwargs: 每个元素与 create_instance 的参数一致
+        :return: 与 tasks_kwargs 顺序一致的任务实例列表
+        """
+        tasks_kwargs = [dict(task_kwargs) for task_kwargs in tasks_kwargs]
+        pipeline_trees, mock_datas = [], []
+        for task_kwargs in tasks_kwargs:
+            pipeline_tree = task_kwargs.pop("pipeline_tree")
+            pipeline_tree["id"] = node_uniqid()
+            pipeline_trees.append(pipeline_tree)
+            mock_datas.append(task_kwargs.pop("mock_data", {}))
+
+        with transaction.atomic():
+            snapshot_ids = self._bulk_get_or_create_snapshots(TaskSnapshot, pipeline_trees)
+            act_mappings = []
+            for pipeline_tree in pipeline_trees:
+                self.inject_template_node_id(pipeline_tree)
+                PipelineTreeSubprocessConverter(pipeline_tree).convert()
+                act_mappings.append(replace_all_id(pipeline_tree)[PE.activities])
+            execution_snapshot_ids = self._bulk_get_or_create_snapshots(TaskExecutionSnapshot, pipeline_trees)
+
+            instance_ids = [pipeline_tree["id"] for pipeline_tree in pipeline_trees]
+            self.bulk_create(
+                [
+                    self.model(
+                        instance_id=instance_id,
+                        snapshot_id=snapshot_id,
+                        execution_snapshot_id=execution_snapshot_id,
+                        **task_kwargs,
+                    )
+                    for instance_id, snapshot_id, execution_snapshot_id, task_kwargs in zip(
+                        instance_ids, snapshot_ids, execution_snapshot_ids, tasks_kwargs
+                    )
+                ],
+                batch_size=TASK_BATCH_CREATE_SIZE,
+            )
+            # bulk_create 在 MySQL 下不会回填主键，需要按 instance_id 重新查询
+            instance_map = self.in_bulk(instance_ids, field_name="instance_id")
+            instances = [instance_map[instance_id] for instance_id in instance_ids]
+
+            mock_data_objs, strategies, timeout_configs = [], [], []
+            for instance, pipeline_tree, mock_data, act_mapping in zip(
+                instances, pipeline_trees, mock_datas, act_mappings
+            ):
+                if instance.create_method in ("MOCK", "DEBUG"):
+                    mock_data_objs.append(
+                        TaskMockData(
+                            taskflow_id=instance.id,
+                            data=self.build_mock_data(mock_data, act_mapping),
+                            mock_data_ids=mock_data.get("mock_data_ids", {}),
+                        )
+                    )
+                strategies.extend(
+                    AutoRetryNodeStrategyCreator(
+                        taskflow_id=instance.id, root_pipeline_id=instance.instance_id
+                    ).build_strategies(pipeline_tree)
+                )
+                timeout_configs.extend(
+                    TimeoutNodeConfig.objects.build_node_timeout_configs(
+                        taskflow_id=instance.id, root_pipeline_id=instance.instance_id, pipeline_tree=pipeline_tree
+                    )
+                )
+            TaskMockData.objects.bulk_create(mock_data_objs, batch_size=TASK_BATCH_CREATE_SIZE)
+            AutoRetryNodeStrategy.objects.bulk_create(
+                strategies, batch_size=AutoRetryNodeStrategyCreator.TASKFLOW_NODE_AUTO_RETRY_BATCH_CREATE_COUNT
+            )
+            TimeoutNodeConfig.objects.bulk_create(
+                timeout_configs, batch_size=TimeoutNodeConfigManager.NODE_TIMEOUT_CONFIG_BATCH_CREAT_COUNT
+            )
+
+            # bulk_create 不会触发 post_save，手动发送保证任务创建的信号处理（如统计）与逐个创建一致
+            for instance in instances:
+                post_save.send(
+                    sender=self.model, instance=instance, created=True, update_fields=None, raw=False, using=self.db
+                )
+
+        return instances
+
 
 class TaskInstance(models.Model):
     """
@@ -199,9 +340,34 @@ class TaskInstance(models.Model):
         setattr(self, "is_deleted", True)
         self.save(update_fields=["is_deleted"])
 
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop("_snapshot_cache", None)
+        return state
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.clear_snapshot_cache()
+
+    def clear_snapshot_cache(self):
+        """
+        清理实例上缓存的快照数据，快照 id 变化或快照内容被原地修改后需要调用
+        snapshot、execution_snapshot 等属性在同一实例上返回的是同一份数据，调用方不应原地修改，需要修改时先复制
+        """
+        self.__dict__.pop("_snapshot_cache", None)
+
+    def _get_cached(self, key, loader):
+        # 以 (类型, 快照 id) 作为 key，快照 id 被重新赋值后会自动失效
+        snapshot_cache = self.__dict__.setdefault("_snapshot_cache", {})
+        if key not in snapshot_cache:
+            snapshot_cache[key] = loader()
+        return snapshot_cache[key]
+
     @property
     def snapshot(self):
-        return TaskSnapshot.objects.filter(id=self.snapshot_id).first()
+        return self._get_cached(
+            ("snapshot", self.snapshot_id), lambda: get_cached_snapshot(TaskSnapshot, self.snapshot_id)
+        )
 
     @property
     def data(self):
@@ -213,11 +379,16 @@ class TaskInstance(models.Model):
 
     @property
     def tree_info(self):
-        return TaskTreeInfo.objects.filter(id=self.tree_info_id).first()
+        return self._get_cached(
+            ("tree_info", self.tree_info_id), lambda: TaskTreeInfo.objects.filter(id=self.tree_info_id).first()
+        )
 
     @property
     def execution_snapshot(self):
-        return TaskExecutionSnapshot.objects.filter(id=self.execution_snapshot_id).first()
+        return self._get_cached(
+            ("execution_snapshot", self.execution_snapshot_id),
+            lambda: get_cached_snapshot(TaskExecutionSnapshot, self.execution_snapshot_id),
+        )
 
     @property
     def execution_data(self):
@@ -227,7 +398,10 @@ class TaskInstance(models.Model):
     def node_id_set(self):
         if not self.tree_info_id:
             self.calculate_tree_info()
-        return set(TaskTreeInfo.objects.get(id=self.tree_info_id).data["node_id_set"])
+        return self._get_cached(
+            ("node_id_set", self.tree_info_id),
+            lambda: set(TaskTreeInfo.objects.get(id=self.tree_info_id).data["node_id_set"]),
+        )
 
     @property
     def elapsed_time(self):
@@ -240,6 +414,7 @@ class TaskInstance(models.Model):
             execution_snapshot = TaskExecutionSnapshot.objects.create_snapshot(data=data)
         self.execution_snapshot_id = execution_snapshot.id
         self.save(update_fields=["execution_snapshot_id"])
+        self.clear_snapshot_cache()
 
     def _replace_id(self, exec_data):
         replace_all_id(exec_data)
@@ -254,6 +429,8 @@ class TaskInstance(models.Model):
         instance_id = node_uniqid()
 
         exec_data = self.execution_data
+        # exec_data 会被原地替换 id，需要清理缓存避免当前实例读到被修改过的数据
+        self.clear_snapshot_cache()
         self._replace_id(exec_data)
         # replace root id
         exec_data["id"] = instance_id
@@ -298,6 +475,9 @@ class TaskInstance(models.Model):
             tree_info = TaskTreeInfo.objects.create(data=tree_info_data)
             self.tree_info_id = tree_info.id
             self.save(update_fields=["tree_info_id"])
+        snapshot_cache = self.__dict__.get("_snapshot_cache", {})
+        snapshot_cache.pop(("tree_info", self.tree_info_id), None)
+        snapshot_cache.pop(("node_id_set", self.tree_info_id), None)
 
     def has_node(self, node_id):
         return node_id in self.node_id_set
@@ -395,8 +575,8 @@ class AutoRetryNodeStrategy(models.Model):
 class TimeoutNodeConfigManager(models.Manager):
     NODE_TIMEOUT_CONFIG_BATCH_CREAT_COUNT = 500
 
-    def batch_create_node_timeout_config(self, taskflow_id: int, root_pipeline_id: str, pipeline_tree: dict):
-        """批量创建节点超时配置"""
+    def build_node_timeout_configs(self, taskflow_id: int, root_pipeline_id: str, pipeline_tree: dict):
+        """构造节点超时配置对象，不写入数据库"""
 
         config_parse_result = parse_node_timeout_configs(pipeline_tree)
         # 这里忽略解析失败的情况，保证即使解析失败也能正常创建任务
@@ -404,9 +584,9 @@ class TimeoutNodeConfigManager(models.Manager):
             logger.error(
                 f'[batch_create_node_timeout_config] parse node timeout config failed: {config_parse_result["result"]}'
             )
-            return
+            return []
         configs = config_parse_result["data"] or []
-        config_objs = [
+        return [
             TimeoutNodeConfig(
                 task_id=taskflow_id,
                 action=config["action"],
@@ -416,6 +596,10 @@ class TimeoutNodeConfigManager(models.Manager):
             )
             for config in configs
         ]
+
+    def batch_create_node_timeout_config(self, taskflow_id: int, root_pipeline_id: str, pipeline_tree: dict):
+        """批量创建节点超时配置"""
+        config_objs = self.build_node_timeout_configs(taskflow_id, root_pipeline_id, pipeline_tree)
         self.bulk_create(config_objs, batch_size=self.NODE_TIMEOUT_CONFIG_BATCH_CREAT_COUNT)
 
 
@@ -641,6 +825,28 @@ class PeriodicTask(models.Model):
         self.save()
 
 
+class TaskFlowRelationManager(models.Manager):
+    def get_ancestor_task_ids(self, task_id):
+        """
+        获取任务的所有祖先任务ID，按父任务到根任务排序
+        同一根任务下的关系一次查出，在内存中回溯父链
+        """
+        relation = self.filter(task_id=task_id).values("root_task_id").first()
+        if not relation:
+            return []
+
+        parent_map = dict(self.filter(root_task_id=relation["root_task_id"]).values_list("task_id", "parent_task_id"))
+        ancestor_task_ids = []
+        current_task_id = int(task_id)
+        while current_task_id in parent_map:
+            current_task_id = parent_map[current_task_id]
+            # 防御脏数据导致的循环
+            if current_task_id in ancestor_task_ids:
+                break
+            ancestor_task_ids.append(current_task_id)
+        return ancestor_task_ids
+
+
 class TaskFlowRelation(models.Model):
     id = models.BigAutoField(verbose_name="ID", primary_key=True)
     task_id = models.BigIntegerField(verbose_name=_("任务ID"), db_index=True)
@@ -649,6 +855,8 @@ class TaskFlowRelation(models.Model):
     create_time = models.DateTimeField(verbose_name=_("创建时间"), auto_now_add=True)
     extra_info = models.JSONField(verbose_name=_("额外信息"), null=True)
 
+    objects = TaskFlowRelationManager()
+
     class Meta:
         app_label = "task"
         verbose_name = verbose_name_plural = _("任务关系")
@@ -1,4 +1,3 @@
-# -*- coding: utf-8 -*-
 """
 TencentBlueKing is pleased to support the open source community by making
 蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
@@ -23,18 +22,39 @@ import logging
 from abc import ABCMeta, abstractmethod
 from urllib.parse import urlencode
 
-import requests
 from django.conf import settings
-from pipeline.eri.runtime import BambooDjangoRuntime
+from pipeline.eri.models import LogEntry
+
+from bkflow.contrib.api.http import get_session
 
 logger = logging.getLogger("root")
 
+# 远程日志源的默认请求超时时间（秒）
+DEFAULT_REQUEST_TIMEOUT = 10
+# 流式输出时每次从数据库读取的日志条数
+STREAM_CHUNK_SIZE = 500
+
 
 class BaseNodeLogDataSource(metaclass=ABCMeta):
     @abstractmethod
     def fetch_node_logs(self, node_id, version_id, *args, **kwargs):
         raise NotImplementedError()
 
+    def iter_node_logs(self, node_id, version_id, *args, **kwargs):
+        """逐段返回日志内容，默认按页拉取直到没有更多日志，与按条输出时一致，各页之间以换行分隔"""
+        page = 1
+        while True:
+            result = self.fetch_node_logs(
+                node_id, version_id, *args, **{**kwargs, "page": page, "page_size": STREAM_CHUNK_SIZE}
+            )
+            if not result["result"] or not result["data"]["logs"]:
+                return
+            yield result["data"]["logs"] if page == 1 else "\n" + result["data"]["logs"]
+            page_info = result["data"]["page_info"] or {}
+            if page * STREAM_CHUNK_SIZE >= page_info.get("total", 0):
+                return
+            page += 1
+
 
 class PaaS3NodeLogDataSource(BaseNodeLogDataSource):
     def __init__(self):
@@ -60,7 +80,12 @@ class PaaS3NodeLogDataSource(BaseNodeLogDataSource):
             url_params.update({"private_token": self.private_token})
         url = self.url.rstrip("/") + f"/?{urlencode(url_params)}"
         payload = {"query": {"query_string": f"__ext_json.node_id:{node_id} AND __ext_json.version:{version_id}"}}
-        response = requests.get(url, headers=self.headers, data=json.dumps(payload))
+        response = get_session().get(
+            url,
+            headers=self.headers,
+            data=json.dumps(payload),
+            timeout=settings.NODE_LOG_DATA_SOURCE_CONFIG.get("timeout", DEFAULT_REQUEST_TIMEOUT),
+        )
         logger.info(
             f"[PaaS3NodeLogDataSource fetch_node_logs] request {url} with payload {payload} and "
             f"response status_code {response.status_code} and content {response.text}."
@@ -78,10 +103,48 @@ class PaaS3NodeLogDataSource(BaseNodeLogDataSource):
 
 
 class DatabaseNodeLogDataSource(BaseNodeLogDataSource):
+    """
+    从引擎 LogEntry 表读取节点日志，支持以下查询方式：
+    - page/page_size: 按条数分页
+    - cursor: 读取 id 大于 cursor 的日志，用于持续跟踪运行中节点的新日志
+    - tail: 读取最后 tail 条日志
+    - start_time/end_time: 按日志输出时间范围过滤
+    """
+
+    def _filter_logs(self, node_id, version_id, start_time=None, end_time=None):
+        queryset = LogEntry.objects.filter(node_id=node_id, version=version_id)
+        if start_time:
+            queryset = queryset.filter(logged_at__gte=start_time)
+        if end_time:
+            queryset = queryset.filter(logged_at__lte=end_time)
+        return queryset
+
     def fetch_node_logs(self, node_id, version_id, *args, **kwargs):
-        runtime = BambooDjangoRuntime()
-        logs = runtime.get_plain_log_for_node(node_id=node_id, version=version_id)
-        return {"result": True, "data": {"logs": logs, "page_info": {}}, "message": ""}
+        page, page_size = kwargs.get("page", 1), kwargs.get("page_size", 30)
+        cursor, tail = kwargs.get("cursor"), kwargs.get("tail")
+        queryset = self._filter_logs(node_id, version_id, kwargs.get("start_time"), kwargs.get("end_time"))
+
+        if tail:
+            entries = list(queryset.order_by("-id").values_list("id", "message")[:tail])[::-1]
+            page_info = {}
+        elif cursor is not None:
+            entries = list(queryset.filter(id__gt=cursor).order_by("id").values_list("id", "message")[:page_size])
+            page_info = {"page_size": page_size, "has_more": len(entries) == page_size}
+        else:
+            offset = (page - 1) * page_size
+            entries = list(queryset.order_by("id").values_list("id", "message")[offset : offset + page_size])
+            page_info = {"page": page, "page_size": page_size, "total": queryset.count()}
+
+        # 没有新日志时游标保持不变，调用方可以继续用该游标轮询
+        page_info["cursor"] = entries[-1][0] if entries else cursor
+        logs = "\n".join(message or "" for _, message in entries)
+        return {"result": True, "data": {"logs": logs, "page_info": page_info}, "message": ""}
+
+    def iter_node_logs(self, node_id, version_id, *args, **kwargs):
+        queryset = self._filter_logs(node_id, version_id, kwargs.get("start_time"), kwargs.get("end_time"))
+        messages = queryset.order_by("id").values_list("message", flat=True).iterator(chunk_size=STREAM_CHUNK_SIZE)
+        for index, message in enumerate(messages):
+            yield (message or "") if index == 0 else "\n" + (message or "")
 
 
 class DummyLogDataSource(BaseNodeLogDataSource):
@@ -17,10 +17,37 @@ We undertake not to change the open source license (MIT license) applicable
 
 to the current version of the project delivered to anyone in the future.
 """
+import logging
+import time
 from abc import ABCMeta, abstractmethod
 
+from django.conf import settings
+
 from bkflow.task.operations import TaskNodeOperation
 
+logger = logging.getLogger("root")
+
+# 写入节点超时时间，新写入的超时时间早于池中所有节点时发布唤醒消息
+ADD_TIMEOUT_NODE_SCRIPT = """
+local added = redis.call('ZADD', KEYS[1], 'NX', ARGV[2], ARGV[1])
+if added == 1 then
+    local first = redis.call('ZRANGE', KEYS[1], 0, 0)
+    if first[1] == ARGV[1] then
+        redis.call('PUBLISH', ARGV[3], ARGV[2])
+    end
+end
+return added
+"""
+
+# 原子地取出并删除已超时的节点，多个调度进程同时运行时同一节点只会被一个进程取到
+CLAIM_TIMEOUT_NODES_SCRIPT = """
+local nodes = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[2])
+for i = 1, #nodes, 2 do
+    redis.call('ZREM', KEYS[1], nodes[i])
+end
+return nodes
+"""
+
 
 class NodeTimeoutStrategy(metaclass=ABCMeta):
     TIMEOUT_NODE_OPERATOR = "bkflow_engine"
@@ -48,3 +75,101 @@ node_timeout_handler = {
     "forced_fail": ForcedFailStrategy(),
     "forced_fail_and_skip": ForcedFailAndSkipStrategy(),
 }
+
+
+def add_timeout_node(redis_inst, node_key, timeout_time):
+    """
+    将执行中的节点加入超时池，若其超时时间最早则唤醒调度进程
+    """
+    return redis_inst.eval(
+        ADD_TIMEOUT_NODE_SCRIPT,
+        1,
+        settings.EXECUTING_NODE_POOL,
+        node_key,
+        timeout_time,
+        settings.EXECUTING_NODE_POOL_WAKEUP_CHANNEL,
+    )
+
+
+class NodeTimeoutScheduler:
+    """
+    节点超时调度器：休眠到池中最早的超时时间，有更早的超时节点写入时通过 pub/sub 被提前唤醒，
+    超时节点通过 lua 脚本原子认领，支持多进程部署
+    """
+
+    def __init__(self, redis_inst, dispatcher, batch_size=None, max_wait=None):
+        self.redis_inst = redis_inst
+        self.dispatcher = dispatcher
+        self.nodes_pool = settings.EXECUTING_NODE_POOL
+        self.wakeup_channel = settings.EXECUTING_NODE_POOL_WAKEUP_CHANNEL
+        self.batch_size = batch_size or settings.NODE_TIMEOUT_CLAIM_BATCH_SIZE
+        # 兜底的最长休眠时间，防止 pub/sub 消息丢失（如连接重建期间）导致超时处理延迟
+        self.max_wait = max_wait or settings.NODE_TIMEOUT_MAX_IDLE_WAIT
+        self.claim_script = redis_inst.register_script(CLAIM_TIMEOUT_NODES_SCRIPT)
+        self.pubsub = None
+
+    @staticmethod
+    def _decode(value):
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def subscribe(self):
+        self.pubsub = self.redis_inst.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(self.wakeup_channel)
+
+    def close(self):
+        if self.pubsub is not None:
+            self.pubsub.close()
+            self.pubsub = None
+
+    def claim_timeout_nodes(self, now=None):
+        """
+        认领已超时的节点
+        :return: [(node_key, timeout_time)]
+        """
+        now = time.time() if now is None else now
+        result = self.claim_script(keys=[self.nodes_pool], args=[now, self.batch_size])
+        return [(self._decode(result[i]), float(result[i + 1])) for i in range(0, len(result), 2)]
+
+    def dispatch(self, claimed_nodes):
+        nodes = [node for node, _ in claimed_nodes]
+        try:
+            self.dispatcher(nodes)
+        except Exception:
+            # 分发失败时将节点放回超时池，等待下一轮重新认领
+            logger.exception(f"[NodeTimeoutScheduler] dispatch {len(nodes)} timeout nodes failed, put them back")
+            self.redis_inst.zadd(self.nodes_pool, mapping=dict(claimed_nodes))
+            raise
+
+    def next_wait_seconds(self, now=None):
+        now = time.time() if now is None else now
+        earliest = self.redis_inst.zrange(self.nodes_pool, 0, 0, withscores=True)
+        if not earliest:
+            return self.max_wait
+        return min(max(earliest[0][1] - now, 0), self.max_wait)
+
+    def wait(self, seconds):
+        """
+        休眠指定时间，收到唤醒消息时提前返回
+        """
+        if seconds <= 0:
+            return
+        if self.pubsub is None:
+            time.sleep(seconds)
+            return
+        message = self.pubsub.get_message(timeout=seconds)
+        # 丢弃堆积的唤醒消息，避免无意义的空转
+        while message is not None:
+            message = self.pubsub.get_message(timeout=0)
+
+    def run_once(self):
+        """
+        执行一轮调度：认领并分发所有已超时节点，然后休眠到下一个超时时间
+        """
+        claimed_nodes = self.claim_timeout_nodes()
+        while claimed_nodes:
+            logger.info(f"[NodeTimeoutScheduler] {len(claimed_nodes)} nodes timeout")
+            self.dispatch(claimed_nodes)
+            if len(claimed_nodes) < self.batch_size:
+                break
+            claimed_nodes = self.claim_timeout_nodes()
+        self.wait(self.next_wait_seconds())
@@ -18,6 +18,7 @@ to the current version of the project delivered to anyone in the future.
 """
 
 import functools
+import json
 import logging
 import traceback
 from contextlib import nullcontext
@@ -38,9 +39,10 @@ from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 from pipeline.component_framework.library import ComponentLibrary
-from pipeline.engine.utils import calculate_elapsed_time
 from pipeline.eri.imp.serializer import SerializerMixin
 from pipeline.eri.models import ExecutionData as DBExecutionData
+from pipeline.eri.models import Node as DBNode
+from pipeline.eri.models import Process as DBProcess
 from pipeline.eri.models import Schedule as DBSchedule
 from pipeline.eri.runtime import BambooDjangoRuntime
 from pipeline.parser.context import get_pipeline_context
@@ -55,6 +57,7 @@ from bkflow.constants import (
 )
 from bkflow.contrib.api.collections.interface import InterfaceModuleClient
 from bkflow.contrib.operation_record.decorators import record_operation
+from bkflow.decision_table.table_cache import warm_decision_tables
 from bkflow.exceptions import ValidationError
 from bkflow.pipeline_plugins.components.collections.uniform_api.credential_handlers import (
     CredentialKeySpaceConfigHandler,
@@ -75,9 +78,9 @@ from bkflow.task.open_plugin_callback import (
 )
 from bkflow.task.signals.context import suppress_node_failure_side_effects
 from bkflow.task.signals.signals import taskflow_started
-from bkflow.task.utils import format_bamboo_engine_status
+from bkflow.task.space_cache import get_space_variables, validate_open_plugins_for_start
+from bkflow.task.utils import format_bamboo_engine_status, format_task_states
 from bkflow.utils.canvas import get_variable_mapping
-from bkflow.utils.dates import format_datetime
 from bkflow.utils.handlers import mask_sensitive_data_for_display
 from bkflow.utils.trace import create_execution_span, start_trace
 
@@ -125,6 +128,58 @@ def uniform_task_operation_result(func):
     return wrapper
 
 
+def get_nodes_ex_data(node_ids) -> dict:
+    """
+    批量获取节点执行输出中的 ex_data，只查询一次 ExecutionData
+    :return: {node_id: ex_data}，没有执行数据的节点为 None，反序列化失败的节点为失败信息
+    """
+    nodes_ex_data = {node_id: None for node_id in node_ids}
+    if not nodes_ex_data:
+        return nodes_ex_data
+
+    serializer = SerializerMixin()
+    execution_data_qs = DBExecutionData.objects.filter(node_id__in=list(nodes_ex_data)).only(
+        "node_id", "outputs_serializer", "outputs"
+    )
+    for execution_data in execution_data_qs:
+        try:
+            outputs = serializer._deserialize(execution_data.outputs, execution_data.outputs_serializer)
+        except Exception as e:
+            nodes_ex_data[execution_data.node_id] = "get ex_data fail: {}".format(e)
+            continue
+        nodes_ex_data[execution_data.node_id] = outputs.get("ex_data")
+    return nodes_ex_data
+
+
+def infer_sleeping_schedule_types(runtime, node_ids) -> dict:
+    """
+    批量推断休眠中节点的调度类型：休眠进程和节点详情各查询一次，服务从组件库加载不访问数据库
+    :return: {node_id: schedule_type_name}，非休眠或无法推断的节点不会出现在结果中
+    """
+    sleeping_node_ids = set(
+        DBProcess.objects.filter(asleep=True, current_node_id__in=list(node_ids)).values_list(
+            "current_node_id", flat=True
+        )
+    )
+    if not sleeping_node_ids:
+        return {}
+
+    schedule_types = {}
+    for node in DBNode.objects.filter(node_id__in=sleeping_node_ids).only("node_id", "detail"):
+        try:
+            node_detail = json.loads(node.detail)
+            service = runtime.get_service(
+                code=node_detail["code"], version=node_detail["version"], name=node_detail.get("name")
+            )
+            inferred_type = service.schedule_type()
+        except Exception:
+            logger.warning("[get_task_states] infer schedule type failed, node_id=%s", node.node_id, exc_info=True)
+            continue
+        if inferred_type:
+            schedule_types[node.node_id] = inferred_type.name
+    return schedule_types
+
+
 def trace_task_operation(operation_name: str, operation_type: str = "task"):
     """为任务操作添加 trace span 的装饰器
 
@@ -340,7 +395,7 @@ class TaskOperation:
             payload["snapshot"] = snapshot
         else:
             payload["pipeline_tree"] = pipeline_tree
-        result = InterfaceModuleClient().validate_open_plugins_for_start(payload)
+        result = validate_open_plugins_for_start(self.task_instance.space_id, payload)
         if not result.get("result"):
             raise ValidationError(result.get("message") or "开放插件启动预检失败")
 
@@ -360,6 +415,8 @@ class TaskOperation:
 
         try:
             self.task_instance.refresh_from_db()
+            # 预热流程引用的决策表，避免决策节点执行时逐次请求 interface
+            warm_decision_tables(self.task_instance.space_id, self.task_instance.execution_data)
             # convert web pipeline to pipeline
             pipeline = format_web_data_to_pipeline(self.task_instance.execution_data)
 
@@ -369,13 +426,7 @@ class TaskOperation:
             system_obj = SystemObject(root_pipeline_data)
             root_pipeline_context = {"${_system}": system_obj}
             # 获取空间变量
-            space_var = InterfaceModuleClient().get_variable(self.task_instance.space_id)
-            if not space_var.get("result"):
-                logger.error("get space variable failed: %s", space_var.get("message"))
-                space_var_data = {}
-            else:
-                space_var_data = space_var.get("data", {})
-            root_pipeline_context.update(space_var_data)
+            root_pipeline_context.update(get_space_variables(self.task_instance.space_id))
 
             # 创建执行级根 Span，将 trace context 注入 pipeline data，
             # 后续插件 Span 通过这些 ID 建立父子关系
@@ -501,36 +552,7 @@ class TaskOperation:
         # subprocess not been executed
         task_states = task_states or TaskStates.CREATED.value
 
-        def _format_status_time(status_tree):
-            status_tree.setdefault("children", {})
-            status_tree.pop("created_time", "")
-            started_time = status_tree.pop("started_time", None)
-            archived_time = status_tree.pop("archived_time", None)
-
-            if "elapsed_time" not in status_tree:
-                status_tree["elapsed_time"] = calculate_elapsed_time(started_time, archived_time)
-
-            status_tree["start_time"] = format_datetime(started_time) if started_time else ""
-            status_tree["finish_time"] = format_datetime(archived_time) if archived_time else ""
-
-        def format_bamboo_engine_status(status_tree):
-            """
-            @summary: 转换通过 bamboo engine api 获取的任务状态格式
-            @return:
-            """
-            _format_status_time(status_tree)
-            child_status = set()
-            for identifier_code, child_tree in list(status_tree["children"].items()):
-                format_bamboo_engine_status(child_tree)
-                child_status.add(child_tree["state"])
-
-            if status_tree["state"] == bamboo_engine_states.RUNNING:
-                if bamboo_engine_states.FAILED in child_status:
-                    status_tree["state"] = bamboo_engine_states.FAILED
-                elif bamboo_engine_states.SUSPENDED in child_status:
-                    status_tree["state"] = "NODE_SUSPENDED"
-
-        format_bamboo_engine_status(task_states)
+        format_task_states(task_states)
 
         if include_schedule:
             nodes = []
@@ -553,31 +575,19 @@ class TaskOperation:
                 except ValueError:
                     continue
                 schedule_types[(schedule["node_id"], schedule["version"])] = schedule_type
+            infer_nodes = []
             for node in nodes:
                 schedule_type = schedule_types.get((node.get("id"), node.get("version")))
                 if schedule_type:
                     node["schedule_type"] = schedule_type
-                    continue
-                if node.get("state") != bamboo_engine_states.RUNNING or not node.get("id"):
-                    continue
-                try:
-                    if not runtime.get_sleep_process_info_with_current_node_id(node["id"]):
-                        continue
-                    engine_node = runtime.get_node(node["id"])
-                    service = runtime.get_service(
-                        code=engine_node.code,
-                        version=engine_node.version,
-                        name=engine_node.name,
-                    )
-                    inferred_type = service.schedule_type()
-                    if inferred_type:
-                        node["schedule_type"] = inferred_type.name
-                except Exception:
-                    logger.warning(
-                        "[get_task_states] infer schedule type failed, node_id=%s",
-                        node["id"],
-                        exc_info=True,
-                    )
+                elif node.get("state") == bamboo_engine_states.RUNNING and node.get("id"):
+                    infer_nodes.append(node)
+            # 没有未完成调度记录的运行中节点，按休眠进程和插件定义批量推断调度类型
+            if infer_nodes:
+                inferred_types = infer_sleeping_schedule_types(runtime, {node["id"] for node in infer_nodes})
+                for node in infer_nodes:
+                    if node["id"] in inferred_types:
+                        node["schedule_type"] = inferred_types[node["id"]]
 
         def collect_fail_nodes(task_status: dict) -> list:
             task_status["ex_data"] = {}
@@ -596,14 +606,7 @@ class TaskOperation:
         # 返回失败节点和对应调试信息
         if with_ex_data and task_states["state"] == bamboo_engine_states.FAILED:
             fail_nodes = collect_fail_nodes(task_states)
-            task_states["ex_data"] = {}
-            for node_id in fail_nodes:
-                data_result = bamboo_engine_api.get_execution_data_outputs(runtime=runtime, node_id=node_id)
-
-                if not data_result:
-                    task_states["ex_data"][node_id] = "get ex_data fail: {}".format(data_result.exc)
-                else:
-                    task_states["ex_data"][node_id] = data_result.data.get("ex_data")
+            task_states["ex_data"] = get_nodes_ex_data(fail_nodes)
 
         return OperationResult(result=True, data=task_states)
 
@@ -1022,9 +1025,9 @@ class TaskNodeOperation:
                 system_obj = SystemObject(root_pipeline_data)
                 root_pipeline_context = {"${_system}": {"type": "plain", "value": system_obj}}
                 # 补充空间变量
-                space_var = InterfaceModuleClient().get_variable(self.task_instance.space_id)
+                space_var_data = get_space_variables(self.task_instance.space_id)
                 root_pipeline_context.update(
-                    {key: {"type": "plain", "value": value} for key, value in space_var["data"].items()}
+                    {key: {"type": "plain", "value": value} for key, value in space_var_data.items()}
                 )
                 existing_context_values = runtime.get_context(self.task_instance.instance_id)
                 root_pipeline_context.update(
@@ -24,7 +24,12 @@ from pipeline.engine.utils import calculate_elapsed_time
 from pipeline.exceptions import PipelineException
 from rest_framework import serializers
 
-from bkflow.constants import TaskOperationSource, TaskOperationType
+from bkflow.constants import (
+    BATCH_CREATE_TASK_MAX_NUM,
+    SpaceCacheResource,
+    TaskOperationSource,
+    TaskOperationType,
+)
 from bkflow.pipeline_web.parser.validator import validate_web_pipeline_tree
 from bkflow.task.models import (
     EngineSpaceConfigValueType,
@@ -134,6 +139,15 @@ class CreateTaskInstanceSerializer(serializers.ModelSerializer):
         ]
 
 
+class BatchCreateTaskInstanceSerializer(serializers.Serializer):
+    tasks = CreateTaskInstanceSerializer(many=True, allow_empty=False, help_text="待创建的任务列表")
+
+    def validate_tasks(self, value):
+        if len(value) > BATCH_CREATE_TASK_MAX_NUM:
+            raise serializers.ValidationError(f"at most {BATCH_CREATE_TASK_MAX_NUM} tasks can be created at once")
+        return value
+
+
 class TaskInstanceSerializer(serializers.ModelSerializer):
     create_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S%z")
     start_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S%z")
@@ -324,3 +338,15 @@ class TaskUpdateLabelSerializer(serializers.Serializer):
 
 class DeleteTaskLabelRelationSerializer(serializers.Serializer):
     label_ids = serializers.ListField(child=serializers.IntegerField(), help_text="标签ID", required=True)
+
+
+class InvalidateDecisionTableSerializer(serializers.Serializer):
+    space_id = serializers.IntegerField(help_text="空间ID", required=True)
+    table_id = serializers.IntegerField(help_text="决策表ID", required=True)
+
+
+class InvalidateSpaceCacheSerializer(serializers.Serializer):
+    space_id = serializers.IntegerField(help_text="空间ID", required=True)
+    resource = serializers.ChoiceField(
+        help_text="缓存数据类型", choices=[resource.value for resource in SpaceCacheResource], required=True
+    )
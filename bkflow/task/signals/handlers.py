@@ -34,6 +34,7 @@ from bkflow.task.models import (
     TaskInstance,
     TimeoutNodeConfig,
 )
+from bkflow.task.node_timeout import add_timeout_node
 from bkflow.task.signals.context import is_node_failure_side_effects_suppressed
 from bkflow.task.utils import ATOM_FAILED, TASK_FINISHED, redis_inst_check
 
@@ -81,7 +82,7 @@ def _node_timeout_info_update(redis_inst, to_state, node_id, version):
         if not timeout_qs:
             return
         timeout_time = (now + datetime.timedelta(seconds=timeout_qs[0].timeout)).timestamp()
-        redis_inst.zadd(settings.EXECUTING_NODE_POOL, mapping={key: timeout_time}, nx=True)
+        add_timeout_node(redis_inst, key, timeout_time)
     elif to_state in [bamboo_engine_states.FAILED, bamboo_engine_states.FINISHED, bamboo_engine_states.SUSPENDED]:
         redis_inst.zrem(settings.EXECUTING_NODE_POOL, key)
 
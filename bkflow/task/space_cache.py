@@ -0,0 +1,110 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+
+from bkflow.constants import SpaceCacheResource
+from bkflow.contrib.api.collections.interface import InterfaceModuleClient
+
+logger = logging.getLogger("root")
+
+SPACE_CACHE_KEY_PREFIX = "bkflow_space_cache"
+
+
+def _get_redis_inst():
+    if not getattr(settings, "SPACE_DATA_CACHE_TTL", 0):
+        return None
+    return getattr(settings, "redis_inst", None)
+
+
+def get_space_cache_version_key(space_id, resource):
+    return f"{SPACE_CACHE_KEY_PREFIX}:version:{resource}:{space_id}"
+
+
+def _get_cache_key(redis_inst, space_id, resource, digest=""):
+    # 缓存 key 带上空间的版本号，interface 侧变更后版本号递增，旧缓存不再被读取并随过期时间自然清理
+    version = int(redis_inst.get(get_space_cache_version_key(space_id, resource)) or 0)
+    return f"{SPACE_CACHE_KEY_PREFIX}:{resource}:{space_id}:{version}:{digest}"
+
+
+def _read_cache(space_id, resource, digest=""):
+    """
+    :return: (缓存 key, 缓存内容)，未开启缓存或读取失败时缓存 key 为 None
+    """
+    redis_inst = _get_redis_inst()
+    if redis_inst is None:
+        return None, None
+    try:
+        cache_key = _get_cache_key(redis_inst, space_id, resource, digest)
+        return cache_key, redis_inst.get(cache_key)
+    except Exception:
+        logger.exception("[space_cache] read space %s %s cache failed", space_id, resource)
+        return None, None
+
+
+def _write_cache(cache_key, value):
+    try:
+        settings.redis_inst.set(cache_key, value, ex=settings.SPACE_DATA_CACHE_TTL)
+    except Exception:
+        logger.exception("[space_cache] write cache %s failed", cache_key)
+
+
+def invalidate_space_cache(space_id, resource):
+    redis_inst = _get_redis_inst()
+    if redis_inst is None:
+        return
+    redis_inst.incr(get_space_cache_version_key(space_id, resource))
+
+
+def get_space_variables(space_id):
+    """
+    获取空间变量，优先读取引擎侧缓存，未命中时请求 interface 并回填，获取失败时返回空字典
+    :return: {"${_space_xxx}": value}
+    """
+    cache_key, cached = _read_cache(space_id, SpaceCacheResource.VARIABLE.value)
+    if cached is not None:
+        return json.loads(cached)
+
+    space_var = InterfaceModuleClient().get_variable(space_id)
+    if not space_var.get("result"):
+        logger.error("get space variable failed: %s", space_var.get("message"))
+        return {}
+    space_var_data = space_var.get("data") or {}
+    if cache_key is not None:
+        _write_cache(cache_key, json.dumps(space_var_data))
+    return space_var_data
+
+
+def validate_open_plugins_for_start(space_id, payload):
+    """
+    开放插件启动预检，相同空间下相同的预检内容在 interface 侧无变更时只请求一次，仅缓存预检通过的结果
+    :return: 与 InterfaceModuleClient.validate_open_plugins_for_start 一致的结果
+    """
+    digest = hashlib.md5(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+    cache_key, cached = _read_cache(space_id, SpaceCacheResource.OPEN_PLUGIN.value, digest)
+    if cached is not None:
+        return {"result": True, "data": {"validated": True}, "message": "success"}
+
+    result = InterfaceModuleClient().validate_open_plugins_for_start(payload)
+    if cache_key is not None and result.get("result"):
+        _write_cache(cache_key, "1")
+    return result
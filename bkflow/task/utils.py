@@ -52,7 +52,7 @@ def redis_inst_check(func):
     return wrapper
 
 
-def _format_status_time(status_tree):
+def _format_status_time(status_tree, empty_time=None):
     status_tree.setdefault("children", {})
     status_tree.pop("created_time", "")
     started_time = status_tree.pop("started_time", None)
@@ -61,8 +61,8 @@ def _format_status_time(status_tree):
     if "elapsed_time" not in status_tree:
         status_tree["elapsed_time"] = calculate_elapsed_time(started_time, archived_time)
 
-    status_tree["start_time"] = format_datetime(started_time) if started_time else None
-    status_tree["finish_time"] = format_datetime(archived_time) if archived_time else None
+    status_tree["start_time"] = format_datetime(started_time) if started_time else empty_time
+    status_tree["finish_time"] = format_datetime(archived_time) if archived_time else empty_time
 
 
 def format_bamboo_engine_status(status_tree):
@@ -83,6 +83,25 @@ def format_bamboo_engine_status(status_tree):
             status_tree["state"] = "NODE_SUSPENDED"
 
 
+def format_task_states(status_tree):
+    """
+    @summary: 转换任务状态树格式，任务状态查询（单个及批量）共用
+    与 format_bamboo_engine_status 不同，未开始/未结束的时间为空字符串，且子流程内节点的暂停状态不会继续向上汇总
+    @return:
+    """
+    _format_status_time(status_tree, empty_time="")
+    child_status = set()
+    for child_tree in status_tree["children"].values():
+        format_task_states(child_tree)
+        child_status.add(child_tree["state"])
+
+    if status_tree["state"] == bamboo_engine_states.RUNNING:
+        if bamboo_engine_states.FAILED in child_status:
+            status_tree["state"] = bamboo_engine_states.FAILED
+        elif bamboo_engine_states.SUSPENDED in child_status:
+            status_tree["state"] = "NODE_SUSPENDED"
+
+
 def add_node_name_to_status_tree(pipeline_tree, status_tree_children):
     for node_id, status in status_tree_children.items():
         status["name"] = pipeline_tree.get("activities", {}).get(node_id, {}).get("name", "")
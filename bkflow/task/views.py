@@ -16,12 +16,13 @@ We undertake not to change the open source license (MIT license) applicable
 
 to the current version of the project delivered to anyone in the future.
 """
-
+import logging
 from functools import wraps
 
 from blueapps.account.decorators import login_exempt
 from django.conf import settings
 from django.db.models import Count, Subquery
+from django.http import StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django_filters import CharFilter, FilterSet
 from django_filters.rest_framework import DjangoFilterBackend
@@ -42,15 +43,19 @@ from bkflow.contrib.openapi.serializers import (
     EmptyBodySerializer,
     GetNodeDetailQuerySerializer,
     GetNodeLogDetailSerializer,
+    GetNodesDetailBodySerializer,
     GetTasksStatesBodySerializer,
     TaskBatchDeleteSerializer,
 )
 from bkflow.contrib.operation_record.decorators import record_operation
+from bkflow.decision_table.table_cache import invalidate_decision_table
 from bkflow.exceptions import ValidationError
+from bkflow.task.batch_states import batch_get_task_states
 from bkflow.task.models import (
     EngineSpaceConfig,
     EngineSpaceConfigValueType,
     PeriodicTask,
+    TaskFlowRelation,
     TaskInstance,
     TaskLabelRelation,
     TaskMockData,
@@ -59,6 +64,7 @@ from bkflow.task.models import (
 from bkflow.task.node_log import NodeLogDataSourceFactory
 from bkflow.task.operations import TaskNodeOperation, TaskOperation
 from bkflow.task.serializers import (
+    BatchCreateTaskInstanceSerializer,
     BatchDeletePeriodicTaskSerializer,
     CreatePeriodicTaskSerializer,
     CreateTaskInstanceSerializer,
@@ -66,6 +72,8 @@ from bkflow.task.serializers import (
     EngineSpaceConfigSerializer,
     GetEngineSpaceConfigSerializer,
     GetTaskOperationRecordSerializer,
+    InvalidateDecisionTableSerializer,
+    InvalidateSpaceCacheSerializer,
     LabelRefSerializer,
     NodeSnapshotQuerySerializer,
     NodeSnapshotResponseSerializer,
@@ -76,12 +84,15 @@ from bkflow.task.serializers import (
     TaskUpdateLabelSerializer,
     UpdatePeriodicTaskSerializer,
 )
+from bkflow.task.space_cache import invalidate_space_cache
 from bkflow.utils.handlers import handle_plain_log
 from bkflow.utils.mixins import BKFLOWCommonMixin
 from bkflow.utils.permissions import AdminPermission, AppInternalPermission
 from bkflow.utils.trace import start_trace
 from bkflow.utils.views import SimpleGenericViewSet
 
+logger = logging.getLogger("root")
+
 
 class TaskInstanceFilterSet(FilterSet):
     label = CharFilter(method="filter_by_labels")
@@ -253,6 +264,22 @@ class TaskInstanceViewSet(
         TaskLabelRelation.objects.filter(label_id__in=label_ids).delete()
         return Response({"label_ids": label_ids})
 
+    @action(detail=False, methods=["post"], serializer_class=InvalidateDecisionTableSerializer)
+    def invalidate_decision_table(self, request, *args, **kwargs):
+        """决策表变更后清理引擎侧缓存"""
+        ser = InvalidateDecisionTableSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        invalidate_decision_table(**ser.validated_data)
+        return Response(ser.validated_data)
+
+    @action(detail=False, methods=["post"], serializer_class=InvalidateSpaceCacheSerializer)
+    def invalidate_space_cache(self, request, *args, **kwargs):
+        """空间变量、开放插件等空间级数据变更后清理引擎侧缓存"""
+        ser = InvalidateSpaceCacheSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        invalidate_space_cache(**ser.validated_data)
+        return Response(ser.validated_data)
+
     @record_operation(RecordType.task.name, TaskOperationType.create.name, TaskOperationSource.api.name)
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -268,6 +295,43 @@ class TaskInstanceViewSet(
         response_data["parameters"] = parameters
         return Response(response_data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @swagger_auto_schema(
+        methods=["post"], operation_description="批量创建任务", request_body=BatchCreateTaskInstanceSerializer
+    )
+    @action(detail=False, methods=["post"], url_path="batch_create_tasks")
+    def batch_create(self, request, *args, **kwargs):
+        serializer = BatchCreateTaskInstanceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tasks_data = serializer.validated_data["tasks"]
+        label_ids_list = [task_data.pop("label_ids", []) for task_data in tasks_data]
+        instances = TaskInstance.objects.batch_create_instances(tasks_data)
+
+        TaskLabelRelation.objects.bulk_create(
+            [
+                TaskLabelRelation(task_id=instance.id, label_id=label_id)
+                for instance, label_ids in zip(instances, label_ids_list)
+                for label_id in set(label_ids)
+            ]
+        )
+        TaskOperationRecord.objects.bulk_create(
+            [
+                TaskOperationRecord(
+                    operate_type=TaskOperationType.create.name,
+                    operate_source=TaskOperationSource.api.name,
+                    instance_id=instance.id,
+                    operator=instance.creator or request.user.username,
+                )
+                for instance in instances
+            ]
+        )
+
+        response_data = TaskInstanceSerializer(instances, many=True).data
+        # 创建后的 pipeline_tree 即任务执行数据，直接取参数，避免逐个任务读取快照
+        for task_data, task_response in zip(tasks_data, response_data):
+            constants = task_data["pipeline_tree"]["constants"]
+            task_response["parameters"] = {key: value["value"] for key, value in constants.items()}
+        return Response(response_data, status=status.HTTP_201_CREATED)
+
     @swagger_auto_schema(methods=["post"], operation_description="批量删除任务", request_body=TaskBatchDeleteSerializer)
     @action(detail=False, methods=["post"], url_path="batch_delete_tasks")
     def batch_delete(self, request, *args, **kwargs):
@@ -374,20 +438,12 @@ class TaskInstanceViewSet(
         ser.is_valid(raise_exception=True)
         task_ids = ser.validated_data["task_ids"]
         space_id = ser.validated_data["space_id"]
-        task_instances = TaskInstance.objects.filter(id__in=task_ids, space_id=space_id)
-        task_operations = [
-            {"task_id": task_instance.id, "operation": TaskOperation(task_instance=task_instance).get_task_states()}
-            for task_instance in task_instances
-        ]
+        task_instances = TaskInstance.objects.filter(id__in=task_ids, space_id=space_id).only(
+            "id", "instance_id", "is_started", "is_expired"
+        )
         task_states = {
-            task_operation["task_id"]: {
-                "state": (
-                    task_operation["operation"].data.get("state")
-                    if task_operation["operation"].result is True
-                    else None
-                )
-            }
-            for task_operation in task_operations
+            task_id: {"state": states.get("state") if states else None}
+            for task_id, states in batch_get_task_states(task_instances).items()
         }
         return Response(task_states)
 
@@ -410,6 +466,13 @@ class TaskInstanceViewSet(
                 mapping[node.get("template_node_id", node_id)] = node_id
         return Response(mapping)
 
+    @swagger_auto_schema(methods=["get"], operation_description="获取任务的所有祖先任务ID（父任务到根任务）")
+    @action(detail=True, methods=["get"], url_path="get_task_ancestors")
+    @validate_task_info
+    def get_task_ancestors(self, request, *args, **kwargs):
+        task_instance = self.get_object()
+        return Response(TaskFlowRelation.objects.get_ancestor_task_ids(task_instance.id))
+
     @swagger_auto_schema(methods=["get"], operation_description="任务全局变量查询")
     @action(detail=True, methods=["get"], url_path="render_current_constants")
     @validate_task_info
@@ -442,30 +505,68 @@ class TaskInstanceViewSet(
         if not task_instance.has_node(node_id):
             raise ValidationError(f"node {node_id} not found")
 
+        return Response(self._get_node_detail_result(task_instance, node_id, **query_ser.validated_data))
+
+    @swagger_auto_schema(
+        methods=["post"], operation_description="批量查询任务节点详情", request_body=GetNodesDetailBodySerializer
+    )
+    @action(detail=True, methods=["post"], url_path="get_task_nodes_detail")
+    @validate_task_info
+    def get_nodes_detail(self, request, *args, **kwargs):
+        """批量获取多个节点详情，返回 {node_id: detail}，获取失败的节点不会出现在结果中"""
+        ser = GetNodesDetailBodySerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        task_instance = self.get_object()
+        node_ids = ser.validated_data["node_ids"]
+        invalid_node_ids = [node_id for node_id in node_ids if not task_instance.has_node(node_id)]
+        if invalid_node_ids:
+            raise ValidationError(f"nodes {invalid_node_ids} not found")
+
+        details, failures = {}, {}
+        for node_id in dict.fromkeys(node_ids):
+            node_result = self._get_node_detail_result(
+                task_instance,
+                node_id,
+                username=ser.validated_data["username"],
+                include_data=ser.validated_data["include_data"],
+                subprocess_stack=[],
+            )
+            if node_result["result"]:
+                details[node_id] = node_result["data"]
+            else:
+                failures[node_id] = node_result["message"]
+        if failures:
+            logger.warning("[get_nodes_detail] task_id=%s, failures: %s", task_instance.id, failures)
+        return Response({"result": True, "data": details, "message": "success"})
+
+    @staticmethod
+    def _get_node_detail_result(
+        task_instance, node_id, username="", include_data=True, subprocess_stack=None, component_code=None, loop=None
+    ):
         node_data = {}
         node_operation = TaskNodeOperation(task_instance=task_instance, node_id=node_id)
-        if query_ser.validated_data["include_data"]:
+        if include_data:
             node_data_result = node_operation.get_node_data(
-                username=query_ser.validated_data["username"],
-                subprocess_stack=query_ser.validated_data.get("subprocess_stack"),
-                component_code=query_ser.validated_data.get("component_code"),
-                loop=query_ser.validated_data.get("loop"),
+                username=username,
+                subprocess_stack=subprocess_stack,
+                component_code=component_code,
+                loop=loop,
             )
             if not node_data_result.result:
-                return Response(dict(node_data_result))
+                return dict(node_data_result)
             node_data = node_data_result.data
 
         node_detail_result = node_operation.get_node_detail(
-            subprocess_stack=query_ser.validated_data.get("subprocess_stack"),
-            component_code=query_ser.validated_data.get("component_code"),
-            loop=query_ser.validated_data.get("loop"),
+            subprocess_stack=subprocess_stack,
+            component_code=component_code,
+            loop=loop,
         )
         if not node_detail_result.result:
-            return Response(dict(node_detail_result))
+            return dict(node_detail_result)
 
         node_detail_result.data.update(node_data)
 
-        return Response(dict(node_detail_result))
+        return dict(node_detail_result)
 
     @swagger_auto_schema(methods=["get"], operation_description="任务节点执行日志", query_serializer=GetNodeLogDetailSerializer)
     @action(detail=True, methods=["get"], url_path="get_task_node_log/(?P<node_id>\\w+)/(?P<version>\\w+)")
@@ -473,9 +574,14 @@ class TaskInstanceViewSet(
     def get_node_log(self, request, node_id, version, *args, **kwargs):
         query_ser = GetNodeLogDetailSerializer(data=request.query_params)
         query_ser.is_valid(raise_exception=True)
-        page, page_size = query_ser.validated_data["page"], query_ser.validated_data["page_size"]
+        query_params = dict(query_ser.validated_data)
         data_source = NodeLogDataSourceFactory(settings.NODE_LOG_DATA_SOURCE).data_source
-        result = data_source.fetch_node_logs(node_id, version, page=page, page_size=page_size)
+        if query_params.pop("stream"):
+            logs = data_source.iter_node_logs(node_id, version, **query_params)
+            return StreamingHttpResponse(
+                (handle_plain_log(chunk) for chunk in logs), content_type="text/plain; charset=utf-8"
+            )
+        result = data_source.fetch_node_logs(node_id, version, **query_params)
         if not result["result"]:
             return Response({"result": False, "message": result["message"], "data": None})
         logs, page_info = result["data"]["logs"], result["data"]["page_info"]
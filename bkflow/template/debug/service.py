@@ -61,6 +61,8 @@ NODE_STATE_MAP = {
     "SUSPENDED": "paused",
 }
 ENGINE_RUN_STATE_MAP = {"FINISHED": "finished", "FAILED": "failed", "REVOKED": "revoked"}
+# 单次批量查询节点详情的节点数量上限
+NODE_DETAIL_BATCH_SIZE = 200
 
 
 class DebugConflictError(Exception):
@@ -559,6 +561,18 @@ class DebugService:
         message = failures[0]["message"] if failures else "task failed"
         return {"type": "runtime", "message": message, "task_id": task_id, "failures": failures}
 
+    @staticmethod
+    def _get_nodes_detail(client, task_id, runtime_ids):
+        """批量获取节点详情，一次请求返回多个节点；获取失败的节点不在结果中。"""
+        node_details = {}
+        for i in range(0, len(runtime_ids), NODE_DETAIL_BATCH_SIZE):
+            detail = client.get_task_nodes_detail(
+                task_id, data={"node_ids": runtime_ids[i : i + NODE_DETAIL_BATCH_SIZE], "include_data": True}
+            )
+            if detail.get("result"):
+                node_details.update(detail.get("data") or {})
+        return node_details
+
     def sync_from_debug_task(self, ctx: DebugContext):
         """惰性回写真实调试任务；全局和单步共用同一条状态生命周期。"""
         # 单节点终止由 terminate() 在 forced_fail 返回后立即重置；期间不读取引擎 FAILED，
@@ -591,62 +605,85 @@ class DebugService:
         runtime_errors = {}
         observed_statuses = []
 
+        node_states = {
+            ns.node_id: ns for ns in DebugNodeState.objects.filter(debug_context=ctx, node_id__in=list(id_map))
+        }
+        synced_states = []
+        detail_targets = []
         for tpl_node_id, runtime_id in id_map.items():
-            ns = DebugNodeState.objects.filter(debug_context=ctx, node_id=tpl_node_id).first()
+            ns = node_states.get(tpl_node_id)
             if ns is None:
                 continue
             child = children.get(runtime_id)
             if not child:
                 continue
+            previous_status = ns.status
             node_status, waiting_reason = self._debug_node_status(child)
             if node_status:
                 ns.status = node_status
             ns.waiting_reason = waiting_reason
             observed_statuses.append(ns.status)
             ns.duration_ms = int((child.get("elapsed_time") or 0) * 1000)
-            if ns.status in ("finished", "failed"):
-                detail = client.get_task_node_detail(task_id, runtime_id, data={"include_data": True})
-                ddata = detail.get("data", {}) if detail.get("result") else {}
-                version = ddata.get("version") or ddata.get("history_id") or "v1"
-                ns.log_ref = {"instance_id": task_id, "node_id": runtime_id, "version": version}
-                outputs = {o["key"]: o["value"] for o in ddata.get("outputs", []) if isinstance(o, dict) and "key" in o}
-                if ns.status == "finished":
-                    if self._is_debuggable_gateway(tpl_node_id):
-                        try:
-                            ns.outputs = evaluate_gateway(self.pipeline_tree, tpl_node_id, ctx.global_vars or {})
-                        except GatewayEvaluationError as error:
-                            logger.warning(
-                                "[debug] sync gateway selected flows failed, template_id=%s, node_id=%s, error=%s",
-                                self.template_id,
-                                tpl_node_id,
-                                error,
-                            )
-                            ns.outputs = {
-                                "selected_flow_ids": [],
-                                "condition_results": error.condition_results,
-                            }
-                    else:
-                        ns.outputs = outputs
-                    ns.error_detail = {}
-                    for out_key, var_key in acts_outputs.get(tpl_node_id, {}).items():
-                        if out_key in outputs:
-                            ctx.global_vars[var_key] = outputs[out_key]
+            synced_states.append(ns)
+            if ns.status not in ("finished", "failed"):
+                continue
+            # 节点状态版本未变化时结果已回写过，无需再次拉取详情
+            state_version = child.get("version")
+            if (
+                state_version
+                and previous_status == ns.status
+                and ns.log_ref == {"instance_id": task_id, "node_id": runtime_id, "version": state_version}
+            ):
+                if ns.status == "failed":
+                    runtime_errors[runtime_id] = (ns.error_detail or {}).get("message") or "step failed"
+                continue
+            detail_targets.append((tpl_node_id, runtime_id, ns))
+
+        node_details = self._get_nodes_detail(client, task_id, [runtime_id for _, runtime_id, _ in detail_targets])
+        for tpl_node_id, runtime_id, ns in detail_targets:
+            ddata = node_details.get(runtime_id, {})
+            version = ddata.get("version") or ddata.get("history_id") or "v1"
+            ns.log_ref = {"instance_id": task_id, "node_id": runtime_id, "version": version}
+            outputs = {o["key"]: o["value"] for o in ddata.get("outputs", []) if isinstance(o, dict) and "key" in o}
+            if ns.status == "finished":
+                if self._is_debuggable_gateway(tpl_node_id):
+                    try:
+                        ns.outputs = evaluate_gateway(self.pipeline_tree, tpl_node_id, ctx.global_vars or {})
+                    except GatewayEvaluationError as error:
+                        logger.warning(
+                            "[debug] sync gateway selected flows failed, template_id=%s, node_id=%s, error=%s",
+                            self.template_id,
+                            tpl_node_id,
+                            error,
+                        )
+                        ns.outputs = {
+                            "selected_flow_ids": [],
+                            "condition_results": error.condition_results,
+                        }
                 else:
-                    message = ddata.get("ex_data") or "step failed"
-                    runtime_errors[runtime_id] = message
-                    if self._is_debuggable_gateway(tpl_node_id):
-                        try:
-                            gateway_result = evaluate_gateway(self.pipeline_tree, tpl_node_id, ctx.global_vars or {})
-                            ns.outputs = gateway_result
-                        except GatewayEvaluationError as error:
-                            ns.outputs = {
-                                "selected_flow_ids": [],
-                                "condition_results": error.condition_results,
-                            }
-                    else:
-                        ns.outputs = {}
-                    ns.error_detail = {"type": "runtime", "message": message}
-            ns.save()
+                    ns.outputs = outputs
+                ns.error_detail = {}
+                for out_key, var_key in acts_outputs.get(tpl_node_id, {}).items():
+                    if out_key in outputs:
+                        ctx.global_vars[var_key] = outputs[out_key]
+            else:
+                message = ddata.get("ex_data") or "step failed"
+                runtime_errors[runtime_id] = message
+                if self._is_debuggable_gateway(tpl_node_id):
+                    try:
+                        gateway_result = evaluate_gateway(self.pipeline_tree, tpl_node_id, ctx.global_vars or {})
+                        ns.outputs = gateway_result
+                    except GatewayEvaluationError as error:
+                        ns.outputs = {
+                            "selected_flow_ids": [],
+                            "condition_results": error.condition_results,
+                        }
+                else:
+                    ns.outputs = {}
+                ns.error_detail = {"type": "runtime", "message": message}
+        DebugNodeState.objects.bulk_update(
+            synced_states, ["status", "waiting_reason", "duration_ms", "log_ref", "outputs", "error_detail"]
+        )
 
         engine_state = data.get("state")
         active_child_statuses = []
@@ -664,11 +701,14 @@ class DebugService:
             self.reset_run_results(ctx, node_ids=list(active_node_ids))
         if engine_state == "FAILED":
             state_errors = data.get("ex_data") if isinstance(data.get("ex_data"), dict) else {}
-            for runtime_id, child in children.items():
-                if child.get("state") != "FAILED" or runtime_errors.get(runtime_id) or state_errors.get(runtime_id):
-                    continue
-                detail = client.get_task_node_detail(task_id, runtime_id, data={"include_data": True})
-                ddata = detail.get("data", {}) if detail.get("result") else {}
+            failed_runtime_ids = [
+                runtime_id
+                for runtime_id, child in children.items()
+                if child.get("state") == "FAILED"
+                and not runtime_errors.get(runtime_id)
+                and not state_errors.get(runtime_id)
+            ]
+            for runtime_id, ddata in self._get_nodes_detail(client, task_id, failed_runtime_ids).items():
                 if ddata.get("ex_data"):
                     runtime_errors[runtime_id] = ddata["ex_data"]
         ctx.last_task_id = task_id
@@ -22,7 +22,7 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from pipeline.core.constants import PE
 
-from bkflow.template.models import Template, TemplateReference
+from bkflow.template.models import Template, TemplateReference, TemplateSnapshot
 
 
 @receiver(post_save, sender=Template)
@@ -54,3 +54,8 @@ def pipeline_template_post_save_handler(sender, instance, created, **kwargs):
             )
         if rs:
             TemplateReference.objects.bulk_create(rs)
+
+
+@receiver(post_save, sender=TemplateSnapshot)
+def template_snapshot_post_save_handler(sender, instance, **kwargs):
+    TemplateSnapshot.invalidate_cache(instance.id)
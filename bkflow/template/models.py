@@ -20,6 +20,7 @@ import datetime
 import logging
 from copy import deepcopy
 
+from django.conf import settings
 from django.db import models, transaction
 from django.utils.translation import ugettext_lazy as _
 from pipeline.core.constants import PE
@@ -35,6 +36,7 @@ from bkflow.contrib.operation_record.models import BaseOperateRecord
 from bkflow.exceptions import APIResponseError, NotFoundError, ValidationError
 from bkflow.space.configs import FlowVersioning
 from bkflow.space.models import SpaceConfig
+from bkflow.utils import redis_cache
 from bkflow.utils.canvas import OperateType
 from bkflow.utils.md5 import compute_pipeline_md5
 from bkflow.utils.models import CommonModel, CommonSnapshot
@@ -150,9 +152,36 @@ class Template(CommonModel):
     def exists(cls, template_id, space_id):
         return cls.objects.filter(id=template_id, space_id=space_id).exists()
 
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop("_snapshot_cache", None)
+        return state
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.clear_snapshot_cache()
+
+    def clear_snapshot_cache(self):
+        """
+        清理实例上缓存的快照，快照内容被修改后需要调用
+        snapshot、pipeline_tree 在同一实例上返回的是同一份数据，调用方不应原地修改，需要修改时先复制
+        """
+        self.__dict__.pop("_snapshot_cache", None)
+
     @property
     def snapshot(self):
-        return TemplateSnapshot.objects.get(id=self.snapshot_id)
+        # 以快照 id 作为 key，快照 id 被重新赋值后会自动失效
+        snapshot_cache = self.__dict__.setdefault("_snapshot_cache", {})
+        if self.snapshot_id not in snapshot_cache:
+            snapshot_cache[self.snapshot_id] = TemplateSnapshot.get_snapshot(self.snapshot_id)
+        return snapshot_cache[self.snapshot_id]
+
+    @property
+    def snapshot_meta(self):
+        """
+        不加载 data 的快照，只需要版本号、md5 等字段时使用
+        """
+        return TemplateSnapshot.objects.defer("data").get(id=self.snapshot_id)
 
     @property
     def pipeline_tree(self):
@@ -169,6 +198,9 @@ class Template(CommonModel):
                 )
             except Exception as e:
                 logger.error("[Template->update_snapshot] update snapshot error, error = {}".format(e))
+            # queryset update 不会触发 post_save，需要手动清理缓存
+            TemplateSnapshot.invalidate_cache(self.snapshot_id)
+            self.clear_snapshot_cache()
 
     def create_flow(self, username) -> int:
         """
@@ -191,12 +223,12 @@ class Template(CommonModel):
     @property
     def version(self):
         if self.validate_space("true"):
-            return self.snapshot.version
-        return self.snapshot.md5sum
+            return self.snapshot_meta.version
+        return self.snapshot_meta.md5sum
 
     @property
     def snapshot_version(self):
-        return self.snapshot.version
+        return self.snapshot_meta.version
 
     def validate_space(self, target):
         return SpaceConfig.get_config(space_id=self.space_id, config_name=FlowVersioning.name) == target
@@ -216,31 +248,26 @@ class Template(CommonModel):
                 id__in=[int(item["subprocess_template_id"]) for item in subprocess_info]
             )
         }
+        # 流程版本配置在循环中不会变化，只读取一次
+        flow_versioning = self.validate_space("true")
         md5sums_to_query = []
         version_to_query = []
         for item in subprocess_info:
-            if self.validate_space("true") and len(item["version"]) == TEMPLATE_MD5SUM_LENGTH:
+            if flow_versioning and len(item["version"]) == TEMPLATE_MD5SUM_LENGTH:
                 md5sums_to_query.append(item["version"])
-            elif not self.validate_space("true") and len(item["version"]) != TEMPLATE_MD5SUM_LENGTH:
+            elif not flow_versioning and len(item["version"]) != TEMPLATE_MD5SUM_LENGTH:
                 version_to_query.append(item["subprocess_template_id"])
             else:
                 continue
 
-        md5_to_version_map = {}
-        version_to_snapshot_map = {}
-        if md5sums_to_query:
-            snapshots = TemplateSnapshot.objects.filter(md5sum__in=md5sums_to_query, draft=False).order_by("id")
-            md5_to_version_map = {snapshot.md5sum: snapshot.version for snapshot in snapshots}
-        if version_to_query:
-            templates = TemplateSnapshot.objects.filter(template_id__in=version_to_query, draft=False).order_by("id")
-            for template in templates:
-                version_to_snapshot_map.setdefault(str(template.template_id), {})[template.version] = template.md5sum
+        md5_to_version_map = TemplateSnapshot.get_md5_version_map(md5sums_to_query)
+        version_to_md5_map = TemplateSnapshot.get_version_md5_map(version_to_query)
 
         for item in subprocess_info:
-            if self.validate_space("true") and len(item["version"]) == TEMPLATE_MD5SUM_LENGTH:
+            if flow_versioning and len(item["version"]) == TEMPLATE_MD5SUM_LENGTH:
                 version = md5_to_version_map.get(item["version"], item["version"])
-            elif not self.validate_space("true") and len(item["version"]) != TEMPLATE_MD5SUM_LENGTH:
-                version = version_to_snapshot_map.get(item["subprocess_template_id"], {}).get(item["version"])
+            elif not flow_versioning and len(item["version"]) != TEMPLATE_MD5SUM_LENGTH:
+                version = version_to_md5_map.get(int(item["subprocess_template_id"]), {}).get(item["version"])
             else:
                 version = item["version"]
             item["version"] = version
@@ -291,6 +318,7 @@ class Template(CommonModel):
                 template.desc = f"基于 {version} 版本的草稿"
 
             template.save()
+            self.clear_snapshot_cache()
             return template
 
         except Exception as e:
@@ -371,6 +399,69 @@ class TemplateSnapshot(CommonSnapshot):
             data["draft"] = True
         return cls.objects.create(**data)
 
+    @classmethod
+    def _get_cache_key(cls, snapshot_id):
+        return "{}:{}".format(cls._meta.db_table, snapshot_id)
+
+    @classmethod
+    def invalidate_cache(cls, snapshot_id):
+        """
+        清理快照缓存，快照修改后调用；事务提交后再清理一次，避免提交前被其他请求读到旧数据重新写入缓存
+        """
+        cache_key = cls._get_cache_key(snapshot_id)
+        redis_cache.delete(cache_key)
+        transaction.on_commit(lambda: redis_cache.delete(cache_key))
+
+    @classmethod
+    def get_snapshot(cls, snapshot_id):
+        """
+        获取快照，开启 TEMPLATE_SNAPSHOT_CACHE_ENABLED 后会以快照 id 为 key 在 redis 中跨请求缓存，快照修改时清理，
+        命中时不查询数据库，返回的实例只包含 id、md5sum 及 data
+        """
+        if not settings.TEMPLATE_SNAPSHOT_CACHE_ENABLED:
+            return cls.objects.get(id=snapshot_id)
+
+        cache_key = cls._get_cache_key(snapshot_id)
+        cached = redis_cache.get_json(cache_key)
+        if cached is not None:
+            return cls(id=snapshot_id, md5sum=cached["md5sum"], data=cached["data"])
+
+        snapshot = cls.objects.get(id=snapshot_id)
+        redis_cache.set_json(
+            cache_key, {"md5sum": snapshot.md5sum, "data": snapshot.data}, settings.TEMPLATE_SNAPSHOT_CACHE_TTL
+        )
+        return snapshot
+
+    @classmethod
+    def get_md5_version_map(cls, md5sums):
+        """
+        批量查询已发布快照 md5 对应的版本号，md5 重复时以最新的快照为准
+        @return: {md5sum: version}
+        """
+        if not md5sums:
+            return {}
+        return dict(
+            cls.objects.filter(md5sum__in=set(md5sums), draft=False).order_by("id").values_list("md5sum", "version")
+        )
+
+    @classmethod
+    def get_version_md5_map(cls, template_ids):
+        """
+        批量查询模板已发布版本对应的快照 md5，版本重复时以最新的快照为准
+        @return: {template_id: {version: md5sum}}
+        """
+        version_map = {}
+        if not template_ids:
+            return version_map
+        snapshots = (
+            cls.objects.filter(template_id__in=set(template_ids), draft=False)
+            .order_by("id")
+            .values_list("template_id", "version", "md5sum")
+        )
+        for template_id, version, md5sum in snapshots:
+            version_map.setdefault(template_id, {})[version] = md5sum
+        return version_map
+
 
 class TemplateOperationRecord(BaseOperateRecord):
     """模版操作记录"""
@@ -26,7 +26,6 @@ from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from pipeline.validators import validate_pipeline_tree
 from rest_framework import serializers
-from webhook.signals import event_broadcast_signal
 
 from bkflow.bk_plugin.models import BKPluginAuthorization
 from bkflow.constants import (
@@ -56,6 +55,7 @@ from bkflow.utils.pipeline import replace_subprocess_version
 from bkflow.utils.version import bump_custom
 from bkflow.utils.webhook import (
     apply_webhook_configs,
+    broadcast_webhook_event,
     clear_scope_webhooks,
     get_webhook_configs,
 )
@@ -210,9 +210,9 @@ class TemplateSerializer(serializers.ModelSerializer):
         snapshot.template_id = template.id
         snapshot.save(update_fields=["template_id"])
 
-        event_broadcast_signal.send(
-            sender=WebhookEventType.TEMPLATE_CREATE.value,
-            scopes=[(WebhookScopeType.SPACE.value, str(template.space_id))],
+        broadcast_webhook_event(
+            WebhookEventType.TEMPLATE_CREATE.value,
+            [(WebhookScopeType.SPACE.value, str(template.space_id))],
             extra_info={"template_id": template.id},
         )
         return template
@@ -296,9 +296,9 @@ class TemplateSerializer(serializers.ModelSerializer):
             clear_scope_webhooks([str(instance.id)])
 
         send_callback(instance.space_id, "template", instance.build_callback_data(operate_type="update"))
-        event_broadcast_signal.send(
-            sender=WebhookEventType.TEMPLATE_UPDATE.value,
-            scopes=[(WebhookScopeType.SPACE.value, str(instance.space_id))],
+        broadcast_webhook_event(
+            WebhookEventType.TEMPLATE_UPDATE.value,
+            [(WebhookScopeType.SPACE.value, str(instance.space_id))],
             extra_info={"template_id": instance.id},
         )
         return instance
@@ -34,7 +34,6 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from webhook.api import verify_webhook_endpoint
-from webhook.signals import event_broadcast_signal
 
 from bkflow.apigw.serializers.credential import CredentialSerializer
 from bkflow.apigw.serializers.task import (
@@ -113,7 +112,7 @@ from bkflow.utils.permissions import AdminPermission, AppInternalPermission
 from bkflow.utils.pipeline import replace_subprocess_version
 from bkflow.utils.version import bump_custom
 from bkflow.utils.views import AdminModelViewSet, SimpleGenericViewSet, UserModelViewSet
-from bkflow.utils.webhook import clear_scope_webhooks
+from bkflow.utils.webhook import broadcast_webhook_event, clear_scope_webhooks
 
 logger = logging.getLogger("root")
 
@@ -268,9 +267,9 @@ class AdminTemplateViewSet(AdminModelViewSet):
             return Response(exception=True, data=result["data"])
 
         task_data = result["data"]
-        event_broadcast_signal.send(
-            sender=WebhookEventType.TASK_CREATE.value,
-            scopes=[(WebhookScopeType.SPACE.value, str(space_id))],
+        broadcast_webhook_event(
+            WebhookEventType.TASK_CREATE.value,
+            [(WebhookScopeType.SPACE.value, str(space_id))],
             extra_info={
                 "task_id": task_data["id"],
                 "task_name": task_data["name"],
@@ -756,9 +755,9 @@ class TemplateViewSet(UserModelViewSet):
             extra_info={"version": new_version},
         )
 
-        event_broadcast_signal.send(
-            sender=WebhookEventType.TEMPLATE_RELEASE.value,
-            scopes=[(WebhookScopeType.SPACE.value, str(instance.space_id))],
+        broadcast_webhook_event(
+            WebhookEventType.TEMPLATE_RELEASE.value,
+            [(WebhookScopeType.SPACE.value, str(instance.space_id))],
             extra_info={
                 "template_id": instance.id,
                 "version": new_version,
@@ -447,15 +447,8 @@ def replace_subprocess_version(pipeline_tree, flow_version_config) -> dict:
             else:
                 continue
 
-    snapshot_map = {}
-    template_map = {}
-    if md5sum_list:
-        snapshots = TemplateSnapshot.objects.filter(md5sum__in=md5sum_list, draft=False).order_by("id")
-        snapshot_map = {snapshot.md5sum: snapshot.version for snapshot in snapshots}
-    if version_list:
-        templates = TemplateSnapshot.objects.filter(template_id__in=version_list, draft=False).order_by("id")
-        for template in templates:
-            template_map.setdefault(template.template_id, {})[template.version] = template.md5sum
+    snapshot_map = TemplateSnapshot.get_md5_version_map(md5sum_list)
+    template_map = TemplateSnapshot.get_version_md5_map(version_list)
 
     for key, value in pipeline_tree["activities"].items():
         if value["type"] == "SubProcess":
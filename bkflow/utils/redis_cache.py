@@ -0,0 +1,94 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import json
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger("root")
+
+
+def get_redis_inst():
+    """
+    获取项目 redis 实例，模块未配置 redis 时返回 None，此时所有缓存读写均视为未命中
+    """
+    return getattr(settings, "redis_inst", None)
+
+
+def get_json(key):
+    """
+    读取 JSON 缓存，未命中、未配置 redis 或读取失败时返回 None
+    """
+    redis_inst = get_redis_inst()
+    if redis_inst is None:
+        return None
+    try:
+        value = redis_inst.get(key)
+    except Exception:
+        logger.exception("[redis_cache] get %s failed", key)
+        return None
+    return None if value is None else json.loads(value)
+
+
+def set_json(key, value, ttl):
+    redis_inst = get_redis_inst()
+    if redis_inst is None:
+        return
+    try:
+        redis_inst.set(key, json.dumps(value), ex=ttl)
+    except Exception:
+        logger.exception("[redis_cache] set %s failed", key)
+
+
+def hget_json(key, field):
+    redis_inst = get_redis_inst()
+    if redis_inst is None:
+        return None
+    try:
+        value = redis_inst.hget(key, field)
+    except Exception:
+        logger.exception("[redis_cache] hget %s %s failed", key, field)
+        return None
+    return None if value is None else json.loads(value)
+
+
+def hset_json(key, field, value, ttl):
+    """
+    写入 hash 缓存的单个字段，并刷新整个 key 的过期时间
+    """
+    redis_inst = get_redis_inst()
+    if redis_inst is None:
+        return
+    try:
+        pipe = redis_inst.pipeline()
+        pipe.hset(key, field, json.dumps(value))
+        pipe.expire(key, ttl)
+        pipe.execute()
+    except Exception:
+        logger.exception("[redis_cache] hset %s %s failed", key, field)
+
+
+def delete(*keys):
+    redis_inst = get_redis_inst()
+    if redis_inst is None or not keys:
+        return
+    try:
+        redis_inst.delete(*keys)
+    except Exception:
+        logger.exception("[redis_cache] delete %s failed", keys)
@@ -18,17 +18,28 @@ to the current version of the project delivered to anyone in the future.
 """
 
 import logging
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from webhook.api import apply_scope_subscriptions, apply_scope_webhooks
+from webhook.base_models import Event as EventBaseModel
+from webhook.config import webhook_settings
 from webhook.contrib.drf.serializers import WebhookSerializer
 from webhook.models import Event, History
 from webhook.models import Scope as ScopeModel
 from webhook.models import Subscription
 from webhook.models import Webhook as WebhookModel
+from webhook.requester import RequestConfig, Requester
 from webhook.utils import process_sensitive_info
 
 from bkflow.constants import WebhookEventType, WebhookScopeType
+from bkflow.space.models import WebhookDelivery, WebhookOutboxEvent, WebhookOutboxStatus
 from bkflow.utils.dates import format_datetime
 from bkflow.utils.local import thread_local
 
@@ -60,17 +71,26 @@ def get_webhook_delivery_history_by_delivery_id(delivery_id):
     根据 delivery_id 查询 webhook 投递历史。
     delivery_id 对应业务中的 task_id，用于关联任务与其 webhook 回调记录。
     """
-    histories = History.objects.filter(delivery_id=delivery_id)
-    result = []
+    return get_webhook_delivery_histories([delivery_id])[str(delivery_id)]
+
+
+def get_webhook_delivery_histories(delivery_ids):
+    """
+    批量查询多个 delivery_id 的 webhook 投递历史，只查询一次 History
+    :return: {delivery_id: [history]}
+    """
+    result = {str(delivery_id): [] for delivery_id in delivery_ids}
+    if not result:
+        return result
 
     event_name_mapping = thread_local.get("event_name_mapping")
     if not event_name_mapping:
         events = Event.objects.values_list("code", "name")
         event_name_mapping = {code: name for code, name in events}
         thread_local.set("event_name_mapping", event_name_mapping)
-    for history in histories:
+    for history in History.objects.filter(delivery_id__in=list(result)):
         response = history.extra_info.get("response", {})
-        result.append(
+        result.setdefault(history.delivery_id, []).append(
             {
                 "created_at": format_datetime(history.created_at),
                 "event_code": history.event_code,
@@ -133,3 +153,235 @@ def apply_webhook_configs(webhook_configs, scope_code):
         return {"result": False, "message": f"Failed to apply webhook configs: {e}", "data": {}, "code": "500"}
 
     return {"result": True, "message": "success", "data": {}, "code": "0"}
+
+
+def enqueue_webhook_event(event_code, scope_type, scope_code, extra_info=None):
+    """
+    将 webhook 事件写入待分发队列，由 worker 异步分发和投递
+    extra_info 中的 delivery_id 会作为投递 ID，没有时自动生成
+    """
+    extra_info = dict(extra_info or {})
+    delivery_id = extra_info.pop("delivery_id", None) or uuid.uuid4().hex
+    return WebhookOutboxEvent.objects.create(
+        event_code=event_code,
+        scope_type=scope_type,
+        scope_code=str(scope_code),
+        delivery_id=str(delivery_id),
+        extra_info=extra_info,
+    )
+
+
+def broadcast_webhook_event(event_code, scopes, extra_info=None):
+    """
+    广播 webhook 事件：按订阅范围写入待分发队列，事务提交后触发分发，不在请求中同步投递
+    :param scopes: [(scope_type, scope_code)]
+    """
+    from bkflow.space.tasks import dispatch_webhook_events
+
+    with transaction.atomic():
+        events = [
+            enqueue_webhook_event(event_code, scope_type, scope_code, extra_info) for scope_type, scope_code in scopes
+        ]
+        transaction.on_commit(dispatch_webhook_events.delay)
+    return events
+
+
+def _claim(model, condition, batch_size):
+    """
+    通过写入领取标识的条件更新领取一批记录，多个 worker 并发时同一条记录只会被一个 worker 领取
+    :return: 领取到的记录 ID 列表
+    """
+    ids = list(model.objects.filter(condition).order_by("id").values_list("id", flat=True)[:batch_size])
+    if not ids:
+        return []
+    claim_token = uuid.uuid4().hex
+    model.objects.filter(condition, id__in=ids).update(
+        status=WebhookOutboxStatus.PROCESSING.value, claim_token=claim_token, claimed_at=timezone.now()
+    )
+    return list(model.objects.filter(claim_token=claim_token).values_list("id", flat=True))
+
+
+def _claimable_query(claim_timeout):
+    # 领取后超时仍未完成的记录视为 worker 异常退出，允许重新领取
+    return Q(status=WebhookOutboxStatus.PENDING.value) | Q(
+        status=WebhookOutboxStatus.PROCESSING.value, claimed_at__lt=timezone.now() - timedelta(seconds=claim_timeout)
+    )
+
+
+def dispatch_webhook_events(batch_size=None):
+    """
+    将待分发事件展开为各个订阅方的投递记录，订阅关系和 webhook 配置按批次查询
+    :return: 本次分发的事件数量
+    """
+    batch_size = batch_size or settings.WEBHOOK_DELIVERY_BATCH_SIZE
+    event_ids = _claim(WebhookOutboxEvent, _claimable_query(settings.WEBHOOK_DELIVERY_CLAIM_TIMEOUT), batch_size)
+    if not event_ids:
+        return 0
+
+    events = list(WebhookOutboxEvent.objects.filter(id__in=event_ids))
+    subscription_query = Q()
+    for scope in {(event.scope_type, event.scope_code) for event in events}:
+        subscription_query |= Q(scope_type=scope[0], scope_code=scope[1])
+    subscribed_webhooks = defaultdict(set)
+    for webhook_code, event_code, scope_type, scope_code in Subscription.objects.filter(
+        subscription_query,
+        event_code__in={event.event_code for event in events} | {webhook_settings.ALL_EVENTS_KEY},
+    ).values_list("webhook_code", "event_code", "scope_type", "scope_code"):
+        subscribed_webhooks[(scope_type, scope_code, event_code)].add(webhook_code)
+
+    deliveries = []
+    for event in events:
+        webhook_codes = (
+            subscribed_webhooks[(event.scope_type, event.scope_code, event.event_code)]
+            | subscribed_webhooks[(event.scope_type, event.scope_code, webhook_settings.ALL_EVENTS_KEY)]
+        )
+        deliveries.extend(
+            WebhookDelivery(
+                event_id=event.id,
+                event_code=event.event_code,
+                delivery_id=event.delivery_id,
+                webhook_code=webhook_code,
+                scope_type=event.scope_type,
+                scope_code=event.scope_code,
+            )
+            for webhook_code in sorted(webhook_codes)
+        )
+    # 重复分发（如 worker 中途退出后重新领取）时依赖唯一约束去重
+    WebhookDelivery.objects.bulk_create(deliveries, batch_size=batch_size, ignore_conflicts=True)
+    WebhookOutboxEvent.objects.filter(id__in=event_ids).update(status=WebhookOutboxStatus.DISPATCHED.value)
+    logger.info("[dispatch_webhook_events] events: %s, deliveries: %s", len(event_ids), len(deliveries))
+    return len(event_ids)
+
+
+def _build_event_payloads(outbox_events):
+    event_models = {event.code: event for event in Event.objects.filter(code__in={e.event_code for e in outbox_events})}
+    payloads = {}
+    for outbox_event in outbox_events:
+        event_model = event_models.get(outbox_event.event_code)
+        if not event_model:
+            logger.error(f"event {outbox_event.event_code} not found")
+            continue
+        event = EventBaseModel.from_orm(event_model)
+        event.info = {**(event.info or {}), **(outbox_event.extra_info or {})}
+        payloads[outbox_event.id] = event.dict()
+    return payloads
+
+
+def _send_subscriber_deliveries(webhook, deliveries, payloads):
+    """
+    按顺序投递同一个订阅方的请求，在线程池中执行，不访问数据库
+    :return: [(delivery, request_config, request_result)]
+    """
+    extra_info = process_sensitive_info(webhook.extra_info or {}, is_decrypt=True)
+    extra_info.setdefault("timeout", webhook_settings.REQUEST_TIMEOUT)
+    results = []
+    for delivery in deliveries:
+        request_config = RequestConfig(url=webhook.endpoint, method=webhook.method, **extra_info)
+        request_config.data.update({"event": payloads[delivery.event_id], "delivery_id": delivery.delivery_id})
+        request_config = request_config.dict()
+        results.append((delivery, request_config, Requester(config=request_config).request()))
+    return results
+
+
+def deliver_webhooks(batch_size=None, concurrency=None):
+    """
+    投递到期的 webhook 请求，同一订阅方的请求顺序发送，不同订阅方之间并发发送
+    失败的请求按 webhook 配置的重试次数和间隔指数退避重试
+    :return: 本次投递的请求数量
+    """
+    batch_size = batch_size or settings.WEBHOOK_DELIVERY_BATCH_SIZE
+    concurrency = concurrency or settings.WEBHOOK_DELIVERY_CONCURRENCY
+    delivery_ids = _claim(
+        WebhookDelivery,
+        _claimable_query(settings.WEBHOOK_DELIVERY_CLAIM_TIMEOUT) & Q(next_retry_at__lte=timezone.now()),
+        batch_size,
+    )
+    if not delivery_ids:
+        return 0
+
+    deliveries = list(WebhookDelivery.objects.filter(id__in=delivery_ids).order_by("id"))
+    payloads = _build_event_payloads(WebhookOutboxEvent.objects.filter(id__in={d.event_id for d in deliveries}))
+
+    webhook_query = Q()
+    for delivery in deliveries:
+        webhook_query |= Q(code=delivery.webhook_code, scope_type=delivery.scope_type, scope_code=delivery.scope_code)
+    webhooks = {
+        (webhook.scope_type, webhook.scope_code, webhook.code): webhook
+        for webhook in WebhookModel.objects.filter(webhook_query)
+    }
+
+    subscriber_deliveries = defaultdict(list)
+    dropped_ids = []
+    for delivery in deliveries:
+        webhook_key = (delivery.scope_type, delivery.scope_code, delivery.webhook_code)
+        # webhook 已删除或事件不存在时不再投递
+        if webhook_key not in webhooks or delivery.event_id not in payloads:
+            dropped_ids.append(delivery.id)
+            continue
+        subscriber_deliveries[webhook_key].append(delivery)
+    if dropped_ids:
+        WebhookDelivery.objects.filter(id__in=dropped_ids).update(status=WebhookOutboxStatus.FAILED.value)
+
+    results = []
+    if subscriber_deliveries:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(subscriber_deliveries))) as executor:
+            futures = [
+                executor.submit(_send_subscriber_deliveries, webhooks[webhook_key], subscriber_items, payloads)
+                for webhook_key, subscriber_items in subscriber_deliveries.items()
+            ]
+            for future in futures:
+                results.extend(future.result())
+
+    _record_delivery_results(results, webhooks)
+    return len(results)
+
+
+def _record_delivery_results(results, webhooks):
+    now = timezone.now()
+    histories = []
+    for delivery, request_config, request_result in results:
+        histories.append(
+            History(
+                webhook_code=delivery.webhook_code,
+                event_code=delivery.event_code,
+                success=request_result.ok,
+                status_code=request_result.response_status_code,
+                delivery_id=delivery.delivery_id,
+                scope_type=delivery.scope_type,
+                scope_code=delivery.scope_code,
+                extra_info={"request": request_config, "response": request_result.json_response()},
+            )
+        )
+        if request_result.ok:
+            delivery.status = WebhookOutboxStatus.SUCCESS.value
+            continue
+
+        webhook = webhooks[(delivery.scope_type, delivery.scope_code, delivery.webhook_code)]
+        extra_info = webhook.extra_info or {}
+        if delivery.retry_times >= extra_info.get("retry_times", 2):
+            delivery.status = WebhookOutboxStatus.FAILED.value
+            continue
+        backoff = extra_info.get("interval", 2) * (2**delivery.retry_times)
+        delivery.status = WebhookOutboxStatus.PENDING.value
+        delivery.retry_times += 1
+        delivery.next_retry_at = now + timedelta(seconds=min(backoff, settings.MAX_WEBHOOK_RETRY_INTERVAL))
+
+    History.objects.bulk_create(histories)
+    for delivery, _, _ in results:
+        delivery.updated_at = now
+    WebhookDelivery.objects.bulk_update(
+        [delivery for delivery, _, _ in results], ["status", "retry_times", "next_retry_at", "updated_at"]
+    )
+
+
+def clean_webhook_outbox(retention_days=None):
+    """清理已完成的事件和投递记录，投递历史仍保存在 History 中"""
+    retention_days = retention_days or settings.WEBHOOK_OUTBOX_RETENTION_DAYS
+    expired_time = timezone.now() - timedelta(days=retention_days)
+    event_count, _ = WebhookOutboxEvent.objects.filter(
+        status=WebhookOutboxStatus.DISPATCHED.value, created_at__lt=expired_time
+    ).delete()
+    delivery_count, _ = WebhookDelivery.objects.filter(
+        status__in=[WebhookOutboxStatus.SUCCESS.value, WebhookOutboxStatus.FAILED.value], updated_at__lt=expired_time
+    ).delete()
+    return event_count, delivery_count
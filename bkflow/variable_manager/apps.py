@@ -22,3 +22,6 @@ from django.apps import AppConfig
 
 class VariableManagerConfig(AppConfig):
     name = "bkflow.variable_manager"
+
+    def ready(self):
+        from bkflow.variable_manager.handlers import variable_change_handler  # noqa
@@ -0,0 +1,30 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bkflow.constants import SpaceCacheResource
+from bkflow.space.utils import invalidate_engine_space_cache
+from bkflow.variable_manager.models import VariableManager
+
+
+@receiver(post_save, sender=VariableManager)
+@receiver(post_delete, sender=VariableManager)
+def variable_change_handler(sender, instance, **kwargs):
+    invalidate_engine_space_cache(instance.space_id, SpaceCacheResource.VARIABLE.value)
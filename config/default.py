@@ -98,6 +98,16 @@ APP_INTERNAL_FROM_SUPERUSER_HEADER_KEY = "Bkflow-Internal-From-SuperUser"
 APP_INTERNAL_TOKEN_REQUEST_META_KEY = "HTTP_BKFLOW_INTERNAL_TOKEN"
 TOKEN_RETENTION_TIME = env.TOKEN_RETENTION_TIME
 
+# 模块间调用连接池及重试配置
+BKFLOW_HTTP_POOL_CONNECTIONS = env.BKFLOW_HTTP_POOL_CONNECTIONS
+BKFLOW_HTTP_POOL_MAXSIZE = env.BKFLOW_HTTP_POOL_MAXSIZE
+BKFLOW_HTTP_MAX_RETRIES = env.BKFLOW_HTTP_MAX_RETRIES
+BKFLOW_HTTP_RETRY_BACKOFF_FACTOR = env.BKFLOW_HTTP_RETRY_BACKOFF_FACTOR
+BKFLOW_HTTP_RETRY_BACKOFF_MAX = env.BKFLOW_HTTP_RETRY_BACKOFF_MAX
+BKFLOW_HTTP_CONNECT_TIMEOUT = env.BKFLOW_HTTP_CONNECT_TIMEOUT
+BKFLOW_HTTP_READ_TIMEOUT = env.BKFLOW_HTTP_READ_TIMEOUT
+BKFLOW_HTTP_ENDPOINT_TIMEOUTS = env.BKFLOW_HTTP_ENDPOINT_TIMEOUTS
+
 APP_WHITE_LIST = env.APP_WHITE_LIST_STR.split(",") if env.APP_WHITE_LIST_STR else []
 
 # PAAS SERVICE DETECTION
@@ -141,6 +151,9 @@ PLUGIN_DISTRIBUTOR_NAME = env.PLUGIN_DISTRIBUTOR_NAME or APP_CODE
 # 开放插件目录同步请求超时
 OPEN_PLUGIN_CATALOG_SYNC_REQUEST_TIMEOUT = env.OPEN_PLUGIN_CATALOG_SYNC_REQUEST_TIMEOUT
 
+# 开放插件目录同步后的有效期
+OPEN_PLUGIN_CATALOG_FRESH_TTL = env.OPEN_PLUGIN_CATALOG_FRESH_TTL
+
 # 默认数据库AUTO字段类型
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 
@@ -499,5 +512,18 @@ MAX_LOOP_TIMES = env.MAX_LOOP_TIMES
 MAX_WEBHOOK_RETRY_TIMES = env.MAX_WEBHOOK_RETRY_TIMES
 MAX_WEBHOOK_RETRY_INTERVAL = env.MAX_WEBHOOK_RETRY_INTERVAL
 MAX_WEBHOOK_TIMEOUT = env.MAX_WEBHOOK_TIMEOUT
+WEBHOOK_DELIVERY_BATCH_SIZE = env.WEBHOOK_DELIVERY_BATCH_SIZE
+WEBHOOK_DELIVERY_CONCURRENCY = env.WEBHOOK_DELIVERY_CONCURRENCY
+WEBHOOK_DELIVERY_CLAIM_TIMEOUT = env.WEBHOOK_DELIVERY_CLAIM_TIMEOUT
+WEBHOOK_OUTBOX_RETENTION_DAYS = env.WEBHOOK_OUTBOX_RETENTION_DAYS
 
 PLUGIN_LOOP_OUTPUTS_KEY = env.PLUGIN_LOOP_OUTPUTS_KEY
+
+# 空间配置缓存时间
+SPACE_CONFIG_CACHE_TTL = env.SPACE_CONFIG_CACHE_TTL
+
+# token 校验结果缓存时间
+TOKEN_VERIFY_CACHE_TTL = env.TOKEN_VERIFY_CACHE_TTL
+
+# 任务祖先关系缓存时间
+TASK_ANCESTORS_CACHE_TTL = env.TASK_ANCESTORS_CACHE_TTL
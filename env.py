@@ -18,8 +18,11 @@ to the current version of the project delivered to anyone in the future.
 """
 
 import json
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # 部署模块相关变量
 # 是否开启部分调试日志
 ENABLE_DEBUG_LOG = bool(int(os.getenv("ENABLE_DEBUG_LOG", 0)))
@@ -60,6 +63,43 @@ APP_INTERNAL_TOKEN = os.getenv("APP_INTERNAL_TOKEN", "")
 INTERFACE_APP_INTERNAL_TOKEN = os.getenv("INTERFACE_APP_INTERNAL_TOKEN", "")
 # 任务模块调用 Interface 模块的 url
 INTERFACE_APP_URL = os.getenv("INTERFACE_APP_URL", "")
+# 模块间调用连接池及重试配置
+BKFLOW_HTTP_POOL_CONNECTIONS = int(os.getenv("BKAPP_HTTP_POOL_CONNECTIONS", 10))
+BKFLOW_HTTP_POOL_MAXSIZE = int(os.getenv("BKAPP_HTTP_POOL_MAXSIZE", 50))
+BKFLOW_HTTP_MAX_RETRIES = int(os.getenv("BKAPP_HTTP_MAX_RETRIES", 2))
+BKFLOW_HTTP_RETRY_BACKOFF_FACTOR = float(os.getenv("BKAPP_HTTP_RETRY_BACKOFF_FACTOR", 0.2))
+BKFLOW_HTTP_RETRY_BACKOFF_MAX = float(os.getenv("BKAPP_HTTP_RETRY_BACKOFF_MAX", 2))
+BKFLOW_HTTP_CONNECT_TIMEOUT = float(os.getenv("BKAPP_HTTP_CONNECT_TIMEOUT", 5))
+# 读超时默认不限制，保持与历史行为一致
+_BKFLOW_HTTP_READ_TIMEOUT = os.getenv("BKAPP_HTTP_READ_TIMEOUT")
+BKFLOW_HTTP_READ_TIMEOUT = float(_BKFLOW_HTTP_READ_TIMEOUT) if _BKFLOW_HTTP_READ_TIMEOUT else None
+
+
+def _is_valid_timeout(timeout):
+    return isinstance(timeout, (int, float)) and not isinstance(timeout, bool) and timeout > 0
+
+
+def _parse_endpoint_timeouts(value):
+    """
+    解析按接口配置的超时时间，值为数字或 [连接超时, 读超时]（读超时可为 null 表示不限制），
+    列表会转换为 requests 支持的元组，非法配置项会被忽略
+    """
+    timeouts = {}
+    for pattern, timeout in json.loads(value).items():
+        if isinstance(timeout, list) and len(timeout) == 2:
+            timeout = tuple(timeout)
+            valid = _is_valid_timeout(timeout[0]) and (timeout[1] is None or _is_valid_timeout(timeout[1]))
+        else:
+            valid = _is_valid_timeout(timeout)
+        if not valid:
+            logger.warning("[BKAPP_HTTP_ENDPOINT_TIMEOUTS] invalid timeout for %s: %s, ignored", pattern, timeout)
+            continue
+        timeouts[pattern] = timeout
+    return timeouts
+
+
+# 按接口配置超时时间，形如 {"get_task_states": 10, "create_task": [3, 30]}，key 为 url 中包含的片段
+BKFLOW_HTTP_ENDPOINT_TIMEOUTS = _parse_endpoint_timeouts(os.getenv("BKAPP_HTTP_ENDPOINT_TIMEOUTS", "{}"))
 # TOKEN保留时间，默认半天
 TOKEN_RETENTION_TIME = int(os.getenv("TOKEN_RETENTION_TIME", 12 * 60 * 60))
 
@@ -86,6 +126,8 @@ BKAPP_API_PLUGIN_REQUEST_TIMEOUT = int(os.getenv("BKAPP_API_PLUGIN_REQUEST_TIMEO
 # 开放插件目录同步请求超时和同步周期
 OPEN_PLUGIN_CATALOG_SYNC_REQUEST_TIMEOUT = int(os.getenv("BKAPP_OPEN_PLUGIN_CATALOG_SYNC_REQUEST_TIMEOUT", 120))
 OPEN_PLUGIN_CATALOG_SYNC_CRONTAB = os.getenv("BKAPP_OPEN_PLUGIN_CATALOG_SYNC_CRONTAB", "*/30 * * * *")
+# 开放插件目录同步后的有效期（秒），remote 模式在有效期内直接读取本地目录，默认覆盖两个同步周期
+OPEN_PLUGIN_CATALOG_FRESH_TTL = int(os.getenv("BKAPP_OPEN_PLUGIN_CATALOG_FRESH_TTL", 60 * 60))
 
 # 开放插件回调 token 有效期（秒）；未配置时对齐节点最长执行时间
 _OPEN_PLUGIN_CALLBACK_TOKEN_TTL = os.getenv("BKAPP_OPEN_PLUGIN_CALLBACK_TOKEN_TTL")
@@ -161,12 +203,48 @@ USE_BKFLOW_CREDENTIAL = os.getenv("USE_BKFLOW_CREDENTIAL", False)  # 默认关
 # 是否开启使用pyinstrument
 USE_PYINSTRUMENT = os.getenv("USE_PYINSTRUMENT", False)
 
+# 是否开启任务快照跨请求缓存（以快照 md5 为 key）及缓存时间
+TASK_SNAPSHOT_CACHE_ENABLED = bool(int(os.getenv("BKAPP_TASK_SNAPSHOT_CACHE_ENABLED", 0)))
+TASK_SNAPSHOT_CACHE_TTL = int(os.getenv("BKAPP_TASK_SNAPSHOT_CACHE_TTL", 60 * 60))
+
+# 是否开启模板快照跨请求缓存（以快照 id 为 key 缓存在 redis 中）及缓存时间
+TEMPLATE_SNAPSHOT_CACHE_ENABLED = bool(int(os.getenv("BKAPP_TEMPLATE_SNAPSHOT_CACHE_ENABLED", 0)))
+TEMPLATE_SNAPSHOT_CACHE_TTL = int(os.getenv("BKAPP_TEMPLATE_SNAPSHOT_CACHE_TTL", 60 * 60))
+
+# 空间配置缓存时间（秒），为 0 时不缓存
+SPACE_CONFIG_CACHE_TTL = int(os.getenv("BKAPP_SPACE_CONFIG_CACHE_TTL", 5 * 60))
+
+# token 校验结果缓存时间（秒），为 0 时不缓存
+TOKEN_VERIFY_CACHE_TTL = int(os.getenv("BKAPP_TOKEN_VERIFY_CACHE_TTL", 30))
+
+# 任务祖先关系缓存时间（秒），祖先关系创建后不会变化，可以缓存较久，为 0 时不缓存
+TASK_ANCESTORS_CACHE_TTL = int(os.getenv("BKAPP_TASK_ANCESTORS_CACHE_TTL", 24 * 60 * 60))
+
+# 节点超时调度单次认领的节点数量及最长休眠时间（秒）
+NODE_TIMEOUT_CLAIM_BATCH_SIZE = int(os.getenv("BKAPP_NODE_TIMEOUT_CLAIM_BATCH_SIZE", 500))
+NODE_TIMEOUT_MAX_IDLE_WAIT = float(os.getenv("BKAPP_NODE_TIMEOUT_MAX_IDLE_WAIT", 5))
+
+# 决策表缓存时间（秒），为 0 时关闭引擎侧缓存；进程内编译结果缓存的决策表数量
+DMN_TABLE_CACHE_TTL = int(os.getenv("BKAPP_DMN_TABLE_CACHE_TTL", 5 * 60))
+DMN_COMPILED_TABLE_CACHE_SIZE = int(os.getenv("BKAPP_DMN_COMPILED_TABLE_CACHE_SIZE", 256))
+
+# 空间变量、开放插件启动预检结果在引擎侧的缓存时间（秒），为 0 时每次启动任务都请求 interface
+SPACE_DATA_CACHE_TTL = int(os.getenv("BKAPP_SPACE_DATA_CACHE_TTL", 5 * 60))
+
 # 清理任务批量数目
 CLEAN_TASK_BATCH_NUM = os.getenv("CLEAN_TASK_BATCH_NUM", 200)
 
 # 清理节点批量数目
 CLEAN_TASK_NODE_BATCH_NUM = os.getenv("CLEAN_TASK_NODE_BATCH_NUM", 5000)
 
+# 清理任务单次删除的行数、删除批次之间的间隔（秒）、单次清理最多删除的行数
+CLEAN_TASK_DELETE_BATCH_SIZE = int(os.getenv("CLEAN_TASK_DELETE_BATCH_SIZE", 500))
+CLEAN_TASK_DELETE_INTERVAL = float(os.getenv("CLEAN_TASK_DELETE_INTERVAL", 0.05))
+CLEAN_TASK_MAX_DELETE_ROWS = int(os.getenv("CLEAN_TASK_MAX_DELETE_ROWS", 100000))
+
+# 单次清理最多扫描的回调数据行数
+CLEAN_TASK_CALLBACK_SCAN_NUM = int(os.getenv("CLEAN_TASK_CALLBACK_SCAN_NUM", 10000))
+
 # 是否开启清理任务 默认关闭
 ENABLE_CLEAN_TASK = os.getenv("ENABLE_CLEAN_TASK", False)
 
@@ -185,6 +263,9 @@ SYNC_BK_PLUGINS_CRONTAB = os.getenv("SYNC_BK_PLUGINS_INTERVAL", "*/10 * * * *")
 ENABLE_HTTP_PLUGIN_DOMAINS_CHECK = bool(int(os.getenv("ENABLE_HTTP_PLUGIN_DOMAINS_CHECK", 1)))
 ALLOWED_HTTP_PLUGIN_DOMAINS = os.getenv("ALLOWED_HTTP_PLUGIN_DOMAINS", "")
 
+# 是否安装基准测试工具（run_benchmarks 命令），仅用于开发、测试环境
+BENCHMARK_ENABLED = bool(int(os.getenv("BKAPP_BENCHMARK_ENABLED", 0)))
+
 # bamboo engine 配置
 PIPELINE_RERUN_MAX_TIMES = int(os.getenv("PIPELINE_RERUN_MAX_TIMES", 100))
 PIPELINE_LOOP_OUTPUTS_INNER_KEY = os.getenv("PIPELINE_LOOP_OUTPUTS_INNER_KEY", "outputs")
@@ -232,5 +313,12 @@ MAX_LOOP_TIMES = int(os.getenv("MAX_LOOP_TIMES", 100))
 MAX_WEBHOOK_RETRY_TIMES = int(os.getenv("MAX_WEBHOOK_RETRY_TIMES", 5))
 MAX_WEBHOOK_RETRY_INTERVAL = int(os.getenv("MAX_WEBHOOK_RETRY_INTERVAL", 600))
 MAX_WEBHOOK_TIMEOUT = int(os.getenv("MAX_WEBHOOK_TIMEOUT", 10))
+# webhook 异步投递配置
+WEBHOOK_DELIVERY_BATCH_SIZE = int(os.getenv("BKAPP_WEBHOOK_DELIVERY_BATCH_SIZE", 200))
+WEBHOOK_DELIVERY_CONCURRENCY = int(os.getenv("BKAPP_WEBHOOK_DELIVERY_CONCURRENCY", 10))
+WEBHOOK_DELIVERY_CLAIM_TIMEOUT = int(os.getenv("BKAPP_WEBHOOK_DELIVERY_CLAIM_TIMEOUT", 5 * 60))
+WEBHOOK_DELIVERY_CRONTAB = os.getenv("BKAPP_WEBHOOK_DELIVERY_CRONTAB", "* * * * *")
+WEBHOOK_OUTBOX_RETENTION_DAYS = int(os.getenv("BKAPP_WEBHOOK_OUTBOX_RETENTION_DAYS", 7))
+WEBHOOK_OUTBOX_CLEAN_CRONTAB = os.getenv("BKAPP_WEBHOOK_OUTBOX_CLEAN_CRONTAB", "30 3 * * *")
 
 PLUGIN_LOOP_OUTPUTS_KEY = os.getenv("PLUGIN_LOOP_OUTPUTS_KEY", "outputs")
@@ -122,8 +122,19 @@ def check_engine_admin_permission(request, *args, **kwargs):
 
 BKFLOW_MODULE = BKFLOWModule.get_module()
 
-if env.BKFLOW_MODULE_TYPE == BKFLOWModuleType.engine.value:
+# 两个模块均可使用 redis，由 pipeline app 初始化为 settings.redis_inst，未配置时相关缓存不生效
+if env.BKAPP_REDIS_HOST:
+    REDIS = {
+        "host": env.BKAPP_REDIS_HOST,
+        "port": env.BKAPP_REDIS_PORT,
+        "password": env.BKAPP_REDIS_PASSWORD,
+        "service_name": env.BKAPP_REDIS_SERVICE_NAME,
+        "mode": env.BKAPP_REDIS_MODE,
+        "db": env.BKAPP_REDIS_DB,
+        "sentinel_password": env.BKAPP_REDIS_SENTINEL_PASSWORD,
+    }
 
+if env.BKFLOW_MODULE_TYPE == BKFLOWModuleType.engine.value:
     if BKFLOW_MODULE.broker_url:
         BROKER_URL = env.BKFLOW_CELERY_BROKER_URL
 
@@ -223,17 +234,13 @@ if env.BKFLOW_MODULE_TYPE == BKFLOWModuleType.engine.value:
 
     # Redis 过期时间节点池 KEY
     EXECUTING_NODE_POOL = f"bkflow_engine_executing_node_pool_{BKFLOW_MODULE.code}"
+    EXECUTING_NODE_POOL_WAKEUP_CHANNEL = f"{EXECUTING_NODE_POOL}_wakeup"
+    NODE_TIMEOUT_CLAIM_BATCH_SIZE = env.NODE_TIMEOUT_CLAIM_BATCH_SIZE
+    NODE_TIMEOUT_MAX_IDLE_WAIT = env.NODE_TIMEOUT_MAX_IDLE_WAIT
 
-    if env.BKAPP_REDIS_HOST:
-        REDIS = {
-            "host": env.BKAPP_REDIS_HOST,
-            "port": env.BKAPP_REDIS_PORT,
-            "password": env.BKAPP_REDIS_PASSWORD,
-            "service_name": env.BKAPP_REDIS_SERVICE_NAME,
-            "mode": env.BKAPP_REDIS_MODE,
-            "db": env.BKAPP_REDIS_DB,
-            "sentinel_password": env.BKAPP_REDIS_SENTINEL_PASSWORD,
-        }
+    DMN_TABLE_CACHE_TTL = env.DMN_TABLE_CACHE_TTL
+    DMN_COMPILED_TABLE_CACHE_SIZE = env.DMN_COMPILED_TABLE_CACHE_SIZE
+    SPACE_DATA_CACHE_TTL = env.SPACE_DATA_CACHE_TTL
 
     INTERFACE_APP_INTERNAL_TOKEN = env.INTERFACE_APP_INTERNAL_TOKEN
     INTERFACE_APP_URL = (
@@ -246,12 +253,17 @@ if env.BKFLOW_MODULE_TYPE == BKFLOWModuleType.engine.value:
     USE_BKFLOW_CREDENTIAL = env.USE_BKFLOW_CREDENTIAL
     CLEAN_TASK_BATCH_NUM = env.CLEAN_TASK_BATCH_NUM
     CLEAN_TASK_NODE_BATCH_NUM = env.CLEAN_TASK_NODE_BATCH_NUM
+    CLEAN_TASK_DELETE_BATCH_SIZE = env.CLEAN_TASK_DELETE_BATCH_SIZE
+    CLEAN_TASK_DELETE_INTERVAL = env.CLEAN_TASK_DELETE_INTERVAL
+    CLEAN_TASK_MAX_DELETE_ROWS = env.CLEAN_TASK_MAX_DELETE_ROWS
+    CLEAN_TASK_CALLBACK_SCAN_NUM = env.CLEAN_TASK_CALLBACK_SCAN_NUM
     CLEAN_TASK_EXPIRED_DAYS = env.CLEAN_TASK_EXPIRED_DAYS
     ENABLE_CLEAN_TASK = env.ENABLE_CLEAN_TASK
     CLEAN_TASK_CRONTAB = env.CLEAN_TASK_CRONTAB
+    TASK_SNAPSHOT_CACHE_ENABLED = env.TASK_SNAPSHOT_CACHE_ENABLED
+    TASK_SNAPSHOT_CACHE_TTL = env.TASK_SNAPSHOT_CACHE_TTL
 
 elif env.BKFLOW_MODULE_TYPE == BKFLOWModuleType.interface.value:
-
     INSTALLED_APPS += (
         "rest_framework",
         "drf_yasg",
@@ -324,10 +336,27 @@ elif env.BKFLOW_MODULE_TYPE == BKFLOWModuleType.interface.value:
     # ban 掉 admin 权限
     BLOCK_ADMIN_PERMISSION = env.BLOCK_ADMIN_PERMISSION
 
+    TEMPLATE_SNAPSHOT_CACHE_ENABLED = env.TEMPLATE_SNAPSHOT_CACHE_ENABLED
+    TEMPLATE_SNAPSHOT_CACHE_TTL = env.TEMPLATE_SNAPSHOT_CACHE_TTL
+
     DATABASE_ROUTERS = ["bkflow.statistics.db_router.StatisticsDBRouter"]
 
+    # webhook 投递使用独立队列，避免慢回调占用通用 worker
+    CELERY_ROUTES = {
+        "bkflow.space.tasks.dispatch_webhook_events": {"queue": "webhook_delivery"},
+        "bkflow.space.tasks.deliver_webhooks": {"queue": "webhook_delivery"},
+    }
+
     # 添加定时任务
     app.conf.beat_schedule = {
+        "deliver_webhooks": {
+            "task": "bkflow.space.tasks.deliver_webhooks",
+            "schedule": _parse_crontab(env.WEBHOOK_DELIVERY_CRONTAB),
+        },
+        "clean_webhook_outbox": {
+            "task": "bkflow.space.tasks.clean_webhook_outbox",
+            "schedule": _parse_crontab(env.WEBHOOK_OUTBOX_CLEAN_CRONTAB),
+        },
         "dispatch_open_plugin_catalog_sync": {
             "task": "bkflow.plugin.tasks.dispatch_open_plugin_catalog_sync",
             "schedule": _parse_crontab(env.OPEN_PLUGIN_CATALOG_SYNC_CRONTAB),
@@ -356,3 +385,7 @@ elif env.BKFLOW_MODULE_TYPE == BKFLOWModuleType.interface.value:
             "schedule": _parse_crontab(env.STATISTICS_CLEAN_CRONTAB),
         },
     }
+
+# 基准测试工具只在开发、测试环境通过环境变量开启，生产环境不安装
+if env.BENCHMARK_ENABLED:
+    INSTALLED_APPS += ("bkflow.contrib.benchmark",)
@@ -38,5 +38,12 @@ PLUGIN_APIGW_API_HOST_FORMAT = getattr(settings, "PLUGIN_APIGW_API_HOST_FORMAT",
 )
 
 BKAPP_INVOKE_PAAS_RETRY_NUM = int(os.getenv("BKAPP_REQUEST_PAAS_RETRY_NUM", 3))
+# 重试间隔按指数增长：BACKOFF * 2 ** (n - 1)，不超过 BACKOFF_MAX（秒）
+BKAPP_INVOKE_PAAS_RETRY_BACKOFF = float(os.getenv("BKAPP_REQUEST_PAAS_RETRY_BACKOFF", 0.5))
+BKAPP_INVOKE_PAAS_RETRY_BACKOFF_MAX = float(os.getenv("BKAPP_REQUEST_PAAS_RETRY_BACKOFF_MAX", 5))
+
+# 插件应用详情进程内缓存时间（秒），过期后 STALE_TTL 内先返回旧数据并在后台刷新，TTL 为 0 时不缓存
+PLUGIN_APP_DETAIL_CACHE_TTL = int(os.getenv("BKAPP_PLUGIN_APP_DETAIL_CACHE_TTL", 60))
+PLUGIN_APP_DETAIL_STALE_TTL = int(os.getenv("BKAPP_PLUGIN_APP_DETAIL_STALE_TTL", 10 * 60))
 
 APIGW_USER_AUTH_KEY_NAME = os.getenv("BKAPP_APIGW_USER_AUTH_KEY_NAME", "bk_token")
@@ -20,6 +20,8 @@ to the current version of the project delivered to anyone in the future.
 import json
 import logging
 import os
+import threading
+import time
 
 import requests
 from django.core.files.uploadedfile import UploadedFile
@@ -37,6 +39,82 @@ from .exceptions import PluginServiceException, PluginServiceNotUse
 logger = logging.getLogger(PLUGIN_CLIENT_LOGGER)
 
 
+def get_backoff_seconds(failures):
+    """第 failures 次失败后的等待时间"""
+    return min(env.BKAPP_INVOKE_PAAS_RETRY_BACKOFF_MAX, env.BKAPP_INVOKE_PAAS_RETRY_BACKOFF * 2 ** (failures - 1))
+
+
+class PluginAppDetailCache:
+    """
+    进程内的插件应用详情缓存，所有 client 共享
+    缓存过期后的 STALE_TTL 时间内直接返回旧数据并在后台刷新，刷新失败时按指数退避重试
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _new_entry(data):
+        return {"data": data, "fetched_at": time.monotonic(), "failures": 0, "retry_at": 0, "refreshing": False}
+
+    def get(self, plugin_code, loader):
+        ttl = env.PLUGIN_APP_DETAIL_CACHE_TTL
+        if ttl <= 0:
+            return loader(plugin_code)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(plugin_code)
+        if entry is not None:
+            age = now - entry["fetched_at"]
+            if age < ttl:
+                return {"result": True, "data": entry["data"], "message": None}
+            if age < ttl + env.PLUGIN_APP_DETAIL_STALE_TTL:
+                self._schedule_refresh(plugin_code, loader, now)
+                return {"result": True, "data": entry["data"], "message": None}
+
+        result = loader(plugin_code)
+        self._update(plugin_code, result)
+        return result
+
+    def _update(self, plugin_code, result):
+        with self._lock:
+            if result.get("result"):
+                self._entries[plugin_code] = self._new_entry(result["data"])
+                return
+            entry = self._entries.get(plugin_code)
+            if entry is not None:
+                entry["refreshing"] = False
+                entry["failures"] += 1
+                entry["retry_at"] = time.monotonic() + get_backoff_seconds(entry["failures"])
+
+    def _schedule_refresh(self, plugin_code, loader, now):
+        with self._lock:
+            entry = self._entries.get(plugin_code)
+            if entry is None or entry["refreshing"] or now < entry["retry_at"]:
+                return
+            entry["refreshing"] = True
+        threading.Thread(target=self._refresh, args=(plugin_code, loader), daemon=True).start()
+
+    def _refresh(self, plugin_code, loader):
+        try:
+            result = loader(plugin_code)
+        except Exception as e:
+            logger.exception(f"[PluginAppDetailCache] refresh {plugin_code} error: {e}")
+            result = {"result": False, "data": None, "message": str(e)}
+        if not result.get("result"):
+            logger.warning(f"[PluginAppDetailCache] refresh {plugin_code} failed: {result.get('message')}")
+        self._update(plugin_code, result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+plugin_app_detail_cache = PluginAppDetailCache()
+
+
 class PluginServiceApiClient:
     def __init__(self, plugin_code, plugin_host=None):
         if not env.USE_PLUGIN_SERVICE == "1":
@@ -44,7 +122,7 @@ class PluginServiceApiClient:
         self.plugin_code = plugin_code
 
         # 如果请求报错，会抛出PluginServiceException类型异常，需要调用方进行捕获处理
-        result = PluginServiceApiClient.get_plugin_app_detail(plugin_code)
+        result = plugin_app_detail_cache.get(plugin_code, PluginServiceApiClient.get_plugin_app_detail)
         if not result["result"]:
             raise PluginServiceException(result["message"])
         self.plugin_host = plugin_host or os.path.join(result["data"]["url"], "bk_plugin/")
@@ -322,6 +400,8 @@ class PluginServiceApiClient:
                 logger.error(
                     f"[PluginServiceApiClient] request api error, invoke_num: {invoke_num}, error: {str(e)}, {message}"
                 )
+                if invoke_num < env.BKAPP_INVOKE_PAAS_RETRY_NUM:
+                    time.sleep(get_backoff_seconds(invoke_num))
             except Exception as e:
                 logger.exception(f"[PluginServiceApiClient] request exception: {e}")
                 raise
@@ -1,4 +1,3 @@
-# -*- coding: utf-8 -*-
 """
 TencentBlueKing is pleased to support the open source community by making
 蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
@@ -18,10 +17,13 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 import os
+from unittest import mock
 
 import pytest
 from django.conf import settings
 
+from tests.fake_redis import FakeRedis
+
 
 @pytest.fixture(scope="session")
 def env_insert_fixture(request):
@@ -53,3 +55,11 @@ def celery_worker_parameters():
         "perform_ping_check": False,
         "queue_arguments": {"x-max-priority": 255},
     }
+
+
+@pytest.fixture
+def fake_redis():
+    # redis_inst 为小写配置，被后续 override_settings 覆盖后会读取不到，直接替换获取入口
+    redis_inst = FakeRedis()
+    with mock.patch("bkflow.utils.redis_cache.get_redis_inst", return_value=redis_inst):
+        yield redis_inst
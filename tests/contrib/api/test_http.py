@@ -1,5 +1,8 @@
+from http.client import HTTPMessage
 from unittest import mock
 
+import requests
+
 from bkflow.contrib.api import http
 
 
@@ -87,12 +90,16 @@ class TestHttpApi:
         assert headers == {"Content-Type": "application/json"}
 
     @mock.patch("bkflow.contrib.api.http.curlify")
-    @mock.patch("bkflow.contrib.api.http.requests.get")
-    @mock.patch("bkflow.contrib.api.http.requests.post")
-    @mock.patch("bkflow.contrib.api.http.requests.put")
-    @mock.patch("bkflow.contrib.api.http.requests.delete")
-    def test_http_methods_success(self, mock_delete, mock_put, mock_post, mock_get, mock_curlify):
+    @mock.patch("bkflow.contrib.api.http.get_session")
+    def test_http_methods_success(self, mock_get_session, mock_curlify):
         """Test GET, POST, PUT, DELETE success cases"""
+        mock_session = mock_get_session.return_value
+        mock_get, mock_post, mock_put, mock_delete = (
+            mock_session.get,
+            mock_session.post,
+            mock_session.put,
+            mock_session.delete,
+        )
         mock_resp = mock.Mock()
         mock_resp.ok = True
         mock_resp.json.return_value = {"result": True, "message": "success", "request_id": "123"}
@@ -127,8 +134,9 @@ class TestHttpApi:
         assert result == {"result": True, "message": "success", "request_id": "123"}
 
     @mock.patch("bkflow.contrib.api.http.curlify")
-    @mock.patch("bkflow.contrib.api.http.requests.head")
-    def test_head_success(self, mock_head, mock_curlify):
+    @mock.patch("bkflow.contrib.api.http.get_session")
+    def test_head_success(self, mock_get_session, mock_curlify):
+        mock_head = mock_get_session.return_value.head
         mock_resp = mock.Mock()
         mock_resp.ok = True
         mock_resp.json.return_value = {"result": True, "message": "success", "request_id": "123"}
@@ -143,12 +151,13 @@ class TestHttpApi:
         result = http._http_request(method="HEAD", url=url, headers=headers)
 
         assert result == {"result": True, "message": "success", "request_id": "123"}
-        mock_head.assert_called_with(url=url, headers=headers, verify=False, cert=None, timeout=None, cookies=None)
+        mock_head.assert_called_with(url=url, headers=headers, verify=False, cert=None, timeout=(5, None), cookies=None)
 
     @mock.patch("bkflow.contrib.api.http.curlify")
-    @mock.patch("bkflow.contrib.api.http.requests.get")
-    def test_request_error_cases(self, mock_get, mock_curlify):
+    @mock.patch("bkflow.contrib.api.http.get_session")
+    def test_request_error_cases(self, mock_get_session, mock_curlify):
         """Test various error cases"""
+        mock_get = mock_get_session.return_value.get
         # Exception
         mock_get.side_effect = Exception("Network Error")
         result = http.get("http://example.com", {})
@@ -197,12 +206,16 @@ class TestHttpApi:
         assert "Unsupported http method PATCH" in result["message"]
 
     @mock.patch("bkflow.contrib.api.http.curlify")
-    @mock.patch("bkflow.contrib.api.http.requests.get")
-    @mock.patch("bkflow.contrib.api.http.requests.post")
-    @mock.patch("bkflow.contrib.api.http.requests.put")
-    @mock.patch("bkflow.contrib.api.http.requests.delete")
-    def test_request_with_optional_params(self, mock_delete, mock_put, mock_post, mock_get, mock_curlify):
+    @mock.patch("bkflow.contrib.api.http.get_session")
+    def test_request_with_optional_params(self, mock_get_session, mock_curlify):
         """Test requests with optional parameters"""
+        mock_session = mock_get_session.return_value
+        mock_get, mock_post, mock_put, mock_delete = (
+            mock_session.get,
+            mock_session.post,
+            mock_session.put,
+            mock_session.delete,
+        )
         mock_resp = mock.Mock()
         mock_resp.ok = True
         mock_resp.json.return_value = {"result": True}
@@ -245,3 +258,71 @@ class TestHttpApi:
             cookies={"token": "xyz"},
         )
         assert result["result"] is True
+
+
+class TestHttpSession:
+    def test_get_session_reused_in_same_process(self):
+        session = http.get_session()
+        assert http.get_session() is session
+
+    def test_get_session_rebuilt_after_fork(self):
+        session = http.get_session()
+        with mock.patch("bkflow.contrib.api.http.os.getpid", return_value=-1):
+            assert http.get_session() is not session
+
+    def test_session_retry_only_idempotent_read(self):
+        session = http.get_session()
+        retry = session.get_adapter("http://example.com").max_retries
+        assert retry.is_retry("GET", 503) is True
+        assert retry.is_retry("POST", 503) is False
+        assert retry._is_method_retryable("PUT") is True
+        assert retry._is_method_retryable("POST") is False
+
+    def test_session_does_not_persist_response_cookies(self):
+        request = requests.Request("GET", "http://example.com/").prepare()
+        msg = HTTPMessage()
+        msg["Set-Cookie"] = "sid=abc; Path=/"
+        response = mock.Mock()
+        response._original_response.msg = msg
+
+        plain_jar = requests.cookies.RequestsCookieJar()
+        requests.cookies.extract_cookies_to_jar(plain_jar, request, response)
+        assert len(plain_jar) == 1
+
+        session = http.get_session()
+        requests.cookies.extract_cookies_to_jar(session.cookies, request, response)
+        assert len(session.cookies) == 0
+
+    def test_jittered_backoff_within_bound(self):
+        retry = http._JitteredRetry(total=5, backoff_factor=10)
+        retry = retry.increment(method="GET", url="/")
+        retry = retry.increment(method="GET", url="/")
+        for _ in range(20):
+            assert 0 <= retry.get_backoff_time() <= 2
+
+    def test_resolve_timeout(self, settings):
+        settings.BKFLOW_HTTP_ENDPOINT_TIMEOUTS = {"task/": 10, "get_task_states/": 3}
+        assert http._resolve_timeout("http://example.com/task/1/get_task_states/", 30) == 30
+        assert http._resolve_timeout("http://example.com/task/1/get_task_states/", None) == 3
+        assert http._resolve_timeout("http://example.com/task/1/", None) == 10
+        assert http._resolve_timeout("http://example.com/space/", None) == (
+            settings.BKFLOW_HTTP_CONNECT_TIMEOUT,
+            settings.BKFLOW_HTTP_READ_TIMEOUT,
+        )
+
+    @mock.patch("bkflow.contrib.api.http.curlify")
+    @mock.patch("bkflow.contrib.api.http.get_session")
+    def test_curl_rendered_only_when_debug_enabled(self, mock_get_session, mock_curlify):
+        mock_resp = mock.Mock()
+        mock_resp.ok = True
+        mock_resp.json.return_value = {"result": True}
+        mock_get_session.return_value.get.return_value = mock_resp
+        mock_curlify.to_curl.return_value = "curl"
+
+        with mock.patch.object(http.logger, "isEnabledFor", return_value=False):
+            http.get("http://example.com", {})
+        mock_curlify.to_curl.assert_not_called()
+
+        with mock.patch.object(http.logger, "isEnabledFor", return_value=True):
+            http.get("http://example.com", {})
+        mock_curlify.to_curl.assert_called_once()
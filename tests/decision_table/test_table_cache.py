@@ -0,0 +1,198 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import json
+from unittest import mock
+
+import pytest
+from bkflow_dmn.api import decide_single_table
+
+from bkflow.decision_table import table_cache
+from bkflow.decision_table.models import DecisionTable
+from bkflow.decision_table.table_parser import DecisionTableParser
+from tests.decision_table.tables import simple_table
+
+SIMPLE_TABLE = {"name": "simple_table", "data": simple_table}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture
+def redis_inst(settings):
+    settings.DMN_TABLE_CACHE_TTL = 60
+    settings.redis_inst = FakeRedis()
+    return settings.redis_inst
+
+
+@pytest.fixture(autouse=True)
+def clear_compiled_tables():
+    table_cache.clear_compiled_tables()
+    yield
+    table_cache.clear_compiled_tables()
+
+
+def mock_interface_client(response):
+    client = mock.MagicMock()
+    client.get_decision_table.return_value = response
+    return mock.patch("bkflow.decision_table.table_cache.InterfaceModuleClient", return_value=client), client
+
+
+class TestCompileDecisionTable:
+    def test_compile_once_for_same_content(self):
+        with mock.patch(
+            "bkflow.decision_table.table_cache.DecisionTableParser", wraps=DecisionTableParser
+        ) as parser_cls:
+            first = table_cache.compile_decision_table(SIMPLE_TABLE)
+            second = table_cache.compile_decision_table(json.loads(json.dumps(SIMPLE_TABLE)))
+
+        assert parser_cls.call_count == 1
+        assert first == second
+        assert first is not second
+        facts = {"text_area": "a", "int_area": 0, "select_area": "value1"}
+        assert decide_single_table(second, facts) == [{"output_area": "1"}]
+
+    def test_compile_again_when_content_changed(self):
+        changed = {"name": "changed_table", "data": simple_table}
+        with mock.patch(
+            "bkflow.decision_table.table_cache.DecisionTableParser", wraps=DecisionTableParser
+        ) as parser_cls:
+            table_cache.compile_decision_table(SIMPLE_TABLE)
+            compiled = table_cache.compile_decision_table(changed)
+
+        assert parser_cls.call_count == 2
+        assert compiled["title"] == "changed_table"
+
+    def test_evict_least_recently_used(self, settings):
+        settings.DMN_COMPILED_TABLE_CACHE_SIZE = 1
+        table_cache.compile_decision_table(SIMPLE_TABLE)
+        table_cache.compile_decision_table({"name": "another", "data": simple_table})
+
+        assert list(table_cache._compiled_tables.keys()) == [
+            table_cache.get_table_content_hash({"name": "another", "data": simple_table})
+        ]
+
+
+class TestGetDecisionTable:
+    def test_fetch_without_cache(self, settings):
+        settings.DMN_TABLE_CACHE_TTL = 0
+        response = {"result": True, "data": dict(SIMPLE_TABLE), "message": "success"}
+        patcher, client = mock_interface_client(response)
+        with patcher:
+            table_cache.get_decision_table(space_id=1, table_id=2)
+            table_cache.get_decision_table(space_id=1, table_id=2)
+
+        assert client.get_decision_table.call_count == 2
+
+    def test_read_through_and_invalidate(self, redis_inst):
+        response = {"result": True, "data": dict(SIMPLE_TABLE), "message": "success"}
+        patcher, client = mock_interface_client(response)
+        with patcher:
+            table_cache.get_decision_table(space_id=1, table_id=2)
+            cached = table_cache.get_decision_table(space_id=1, table_id=2)
+            assert client.get_decision_table.call_count == 1
+            assert cached["data"]["data"] == simple_table
+            assert cached["data"]["version"] == table_cache.get_table_content_hash(SIMPLE_TABLE)
+
+            table_cache.invalidate_decision_table(space_id=1, table_id=2)
+            table_cache.get_decision_table(space_id=1, table_id=2)
+            assert client.get_decision_table.call_count == 2
+
+    def test_failed_result_not_cached(self, redis_inst):
+        patcher, client = mock_interface_client({"result": False, "message": "error"})
+        with patcher:
+            assert table_cache.get_decision_table(space_id=1, table_id=2)["result"] is False
+
+        assert redis_inst.data == {}
+
+
+class TestWarmDecisionTables:
+    PIPELINE_TREE = {
+        "activities": {
+            "act_1": {
+                "type": "ServiceActivity",
+                "component": {"code": "dmn_plugin", "data": {"table_id": {"value": 1}}},
+            },
+            "act_2": {"type": "ServiceActivity", "component": {"code": "bk_display", "data": {}}},
+            "act_3": {
+                "type": "SubProcess",
+                "pipeline": {
+                    "activities": {
+                        "act_4": {
+                            "type": "ServiceActivity",
+                            "component": {"code": "dmn_plugin", "data": {"table_id": {"value": 2}}},
+                        }
+                    }
+                },
+            },
+        }
+    }
+
+    def test_collect_decision_table_ids(self):
+        assert table_cache.collect_decision_table_ids(self.PIPELINE_TREE) == {1, 2}
+
+    def test_warm_decision_tables(self, redis_inst):
+        response = {"result": True, "data": dict(SIMPLE_TABLE), "message": "success"}
+        patcher, client = mock_interface_client(response)
+        with patcher:
+            table_cache.warm_decision_tables(space_id=1, pipeline_tree=self.PIPELINE_TREE)
+
+        assert client.get_decision_table.call_count == 2
+        assert set(redis_inst.data.keys()) == {
+            table_cache.get_table_cache_key(1, 1),
+            table_cache.get_table_cache_key(1, 2),
+        }
+        assert len(table_cache._compiled_tables) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDecisionTableHandlers:
+    def test_invalidate_engine_cache_on_update(self):
+        with mock.patch("bkflow.decision_table.handlers.TaskComponentClient") as client_cls:
+            table = DecisionTable.objects.create(name="table", space_id=1, data=simple_table)
+            client_cls.assert_not_called()
+
+            table.save()
+
+        client_cls.assert_called_once_with(space_id=1)
+        client_cls.return_value.invalidate_decision_table.assert_called_once_with(
+            data={"space_id": 1, "table_id": table.id}
+        )
+
+    def test_invalidate_engine_cache_on_delete(self):
+        table = DecisionTable.objects.create(name="table", space_id=1, data=simple_table)
+        table_id = table.id
+
+        with mock.patch("bkflow.decision_table.handlers.TaskComponentClient") as client_cls:
+            table.delete()
+
+        client_cls.assert_called_once_with(space_id=1)
+        client_cls.return_value.invalidate_decision_table.assert_called_once_with(
+            data={"space_id": 1, "table_id": table_id}
+        )
@@ -5,7 +5,12 @@ from django.test import TestCase
 from django.utils import timezone
 
 from bkflow.statistics.collectors.task_collector import TaskStatisticsCollector
-from bkflow.statistics.models import TaskflowExecutedNodeStatistics, TaskflowStatistics
+from bkflow.statistics.models import (
+    DailyStatisticsSummary,
+    PluginExecutionSummary,
+    TaskflowExecutedNodeStatistics,
+    TaskflowStatistics,
+)
 
 
 class TestTaskStatisticsCollector(TestCase):
@@ -158,6 +163,60 @@ class TestTaskStatisticsCollector(TestCase):
         stat = TaskflowStatistics.objects.get(task_id=1)
         assert stat.final_state == "REVOKED"
 
+    @patch("bkflow.statistics.collectors.task_collector.TaskStatisticsCollector.task", new_callable=PropertyMock)
+    def test_task_statistics_rollup_applies_delta(self, mock_task_prop):
+        """任务状态变化时每日汇总只累加新旧记录的差值，重复采集不会重复计数"""
+        mock_task = self._make_mock_task()
+        mock_task_prop.return_value = mock_task
+        collector = TaskStatisticsCollector(task_id=1)
+        collector.collect_on_create()
+        collector.collect_on_create()
+
+        summary = DailyStatisticsSummary.objects.get(space_id=100, scope_type="project", scope_value="proj_1")
+        assert summary.task_created_count == 1
+        assert summary.task_finished_count == 0
+
+        now = timezone.now()
+        mock_task.is_started = True
+        mock_task.is_finished = True
+        mock_task.start_time = now - timedelta(seconds=30)
+        mock_task.finish_time = now
+        collector._update_task_statistics()
+        collector._update_task_statistics()
+
+        summary.refresh_from_db()
+        assert summary.task_created_count == 1
+        assert summary.task_finished_count == 1
+        assert summary.task_success_count == 1
+        assert summary.task_elapsed_time_sum == 30
+        assert summary.task_elapsed_count == 1
+        assert summary.avg_task_elapsed_time == 30
+        assert summary.max_task_elapsed_time == 30
+
+    @patch("bamboo_engine.api.get_pipeline_states")
+    @patch("pipeline.eri.runtime.BambooDjangoRuntime")
+    @patch("bkflow.statistics.collectors.task_collector.TaskStatisticsCollector.task", new_callable=PropertyMock)
+    def test_node_statistics_rollup_is_idempotent(self, mock_task_prop, mock_runtime_cls, mock_get_states):
+        mock_task = self._make_mock_task()
+        mock_task_prop.return_value = mock_task
+        mock_result = MagicMock()
+        mock_result.result = True
+        mock_result.data = self._make_bamboo_status_tree(root_id="inst_001")
+        mock_get_states.return_value = mock_result
+
+        collector = TaskStatisticsCollector(task_id=1)
+        collector._collect_node_statistics()
+        collector._collect_node_statistics()
+
+        summary = DailyStatisticsSummary.objects.get(space_id=100, scope_type="project", scope_value="proj_1")
+        assert summary.node_executed_count == 1
+        assert summary.node_success_count == 1
+        plugin_summary = PluginExecutionSummary.objects.get(period_type="day", space_id=100, component_code="bk_http")
+        assert plugin_summary.execution_count == 1
+        assert plugin_summary.success_count == 1
+        assert plugin_summary.elapsed_time_sum == 180
+        assert plugin_summary.avg_elapsed_time == 180
+
     @patch("bkflow.statistics.collectors.task_collector.TaskStatisticsCollector.task", new_callable=PropertyMock)
     def test_extract_executed_nodes_with_bamboo_status_tree(self, mock_task_prop):
         """验证 _extract_executed_nodes 能正确解析 get_pipeline_states 的返回结构
@@ -0,0 +1,98 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import pytest
+from bamboo_engine import states as bamboo_engine_states
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from pipeline.eri.models import State as DBState
+
+from bkflow.task.batch_states import batch_get_task_states, get_pipeline_state_trees
+from bkflow.task.models import TaskInstance
+from bkflow.utils.pipeline import build_default_pipeline_tree
+
+
+def _create_state(node_id, root_id, parent_id, name):
+    return DBState.objects.create(node_id=node_id, root_id=root_id, parent_id=parent_id, name=name, version="v")
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBatchStates:
+    def _create_started_task(self):
+        task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+        TaskInstance.objects.filter(id=task_instance.id).update(is_started=True)
+        task_instance.refresh_from_db()
+        return task_instance
+
+    def test_get_pipeline_state_trees(self):
+        _create_state("root1", "root1", "", bamboo_engine_states.RUNNING)
+        _create_state("sub1", "root1", "root1", bamboo_engine_states.RUNNING)
+        _create_state("act1", "root1", "sub1", bamboo_engine_states.FAILED)
+        _create_state("act2", "root1", "root1", bamboo_engine_states.FINISHED)
+        _create_state("root2", "root2", "", bamboo_engine_states.FINISHED)
+
+        trees = get_pipeline_state_trees(["root1", "root2", "root3"])
+
+        assert set(trees.keys()) == {"root1", "root2"}
+        assert set(trees["root1"]["children"].keys()) == {"sub1", "act2"}
+        assert set(trees["root1"]["children"]["sub1"]["children"].keys()) == {"act1"}
+        assert trees["root2"]["children"] == {}
+
+    def test_batch_get_task_states(self):
+        task1 = self._create_started_task()
+        task2 = self._create_started_task()
+        task3 = self._create_started_task()
+        created_task = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+        expired_task = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+        TaskInstance.objects.filter(id=expired_task.id).update(is_started=True, is_expired=True)
+        expired_task.refresh_from_db()
+
+        _create_state(task1.instance_id, task1.instance_id, "", bamboo_engine_states.RUNNING)
+        _create_state("t1_act", task1.instance_id, task1.instance_id, bamboo_engine_states.FAILED)
+        _create_state(task2.instance_id, task2.instance_id, "", bamboo_engine_states.RUNNING)
+        _create_state("t2_act", task2.instance_id, task2.instance_id, bamboo_engine_states.SUSPENDED)
+
+        task_instances = [task1, task2, task3, created_task, expired_task]
+        with CaptureQueriesContext(connection) as ctx:
+            task_states = batch_get_task_states(task_instances)
+
+        assert len(ctx.captured_queries) == 1
+        assert task_states[task1.id]["state"] == bamboo_engine_states.FAILED
+        assert task_states[task1.id]["children"]["t1_act"]["state"] == bamboo_engine_states.FAILED
+        assert "start_time" in task_states[task1.id]
+        assert task_states[task2.id]["state"] == "NODE_SUSPENDED"
+        assert task_states[task3.id]["state"] == "CREATED"
+        assert task_states[created_task.id]["state"] == "CREATED"
+        assert task_states[expired_task.id]["state"] == "EXPIRED"
+
+    def test_batch_get_task_states_nested_subprocess(self):
+        """子流程内的节点暂停只影响直接父节点，与 TaskOperation.get_task_states 的格式一致"""
+        task = self._create_started_task()
+        _create_state(task.instance_id, task.instance_id, "", bamboo_engine_states.RUNNING)
+        _create_state("sub", task.instance_id, task.instance_id, bamboo_engine_states.RUNNING)
+        _create_state("sub_sub", task.instance_id, "sub", bamboo_engine_states.RUNNING)
+        _create_state("act", task.instance_id, "sub_sub", bamboo_engine_states.SUSPENDED)
+
+        task_state = batch_get_task_states([task])[task.id]
+
+        sub_state = task_state["children"]["sub"]
+        assert task_state["state"] == bamboo_engine_states.RUNNING
+        assert sub_state["state"] == bamboo_engine_states.RUNNING
+        assert sub_state["children"]["sub_sub"]["state"] == "NODE_SUSPENDED"
+        assert sub_state["children"]["sub_sub"]["children"]["act"]["state"] == bamboo_engine_states.SUSPENDED
+        assert task_state["finish_time"] == ""
@@ -429,6 +429,18 @@ class TestDispatchTimeoutNodes:
         # 验证没有分发任何节点
         mock_apply_async.assert_not_called()
 
+    @patch("bkflow.task.celery.tasks.execute_node_timeout_strategy.apply_async")
+    @patch("bkflow.task.celery.tasks.settings.BKFLOW_MODULE")
+    def test_dispatch_timeout_nodes_directly(self, mock_module, mock_apply_async):
+        """测试直接传递超时节点，不依赖 TimeoutNodesRecord"""
+        mock_module.code = "test_module"
+
+        dispatch_timeout_nodes(nodes=["node1_v1", "node2_v2"])
+
+        assert mock_apply_async.call_count == 2
+        assert mock_apply_async.call_args_list[1][1]["kwargs"] == {"node_id": "node2", "version": "v2"}
+        assert not TimeoutNodesRecord.objects.exists()
+
 
 @pytest.mark.django_db(transaction=True)
 class TestExecuteNodeTimeoutStrategy:
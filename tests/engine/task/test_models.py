@@ -17,9 +17,12 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 import json
+import pickle
 
 import pytest
 from bamboo_engine import states
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django_celery_beat.models import CrontabSchedule as DjangoCeleryBeatCrontabSchedule
 from django_celery_beat.models import PeriodicTask as DjangoCeleryBeatPeriodicTask
@@ -187,6 +190,49 @@ class TestTaskInstance:
         assert "fail_nodes" not in task_mock_data.data
         assert "errors" not in task_mock_data.data
 
+    def test_batch_create_instances(self):
+        """测试批量创建任务实例"""
+        pipeline_tree = build_default_pipeline_tree()
+        node_id = list(pipeline_tree[PE.activities].keys())[0]
+        tasks_kwargs = [
+            {"space_id": 1, "name": "task_{}".format(i), "pipeline_tree": build_default_pipeline_tree()}
+            for i in range(3)
+        ]
+        tasks_kwargs.append(
+            {
+                "space_id": 1,
+                "name": "mock_task",
+                "pipeline_tree": pipeline_tree,
+                "create_method": "MOCK",
+                "mock_data": {"nodes": [node_id], "outputs": {node_id: {"k": "v"}}},
+            }
+        )
+
+        instances = TaskInstance.objects.batch_create_instances(tasks_kwargs)
+
+        assert [instance.name for instance in instances] == ["task_0", "task_1", "task_2", "mock_task"]
+        assert len({instance.instance_id for instance in instances}) == 4
+        for instance in instances:
+            assert instance.id is not None
+            assert instance.snapshot_id is not None
+            assert instance.execution_data["id"] == instance.instance_id
+        # 每个任务的节点 ID 均被替换，执行快照互不相同
+        assert len({instance.execution_snapshot_id for instance in instances}) == 4
+        task_mock_data = TaskMockData.objects.get(taskflow_id=instances[-1].id)
+        assert task_mock_data.data["nodes"][0] in instances[-1].execution_data[PE.activities]
+        assert not TaskMockData.objects.filter(taskflow_id__in=[instance.id for instance in instances[:3]]).exists()
+
+    def test_batch_create_instances_query_count(self):
+        """批量创建的查询次数与任务数量无关"""
+
+        def _count_queries(task_num):
+            tasks_kwargs = [{"space_id": 1, "pipeline_tree": build_default_pipeline_tree()} for _ in range(task_num)]
+            with CaptureQueriesContext(connection) as ctx:
+                TaskInstance.objects.batch_create_instances(tasks_kwargs)
+            return len(ctx.captured_queries)
+
+        assert _count_queries(2) == _count_queries(10)
+
     def test_change_parent_task_node_state_to_running_without_relation(self):
         """Cover TaskInstance.change_parent_task_node_state_to_running no relation branch"""
         task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
@@ -257,6 +303,68 @@ class TestTaskInstanceMoreCoverage:
         task_instance.refresh_from_db()
         assert task_instance.elapsed_time is not None
 
+    def test_snapshot_properties_cached_per_instance(self):
+        task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+        task_instance.calculate_tree_info()
+        task_instance.refresh_from_db()
+
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(3):
+                task_instance.pipeline_tree
+                task_instance.execution_data
+                task_instance.data
+                task_instance.tree_info
+                task_instance.node_id_set
+        assert len(ctx.captured_queries) == 4
+
+        task_instance.refresh_from_db()
+        with CaptureQueriesContext(connection) as ctx:
+            task_instance.execution_data
+        assert len(ctx.captured_queries) == 1
+
+    def test_snapshot_cache_invalidated_on_write(self):
+        task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+        origin_data = task_instance.execution_data
+        origin_activities = set(origin_data["activities"].keys())
+
+        task_instance.clone(creator="clone_creator")
+        assert set(task_instance.execution_data["activities"].keys()) == origin_activities
+
+        new_snapshot = TaskExecutionSnapshot.objects.create_snapshot(build_default_pipeline_tree())
+        task_instance.execution_snapshot_id = new_snapshot.id
+        assert task_instance.execution_snapshot.id == new_snapshot.id
+
+    def test_snapshot_cache_dropped_when_pickled(self):
+        task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+        task_instance.execution_data
+        assert "_snapshot_cache" not in pickle.loads(pickle.dumps(task_instance)).__dict__
+
+    def test_cross_request_snapshot_cache(self, settings, fake_redis):
+        settings.TASK_SNAPSHOT_CACHE_ENABLED = True
+        task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+
+        with CaptureQueriesContext(connection) as ctx:
+            execution_data = TaskInstance.objects.get(id=task_instance.id).execution_data
+        # 未命中时与关闭缓存一致：任务 + 快照各一次查询
+        assert len(ctx.captured_queries) == 2
+
+        another_instance = TaskInstance.objects.get(id=task_instance.id)
+        with CaptureQueriesContext(connection) as ctx:
+            assert another_instance.execution_data == execution_data
+        assert len(ctx.captured_queries) == 0
+
+        # 不同实例拿到的是各自反序列化的数据，互不影响
+        another_instance.execution_data["activities"] = {}
+        assert TaskInstance.objects.get(id=task_instance.id).execution_data == execution_data
+
+    def test_cross_request_snapshot_cache_without_redis(self, settings):
+        settings.TASK_SNAPSHOT_CACHE_ENABLED = True
+        task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert TaskInstance.objects.get(id=task_instance.id).execution_data is not None
+        assert len(ctx.captured_queries) == 2
+
     def test_replace_id_with_subprocess_node(self, monkeypatch):
         """Cover TaskInstance._replace_id subprocess recursion branch"""
 
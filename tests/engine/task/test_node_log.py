@@ -1,6 +1,9 @@
+import datetime
 from unittest import mock
 
 import pytest
+from django.utils import timezone
+from pipeline.eri.models import LogEntry
 
 from bkflow.task.node_log import (
     BaseNodeLogDataSource,
@@ -34,9 +37,9 @@ class TestNodeLogDataSources:
         assert source.private_token == "test_token"
         assert "X-Bkapi-Authorization" in source.headers
 
-    @mock.patch("bkflow.task.node_log.requests.get")
+    @mock.patch("bkflow.task.node_log.get_session")
     @mock.patch("bkflow.task.node_log.settings")
-    def test_paas3_fetch(self, mock_settings, mock_get):
+    def test_paas3_fetch(self, mock_settings, mock_get_session):
         """Test PaaS3 fetch_node_logs success and failure"""
         mock_settings.NODE_LOG_DATA_SOURCE_CONFIG = {"url": "http://paas3.example.com/logs"}
         mock_settings.APP_CODE = "test_app"
@@ -52,10 +55,12 @@ class TestNodeLogDataSources:
                 "logs": [{"ts": "2023-01-01 10:00:00", "message": "Log 1"}],
             }
         }
+        mock_get = mock_get_session.return_value.get
         mock_get.return_value = mock_response
         source = PaaS3NodeLogDataSource()
         result = source.fetch_node_logs("node_123", "v1", page=1, page_size=30)
         assert result["result"] is True
+        assert mock_get.call_args.kwargs["timeout"] == 10
 
         # Failure
         mock_response.status_code = 500
@@ -65,20 +70,6 @@ class TestNodeLogDataSources:
         assert result["result"] is False
         assert result["message"] == "Internal Server Error"
 
-    @mock.patch("bkflow.task.node_log.BambooDjangoRuntime")
-    def test_database_fetch(self, mock_runtime):
-        """Test DatabaseNodeLogDataSource fetch_node_logs"""
-        mock_runtime_instance = mock.Mock()
-        mock_runtime_instance.get_plain_log_for_node.return_value = "Test log content"
-        mock_runtime.return_value = mock_runtime_instance
-
-        source = DatabaseNodeLogDataSource()
-        result = source.fetch_node_logs("node_456", "v2")
-
-        assert result["result"] is True
-        assert result["data"]["logs"] == "Test log content"
-        assert result["data"]["page_info"] == {}
-
     def test_dummy_fetch(self):
         """Test DummyLogDataSource fetch_node_logs"""
         source = DummyLogDataSource()
@@ -88,6 +79,21 @@ class TestNodeLogDataSources:
         assert result["data"]["logs"] == ""
         assert result["data"]["page_info"] == {}
 
+    def test_base_iter_node_logs(self):
+        class PagedLogDataSource(BaseNodeLogDataSource):
+            def __init__(self):
+                self.calls = []
+
+            def fetch_node_logs(self, node_id, version_id, *args, **kwargs):
+                self.calls.append(kwargs)
+                logs = {1: "line 0\nline 1", 2: "line 2"}.get(kwargs["page"], "")
+                return {"result": True, "data": {"logs": logs, "page_info": {"total": 1000}}, "message": ""}
+
+        source = PagedLogDataSource()
+        assert "".join(source.iter_node_logs("node_1", "v1", start_time="t")) == "line 0\nline 1\nline 2"
+        assert [call["page"] for call in source.calls] == [1, 2]
+        assert all(call["start_time"] == "t" for call in source.calls)
+
     def test_factory_database(self):
         """Test factory with DATABASE datasource"""
         factory = NodeLogDataSourceFactory("DATABASE")
@@ -119,3 +125,59 @@ class TestNodeLogDataSources:
         assert "DATABASE" in NodeLogDataSourceFactory.DATASOURCE_MAPPINGS
         assert "PaaS3" in NodeLogDataSourceFactory.DATASOURCE_MAPPINGS
         assert "DUMMY" in NodeLogDataSourceFactory.DATASOURCE_MAPPINGS
+
+
+@pytest.mark.django_db
+class TestDatabaseNodeLogDataSource:
+    def setup_method(self):
+        self.entries = [
+            LogEntry.objects.create(
+                node_id="node_1", version="v1", logger_name="test", level_name="INFO", message=f"line {i}"
+            )
+            for i in range(5)
+        ]
+        LogEntry.objects.create(node_id="node_1", version="v2", logger_name="test", level_name="INFO", message="other")
+        self.source = DatabaseNodeLogDataSource()
+
+    def test_fetch_by_page(self):
+        result = self.source.fetch_node_logs("node_1", "v1", page=2, page_size=2)
+
+        assert result["result"] is True
+        assert result["data"]["logs"] == "line 2\nline 3"
+        assert result["data"]["page_info"] == {
+            "page": 2,
+            "page_size": 2,
+            "total": 5,
+            "cursor": self.entries[3].id,
+        }
+
+    def test_fetch_by_cursor(self):
+        result = self.source.fetch_node_logs("node_1", "v1", cursor=self.entries[1].id, page_size=2)
+        assert result["data"]["logs"] == "line 2\nline 3"
+        assert result["data"]["page_info"] == {"page_size": 2, "has_more": True, "cursor": self.entries[3].id}
+
+        result = self.source.fetch_node_logs("node_1", "v1", cursor=self.entries[4].id, page_size=2)
+        assert result["data"]["logs"] == ""
+        assert result["data"]["page_info"] == {"page_size": 2, "has_more": False, "cursor": self.entries[4].id}
+
+    def test_fetch_tail(self):
+        result = self.source.fetch_node_logs("node_1", "v1", tail=2)
+
+        assert result["data"]["logs"] == "line 3\nline 4"
+        assert result["data"]["page_info"] == {"cursor": self.entries[4].id}
+
+    def test_fetch_by_time_range(self):
+        now = timezone.now()
+        LogEntry.objects.filter(id__in=[e.id for e in self.entries[:2]]).update(
+            logged_at=now - datetime.timedelta(hours=1)
+        )
+
+        result = self.source.fetch_node_logs(
+            "node_1", "v1", start_time=now - datetime.timedelta(minutes=1), page=1, page_size=30
+        )
+
+        assert result["data"]["logs"] == "line 2\nline 3\nline 4"
+        assert result["data"]["page_info"]["total"] == 3
+
+    def test_iter_node_logs(self):
+        assert "".join(self.source.iter_node_logs("node_1", "v1")) == "\n".join(f"line {i}" for i in range(5))
@@ -5,7 +5,9 @@ import pytest
 from bkflow.task.node_timeout import (
     ForcedFailAndSkipStrategy,
     ForcedFailStrategy,
+    NodeTimeoutScheduler,
     NodeTimeoutStrategy,
+    add_timeout_node,
     node_timeout_handler,
 )
 
@@ -58,3 +60,100 @@ class TestNodeTimeoutStrategies:
         # Abstract base
         with pytest.raises(TypeError):
             NodeTimeoutStrategy()
+
+
+class FakeTimeoutPoolRedis:
+    """模拟超时节点池，认领脚本以 Python 实现"""
+
+    def __init__(self, nodes=None):
+        self.pool = dict(nodes or {})
+        self.pubsub_inst = mock.Mock()
+        self.pubsub_inst.get_message.return_value = None
+
+    def register_script(self, script):
+        def claim(keys, args):
+            now, limit = args
+            due = sorted([(score, node) for node, score in self.pool.items() if score <= now])[:limit]
+            result = []
+            for score, node in due:
+                self.pool.pop(node)
+                result.extend([node.encode("utf-8"), str(score).encode("utf-8")])
+            return result
+
+        return claim
+
+    def zadd(self, name, mapping):
+        self.pool.update(mapping)
+
+    def zrange(self, name, start, end, withscores=False):
+        return sorted([(node, score) for node, score in self.pool.items()], key=lambda item: item[1])[:1]
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return self.pubsub_inst
+
+
+class TestNodeTimeoutScheduler:
+    def test_add_timeout_node(self, settings):
+        redis_inst = mock.Mock()
+        add_timeout_node(redis_inst, "node_v1", 100.0)
+        args = redis_inst.eval.call_args[0]
+        assert args[1:] == (
+            1,
+            settings.EXECUTING_NODE_POOL,
+            "node_v1",
+            100.0,
+            settings.EXECUTING_NODE_POOL_WAKEUP_CHANNEL,
+        )
+
+    def test_claim_timeout_nodes(self):
+        redis_inst = FakeTimeoutPoolRedis({"n1_v1": 10.0, "n2_v1": 20.0, "n3_v1": 30.0})
+        scheduler = NodeTimeoutScheduler(redis_inst, dispatcher=mock.Mock(), batch_size=10, max_wait=5)
+
+        assert scheduler.claim_timeout_nodes(now=25) == [("n1_v1", 10.0), ("n2_v1", 20.0)]
+        assert scheduler.claim_timeout_nodes(now=25) == []
+        assert list(redis_inst.pool.keys()) == ["n3_v1"]
+
+    def test_run_once_dispatches_in_batches(self):
+        nodes = {f"n{i}_v1": float(i) for i in range(5)}
+        redis_inst = FakeTimeoutPoolRedis(nodes)
+        dispatcher = mock.Mock()
+        scheduler = NodeTimeoutScheduler(redis_inst, dispatcher=dispatcher, batch_size=2, max_wait=5)
+        scheduler.subscribe()
+
+        scheduler.run_once()
+
+        assert [len(call[0][0]) for call in dispatcher.call_args_list] == [2, 2, 1]
+        assert redis_inst.pool == {}
+        redis_inst.pubsub_inst.get_message.assert_called_once_with(timeout=5)
+
+    def test_dispatch_failed_puts_nodes_back(self):
+        redis_inst = FakeTimeoutPoolRedis({"n1_v1": 1.0})
+        dispatcher = mock.Mock(side_effect=Exception("broker down"))
+        scheduler = NodeTimeoutScheduler(redis_inst, dispatcher=dispatcher, batch_size=10, max_wait=5)
+
+        with pytest.raises(Exception):
+            scheduler.run_once()
+        assert redis_inst.pool == {"n1_v1": 1.0}
+
+    def test_next_wait_seconds(self):
+        redis_inst = FakeTimeoutPoolRedis()
+        scheduler = NodeTimeoutScheduler(redis_inst, dispatcher=mock.Mock(), batch_size=10, max_wait=5)
+        assert scheduler.next_wait_seconds(now=100) == 5
+
+        redis_inst.pool = {"n1_v1": 102.5}
+        assert scheduler.next_wait_seconds(now=100) == 2.5
+        assert scheduler.next_wait_seconds(now=200) == 0
+
+    def test_wait_wakes_up_and_drains_messages(self):
+        redis_inst = FakeTimeoutPoolRedis()
+        scheduler = NodeTimeoutScheduler(redis_inst, dispatcher=mock.Mock(), batch_size=10, max_wait=5)
+        scheduler.subscribe()
+        redis_inst.pubsub_inst.get_message.side_effect = [{"data": b"1"}, {"data": b"2"}, None]
+
+        scheduler.wait(3)
+
+        assert redis_inst.pubsub_inst.get_message.call_args_list == [
+            mock.call(timeout=3),
+            mock.call(timeout=0),
+            mock.call(timeout=0),
+        ]
@@ -42,7 +42,7 @@ class TestTaskOperationTrace:
         mocker.patch("bkflow.task.operations.TaskInstance.objects.filter", return_value=update_queryset)
         mocker.patch("bkflow.task.operations.format_web_data_to_pipeline", return_value={"pipeline": "formatted"})
         mocker.patch("bkflow.task.operations.get_pipeline_context", return_value={})
-        mock_client = mocker.patch("bkflow.task.operations.InterfaceModuleClient")
+        mock_client = mocker.patch("bkflow.task.space_cache.InterfaceModuleClient")
         mock_client.return_value.get_variable.return_value = {"result": True, "data": {}}
         mocker.patch(
             "bkflow.task.operations.bamboo_engine_api.run_pipeline",
@@ -75,7 +75,7 @@ class TestTaskOperation:
         executor = "test_executor"
         task_operation = TaskOperation(task_instance, queue)
         mocker.patch("bamboo_engine.api.run_pipeline", return_value=EngineAPIResult(result=True, message="success"))
-        mock_client = mocker.patch("bkflow.task.operations.InterfaceModuleClient")
+        mock_client = mocker.patch("bkflow.task.space_cache.InterfaceModuleClient")
         mock_client.return_value.get_variable.return_value = {"result": True, "data": {}}
 
         task_operation.start(operator=executor)
@@ -141,7 +141,7 @@ class TestTaskOperation:
         """不含开放插件的存量任务启动时不应请求 Interface 做预检。"""
         task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
         mocker.patch("bamboo_engine.api.run_pipeline", return_value=EngineAPIResult(result=True, message="success"))
-        mock_client = mocker.patch("bkflow.task.operations.InterfaceModuleClient")
+        mock_client = mocker.patch("bkflow.task.space_cache.InterfaceModuleClient")
         mock_client.return_value.get_variable.return_value = {"result": True, "data": {}}
 
         result = TaskOperation(task_instance).start(operator="test_executor")
@@ -165,7 +165,7 @@ class TestTaskOperation:
             space_id=1, pipeline_tree=build_default_pipeline_tree(), extra_info=extra_info
         )
         mocker.patch("bamboo_engine.api.run_pipeline", return_value=EngineAPIResult(result=True, message="success"))
-        mock_client = mocker.patch("bkflow.task.operations.InterfaceModuleClient")
+        mock_client = mocker.patch("bkflow.task.space_cache.InterfaceModuleClient")
         mock_client.return_value.get_variable.return_value = {"result": True, "data": {}}
         mock_client.return_value.validate_open_plugins_for_start.return_value = {"result": True, "data": {}}
 
@@ -198,7 +198,7 @@ class TestTaskOperation:
         mock_run = mocker.patch(
             "bamboo_engine.api.run_pipeline", return_value=EngineAPIResult(result=True, message="success")
         )
-        mock_client = mocker.patch("bkflow.task.operations.InterfaceModuleClient")
+        mock_client = mocker.patch("bkflow.task.space_cache.InterfaceModuleClient")
         mock_client.return_value.validate_open_plugins_for_start.return_value = {
             "result": False,
             "message": "开放插件 [open_plugin_001] 在当前空间未开放",
@@ -0,0 +1,100 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+from unittest import mock
+
+import pytest
+
+from bkflow.constants import SpaceCacheResource
+from bkflow.task import space_cache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key) or 0) + 1
+        return self.data[key]
+
+
+@pytest.fixture
+def redis_inst(settings):
+    settings.SPACE_DATA_CACHE_TTL = 60
+    settings.redis_inst = FakeRedis()
+    return settings.redis_inst
+
+
+@pytest.fixture
+def interface_client():
+    client = mock.MagicMock()
+    client.get_variable.return_value = {"result": True, "data": {"${_space_a}": "1"}}
+    client.validate_open_plugins_for_start.return_value = {"result": True, "data": {"validated": True}}
+    with mock.patch("bkflow.task.space_cache.InterfaceModuleClient", return_value=client):
+        yield client
+
+
+class TestGetSpaceVariables:
+    def test_request_interface_once_until_invalidated(self, redis_inst, interface_client):
+        assert space_cache.get_space_variables(1) == {"${_space_a}": "1"}
+        assert space_cache.get_space_variables(1) == {"${_space_a}": "1"}
+        assert interface_client.get_variable.call_count == 1
+
+        interface_client.get_variable.return_value = {"result": True, "data": {"${_space_a}": "2"}}
+        space_cache.invalidate_space_cache(1, SpaceCacheResource.VARIABLE.value)
+        assert space_cache.get_space_variables(1) == {"${_space_a}": "2"}
+        assert interface_client.get_variable.call_count == 2
+
+    def test_failed_result_not_cached(self, redis_inst, interface_client):
+        interface_client.get_variable.return_value = {"result": False, "message": "error"}
+        assert space_cache.get_space_variables(1) == {}
+        assert space_cache.get_space_variables(1) == {}
+        assert interface_client.get_variable.call_count == 2
+
+    def test_cache_disabled(self, settings, interface_client):
+        settings.SPACE_DATA_CACHE_TTL = 0
+        settings.redis_inst = FakeRedis()
+        space_cache.get_space_variables(1)
+        space_cache.get_space_variables(1)
+        assert interface_client.get_variable.call_count == 2
+        assert settings.redis_inst.data == {}
+
+
+class TestValidateOpenPluginsForStart:
+    def test_only_cache_validated_payload(self, redis_inst, interface_client):
+        payload = {"space_id": 1, "snapshot": [{"plugin_id": "p1", "plugin_version": "1.0.0"}]}
+        assert space_cache.validate_open_plugins_for_start(1, payload)["result"] is True
+        assert space_cache.validate_open_plugins_for_start(1, dict(payload))["result"] is True
+        assert interface_client.validate_open_plugins_for_start.call_count == 1
+
+        other_payload = {"space_id": 1, "snapshot": [{"plugin_id": "p2", "plugin_version": "1.0.0"}]}
+        interface_client.validate_open_plugins_for_start.return_value = {"result": False, "message": "未开放"}
+        assert space_cache.validate_open_plugins_for_start(1, other_payload)["result"] is False
+        assert space_cache.validate_open_plugins_for_start(1, other_payload)["result"] is False
+        assert interface_client.validate_open_plugins_for_start.call_count == 3
+
+        # 插件变更后已缓存的预检结果失效
+        space_cache.invalidate_space_cache(1, SpaceCacheResource.OPEN_PLUGIN.value)
+        assert space_cache.validate_open_plugins_for_start(1, payload)["result"] is False
+        assert interface_client.validate_open_plugins_for_start.call_count == 4
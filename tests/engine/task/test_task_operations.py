@@ -17,12 +17,19 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 
+import json
+
 import pytest
 from bamboo_engine import states as bamboo_engine_states
 from bamboo_engine.api import EngineAPIResult
 from bamboo_engine.eri import ScheduleType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from opentelemetry import trace
 from opentelemetry.sdk.trace import TracerProvider
+from pipeline.eri.models import ExecutionData as DBExecutionData
+from pipeline.eri.models import Node as DBNode
+from pipeline.eri.models import Process as DBProcess
 from pipeline.eri.models import Schedule as DBSchedule
 from pipeline.utils.uniqid import node_uniqid
 
@@ -213,7 +220,7 @@ class TestTaskOperationComplete:
             "bkflow.task.operations.get_pipeline_context",
             return_value={"task_scope_type": "project", "task_scope_value": "123"},
         )
-        mock_client = mocker.patch("bkflow.task.operations.InterfaceModuleClient")
+        mock_client = mocker.patch("bkflow.task.space_cache.InterfaceModuleClient")
         mock_client.return_value.get_variable.return_value = {
             "result": True,
             "data": {"${var1}": "value1", "${var2}": "value2"},
@@ -233,7 +240,7 @@ class TestTaskOperationComplete:
 
         mocker.patch("bkflow.task.operations.format_web_data_to_pipeline", return_value=pipeline_tree)
         mocker.patch("bkflow.task.operations.get_pipeline_context", return_value={})
-        mock_client = mocker.patch("bkflow.task.operations.InterfaceModuleClient")
+        mock_client = mocker.patch("bkflow.task.space_cache.InterfaceModuleClient")
         mock_client.return_value.get_variable.return_value = {
             "result": True,
             "data": {"${var1}": "value1"},
@@ -461,21 +468,20 @@ class TestTaskOperationComplete:
             "bamboo_engine.api.get_pipeline_states",
             return_value=EngineAPIResult(result=True, data=mock_states, message="success"),
         )
-        mocker.patch(
-            "pipeline.eri.runtime.BambooDjangoRuntime.get_sleep_process_info_with_current_node_id",
-            return_value=mocker.MagicMock(),
+        DBProcess.objects.create(
+            asleep=True, current_node_id="node_1", root_pipeline_id=task_instance.instance_id, priority=100
         )
-        mocker.patch(
-            "pipeline.eri.runtime.BambooDjangoRuntime.get_node",
-            return_value=mocker.MagicMock(code="pause_node", version="legacy", name="pause"),
+        DBNode.objects.create(
+            node_id="node_1", detail=json.dumps({"type": "ServiceActivity", "code": "pause_node", "version": "legacy"})
         )
         service = mocker.MagicMock()
         service.schedule_type.return_value = ScheduleType.CALLBACK
-        mocker.patch("pipeline.eri.runtime.BambooDjangoRuntime.get_service", return_value=service)
+        get_service = mocker.patch("pipeline.eri.runtime.BambooDjangoRuntime.get_service", return_value=service)
 
         result = TaskOperation(task_instance).get_task_states(include_schedule=True)
 
         assert result.data["children"]["node_1"]["schedule_type"] == ScheduleType.CALLBACK.name
+        get_service.assert_called_once_with(code="pause_node", version="legacy", name=None)
 
     def test_get_task_states_does_not_include_schedule_type_by_default(self, mocker):
         task_instance = TaskInstance.objects.create(
@@ -536,6 +542,64 @@ class TestTaskOperationComplete:
         assert result.result is True
         assert "ex_data" in result.data
 
+    def test_get_task_states_fetches_failed_and_sleeping_nodes_in_batch(self, mocker):
+        """测试失败节点 ex_data 与休眠节点调度类型的查询次数与节点数量无关"""
+        task_instance = TaskInstance.objects.create(
+            name="test_task", space_id=1, instance_id=node_uniqid(), is_started=True
+        )
+        children = {}
+        for index in range(10):
+            failed_id = "failed_{}".format(index)
+            running_id = "running_{}".format(index)
+            children[failed_id] = {"id": failed_id, "state": bamboo_engine_states.FAILED, "children": {}}
+            children[running_id] = {
+                "id": running_id,
+                "state": bamboo_engine_states.RUNNING,
+                "version": "v1",
+                "children": {},
+            }
+            DBProcess.objects.create(
+                asleep=True, current_node_id=running_id, root_pipeline_id=task_instance.instance_id, priority=100
+            )
+            DBNode.objects.create(
+                node_id=running_id,
+                detail=json.dumps({"type": "ServiceActivity", "code": "pause_node", "version": "legacy"}),
+            )
+            if index:
+                DBExecutionData.objects.create(
+                    node_id=failed_id,
+                    inputs_serializer="json",
+                    outputs_serializer="json",
+                    inputs="{}",
+                    outputs=json.dumps({"ex_data": "error {}".format(index)}),
+                )
+        mock_states = {
+            task_instance.instance_id: {
+                "id": task_instance.instance_id,
+                "state": bamboo_engine_states.FAILED,
+                "children": children,
+            }
+        }
+        mocker.patch(
+            "bamboo_engine.api.get_pipeline_states",
+            return_value=EngineAPIResult(result=True, data=mock_states, message="success"),
+        )
+        service = mocker.MagicMock()
+        service.schedule_type.return_value = ScheduleType.POLL
+        mocker.patch("pipeline.eri.runtime.BambooDjangoRuntime.get_service", return_value=service)
+
+        with CaptureQueriesContext(connection) as ctx:
+            result = TaskOperation(task_instance).get_task_states(with_ex_data=True, include_schedule=True)
+
+        # Schedule、Process、Node、ExecutionData 各一次
+        assert len(ctx.captured_queries) == 4
+        assert result.data["ex_data"]["failed_0"] is None
+        assert result.data["ex_data"]["failed_9"] == "error 9"
+        assert len(result.data["ex_data"]) == 10
+        assert {
+            node["schedule_type"] for node_id, node in result.data["children"].items() if node_id.startswith("running")
+        } == {ScheduleType.POLL.name}
+
     def test_render_current_constants_hydrate_failed(self, mocker):
         """测试渲染当前常量时 hydrate 失败"""
         space_id = 1
@@ -794,7 +858,7 @@ class TestTaskOperationComplete:
 
         mocker.patch("bkflow.task.operations.format_web_data_to_pipeline", return_value=pipeline_tree)
         mocker.patch("bkflow.task.operations.get_pipeline_context", return_value={})
-        mock_client = mocker.patch("bkflow.task.operations.InterfaceModuleClient")
+        mock_client = mocker.patch("bkflow.task.space_cache.InterfaceModuleClient")
         mock_client.return_value.get_variable.return_value = {"result": True, "data": {}}
         mocker.patch("django.conf.settings.ENABLE_OTEL_TRACE", True)
 
@@ -830,7 +894,7 @@ class TestTaskOperationComplete:
         mocker.patch("bkflow.task.operations.format_web_data_to_pipeline", return_value=pipeline_tree)
         mocker.patch("bkflow.task.operations.get_pipeline_context", return_value={})
         mocker.patch("bkflow.task.models.EngineSpaceConfig.get_space_var", return_value={})
-        mock_client = mocker.patch("bkflow.task.operations.InterfaceModuleClient")
+        mock_client = mocker.patch("bkflow.task.space_cache.InterfaceModuleClient")
         mock_client.return_value.get_variable.return_value = {"result": True, "data": {}}
         mocker.patch("django.conf.settings.ENABLE_OTEL_TRACE", False)
 
@@ -872,7 +936,7 @@ class TestTaskOperationComplete:
 
         mocker.patch("bkflow.task.operations.format_web_data_to_pipeline", return_value=pipeline_tree)
         mocker.patch("bkflow.task.operations.get_pipeline_context", return_value={})
-        mock_client = mocker.patch("bkflow.task.operations.InterfaceModuleClient")
+        mock_client = mocker.patch("bkflow.task.space_cache.InterfaceModuleClient")
         mock_client.return_value.get_variable.return_value = {"result": True, "data": {}}
         mocker.patch("django.conf.settings.ENABLE_OTEL_TRACE", True)
 
@@ -20,13 +20,16 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 from django.conf import settings
+from pipeline.eri.models import State as DBState
 from rest_framework import status
 from rest_framework.test import APIRequestFactory
 
+from bkflow.exceptions import ValidationError
 from bkflow.task.models import (
     EngineSpaceConfig,
     EngineSpaceConfigValueType,
     PeriodicTask,
+    TaskFlowRelation,
     TaskInstance,
     TaskLabelRelation,
     TaskMockData,
@@ -114,6 +117,33 @@ class TestTaskInstanceViewSet:
         assert response.data["data"]["name"] == "test_task"
         assert "parameters" in response.data["data"]
 
+    def test_batch_create_tasks(self):
+        """测试批量创建任务实例"""
+        view = TaskInstanceViewSet.as_view({"post": "batch_create"})
+        data = {
+            "tasks": [
+                {
+                    "space_id": 1,
+                    "pipeline_tree": build_default_pipeline_tree(),
+                    "name": "test_task_{}".format(i),
+                    "creator": "test_creator",
+                }
+                for i in range(3)
+            ]
+        }
+
+        request = self._create_request_with_auth("post", "/task/batch_create_tasks/", data)
+        response = view(request)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [task["name"] for task in response.data["data"]] == ["test_task_0", "test_task_1", "test_task_2"]
+        assert all("parameters" in task for task in response.data["data"])
+        assert (
+            TaskOperationRecord.objects.filter(
+                instance_id__in=[task["id"] for task in response.data["data"]], operate_type="create"
+            ).count()
+            == 3
+        )
+
     def test_get_serializer_class_create(self):
         """测试 get_serializer_class 方法 - create action"""
         view = TaskInstanceViewSet()
@@ -575,38 +605,34 @@ class TestTaskInstanceViewSet:
         response = view(request, pk=task_instance.id)
         assert response.status_code == status.HTTP_200_OK
 
-    @patch("bkflow.task.views.TaskOperation")
-    def test_get_tasks_states(self, mock_task_operation):
+    def test_get_tasks_states(self):
         """测试批量获取任务状态"""
         task1 = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
         task2 = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+        task3 = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
         # 启动任务
         self._start_task_instance(task1)
         self._start_task_instance(task2)
-
-        mock_operation = MagicMock()
-        mock_operation.get_task_states.return_value = MagicMock(result=True, data={"state": "RUNNING"})
-        mock_task_operation.return_value = mock_operation
+        DBState.objects.create(node_id=task1.instance_id, root_id=task1.instance_id, name="RUNNING", version="v1")
 
         view = TaskInstanceViewSet.as_view({"post": "get_tasks_states"})
-        data = {"space_id": 1, "task_ids": [task1.id, task2.id]}
+        data = {"space_id": 1, "task_ids": [task1.id, task2.id, task3.id]}
         request = self._create_request_with_auth("post", "/task/get_tasks_states/", data)
 
         response = view(request)
         assert response.status_code == status.HTTP_200_OK
-        assert task1.id in response.data["data"]
-        assert task2.id in response.data["data"]
+        assert response.data["data"][task1.id]["state"] == "RUNNING"
+        assert response.data["data"][task2.id]["state"] == "CREATED"
+        assert response.data["data"][task3.id]["state"] == "CREATED"
 
-    @patch("bkflow.task.views.TaskOperation")
-    def test_get_tasks_states_with_failure(self, mock_task_operation):
+    @patch("bkflow.task.views.batch_get_task_states")
+    def test_get_tasks_states_with_failure(self, mock_batch_get_task_states):
         """测试批量获取任务状态 - 部分失败"""
         task1 = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
         # 启动任务
         self._start_task_instance(task1)
 
-        mock_operation = MagicMock()
-        mock_operation.get_task_states.return_value = MagicMock(result=False, data={})
-        mock_task_operation.return_value = mock_operation
+        mock_batch_get_task_states.return_value = {task1.id: None}
 
         view = TaskInstanceViewSet.as_view({"post": "get_tasks_states"})
         data = {"space_id": 1, "task_ids": [task1.id]}
@@ -707,6 +733,44 @@ class TestTaskInstanceViewSet:
         assert response.data["result"] is True
         assert "page" in response.data
 
+    @patch("bkflow.task.views.handle_plain_log", side_effect=lambda log: log.replace("secret", "******"))
+    @patch("bkflow.task.views.NodeLogDataSourceFactory")
+    def test_get_node_log_stream(self, mock_log_factory, mock_handle_plain_log):
+        """测试获取节点日志 - 流式返回"""
+        pipeline_tree = build_default_pipeline_tree()
+        task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=pipeline_tree)
+        node_id = list(pipeline_tree["activities"].keys())[0]
+
+        mock_data_source = MagicMock()
+        mock_data_source.iter_node_logs.return_value = iter(["line 1", "\nsecret line 2"])
+        mock_log_factory.return_value.data_source = mock_data_source
+
+        view = TaskInstanceViewSet.as_view({"get": "get_node_log"})
+        request = self._create_request_with_auth(
+            "get", f"/task/{task_instance.id}/get_task_node_log/{node_id}/v1/", {"stream": "true"}
+        )
+
+        response = view(request, pk=task_instance.id, node_id=node_id, version="v1")
+        assert response.status_code == status.HTTP_200_OK
+        assert b"".join(response.streaming_content) == b"line 1\n****** line 2"
+        mock_data_source.fetch_node_logs.assert_not_called()
+
+    @patch("bkflow.task.views.NodeLogDataSourceFactory")
+    def test_get_node_log_stream_with_cursor_or_tail(self, mock_log_factory):
+        """测试获取节点日志 - 流式返回不支持 cursor 和 tail"""
+        pipeline_tree = build_default_pipeline_tree()
+        task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=pipeline_tree)
+        node_id = list(pipeline_tree["activities"].keys())[0]
+        view = TaskInstanceViewSet.as_view({"get": "get_node_log"})
+
+        for params in [{"stream": "true", "cursor": 1}, {"stream": "true", "tail": 10}]:
+            request = self._create_request_with_auth(
+                "get", f"/task/{task_instance.id}/get_task_node_log/{node_id}/v1/", params
+            )
+            response = view(request, pk=task_instance.id, node_id=node_id, version="v1")
+            assert response.data["result"] is False
+        mock_log_factory.return_value.data_source.iter_node_logs.assert_not_called()
+
     @patch("bkflow.task.views.NodeLogDataSourceFactory")
     def test_get_node_log_failure(self, mock_log_factory):
         """测试获取节点日志 - 失败"""
@@ -1144,6 +1208,56 @@ class TestTaskInstanceViewSet:
         assert response.data["data"]["label_ids"] == [1]
         assert set(TaskLabelRelation.objects.filter(task_id=task.id).values_list("label_id", flat=True)) == {2}
 
+    @patch("bkflow.task.views.invalidate_decision_table")
+    def test_invalidate_decision_table(self, mock_invalidate):
+        """测试 invalidate_decision_table action"""
+        view = TaskInstanceViewSet.as_view({"post": "invalidate_decision_table"})
+        request = self._create_request_with_auth(
+            "post",
+            "/task/invalidate_decision_table/",
+            {"space_id": 1, "table_id": 2},
+        )
+        response = view(request)
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_invalidate.assert_called_once_with(space_id=1, table_id=2)
+
+    @patch("bkflow.task.views.invalidate_space_cache")
+    def test_invalidate_space_cache(self, mock_invalidate):
+        """测试 invalidate_space_cache action"""
+        view = TaskInstanceViewSet.as_view({"post": "invalidate_space_cache"})
+        request = self._create_request_with_auth(
+            "post",
+            "/task/invalidate_space_cache/",
+            {"space_id": 1, "resource": "variable"},
+        )
+        response = view(request)
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_invalidate.assert_called_once_with(space_id=1, resource="variable")
+
+    def test_get_task_ancestors(self):
+        """测试 get_task_ancestors action"""
+        root = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+        child = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+        grandchild = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+        TaskFlowRelation.objects.create(task_id=child.id, parent_task_id=root.id, root_task_id=root.id)
+        TaskFlowRelation.objects.create(task_id=grandchild.id, parent_task_id=child.id, root_task_id=root.id)
+
+        view = TaskInstanceViewSet.as_view({"get": "get_task_ancestors"})
+        request = self._create_request_with_auth("get", f"/task/{grandchild.id}/get_task_ancestors/")
+        response = view(request, pk=grandchild.id)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["data"] == [child.id, root.id]
+
+        request = self._create_request_with_auth("get", f"/task/{root.id}/get_task_ancestors/")
+        response = view(request, pk=root.id)
+        assert response.data["data"] == []
+
+        request = self._create_request_with_auth("get", f"/task/{root.id}/get_task_ancestors/", space_id="2")
+        response = view(request, pk=root.id)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
     @patch("bkflow.task.views.start_trace")
     @patch("bkflow.task.views.TaskOperation")
     def test_operate_task_operation_method_not_found(self, mock_task_operation, mock_start_trace):
@@ -1307,6 +1421,55 @@ class TestTaskInstanceViewSet:
             assert response.data["result"] is False
             assert response.data["message"] == "detail_failed"
 
+    def test_get_nodes_detail(self):
+        """测试 get_nodes_detail 一次请求返回多个节点详情，获取失败的节点不在结果中"""
+
+        class _Result(dict):
+            def __init__(self, result=True, data=None, message="success"):
+                super().__init__({"result": result, "data": data, "message": message})
+                self.result = result
+                self.data = data
+                self.message = message
+
+        task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+        execution_data = task_instance.execution_data
+        node_ids = [list(execution_data["activities"].keys())[0], execution_data["start_event"]["id"]]
+
+        def node_operation(task_instance, node_id):
+            node_op = MagicMock()
+            node_op.get_node_data.return_value = _Result(result=True, data={"inputs": {"node": node_id}})
+            if node_id == node_ids[1]:
+                node_op.get_node_detail.return_value = _Result(result=False, message="detail_failed")
+            else:
+                node_op.get_node_detail.return_value = _Result(result=True, data={"version": f"v_{node_id}"})
+            return node_op
+
+        with patch("bkflow.task.views.TaskNodeOperation", side_effect=node_operation):
+            view = TaskInstanceViewSet.as_view({"post": "get_nodes_detail"})
+            request = self._create_request_with_auth(
+                "post",
+                f"/task/{task_instance.id}/get_task_nodes_detail/",
+                {"node_ids": node_ids[:2], "include_data": True},
+            )
+            response = view(request, pk=task_instance.id)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["result"] is True
+        assert response.data["data"] == {
+            node_ids[0]: {"version": f"v_{node_ids[0]}", "inputs": {"node": node_ids[0]}},
+        }
+
+    def test_get_nodes_detail_node_not_found(self):
+        """测试 get_nodes_detail 包含不属于任务的节点时报错"""
+        task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+
+        view = TaskInstanceViewSet.as_view({"post": "get_nodes_detail"})
+        request = self._create_request_with_auth(
+            "post", f"/task/{task_instance.id}/get_task_nodes_detail/", {"node_ids": ["not_exist"]}
+        )
+        with pytest.raises(ValidationError):
+            view(request, pk=task_instance.id)
+
     def test_get_node_snapshot_config_template_node_id_not_found(self):
         """测试 get_node_snapshot_config - template_node_id 未找到"""
         task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
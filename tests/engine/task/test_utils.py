@@ -19,7 +19,11 @@ to the current version of the project delivered to anyone in the future.
 import pytest
 from bamboo_engine import states as bamboo_engine_states
 
-from bkflow.task.utils import format_bamboo_engine_status, parse_node_timeout_configs
+from bkflow.task.utils import (
+    format_bamboo_engine_status,
+    format_task_states,
+    parse_node_timeout_configs,
+)
 from bkflow.utils.pipeline import build_default_pipeline_tree
 
 
@@ -57,6 +61,25 @@ class TestFormatBambooEngineStatus:
         format_bamboo_engine_status(status_tree)
         assert status_tree["state"] == "NODE_SUSPENDED"
 
+    def test_format_task_states(self):
+        """测试任务状态格式化，子流程内的节点暂停不继续向上汇总"""
+        status_tree = {
+            "state": bamboo_engine_states.RUNNING,
+            "started_time": None,
+            "archived_time": None,
+            "children": {
+                "sub": {
+                    "state": bamboo_engine_states.RUNNING,
+                    "children": {"node1": {"state": bamboo_engine_states.SUSPENDED, "children": {}}},
+                }
+            },
+        }
+        format_task_states(status_tree)
+        assert status_tree["state"] == bamboo_engine_states.RUNNING
+        assert status_tree["children"]["sub"]["state"] == "NODE_SUSPENDED"
+        assert status_tree["start_time"] == ""
+        assert status_tree["finish_time"] == ""
+
 
 @pytest.mark.django_db(transaction=True)
 class TestParseNodeTimeoutConfigs:
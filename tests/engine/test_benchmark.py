@@ -0,0 +1,92 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import io
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from bkflow.contrib.benchmark.cases import BENCHMARK_CASES
+from bkflow.contrib.benchmark.pipeline import build_pipeline_tree
+from bkflow.contrib.benchmark.runner import compare_result
+from bkflow.pipeline_web.parser.format import format_web_data_to_pipeline
+from bkflow.task.models import TaskInstance
+
+
+class TestBenchmark:
+    def test_build_pipeline_tree_is_executable(self):
+        pipeline_tree = build_pipeline_tree(30, seed=1)
+
+        assert len(pipeline_tree["activities"]) == 30
+        assert len(pipeline_tree["location"]) == len(pipeline_tree["activities"]) + len(pipeline_tree["gateways"]) + 2
+        assert len(pipeline_tree["line"]) == len(pipeline_tree["flows"])
+        pipeline = format_web_data_to_pipeline(pipeline_tree)
+        assert pipeline["data"]["inputs"]
+
+    def test_compare_result(self):
+        baseline_result = {"time": 1.0, "queries": 5, "peak_memory": 1000}
+
+        assert compare_result({"time": 1.1, "queries": 5, "peak_memory": 1100}, baseline_result, 0.2, 0.2) == []
+        assert compare_result({"time": 1.3, "queries": 6, "peak_memory": 1300}, baseline_result, 0.2, 0.2) == [
+            "time",
+            "queries",
+            "peak_memory",
+        ]
+
+    def test_interface_cases_unavailable_in_engine(self):
+        assert not BENCHMARK_CASES["template.replace_subprocess_version"].available
+        with pytest.raises(CommandError, match="requires apps"):
+            call_command("run_benchmarks", "--cases", "template.replace_subprocess_version")
+
+    @pytest.mark.django_db
+    def test_run_benchmarks_saves_and_compares_baseline(self, tmp_path):
+        baseline_path = str(tmp_path / "baseline.json")
+        options = ["--sizes", "5", "--repeat", "1", "--baseline", baseline_path]
+        cases = ["--cases", "task.create_instance", "task.start", "task.get_task_states.with_ex_data"]
+
+        call_command("run_benchmarks", *cases, *options, "--save-baseline", stdout=io.StringIO())
+
+        with open(baseline_path) as fp:
+            baseline = json.load(fp)
+        assert set(baseline["results"]) == {
+            "task.create_instance@5",
+            "task.start@5",
+            "task.get_task_states.with_ex_data@5",
+        }
+        assert baseline["results"]["task.create_instance@5"]["queries"] > 0
+        # 每次运行的数据都会回滚
+        assert not TaskInstance.objects.exists()
+
+        baseline["results"]["task.create_instance@5"]["queries"] = 0
+        with open(baseline_path, "w") as fp:
+            json.dump(baseline, fp)
+        stdout = io.StringIO()
+        with pytest.raises(CommandError, match="1 benchmark"):
+            call_command(
+                "run_benchmarks",
+                *cases,
+                *options,
+                "--time-threshold",
+                "100",
+                "--memory-threshold",
+                "100",
+                "--fail-on-regression",
+                stdout=stdout,
+            )
+        assert "regression: task.create_instance@5 queries" in stdout.getvalue()
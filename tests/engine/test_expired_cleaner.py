@@ -21,17 +21,45 @@ from unittest.mock import patch
 
 import pytest
 from django.utils import timezone
+from pipeline.eri.models import CallbackData, Data, Node, State
 
 from bkflow.contrib.expired_cleaner.tasks import clean_task
 from bkflow.contrib.expired_cleaner.utils import (
+    CALLBACK_DATA_CHECKPOINT_KEY,
+    DeleteRateLimiter,
     chunk_data,
+    clean_orphan_callback_data,
     delete_expired_data,
     get_expired_data,
+    get_pipeline_node_ids,
+)
+from bkflow.task.models import (
+    TaskInstance,
+    TaskMockData,
+    TaskOperationRecord,
+    TaskSnapshot,
 )
-from bkflow.task.models import TaskInstance, TaskMockData, TaskOperationRecord
 from bkflow.utils.pipeline import build_default_pipeline_tree
 
 
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+
+def create_expired_task(expired_time):
+    task_instance = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+    TaskInstance.objects.filter(id=task_instance.id).update(create_time=expired_time - timedelta(days=1))
+    task_instance.refresh_from_db()
+    return task_instance
+
+
 @pytest.mark.django_db(transaction=True)
 class TestExpiredCleaner:
     """测试过期数据清理功能"""
@@ -91,6 +119,86 @@ class TestExpiredCleaner:
         assert not TaskMockData.objects.filter(id=task_mock_data.id).exists()
         assert not TaskOperationRecord.objects.filter(id=task_operation_record.id).exists()
 
+    def test_get_pipeline_node_ids(self):
+        """测试获取流程树（包括子流程）中的所有节点"""
+        pipeline_tree = build_default_pipeline_tree()
+        sub_tree = build_default_pipeline_tree()
+        pipeline_tree["activities"]["sub"] = {"id": "sub", "type": "SubProcess", "pipeline": sub_tree}
+        node_ids = get_pipeline_node_ids(pipeline_tree)
+        assert "sub" in node_ids
+        assert sub_tree["start_event"]["id"] in node_ids
+        assert pipeline_tree["end_event"]["id"] in node_ids
+        assert set(sub_tree["activities"].keys()).issubset(node_ids)
+
+    @patch("django.conf.settings.CLEAN_TASK_DELETE_INTERVAL", 0)
+    def test_delete_expired_data_collects_all_nodes(self):
+        """测试未执行节点和 State 中的节点数据都会被清理"""
+        expired_time = timezone.now() - timedelta(days=30)
+        task_instance = create_expired_task(expired_time)
+        tree_node_id = list(task_instance.execution_data["activities"].keys())[0]
+        Node.objects.create(node_id=tree_node_id, detail="{}")
+        Data.objects.create(node_id="state_node", inputs="{}", outputs="{}")
+        State.objects.create(node_id="state_node", root_id=task_instance.instance_id, name="FINISHED", version="v")
+
+        delete_expired_data(expired_time)
+
+        assert not Node.objects.filter(node_id=tree_node_id).exists()
+        assert not Data.objects.filter(node_id="state_node").exists()
+        assert not State.objects.filter(node_id="state_node").exists()
+
+    @patch("django.conf.settings.CLEAN_TASK_DELETE_INTERVAL", 0)
+    def test_delete_expired_data_keeps_shared_snapshot(self):
+        """测试仍被其他任务引用的快照不会被删除"""
+        expired_time = timezone.now() - timedelta(days=30)
+        task_instance = create_expired_task(expired_time)
+        alive_task = TaskInstance.objects.create_instance(space_id=1, pipeline_tree=build_default_pipeline_tree())
+        TaskInstance.objects.filter(id=alive_task.id).update(snapshot_id=task_instance.snapshot_id)
+
+        delete_expired_data(expired_time)
+
+        assert not TaskInstance.objects.filter(id=task_instance.id).exists()
+        assert TaskSnapshot.objects.filter(id=task_instance.snapshot_id).exists()
+
+    @patch("django.conf.settings.CLEAN_TASK_DELETE_INTERVAL", 0)
+    @patch("django.conf.settings.CLEAN_TASK_DELETE_BATCH_SIZE", 1)
+    @patch("django.conf.settings.CLEAN_TASK_MAX_DELETE_ROWS", 2)
+    def test_delete_expired_data_resumes_after_limit(self):
+        """测试达到单次删除上限后停止，下次清理继续"""
+        expired_time = timezone.now() - timedelta(days=30)
+        task_instance = create_expired_task(expired_time)
+        for i in range(3):
+            Node.objects.create(node_id=f"node_{i}", detail="{}")
+            State.objects.create(node_id=f"node_{i}", root_id=task_instance.instance_id, name="FINISHED", version="v")
+
+        delete_expired_data(expired_time)
+        assert Node.objects.filter(node_id__startswith="node_").count() == 1
+        assert TaskInstance.objects.filter(id=task_instance.id).exists()
+
+        with patch("django.conf.settings.CLEAN_TASK_MAX_DELETE_ROWS", 100):
+            delete_expired_data(expired_time)
+        assert not Node.objects.filter(node_id__startswith="node_").exists()
+        assert not TaskInstance.objects.filter(id=task_instance.id).exists()
+
+    @patch("django.conf.settings.CLEAN_TASK_CALLBACK_SCAN_NUM", 2)
+    def test_clean_orphan_callback_data(self):
+        """测试按主键分批扫描并清理节点状态已不存在的回调数据"""
+        State.objects.create(node_id="alive", root_id="root", name="RUNNING", version="v")
+        alive = CallbackData.objects.create(node_id="alive", version="v", data="{}")
+        orphans = [CallbackData.objects.create(node_id=f"orphan_{i}", version="v", data="{}") for i in range(2)]
+        redis_inst = FakeRedis()
+
+        with patch("django.conf.settings.redis_inst", redis_inst, create=True):
+            clean_orphan_callback_data(DeleteRateLimiter(batch_size=10, interval=0, max_rows=100))
+            assert redis_inst.get(CALLBACK_DATA_CHECKPOINT_KEY) == orphans[0].id
+            assert CallbackData.objects.filter(id=alive.id).exists()
+            assert not CallbackData.objects.filter(id=orphans[0].id).exists()
+            assert CallbackData.objects.filter(id=orphans[1].id).exists()
+
+            clean_orphan_callback_data(DeleteRateLimiter(batch_size=10, interval=0, max_rows=100))
+            assert not CallbackData.objects.filter(id=orphans[1].id).exists()
+            # 扫描到表尾后从头开始
+            assert redis_inst.get(CALLBACK_DATA_CHECKPOINT_KEY) == 0
+
     @patch("bkflow.contrib.expired_cleaner.tasks.delete_expired_data")
     def test_clean_task(self, mock_delete_expired_data):
         """测试清理任务"""
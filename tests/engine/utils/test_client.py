@@ -295,6 +295,11 @@ class TestTaskComponentClient:
             data=None,
         )
 
+        client.get_task_nodes_detail(3, {"node_ids": ["node"]})
+        client._request.assert_called_with(
+            method="post", url="http://task.space1/task/3/get_task_nodes_detail/", data={"node_ids": ["node"]}
+        )
+
         client.node_operate(3, "node", "retry", {"z": 3})
         client._request.assert_called_with(
             method="post", url="http://task.space1/task/3/node_operate/node/retry/", data={"z": 3}
@@ -0,0 +1,92 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+import time
+
+
+class FakeRedis:
+    """
+    内存实现的 redis 客户端，覆盖项目缓存用到的命令，取值与 redis-py 一致返回 bytes
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.expire_at = {}
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode("utf-8")
+
+    def _alive(self, key):
+        expire_at = self.expire_at.get(key)
+        if expire_at is not None and expire_at <= time.time():
+            self.data.pop(key, None)
+            self.expire_at.pop(key, None)
+        return key in self.data
+
+    def get(self, key):
+        return self.data[key] if self._alive(key) else None
+
+    def set(self, key, value, ex=None):
+        self.data[key] = self._encode(value)
+        self.expire_at.pop(key, None)
+        if ex:
+            self.expire(key, ex)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+            self.expire_at.pop(key, None)
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.data[key] = self._encode(value)
+        return value
+
+    def hget(self, key, field):
+        return self.data[key].get(field) if self._alive(key) else None
+
+    def hset(self, key, field, value):
+        if not self._alive(key):
+            self.data[key] = {}
+        self.data[key][field] = self._encode(value)
+
+    def expire(self, key, seconds):
+        if key in self.data:
+            self.expire_at[key] = time.time() + seconds
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis_inst):
+        self.redis_inst = redis_inst
+        self.commands = []
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return command
+
+    def execute(self):
+        return [getattr(self.redis_inst, name)(*args, **kwargs) for name, args, kwargs in self.commands]
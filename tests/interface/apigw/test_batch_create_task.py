@@ -0,0 +1,129 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+
+import json
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from bkflow.constants import WebhookEventType
+from bkflow.space.models import Space, WebhookOutboxEvent
+from bkflow.template.models import Template, TemplateSnapshot
+from tests.interface.apigw.test_create_task import (
+    build_open_plugin_pipeline_tree,
+    build_pipeline_tree,
+    create_open_plugin_catalog,
+)
+
+
+@override_settings(BK_APIGW_REQUIRE_EXEMPT=True, MIDDLEWARE=("tests.interface.apigw.middlewares.OverrideMiddleware",))
+class TestBatchCreateTask(TestCase):
+    """Test batch_create_task apigw views"""
+
+    def setUp(self):
+        self.space = Space.objects.create(app_code="test", platform_url="http://test.com", name="test_space")
+        self.url = "/apigw/space/{}/batch_create_task/".format(self.space.id)
+
+    def _create_template(self, pipeline_tree):
+        snapshot = TemplateSnapshot.create_snapshot(pipeline_tree=pipeline_tree, username="test_user", version="1.0.0")
+        template = Template.objects.create(
+            name="测试流程", space_id=self.space.id, snapshot_id=snapshot.id, creator="test_user"
+        )
+        snapshot.template_id = template.id
+        snapshot.save()
+        return template
+
+    @mock.patch("bkflow.apigw.views.batch_create_task.dispatch_webhook_events")
+    @mock.patch("bkflow.apigw.views.batch_create_task.TaskComponentClient")
+    def test_batch_create_task(self, mock_client_class, mock_dispatch):
+        template = self._create_template(build_pipeline_tree())
+        mock_client = mock_client_class.return_value
+        mock_client.batch_create_tasks.return_value = {
+            "result": True,
+            "data": [
+                {"id": i, "name": "任务{}".format(i), "template_id": template.id, "parameters": {}} for i in range(2)
+            ],
+        }
+
+        data = {
+            "tasks": [
+                {"template_id": template.id, "name": "任务0", "creator": "test_user"},
+                {
+                    "template_id": template.id,
+                    "name": "任务1",
+                    "creator": "test_user",
+                    "custom_span_attributes": {"request_id": "req-1"},
+                },
+            ]
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(path=self.url, data=json.dumps(data), content_type="application/json")
+
+        resp_data = json.loads(resp.content)
+        self.assertEqual(resp_data["result"], True)
+        self.assertEqual([task["labels"] for task in resp_data["data"]], [[], []])
+        mock_client.batch_create_tasks.assert_called_once()
+        create_tasks_data = mock_client.batch_create_tasks.call_args[0][0]["tasks"]
+        self.assertEqual([task["name"] for task in create_tasks_data], ["任务0", "任务1"])
+        self.assertNotIn("custom_context", create_tasks_data[0]["extra_info"])
+        self.assertEqual(
+            create_tasks_data[1]["extra_info"]["custom_context"]["custom_span_attributes"], {"request_id": "req-1"}
+        )
+        # 同一模板的任务使用各自的流程树副本
+        self.assertIsNot(create_tasks_data[0]["pipeline_tree"], create_tasks_data[1]["pipeline_tree"])
+        # 创建事件写入待分发队列，提交后只触发一次分发
+        events = WebhookOutboxEvent.objects.filter(event_code=WebhookEventType.TASK_CREATE.value).order_by("id")
+        self.assertEqual([event.extra_info["task_id"] for event in events], [0, 1])
+        self.assertEqual({(event.scope_type, event.scope_code) for event in events}, {("space", str(self.space.id))})
+        mock_dispatch.delay.assert_called_once_with()
+
+    @mock.patch("bkflow.apigw.views.batch_create_task.TaskComponentClient")
+    def test_batch_create_task_template_not_exist(self, mock_client_class):
+        template = self._create_template(build_pipeline_tree())
+        data = {
+            "tasks": [
+                {"template_id": template.id, "creator": "test_user"},
+                {"template_id": template.id + 100, "creator": "test_user"},
+            ]
+        }
+        resp = self.client.post(path=self.url, data=json.dumps(data), content_type="application/json")
+
+        resp_data = json.loads(resp.content)
+        self.assertEqual(resp_data["result"], False)
+        mock_client_class.return_value.batch_create_tasks.assert_not_called()
+
+    @mock.patch("bkflow.apigw.views.batch_create_task.TaskComponentClient")
+    def test_batch_create_task_rejects_disabled_open_plugin(self, mock_client_class):
+        template = self._create_template(build_open_plugin_pipeline_tree())
+        create_open_plugin_catalog(space_id=self.space.id, enabled=False)
+
+        data = {"tasks": [{"template_id": template.id, "creator": "test_user"}]}
+        resp = self.client.post(path=self.url, data=json.dumps(data), content_type="application/json")
+
+        resp_data = json.loads(resp.content)
+        self.assertEqual(resp_data["result"], False)
+        self.assertIn("未开放", resp_data["message"])
+        mock_client_class.return_value.batch_create_tasks.assert_not_called()
+
+    def test_batch_create_task_exceeds_max_num(self):
+        data = {"tasks": [{"template_id": 1, "creator": "test_user"}] * 101}
+        resp = self.client.post(path=self.url, data=json.dumps(data), content_type="application/json")
+
+        resp_data = json.loads(resp.content)
+        self.assertEqual(resp_data["result"], False)
@@ -21,9 +21,20 @@ to the current version of the project delivered to anyone in the future.
 from django.test import TestCase
 
 from bkflow.pipeline_web.drawing_new.drawing import draw_pipeline
+from bkflow.pipeline_web.drawing_new.generator import generate_pipeline_tree
 from bkflow.pipeline_web.tests.drawing_new.data import pipeline_without_gateways
 
 
 class DrawingTest(TestCase):
     def test_draw_pipeline_without_gateways(self):
         draw_pipeline(pipeline_without_gateways)
+
+    def test_draw_generated_pipeline(self):
+        pipeline = generate_pipeline_tree(100, seed=1)
+        flow_ids = set(pipeline["flows"].keys())
+        draw_pipeline(pipeline)
+        node_ids = set(pipeline["activities"]) | set(pipeline["gateways"])
+        node_ids |= {pipeline["start_event"]["id"], pipeline["end_event"]["id"]}
+        self.assertEqual({location["id"] for location in pipeline["location"]}, node_ids)
+        self.assertEqual(set(pipeline["flows"].keys()), flow_ids)
+        self.assertNotIn("all_nodes", pipeline)
@@ -17,6 +17,7 @@ We undertake not to change the open source license (MIT license) applicable
 to the current version of the project delivered to anyone in the future.
 """
 
+import copy
 import json
 
 from django.test import TestCase
@@ -24,7 +25,10 @@ from pipeline.component_framework.component import Component
 from pipeline.component_framework.library import ComponentLibrary
 from pipeline.core.flow.activity import Service
 
-from bkflow.pipeline_web.parser.format import format_web_data_to_pipeline
+from bkflow.pipeline_web.parser.format import (
+    format_data_to_pipeline_inputs,
+    format_web_data_to_pipeline,
+)
 
 
 class MockSleepTimerService(Service):
@@ -2674,3 +2678,80 @@ class FormatWebDataToPipelineTestCase(TestCase):
         self.assertEqual(inputs["uniform_api_plugin_api_meta"]["value"], api_meta)
         self.assertFalse(inputs["uniform_api_plugin_api_meta"]["is_param"])
         self.assertFalse(inputs["uniform_api_plugin_api_meta"]["need_render"])
+
+    def test_input_tree_not_modified(self):
+        origin_tree = copy.deepcopy(web_tree)
+        result = format_web_data_to_pipeline(web_tree)
+        self.assertEqual(web_tree, origin_tree)
+        self.assertNotIn("constants", result)
+
+    def test_act_inputs_same_as_format_data_to_pipeline_inputs(self):
+        """节点 inputs 与逐节点调用 format_data_to_pipeline_inputs 的结果和顺序一致"""
+        tree = copy.deepcopy(web_tree)
+        result = format_web_data_to_pipeline(tree)
+        for act_id, act in web_tree["activities"].items():
+            if act["type"] != "ServiceActivity":
+                continue
+            act_data = act["component"]["data"]
+            all_inputs = format_data_to_pipeline_inputs(act_data, result["data"]["inputs"])
+            expected = {key: value for key, value in all_inputs.items() if key in act_data}
+            actual = result["activities"][act_id]["component"]["inputs"]
+            actual = [(key, value) for key, value in actual.items() if key != "__executor_proxy"]
+            self.assertEqual(actual, list(expected.items()))
+
+    def test_act_inputs_with_global_key(self):
+        web_tree = {
+            "id": "pipeline",
+            "activities": {
+                "node_1": {
+                    "id": "node_1",
+                    "type": "ServiceActivity",
+                    "name": "node",
+                    "incoming": ["flow_start_node"],
+                    "outgoing": "flow_node_end",
+                    "error_ignorable": False,
+                    "component": {
+                        "code": "bk_display",
+                        "data": {
+                            "bk_display_message": {"hook": False, "value": "${a}"},
+                            "${b}": {"hook": True, "value": "${b}"},
+                        },
+                    },
+                }
+            },
+            "constants": {
+                "${b}": {
+                    "custom_type": "input",
+                    "source_type": "custom",
+                    "show_type": "show",
+                    "source_info": {},
+                    "source_tag": "input.input",
+                    "value": "${a}",
+                },
+                "${a}": {
+                    "custom_type": "input",
+                    "source_type": "custom",
+                    "show_type": "hide",
+                    "source_info": {},
+                    "source_tag": "input.input",
+                    "value": "plain",
+                },
+            },
+            "outputs": [],
+            "flows": {
+                "flow_start_node": {"id": "flow_start_node", "source": "start", "target": "node_1"},
+                "flow_node_end": {"id": "flow_node_end", "source": "node_1", "target": "end"},
+            },
+            "gateways": {},
+            "start_event": {"id": "start", "type": "EmptyStartEvent", "incoming": "", "outgoing": "flow_start_node"},
+            "end_event": {"id": "end", "type": "EmptyEndEvent", "incoming": "flow_node_end", "outgoing": ""},
+        }
+
+        result = format_web_data_to_pipeline(web_tree)
+
+        inputs = result["activities"]["node_1"]["component"]["inputs"]
+        self.assertEqual(list(inputs.keys()), ["${b}", "bk_display_message"])
+        self.assertEqual(inputs["${b}"], result["data"]["inputs"]["${b}"])
+        self.assertIsNot(inputs["${b}"], result["data"]["inputs"]["${b}"])
+        self.assertEqual(inputs["bk_display_message"]["type"], "splice")
+        self.assertEqual(result["data"]["inputs"]["${a}"]["type"], "plain")
@@ -22,9 +22,12 @@ import json
 from unittest.mock import MagicMock, patch
 
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from bkflow.pipeline_web.preview_base import PipelineTemplateWebPreviewer
+from bkflow.template.models import Template, TemplateReference, TemplateSnapshot
 
 
 class MockTemplateScheme:
@@ -666,53 +669,78 @@ class PipelineTemplateWebPreviewerTestCase(TestCase):
         self.assertIn("${const2}", pipeline_tree["constants"])
         self.assertIn("${const2}", pipeline_tree["outputs"])
 
-    @patch("bkflow.pipeline_web.preview_base.Template")
-    @patch("bkflow.pipeline_web.preview_base.TemplateReference")
-    def test_is_circular_reference_no_cycle(self, mock_ref, mock_template):
-        """测试无循环引用的情况"""
-        mock_template.objects.filter.return_value.values_list.return_value = [1, 2, 3]
-        mock_ref.objects.filter.return_value.values.return_value = [
-            {"root_template_id": "1", "subprocess_template_id": "2"},
-            {"root_template_id": "2", "subprocess_template_id": "3"},
+    def _create_templates(self, count, space_id=1):
+        snapshot = TemplateSnapshot.create_snapshot({"activities": {}}, "admin", "1.0.0")
+        return [
+            Template.objects.create(name=f"template_{i}", space_id=space_id, snapshot_id=snapshot.id).id
+            for i in range(count)
         ]
 
-        pipeline_tree = {
+    @staticmethod
+    def _create_references(edges):
+        # 直接写入引用关系，避免触发模板保存时对 pipeline_tree 的解析
+        TemplateReference.objects.bulk_create(
+            [
+                TemplateReference(
+                    root_template_id=str(root_id),
+                    subprocess_template_id=str(sub_id),
+                    subprocess_node_id="node",
+                    version="",
+                )
+                for root_id, sub_id in edges
+            ]
+        )
+
+    @staticmethod
+    def _build_subprocess_tree(template_id):
+        return {
             "activities": {
-                "sub1": {
-                    "id": "sub1",
-                    "type": "SubProcess",
-                    "name": "subprocess1",
-                    "template_id": 2,
-                }
+                "sub1": {"id": "sub1", "type": "SubProcess", "name": "subprocess1", "template_id": template_id}
             }
         }
 
-        result = PipelineTemplateWebPreviewer.is_circular_reference(pipeline_tree, 1, "space1", "project", "proj1")
+    def test_is_circular_reference_no_cycle(self):
+        """测试无循环引用的情况"""
+        t1, t2, t3 = self._create_templates(3)
+        self._create_references([(t1, t2), (t2, t3)])
+
+        result = PipelineTemplateWebPreviewer.is_circular_reference(self._build_subprocess_tree(t2), t1, 1, None, None)
         self.assertFalse(result["has_cycle"])
 
-    @patch("bkflow.pipeline_web.preview_base.Template")
-    @patch("bkflow.pipeline_web.preview_base.TemplateReference")
-    def test_is_circular_reference_with_cycle(self, mock_ref, mock_template):
+    def test_is_circular_reference_with_cycle(self):
         """测试存在循环引用的情况"""
-        mock_template.objects.filter.return_value.values_list.return_value = [1, 2, 3]
-        mock_ref.objects.filter.return_value.values.return_value = [
-            {"root_template_id": "1", "subprocess_template_id": "2"},
-            {"root_template_id": "2", "subprocess_template_id": "3"},
-            {"root_template_id": "3", "subprocess_template_id": "1"},  # 循环
-        ]
-
-        pipeline_tree = {
-            "activities": {
-                "sub1": {
-                    "id": "sub1",
-                    "type": "SubProcess",
-                    "name": "subprocess1",
-                    "template_id": 2,
-                }
-            }
-        }
+        t1, t2, t3 = self._create_templates(3)
+        self._create_references([(t1, t2), (t2, t3), (t3, t1)])
 
-        result = PipelineTemplateWebPreviewer.is_circular_reference(pipeline_tree, 1, "space1", "project", "proj1")
+        result = PipelineTemplateWebPreviewer.is_circular_reference(self._build_subprocess_tree(t2), t1, 1, None, None)
         self.assertTrue(result["has_cycle"])
         self.assertEqual(result["node_key"], "sub1")
-        self.assertEqual(result["template_id"], 2)
+        self.assertEqual(result["template_id"], t2)
+
+        # 画布中的 template_id 为字符串时同样能检测出循环
+        result = PipelineTemplateWebPreviewer.is_circular_reference(
+            self._build_subprocess_tree(str(t2)), t1, 1, None, None
+        )
+        self.assertTrue(result["has_cycle"])
+
+    def test_is_circular_reference_only_loads_reachable_templates(self):
+        """测试只按层加载可达模板的引用关系，查询次数与空间内模板数量无关"""
+        t1, t2, t3, *others = self._create_templates(10)
+        self._create_references([(t2, t3)] + [(other, t1) for other in others])
+
+        with CaptureQueriesContext(connection) as ctx:
+            result = PipelineTemplateWebPreviewer.is_circular_reference(
+                self._build_subprocess_tree(t2), t1, 1, None, None
+            )
+        self.assertFalse(result["has_cycle"])
+        # t2 与 t3 两层，每层查询一次模板范围与一次引用关系
+        self.assertEqual(len(ctx.captured_queries), 4)
+
+    def test_is_circular_reference_ignores_other_scope(self):
+        """测试不同空间的模板引用关系不参与检查"""
+        t1, t2 = self._create_templates(2)
+        (other_space_template,) = self._create_templates(1, space_id=2)
+        self._create_references([(t2, other_space_template), (other_space_template, t1)])
+
+        result = PipelineTemplateWebPreviewer.is_circular_reference(self._build_subprocess_tree(t2), t1, 1, None, None)
+        self.assertFalse(result["has_cycle"])
@@ -20,7 +20,11 @@ to the current version of the project delivered to anyone in the future.
 from django.test import TestCase
 
 from bkflow.pipeline_web.constants import PWE
+from bkflow.pipeline_web.drawing_new import acyclic, normalize
+from bkflow.pipeline_web.drawing_new.dummy import replace_long_path_with_dummy
+from bkflow.pipeline_web.drawing_new.generator import generate_pipeline_tree
 from bkflow.pipeline_web.drawing_new.order import order
+from bkflow.pipeline_web.drawing_new.rank import tight_tree
 
 
 class TestOrder(TestCase):
@@ -78,6 +82,41 @@ class TestOrder(TestCase):
         count = order.crossing_count(self.pipeline, orders)
         self.assertIsInstance(count, int)
         self.assertGreaterEqual(count, 0)
+        self.assertEqual(count, self._naive_crossing_count(self.pipeline, orders))
+
+        orders = {0: ["node0"], 1: ["node3", "node1", "node2"], 2: ["node8", "node4", "node6", "node5", "node7"]}
+        self.assertEqual(order.crossing_count(self.pipeline, orders), self._naive_crossing_count(self.pipeline, orders))
+
+    def test_crossing_count_on_generated_pipeline(self):
+        """累加树交叉数与逐对比较的结果一致"""
+        pipeline = generate_pipeline_tree(80, seed=3, branch_prob=0.4, loop_prob=0.1)
+        normalize.normalize_run(pipeline)
+        acyclic.remove_self_edges(pipeline)
+        acyclic.acyclic_run(pipeline)
+        ranks = tight_tree.tight_tree_ranker(pipeline)
+        replace_long_path_with_dummy(pipeline, ranks)
+
+        orders = order.init_order(pipeline, ranks)
+        self.assertEqual(order.crossing_count(pipeline, orders), self._naive_crossing_count(pipeline, orders))
+        best = order.ordering(pipeline, ranks)
+        self.assertEqual(sorted(map(len, best.values())), sorted(map(len, orders.values())))
+        self.assertLessEqual(order.crossing_count(pipeline, best), order.crossing_count(pipeline, orders))
+
+    @staticmethod
+    def _naive_crossing_count(pipeline, orders):
+        count = 0
+        for rk in range(min(orders), max(orders)):
+            current_layer, next_layer = orders[rk], orders[rk + 1]
+            flows = [
+                (current_layer.index(flow[PWE.source]), next_layer.index(flow[PWE.target]))
+                for flow in pipeline[PWE.flows].values()
+                if flow[PWE.source] in current_layer and flow[PWE.target] in next_layer
+            ]
+            for i, (first_source, first_target) in enumerate(flows):
+                for next_source, next_target in flows[i + 1 :]:
+                    if (first_source - next_source) * (first_target - next_target) < 0:
+                        count += 1
+        return count
 
     def test_sort_layer_and_median_value(self):
         """测试层内排序和中位值计算"""
@@ -1,7 +1,9 @@
 from unittest.mock import MagicMock, patch
 
 import pytest
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 from bkflow.exceptions import APIResponseError, ValidationError
 from bkflow.plugin.models import OpenPluginCatalogIndex, SpaceOpenPluginAvailability
@@ -251,12 +253,128 @@ class TestOpenPluginCatalogService:
             space_id=999, source_key="sops", plugin_id="open_plugin_001"
         ).enabled
 
+    @patch("bkflow.space.utils.TaskComponentClient")
+    def test_disable_plugin_invalidates_engine_cache_after_commit(
+        self, mock_client_cls, django_capture_on_commit_callbacks
+    ):
+        """测试关闭插件后通知引擎清理启动预检缓存，开启插件不需要通知"""
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            OpenPluginCatalogService.toggle_plugin(
+                space_id=999, source_key="sops", plugin_id="open_plugin_001", enabled=True
+            )
+        assert callbacks == []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            OpenPluginCatalogService.toggle_plugin(
+                space_id=999, source_key="sops", plugin_id="open_plugin_001", enabled=False
+            )
+        mock_client_cls.assert_called_once_with(space_id=999)
+        mock_client_cls.return_value.invalidate_space_cache.assert_called_once_with(
+            data={"space_id": 999, "resource": "open_plugin"}
+        )
+
+    def test_search_visible_plugins_filters_in_db_and_paginates_with_cursor(self):
+        """测试可见插件检索在数据库侧完成过滤，并支持游标分页"""
+        for plugin_id, plugin_name, group_name, enabled in [
+            ("builtin__job_execute_task", "JOB 执行作业", "JOB", True),
+            ("builtin__job_fast_push_file", "JOB 执行文件分发", "JOB", True),
+            ("builtin__job_disabled", "JOB 已停用", "JOB", False),
+            ("builtin__cc_update_host", "CC 更新主机", "CC", True),
+        ]:
+            OpenPluginCatalogIndex.objects.create(
+                space_id=999,
+                source_key="sops",
+                plugin_id=plugin_id,
+                plugin_code=plugin_id.replace("builtin__", ""),
+                plugin_name=plugin_name,
+                plugin_source="builtin",
+                group_name=group_name,
+                group_display_name=group_name,
+            )
+            SpaceOpenPluginAvailability.objects.create(
+                space_id=999, source_key="sops", plugin_id=plugin_id, enabled=enabled
+            )
+
+        plugins, total, next_cursor = OpenPluginCatalogService.search_visible_plugins(
+            space_id=999, source_key="sops", keyword="job", limit=1
+        )
+        assert total == 2
+        assert [plugin.plugin_id for plugin in plugins] == ["builtin__job_execute_task"]
+        assert next_cursor
+
+        plugins, total, next_cursor = OpenPluginCatalogService.search_visible_plugins(
+            space_id=999, source_key="sops", keyword="job", limit=1, cursor=next_cursor
+        )
+        assert [plugin.plugin_id for plugin in plugins] == ["builtin__job_fast_push_file"]
+        assert next_cursor
+
+        plugins, _, next_cursor = OpenPluginCatalogService.search_visible_plugins(
+            space_id=999, source_key="sops", keyword="job", limit=1, cursor=next_cursor
+        )
+        assert plugins == []
+        assert next_cursor is None
+
+        # 关键字按名称、编码或 ID 前缀匹配，不做任意子串匹配
+        for keyword, expected in [
+            ("job 执行文件", ["builtin__job_fast_push_file"]),
+            ("CC_update", ["builtin__cc_update_host"]),
+            ("builtin__cc", ["builtin__cc_update_host"]),
+            ("更新主机", []),
+        ]:
+            plugins, _, _ = OpenPluginCatalogService.search_visible_plugins(
+                space_id=999, source_key="sops", keyword=keyword
+            )
+            assert [plugin.plugin_id for plugin in plugins] == expected
+
+        assert OpenPluginCatalogService.list_visible_categories(space_id=999, source_key="sops") == [
+            ("CC", "CC"),
+            ("JOB", "JOB"),
+        ]
+
+    def test_refresh_catalog_index_applies_diff_with_bulk_writes(self):
+        """测试目录刷新按差量批量写入，查询次数与插件数量无关"""
+
+        def build_api_item(index, name=None):
+            return {
+                "id": "open_plugin_{:03d}".format(index),
+                "name": name or "插件 {}".format(index),
+                "plugin_source": "builtin",
+                "plugin_code": "plugin_{}".format(index),
+                "wrapper_version": "v4.0.0",
+                "versions": ["1.0.0"],
+                "category": "JOB",
+            }
+
+        OpenPluginCatalogService._refresh_catalog_index(
+            space_id=999, source_key="sops", api_list=[build_api_item(index) for index in range(100)]
+        )
+        SpaceOpenPluginAvailability.objects.filter(plugin_id="open_plugin_001").update(enabled=False)
+        unchanged = OpenPluginCatalogIndex.objects.get(plugin_id="open_plugin_002")
+
+        api_list = [build_api_item(index) for index in range(1, 150)]
+        api_list[0] = build_api_item(1, name="Renamed Plugin")
+        api_list.append({"id": "legacy_plugin", "wrapper_version": "v2.0.0"})
+        with CaptureQueriesContext(connection) as ctx:
+            OpenPluginCatalogService._refresh_catalog_index(space_id=999, source_key="sops", api_list=api_list)
+
+        assert len(ctx.captured_queries) <= 10
+        catalogs = {item.plugin_id: item for item in OpenPluginCatalogIndex.objects.filter(space_id=999)}
+        assert len(catalogs) == 150
+        assert "legacy_plugin" not in catalogs
+        assert catalogs["open_plugin_000"].status == OpenPluginCatalogIndex.Status.UNAVAILABLE
+        assert catalogs["open_plugin_001"].plugin_name == "Renamed Plugin"
+        assert catalogs["open_plugin_002"].update_time == unchanged.update_time
+        assert catalogs["open_plugin_149"].status == OpenPluginCatalogIndex.Status.AVAILABLE
+        assert SpaceOpenPluginAvailability.objects.filter(space_id=999).count() == 150
+        assert not SpaceOpenPluginAvailability.objects.get(plugin_id="open_plugin_001").enabled
+        assert SpaceOpenPluginAvailability.objects.get(plugin_id="open_plugin_149").enabled
+
     @patch("bkflow.plugin.services.open_plugin_catalog.Credential")
     @patch("bkflow.plugin.services.open_plugin_catalog.UniformAPIClient")
     @patch("bkflow.plugin.services.open_plugin_catalog.SpaceConfig")
     @patch("bkflow.plugin.services.open_plugin_catalog.UniformAPIConfigHandler")
     def test_sync_space_plugins_creates_index_and_default_enabled_availability(
-        self, mock_handler, mock_sc, mock_client_cls, mock_cred
+        self, mock_handler, mock_sc, mock_client_cls, mock_cred, fake_redis
     ):
         """测试同步目录后写入索引，并默认开启空间开放状态"""
         mock_sc.get_config.side_effect = lambda space_id, config_name, scope=None: {
@@ -297,7 +415,9 @@ class TestOpenPluginCatalogService:
         mock_client.request.return_value = list_resp
         mock_client_cls.return_value = mock_client
 
+        assert OpenPluginCatalogService.is_catalog_fresh(space_id=1, source_key="sops") is False
         OpenPluginCatalogService.sync_space_plugins(space_id=1)
+        assert OpenPluginCatalogService.is_catalog_fresh(space_id=1, source_key="sops") is True
 
         index = OpenPluginCatalogIndex.objects.get(space_id=1, source_key="sops", plugin_id="open_plugin_001")
         availability = SpaceOpenPluginAvailability.objects.get(
@@ -5,6 +5,8 @@ from unittest.mock import patch
 
 import pytest
 from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import serializers
 
 from bkflow.plugin.models import OpenPluginCatalogIndex, SpaceOpenPluginAvailability
@@ -118,7 +120,7 @@ def test_validate_passes_for_enabled_available_plugin():
 
 
 def test_collect_plugin_references_reads_source_key_from_runtime_hidden_field(monkeypatch):
-    monkeypatch.setattr(OpenPluginSnapshotService, "_get_catalog_entry", lambda **kwargs: None)
+    monkeypatch.setattr(OpenPluginSnapshotService, "_get_catalog_entries", lambda **kwargs: {})
     pipeline_tree = build_open_plugin_pipeline_tree()
     component = pipeline_tree["activities"]["node1"]["component"]
     component["version"] = "v4.0.0"
@@ -144,7 +146,11 @@ def test_collect_plugin_references_does_not_infer_missing_exact_version(monkeypa
         latest_version="1.2.0",
         default_version="1.1.0",
     )
-    monkeypatch.setattr(OpenPluginSnapshotService, "_get_catalog_entry", lambda **kwargs: catalog)
+    monkeypatch.setattr(
+        OpenPluginSnapshotService,
+        "_get_catalog_entries",
+        lambda **kwargs: {("open_plugin_001", "sops"): catalog},
+    )
 
     with patch.object(SpaceOpenPluginAvailability.objects, "filter") as availability_filter:
         availability_filter.return_value.exists.return_value = True
@@ -270,10 +276,10 @@ def test_validate_pipeline_tree_ignores_legacy_uniform_api_with_source_key():
         "uniform_api_plugin_method": {"value": "POST"},
         "uniform_api_plugin_version": {"value": "v2.0.0"},
     }
-    with patch.object(OpenPluginSnapshotService, "_get_catalog_entry", return_value=None) as get_catalog_entry:
+    with patch.object(OpenPluginSnapshotService, "_get_catalog_entries", return_value={}) as get_catalog_entries:
         OpenPluginSnapshotService.validate_pipeline_tree(space_id=1, pipeline_tree=pipeline_tree)
 
-    get_catalog_entry.assert_not_called()
+    get_catalog_entries.assert_not_called()
 
 
 def test_collect_plugin_references_recognizes_legacy_saved_open_plugin_metadata(monkeypatch):
@@ -289,7 +295,7 @@ def test_collect_plugin_references_recognizes_legacy_saved_open_plugin_metadata(
         "meta_url_template": "https://example.com/open-plugins/open_plugin_001?version={version}",
     }
     component["data"].pop("uniform_api_plugin_id")
-    monkeypatch.setattr(OpenPluginSnapshotService, "_get_catalog_entry", lambda **kwargs: None)
+    monkeypatch.setattr(OpenPluginSnapshotService, "_get_catalog_entries", lambda **kwargs: {})
 
     references = OpenPluginSnapshotService.collect_plugin_references(
         space_id=1,
@@ -536,3 +542,53 @@ def test_build_schema_snapshot_passes_source_key_to_schema_query(mock_get_schema
     assert mock_get_schema.call_args.kwargs["version"] == "1.2.0"
     assert mock_get_schema.call_args.kwargs["plugin_type"] == "uniform_api"
     assert mock_get_schema.call_args.kwargs["source_key"] == "source-b"
+
+
+@pytest.mark.django_db
+def test_collect_plugin_references_resolves_all_nodes_with_constant_queries():
+    """多个开放插件节点的目录与开放状态各只查询一次"""
+    pipeline_tree = build_open_plugin_pipeline_tree()
+    node = pipeline_tree["activities"]["node1"]
+    for index in range(2, 6):
+        plugin_id = "open_plugin_00{}".format(index)
+        create_catalog_plugin(space_id=1, source_key="sops", plugin_id=plugin_id)
+        new_node = deepcopy(node)
+        new_node["id"] = "node{}".format(index)
+        new_node["component"]["data"]["uniform_api_plugin_id"] = {"value": plugin_id}
+        pipeline_tree["activities"][new_node["id"]] = new_node
+    create_available_open_plugin(space_id=1, enabled=False)
+
+    with CaptureQueriesContext(connection) as ctx:
+        references = OpenPluginSnapshotService.collect_plugin_references(space_id=1, pipeline_tree=pipeline_tree)
+
+    assert len(ctx.captured_queries) == 2
+    assert {ref["node_id"]: ref["enabled"] for ref in references} == {
+        "node1": False,
+        "node2": True,
+        "node3": True,
+        "node4": True,
+        "node5": True,
+    }
+
+
+@pytest.mark.django_db
+def test_fill_reference_wrapper_versions_resolves_missing_versions_in_one_query():
+    create_catalog_plugin(space_id=1, source_key="source-a", plugin_id="open_plugin_001")
+    create_catalog_plugin(space_id=1, source_key="source-b", plugin_id="open_plugin_002")
+    reference_snapshot = [
+        {"node_id": "node1", "plugin_id": "open_plugin_001", "source_key": "source-a", "wrapper_version": ""},
+        {"node_id": "node2", "plugin_id": "open_plugin_002", "source_key": "", "wrapper_version": ""},
+        {"node_id": "node3", "plugin_id": "open_plugin_003", "source_key": "sops", "wrapper_version": ""},
+        {"node_id": "node4", "plugin_id": "open_plugin_001", "source_key": "sops", "wrapper_version": "v3.0.0"},
+    ]
+
+    with CaptureQueriesContext(connection) as ctx:
+        result = OpenPluginSnapshotService._fill_reference_wrapper_versions(
+            space_id=1, reference_snapshot=reference_snapshot
+        )
+
+    assert len(ctx.captured_queries) == 1
+    assert result == {
+        "changed": True,
+        "wrapper_version_map": {"node1": "v4.0.0", "node2": "v4.0.0", "node3": "", "node4": "v3.0.0"},
+    }
@@ -4,9 +4,15 @@ Tests for bkflow/space/models.py
 from unittest import mock
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from bkflow.exceptions import APIResponseError, ValidationError
-from bkflow.space.configs import ApiGatewayCredentialConfig, SuperusersConfig
+from bkflow.space.configs import (
+    ApiGatewayCredentialConfig,
+    FlowVersioning,
+    SuperusersConfig,
+)
 from bkflow.space.exceptions import SpaceNotExists
 from bkflow.space.models import Credential, CredentialType, Space, SpaceConfig
 
@@ -387,6 +393,94 @@ class TestSpaceConfig:
             SpaceConfig.get_config(space_id=self.space.id, config_name="invalid_config_name")
 
 
+@pytest.mark.django_db
+class TestSpaceConfigCache:
+    @pytest.fixture(autouse=True)
+    def setup(self, fake_redis):
+        self.redis = fake_redis
+        self.space = Space.objects.create(name="Test Space", app_code="test_app", platform_url="http://example.com")
+
+    def test_get_config_read_through(self):
+        """Test SpaceConfig.get_config only queries db once per space"""
+        SpaceConfig.objects.create(
+            space_id=self.space.id, name=SuperusersConfig.name, value_type="JSON", json_value=["admin"]
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert SpaceConfig.get_config(self.space.id, SuperusersConfig.name) == ["admin"]
+            assert SpaceConfig.get_config(self.space.id, SuperusersConfig.name) == ["admin"]
+            assert SpaceConfig.get_config(self.space.id, FlowVersioning.name) == FlowVersioning.default_value
+        assert len(ctx.captured_queries) == 1
+
+    def test_get_config_cache_disabled(self, settings):
+        """Test SpaceConfig.get_config without cache"""
+        settings.SPACE_CONFIG_CACHE_TTL = 0
+
+        with CaptureQueriesContext(connection) as ctx:
+            SpaceConfig.get_config(self.space.id, SuperusersConfig.name)
+            SpaceConfig.get_config(self.space.id, SuperusersConfig.name)
+        assert len(ctx.captured_queries) == 2
+
+    def test_get_configs(self):
+        """Test SpaceConfig.get_configs"""
+        SpaceConfig.objects.create(
+            space_id=self.space.id, name=SuperusersConfig.name, value_type="JSON", json_value=["admin"]
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            result = SpaceConfig.get_configs(self.space.id, [SuperusersConfig.name, FlowVersioning.name])
+        assert len(ctx.captured_queries) == 1
+        assert result == {SuperusersConfig.name: ["admin"], FlowVersioning.name: FlowVersioning.default_value}
+
+        with pytest.raises(ValidationError):
+            SpaceConfig.get_configs(self.space.id, ["invalid_config_name"])
+
+    def test_invalidate_on_save_and_delete(self):
+        """Test SpaceConfig cache is invalidated on save and delete"""
+        assert SpaceConfig.get_config(self.space.id, SuperusersConfig.name) == SuperusersConfig.default_value
+
+        config = SpaceConfig.objects.create(
+            space_id=self.space.id, name=SuperusersConfig.name, value_type="JSON", json_value=["admin"]
+        )
+        assert SpaceConfig.get_config(self.space.id, SuperusersConfig.name) == ["admin"]
+
+        config.json_value = ["admin", "user1"]
+        config.save()
+        assert SpaceConfig.get_config(self.space.id, SuperusersConfig.name) == ["admin", "user1"]
+
+        config.delete()
+        assert SpaceConfig.get_config(self.space.id, SuperusersConfig.name) == SuperusersConfig.default_value
+
+    def test_invalidate_on_batch_update(self):
+        """Test SpaceConfig cache is invalidated on batch_update"""
+        assert SpaceConfig.get_config(self.space.id, SuperusersConfig.name) == SuperusersConfig.default_value
+
+        SpaceConfig.objects.batch_update(space_id=self.space.id, configs={SuperusersConfig.name: ["admin"]})
+        assert SpaceConfig.get_config(self.space.id, SuperusersConfig.name) == ["admin"]
+
+        SpaceConfig.objects.batch_update(space_id=self.space.id, configs={SuperusersConfig.name: ["user1"]})
+        assert SpaceConfig.get_config(self.space.id, SuperusersConfig.name) == ["user1"]
+
+    def test_cache_shared_through_redis(self):
+        """Test SpaceConfig cache is stored in redis so that invalidation reaches every process"""
+        cache_key = SpaceConfig._get_cache_key(self.space.id)
+        SpaceConfig.get_config(self.space.id, SuperusersConfig.name)
+        assert self.redis.get(cache_key) is not None
+
+        SpaceConfig.objects.create(
+            space_id=self.space.id, name=SuperusersConfig.name, value_type="JSON", json_value=["admin"]
+        )
+        assert self.redis.get(cache_key) is None
+
+    def test_get_config_without_redis(self):
+        """Test SpaceConfig.get_config falls back to db when redis is not configured"""
+        with mock.patch("bkflow.utils.redis_cache.get_redis_inst", return_value=None):
+            with CaptureQueriesContext(connection) as ctx:
+                SpaceConfig.get_config(self.space.id, SuperusersConfig.name)
+                SpaceConfig.get_config(self.space.id, SuperusersConfig.name)
+        assert len(ctx.captured_queries) == 2
+
+
 @pytest.mark.django_db
 class TestCredential:
     def setup_method(self):
@@ -7,7 +7,6 @@ import pytest
 from blueapps.account.models import User
 from rest_framework import status
 from rest_framework.test import APIRequestFactory, force_authenticate
-from webhook.base_models import Scope
 
 from bkflow.constants import WebhookScopeType
 from bkflow.plugin.models import OpenPluginCatalogIndex, SpaceOpenPluginAvailability
@@ -18,6 +17,8 @@ from bkflow.space.models import (
     Space,
     SpaceConfig,
     SpaceCreateType,
+    WebhookOutboxEvent,
+    WebhookOutboxStatus,
 )
 from bkflow.space.views import (
     CredentialConfigViewSet,
@@ -241,8 +242,8 @@ class TestSpaceInternalViewSet:
         )
         self.space = Space.objects.create(name="Test Space", app_code="test_app")
 
-    @mock.patch("bkflow.space.views.event_broadcast_signal")
-    def test_broadcast_task_events(self, mock_signal):
+    @mock.patch("bkflow.space.views.dispatch_webhook_events")
+    def test_broadcast_task_events(self, mock_dispatch):
         """Test broadcast_task_events action"""
         view = SpaceInternalViewSet.as_view({"post": "broadcast_task_events"})
         data = {
@@ -260,16 +261,17 @@ class TestSpaceInternalViewSet:
         assert response.status_code == 200
         # Response is wrapped by SimpleGenericViewSet.finalize_response
         assert response.data.get("data") == "success"
-        # broadcast_task_events 会触发两次 signal：空间级别 + 流程级别
-        assert mock_signal.send.call_count == 2
-        calls = mock_signal.send.call_args_list
-        # 第一次：空间级别回调
-        assert calls[0].kwargs["sender"] == "task_created"
-        assert calls[0].kwargs["scopes"] == [Scope(type=WebhookScopeType.SPACE.value, code=str(self.space.id))]
-        # 第二次：流程级别回调
-        assert calls[1].kwargs["sender"] == "task_created"
-        assert calls[1].kwargs["scopes"] == [Scope(type=WebhookScopeType.TEMPLATE.value, code="1")]
-        assert calls[1].kwargs["extra_info"]["delivery_id"] == 123
+        # broadcast_task_events 会写入两条待分发事件：空间级别 + 流程级别
+        events = list(WebhookOutboxEvent.objects.order_by("id"))
+        assert len(events) == 2
+        # 第一条：空间级别回调
+        assert events[0].event_code == "task_created"
+        assert (events[0].scope_type, events[0].scope_code) == (WebhookScopeType.SPACE.value, str(self.space.id))
+        assert events[0].extra_info == {"task_id": 123}
+        # 第二条：流程级别回调
+        assert (events[1].scope_type, events[1].scope_code) == (WebhookScopeType.TEMPLATE.value, "1")
+        assert events[1].delivery_id == "123"
+        assert events[1].status == WebhookOutboxStatus.PENDING.value
 
     def test_get_credential_config(self):
         """Test get_credential_config with existing and non-existing credentials"""
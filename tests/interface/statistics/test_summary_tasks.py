@@ -1,11 +1,20 @@
+from datetime import timedelta
+
 from django.test import TestCase
 from django.utils import timezone
 
 from bkflow.statistics.models import (
+    DailyStatisticsSummary,
     PluginExecutionSummary,
     TaskflowExecutedNodeStatistics,
+    TaskflowStatistics,
+    TemplateStatistics,
+)
+from bkflow.statistics.rollups import bulk_upsert
+from bkflow.statistics.tasks.summary_tasks import (
+    _generate_daily_summary,
+    _generate_plugin_summary,
 )
-from bkflow.statistics.tasks.summary_tasks import _generate_plugin_summary
 
 
 class TestGeneratePluginSummary(TestCase):
@@ -52,3 +61,97 @@ class TestGeneratePluginSummary(TestCase):
             ("builtin", 1, 0),
             ("third_party", 1, 1),
         ]
+
+    def test_generate_week_summary_rolls_up_day_summaries(self):
+        period_start = timezone.localdate()
+        for offset, (execution, elapsed_sum, max_elapsed) in enumerate([(2, 20, 15), (3, 60, 30)]):
+            PluginExecutionSummary.objects.create(
+                period_type="day",
+                period_start=period_start + timedelta(days=offset),
+                space_id=100,
+                component_code="bk_http",
+                plugin_source="builtin",
+                version="v1",
+                execution_count=execution,
+                success_count=execution,
+                elapsed_time_sum=elapsed_sum,
+                elapsed_count=execution,
+                max_elapsed_time=max_elapsed,
+            )
+
+        _generate_plugin_summary("week", period_start)
+
+        summary = PluginExecutionSummary.objects.get(period_type="week", period_start=period_start)
+        assert summary.execution_count == 5
+        assert summary.success_count == 5
+        assert summary.avg_elapsed_time == 16
+        assert summary.max_elapsed_time == 30
+
+
+class TestGenerateDailySummary(TestCase):
+    def test_reconcile_overrides_incremental_rows_and_fills_empty_spaces(self):
+        now = timezone.now()
+        summary_date = timezone.localdate(now)
+        TaskflowStatistics.objects.create(
+            task_id=1,
+            space_id=100,
+            scope_type="project",
+            scope_value="1",
+            create_time=now,
+            is_finished=True,
+            final_state="FINISHED",
+            elapsed_time=10,
+        )
+        TaskflowExecutedNodeStatistics.objects.create(
+            task_id=1,
+            space_id=100,
+            component_code="bk_http",
+            node_id="node_1",
+            started_time=now,
+            status=False,
+            state="FAILED",
+        )
+        TemplateStatistics.objects.create(template_id=1, space_id=200, scope_type="project", scope_value="2")
+        DailyStatisticsSummary.objects.create(
+            date=summary_date, space_id=100, scope_type="project", scope_value="1", task_created_count=5
+        )
+
+        _generate_daily_summary(summary_date)
+        _generate_daily_summary(summary_date)
+
+        summary = DailyStatisticsSummary.objects.get(date=summary_date, space_id=100)
+        assert summary.task_created_count == 1
+        assert summary.task_success_count == 1
+        assert summary.node_executed_count == 1
+        assert summary.node_failed_count == 1
+        assert summary.avg_task_elapsed_time == 10
+        empty_summary = DailyStatisticsSummary.objects.get(date=summary_date, space_id=200)
+        assert empty_summary.task_created_count == 0
+
+
+class TestBulkUpsert(TestCase):
+    def test_increment_and_replace_on_conflict(self):
+        row = {
+            "date": timezone.localdate(),
+            "space_id": 100,
+            "scope_type": "",
+            "scope_value": "",
+            "task_created_count": 1,
+            "task_elapsed_time_sum": 10,
+            "task_elapsed_count": 1,
+            "max_task_elapsed_time": 10,
+        }
+        kwargs = {
+            "unique_fields": ("date", "space_id", "scope_type", "scope_value"),
+            "increment_fields": ("task_created_count", "task_elapsed_time_sum", "task_elapsed_count"),
+            "max_fields": ("max_task_elapsed_time",),
+            "avg_fields": {"avg_task_elapsed_time": ("task_elapsed_time_sum", "task_elapsed_count")},
+        }
+        bulk_upsert(DailyStatisticsSummary, [row], **kwargs)
+        bulk_upsert(DailyStatisticsSummary, [dict(row, task_elapsed_time_sum=30, max_task_elapsed_time=30)], **kwargs)
+
+        summary = DailyStatisticsSummary.objects.get(space_id=100)
+        assert summary.task_created_count == 2
+        assert summary.task_elapsed_time_sum == 40
+        assert summary.avg_task_elapsed_time == 20
+        assert summary.max_task_elapsed_time == 30
@@ -502,3 +502,89 @@ class TestTaskMockTokenPermission:
 
         result = self.permission.has_permission(request, view)
         assert result is True
+
+
+@pytest.mark.django_db
+class TestTokenVerify:
+    """Test Token.verify parent chain resolution and verification cache"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, fake_redis):
+        self.redis = fake_redis
+        self.token = Token.objects.create(
+            token="test_token_parent",
+            space_id=1,
+            user="testuser",
+            resource_type=ResourceType.TASK.value,
+            resource_id="1",
+            permission_type=PermissionType.VIEW.value,
+            expired_time=timezone.now() + timezone.timedelta(hours=1),
+        )
+
+    def _verify(self, resource_id):
+        return Token.verify(
+            None,
+            "testuser",
+            resource_type=ResourceType.TASK.value,
+            resource_id=resource_id,
+            permission_type=PermissionType.VIEW.value,
+            token="test_token_parent",
+        )
+
+    @mock.patch("bkflow.permission.models.TaskComponentClient")
+    def test_verify_by_ancestor_task(self, mock_client_class):
+        """Token granted on an ancestor task should pass with a single ancestor lookup"""
+        mock_client_class.return_value.get_task_ancestors.return_value = {"result": True, "data": [2, 1]}
+
+        assert self._verify("3") is True
+        assert self._verify("3") is True
+        mock_client_class.return_value.get_task_ancestors.assert_called_once_with("3")
+        mock_client_class.return_value.get_task_detail.assert_not_called()
+
+    @mock.patch("bkflow.permission.models.TaskComponentClient")
+    def test_ancestors_cache_ttl(self, mock_client_class, settings):
+        """Ancestor lookup should use its own cache ttl and be skipped when disabled"""
+        mock_client_class.return_value.get_task_ancestors.return_value = {"result": True, "data": [2, 1]}
+        settings.TOKEN_VERIFY_CACHE_TTL = 0
+
+        settings.TASK_ANCESTORS_CACHE_TTL = 60
+        assert self._verify("3") is True
+        assert self._verify("3") is True
+        assert mock_client_class.return_value.get_task_ancestors.call_count == 1
+        assert self.redis.get("task_ancestors:1:3") is not None
+
+        settings.TASK_ANCESTORS_CACHE_TTL = 0
+        assert self._verify("4") is True
+        assert self._verify("4") is True
+        assert mock_client_class.return_value.get_task_ancestors.call_count == 3
+
+    @mock.patch("bkflow.permission.models.TaskComponentClient")
+    def test_verify_not_ancestor_or_lookup_failed(self, mock_client_class):
+        """Token should be rejected when the task is not a descendant or lookup fails"""
+        mock_client_class.return_value.get_task_ancestors.return_value = {"result": True, "data": [5]}
+        assert self._verify("6") is False
+
+        mock_client_class.return_value.get_task_ancestors.return_value = {"result": False, "message": "error"}
+        assert self._verify("7") is False
+
+    def test_verify_cache_invalidated_on_revoke(self, settings):
+        """Cached verification should be invalidated when the token is revoked or changed"""
+        settings.TOKEN_VERIFY_CACHE_TTL = 60
+        assert self._verify("1") is True
+        assert self.redis.hget("token_verify:test_token_parent", "None:testuser:TASK:1:VIEW") is not None
+
+        # 绕过信号直接更新时命中缓存
+        Token.objects.filter(token="test_token_parent").update(
+            expired_time=timezone.now() - timezone.timedelta(hours=1)
+        )
+        assert self._verify("1") is True
+
+        Token.invalidate_verify_cache(["test_token_parent"])
+        assert self._verify("1") is False
+
+        self.token.expired_time = timezone.now() + timezone.timedelta(hours=1)
+        self.token.save()
+        assert self._verify("1") is True
+
+        self.token.delete()
+        assert self._verify("1") is False
@@ -90,6 +90,15 @@ PIPELINE_ADDITIONAL_GATEWAYS = {
 }
 
 
+def nodes_detail(detail):
+    """批量节点详情接口的 mock：每个请求节点返回相同详情"""
+
+    def side_effect(task_id, data):
+        return {"result": True, "data": {node_id: detail for node_id in data["node_ids"]}, "message": ""}
+
+    return side_effect
+
+
 @pytest.mark.django_db
 class TestSyncFromDebugTask:
     def test_sync_writes_back_status_and_global_vars(self, mocker):
@@ -113,11 +122,9 @@ class TestSyncFromDebugTask:
         }
         client.get_node_id_map.return_value = {"result": True, "data": {"A": "rtA"}, "message": ""}
         # 节点 A 的输出（含产出 k1）
-        client.get_task_node_detail.return_value = {
-            "result": True,
-            "data": {"outputs": [{"key": "k1", "value": "produced"}], "version": "v1"},
-            "message": "",
-        }
+        client.get_task_nodes_detail.side_effect = nodes_detail(
+            {"outputs": [{"key": "k1", "value": "produced"}], "version": "v1"}
+        )
         mocker.patch.object(svc, "_task_client", return_value=client)
 
         svc.sync_from_debug_task(ctx)
@@ -159,6 +166,47 @@ class TestSyncFromDebugTask:
         assert ns.status == "running"
         assert ns.duration_ms == 1000  # elapsed_time(s) -> ms
 
+    def test_sync_only_fetches_details_when_state_version_changed(self, mocker):
+        """节点状态版本未变化时不重复拉取详情，版本变化后重新回写"""
+        svc = DebugService(template_id=1, space_id=10, pipeline_tree=PIPELINE)
+        ctx = svc.get_or_create_context()
+        svc.sync_node_states()
+        ctx.status = "running"
+        ctx.active_task_id = 456
+        ctx.save()
+
+        client = mocker.MagicMock()
+        client.get_node_id_map.return_value = {"result": True, "data": {"A": "rtA"}, "message": ""}
+        mocker.patch.object(svc, "_task_client", return_value=client)
+
+        def sync(version, produced):
+            client.get_task_states.return_value = {
+                "result": True,
+                "data": {
+                    "state": "RUNNING",
+                    "children": {"rtA": {"state": "FINISHED", "elapsed_time": 1, "version": version}},
+                },
+                "message": "",
+            }
+            client.get_task_nodes_detail.side_effect = nodes_detail(
+                {"outputs": [{"key": "k1", "value": produced}], "version": version}
+            )
+            svc.sync_from_debug_task(ctx)
+
+        sync("v1", "first")
+        sync("v1", "ignored")
+        assert client.get_task_nodes_detail.call_count == 1
+        ns = DebugNodeState.objects.get(debug_context=ctx, node_id="A")
+        assert ns.outputs == {"k1": "first"}
+
+        sync("v2", "second")
+        assert client.get_task_nodes_detail.call_count == 2
+        ns.refresh_from_db()
+        ctx.refresh_from_db()
+        assert ns.outputs == {"k1": "second"}
+        assert ns.log_ref == {"instance_id": 456, "node_id": "rtA", "version": "v2"}
+        assert ctx.global_vars.get("${g1}") == "second"
+
     def test_sync_step_callback_is_waiting_and_keeps_lock(self, mocker):
         svc = DebugService(template_id=1, space_id=10, pipeline_tree=PIPELINE)
         ctx = svc.get_or_create_context()
@@ -215,11 +263,9 @@ class TestSyncFromDebugTask:
             "message": "",
         }
         client.get_node_id_map.return_value = {"result": True, "data": {"A": "rtA"}, "message": ""}
-        client.get_task_node_detail.return_value = {
-            "result": True,
-            "data": {"outputs": [{"key": "k1", "value": "produced"}], "version": "v2"},
-            "message": "",
-        }
+        client.get_task_nodes_detail.side_effect = nodes_detail(
+            {"outputs": [{"key": "k1", "value": "produced"}], "version": "v2"}
+        )
         mocker.patch.object(svc, "_task_client", return_value=client)
 
         svc.sync_from_debug_task(ctx)
@@ -343,11 +389,7 @@ class TestSyncFromDebugTask:
             "data": {"A": "rtA", "G": "rt_gateway"},
             "message": "",
         }
-        client.get_task_node_detail.return_value = {
-            "result": True,
-            "data": {"ex_data": "multiple conditions meet", "outputs": []},
-            "message": "",
-        }
+        client.get_task_nodes_detail.side_effect = nodes_detail({"ex_data": "multiple conditions meet", "outputs": []})
         mocker.patch.object(svc, "_task_client", return_value=client)
 
         svc.sync_from_debug_task(ctx)
@@ -372,7 +414,9 @@ class TestSyncFromDebugTask:
         gateway = DebugNodeState.objects.get(debug_context=ctx, node_id="G")
         assert gateway.status == "failed"
         assert gateway.error_detail == {"type": "runtime", "message": "multiple conditions meet"}
-        client.get_task_node_detail.assert_called_once_with(456, "rt_gateway", data={"include_data": True})
+        client.get_task_nodes_detail.assert_called_once_with(
+            456, data={"node_ids": ["rt_gateway"], "include_data": True}
+        )
 
     def test_sync_finished_gateway_persists_selected_flows(self, mocker):
         svc = DebugService(template_id=1, space_id=10, pipeline_tree=PIPELINE_GATEWAY)
@@ -394,11 +438,7 @@ class TestSyncFromDebugTask:
             "message": "",
         }
         client.get_node_id_map.return_value = {"result": True, "data": {"G": "rt_gateway"}, "message": ""}
-        client.get_task_node_detail.return_value = {
-            "result": True,
-            "data": {"outputs": [], "version": "v1"},
-            "message": "",
-        }
+        client.get_task_nodes_detail.side_effect = nodes_detail({"outputs": [], "version": "v1"})
         mocker.patch.object(svc, "_task_client", return_value=client)
 
         svc.sync_from_debug_task(ctx)
@@ -437,11 +477,7 @@ class TestSyncFromDebugTask:
             "data": {"CPG": "rt_conditional", "PG": "rt_parallel", "CG": "rt_converge"},
             "message": "",
         }
-        client.get_task_node_detail.return_value = {
-            "result": True,
-            "data": {"outputs": [], "version": "v1"},
-            "message": "",
-        }
+        client.get_task_nodes_detail.side_effect = nodes_detail({"outputs": [], "version": "v1"})
         mocker.patch.object(svc, "_task_client", return_value=client)
 
         svc.sync_from_debug_task(ctx)
@@ -500,11 +536,9 @@ class TestSyncFromDebugTask:
             "data": {"PG": "rt_parallel", "CG": "rt_converge"},
             "message": "",
         }
-        client.get_task_node_detail.return_value = {
-            "result": True,
-            "data": {"ex_data": "parallel gateway failed", "outputs": [], "version": "v2"},
-            "message": "",
-        }
+        client.get_task_nodes_detail.side_effect = nodes_detail(
+            {"ex_data": "parallel gateway failed", "outputs": [], "version": "v2"}
+        )
         mocker.patch.object(svc, "_task_client", return_value=client)
 
         svc.sync_from_debug_task(ctx)
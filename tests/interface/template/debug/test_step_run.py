@@ -314,7 +314,7 @@ class TestStepRunAndMock:
         assert ctx.last_run_type == "step"
         assert ctx.last_run_status == "running"
         client.get_task_states.assert_not_called()
-        client.get_task_node_detail.assert_not_called()
+        client.get_task_nodes_detail.assert_not_called()
 
     def test_step_run_real_create_failure_raises_and_releases_lock(self, mocker):
         """create 失败：抛 DebugStateError、释放锁、无任务故不清理（I-1）"""
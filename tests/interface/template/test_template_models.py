@@ -20,6 +20,8 @@ from copy import deepcopy
 from unittest import mock
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from bkflow.exceptions import ValidationError
 from bkflow.space.models import Space
@@ -30,6 +32,7 @@ from bkflow.template.models import (
     TemplateSnapshot,
     Trigger,
 )
+from bkflow.utils.md5 import compute_pipeline_md5
 
 
 def build_pipeline_tree():
@@ -721,6 +724,93 @@ class TestTemplateSnapshot:
         assert snapshot.creator == "admin"
         assert snapshot.draft is True  # 无版本号时是草稿
 
+    def test_get_version_maps(self):
+        """测试批量查询快照版本与 md5 的映射"""
+        old_snapshot = TemplateSnapshot.create_snapshot(self.pipeline_tree, "admin", "1.0.0")
+        old_snapshot.template_id = 1
+        old_snapshot.save()
+        new_tree = deepcopy(self.pipeline_tree)
+        new_tree["constants"] = {}
+        new_snapshot = TemplateSnapshot.create_snapshot(new_tree, "admin", "2.0.0")
+        new_snapshot.template_id = 1
+        new_snapshot.save()
+        draft_snapshot = TemplateSnapshot.create_draft_snapshot(new_tree, "admin")
+        draft_snapshot.template_id = 1
+        draft_snapshot.save()
+
+        with CaptureQueriesContext(connection) as ctx:
+            md5_version_map = TemplateSnapshot.get_md5_version_map([old_snapshot.md5sum, new_snapshot.md5sum])
+            version_md5_map = TemplateSnapshot.get_version_md5_map(["1", 2])
+        assert len(ctx.captured_queries) == 2
+        assert all("data" not in query["sql"].split("FROM")[0] for query in ctx.captured_queries)
+
+        assert md5_version_map == {old_snapshot.md5sum: "1.0.0", new_snapshot.md5sum: "2.0.0"}
+        assert version_md5_map == {1: {"1.0.0": old_snapshot.md5sum, "2.0.0": new_snapshot.md5sum}}
+        assert TemplateSnapshot.get_md5_version_map([]) == {}
+        assert TemplateSnapshot.get_version_md5_map([]) == {}
+
+    def test_get_snapshot_with_cache(self, settings, fake_redis):
+        """测试开启缓存后以快照 id 为 key 在 redis 中跨请求复用快照数据"""
+        settings.TEMPLATE_SNAPSHOT_CACHE_ENABLED = True
+        snapshot = TemplateSnapshot.create_snapshot(self.pipeline_tree, "admin", "1.0.0")
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert TemplateSnapshot.get_snapshot(snapshot.id).data == self.pipeline_tree
+        assert len(ctx.captured_queries) == 1
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached_snapshot = TemplateSnapshot.get_snapshot(snapshot.id)
+            assert cached_snapshot.data == self.pipeline_tree
+            assert cached_snapshot.md5sum == snapshot.md5sum
+        assert len(ctx.captured_queries) == 0
+
+        cached_snapshot.data["activities"] = {}
+        assert TemplateSnapshot.get_snapshot(snapshot.id).data == self.pipeline_tree
+
+    def test_get_snapshot_cache_invalidated(self, settings, fake_redis):
+        """测试快照修改后缓存失效"""
+        settings.TEMPLATE_SNAPSHOT_CACHE_ENABLED = True
+        snapshot = TemplateSnapshot.create_snapshot(self.pipeline_tree, "admin", "1.0.0")
+        template = Template.objects.create(
+            name="Test Template", space_id=1, snapshot_id=snapshot.id, creator="admin", updated_by="admin"
+        )
+        TemplateSnapshot.get_snapshot(snapshot.id)
+
+        new_tree = deepcopy(self.pipeline_tree)
+        new_tree["constants"]["${key2}"] = {"key": "key2", "value": "value2"}
+        template.update_snapshot(new_tree)
+        assert TemplateSnapshot.get_snapshot(snapshot.id).data == new_tree
+        assert template.pipeline_tree == new_tree
+
+        snapshot.refresh_from_db()
+        snapshot.data = self.pipeline_tree
+        snapshot.md5sum = compute_pipeline_md5(self.pipeline_tree)
+        snapshot.save()
+        assert TemplateSnapshot.get_snapshot(snapshot.id).data == self.pipeline_tree
+
+    def test_template_snapshot_memoized(self, settings):
+        """测试同一模板实例多次访问 pipeline_tree 只查询一次快照"""
+        settings.TEMPLATE_SNAPSHOT_CACHE_ENABLED = False
+        snapshot = TemplateSnapshot.create_snapshot(self.pipeline_tree, "admin", "1.0.0")
+        template = Template.objects.create(
+            name="Test Template", space_id=1, snapshot_id=snapshot.id, creator="admin", updated_by="admin"
+        )
+        template = Template.objects.get(id=template.id)
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert template.pipeline_tree == self.pipeline_tree
+            assert template.snapshot is template.snapshot
+            assert template.pipeline_tree is template.pipeline_tree
+        assert len(ctx.captured_queries) == 1
+
+        new_snapshot = TemplateSnapshot.create_snapshot(build_pipeline_tree(), "admin", "2.0.0")
+        template.snapshot_id = new_snapshot.id
+        assert template.snapshot.id == new_snapshot.id
+
+        template.refresh_from_db()
+        assert template.snapshot.id == snapshot.id
+        assert "_snapshot_cache" not in template.__getstate__()
+
 
 @pytest.mark.django_db
 class TestTemplateMockDataManager:
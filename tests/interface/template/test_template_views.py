@@ -185,7 +185,7 @@ def test_template_serializer_writes_schema_snapshot(mock_is_circular_reference,
         "bkflow.template.serializers.template.PipelineTemplateWebPreviewer.validate_loop_variables",
         return_value={"has_loop": True},
     ), mock.patch("bkflow.template.serializers.template.SpaceConfig.get_config", return_value="false"), mock.patch(
-        "bkflow.template.serializers.template.event_broadcast_signal.send"
+        "bkflow.template.serializers.template.broadcast_webhook_event"
     ):
         assert serializer.is_valid(), serializer.errors
         template = serializer.save()
@@ -237,7 +237,7 @@ def test_template_serializer_clears_open_plugin_snapshots_after_switching_to_nor
     ), mock.patch(
         "bkflow.template.serializers.template.send_callback"
     ), mock.patch(
-        "bkflow.template.serializers.template.event_broadcast_signal.send"
+        "bkflow.template.serializers.template.broadcast_webhook_event"
     ):
         assert serializer.is_valid(), serializer.errors
         updated_template = serializer.save()
@@ -2189,7 +2189,7 @@ class TestTemplateViewsMoreCoverage:
         assert response.status_code == 200
         assert response.data.get("result") is True
 
-    @mock.patch("bkflow.template.views.template.event_broadcast_signal")
+    @mock.patch("bkflow.template.views.template.broadcast_webhook_event")
     @mock.patch("bkflow.template.views.template.PipelineTemplateWebPreviewer.preview_pipeline_tree_exclude_task_nodes")
     @mock.patch("bkflow.template.views.template.TaskComponentClient")
     def test_admin_create_task_success_hits_event_broadcast_250_263(self, mock_client_cls, _mock_preview, mock_signal):
@@ -2209,7 +2209,7 @@ class TestTemplateViewsMoreCoverage:
 
         assert response.status_code == 200
         assert response.data.get("result") is True
-        mock_signal.send.assert_called_once()
+        mock_signal.assert_called_once()
 
     def test_admin_batch_delete_continue_branch_311(self):
         """Cover batch_delete 'continue' branch when root template is also in delete list (311)."""
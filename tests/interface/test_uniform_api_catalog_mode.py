@@ -4,6 +4,7 @@ import pytest
 
 from bkflow.exceptions import ValidationError
 from bkflow.pipeline_plugins.query.uniform_api import uniform_api as uniform_api_query
+from bkflow.plugin.models import OpenPluginCatalogIndex, SpaceOpenPluginAvailability
 from bkflow.space.configs import UniformApiConfig
 
 LIST_KEY = UniformApiConfig.Keys.META_APIS.value
@@ -31,25 +32,34 @@ def build_cached_plugin(
     category="JOB",
     category_name=None,
     status="available",
-    enabled=True,
 ):
-    return {
-        "source_key": "sops",
-        "plugin_id": plugin_id,
-        "plugin_code": plugin_id.replace("builtin__", ""),
-        "plugin_name": name,
-        "plugin_source": plugin_source,
-        "group_name": category,
-        "group_display_name": category_name or category,
-        "wrapper_version": "v4.0.0",
-        "default_version": "legacy",
-        "latest_version": "legacy",
-        "versions": ["legacy"],
-        "meta_url_template": "https://bk-sops.example/plugins/{}/?version={{version}}".format(plugin_id),
-        "description": "plugin description",
-        "status": status,
-        "enabled": enabled,
-    }
+    plugin_code = plugin_id.replace("builtin__", "")
+    return OpenPluginCatalogIndex(
+        space_id=1,
+        source_key="sops",
+        plugin_id=plugin_id,
+        plugin_code=plugin_code,
+        plugin_name=name,
+        plugin_source=plugin_source,
+        group_name=category,
+        group_display_name=category_name or category,
+        wrapper_version="v4.0.0",
+        default_version="legacy",
+        latest_version="legacy",
+        versions=["legacy"],
+        meta_url_template="https://bk-sops.example/plugins/{}/?version={{version}}".format(plugin_id),
+        description="plugin description",
+        status=status,
+    )
+
+
+def create_cached_plugin(enabled=True, **kwargs):
+    plugin = build_cached_plugin(**kwargs)
+    plugin.save()
+    SpaceOpenPluginAvailability.objects.create(
+        space_id=plugin.space_id, source_key=plugin.source_key, plugin_id=plugin.plugin_id, enabled=enabled
+    )
+    return plugin
 
 
 def configure_query(catalog_mode, client, catalog_service):
@@ -68,18 +78,18 @@ def test_extract_plugin_source_from_configured_url():
     assert uniform_api_query._extract_plugin_source("https://bk-sops.example/plugins/") is None
 
 
+@pytest.mark.django_db
 def test_build_cached_list_filters_visibility_source_keyword_and_paginates():
-    plugins = [
-        build_cached_plugin(name="执行作业"),
-        build_cached_plugin(plugin_id="builtin__job_execute_task_2", name="执行作业 2"),
-        build_cached_plugin(plugin_id="builtin__cc_update_host", name="更新主机", category="CC"),
-        build_cached_plugin(plugin_id="third-party", name="执行第三方", plugin_source="third_party"),
-        build_cached_plugin(plugin_id="builtin__disabled", name="执行已停用", enabled=False),
-        build_cached_plugin(plugin_id="builtin__unavailable", name="执行已下架", status="unavailable"),
-    ]
+    create_cached_plugin(name="执行作业")
+    create_cached_plugin(plugin_id="builtin__job_execute_task_2", name="执行作业 2")
+    create_cached_plugin(plugin_id="builtin__cc_update_host", name="更新主机", category="CC")
+    create_cached_plugin(plugin_id="third-party", name="执行第三方", plugin_source="third_party")
+    create_cached_plugin(plugin_id="builtin__disabled", name="执行已停用", enabled=False)
+    create_cached_plugin(plugin_id="builtin__unavailable", name="执行已下架", status="unavailable")
 
     result = uniform_api_query._build_cached_catalog_data(
-        plugins=plugins,
+        space_id=1,
+        source_key="sops",
         request_data={"category": "JOB", "key": "执行", "limit": 1, "offset": 1},
         config_key=LIST_KEY,
         plugin_source="builtin",
@@ -92,20 +102,71 @@ def test_build_cached_list_filters_visibility_source_keyword_and_paginates():
     assert result["apis"][0]["source_key"] == "sops"
 
 
+@pytest.mark.django_db
+def test_build_cached_list_keyword_is_case_insensitive():
+    create_cached_plugin(plugin_id="builtin__JOB_fast_execute", name="Fast Execute")
+    create_cached_plugin(plugin_id="builtin__cc_update_host", name="更新主机", category="CC")
+
+    result = uniform_api_query._build_cached_catalog_data(
+        space_id=1,
+        source_key="sops",
+        request_data={"key": "job_FAST"},
+        config_key=LIST_KEY,
+        plugin_source="builtin",
+    )
+
+    assert [plugin["id"] for plugin in result["apis"]] == ["builtin__JOB_fast_execute"]
+
+
+@pytest.mark.django_db
+def test_build_cached_list_paginates_with_cursor():
+    for index in range(5):
+        create_cached_plugin(plugin_id=f"builtin__plugin_{index}", name=f"插件 {index}")
+
+    request_data = {"limit": 2}
+    plugin_ids = []
+    while True:
+        result = uniform_api_query._build_cached_catalog_data(
+            space_id=1,
+            source_key="sops",
+            request_data=request_data,
+            config_key=LIST_KEY,
+            plugin_source="builtin",
+        )
+        assert result["total"] == 5
+        plugin_ids.extend(plugin["id"] for plugin in result["apis"])
+        if not result["next_cursor"]:
+            break
+        request_data = {"limit": 2, "cursor": result["next_cursor"], "offset": 100}
+
+    assert plugin_ids == [f"builtin__plugin_{index}" for index in range(5)]
+
+
+@pytest.mark.django_db
+def test_build_cached_list_rejects_invalid_cursor():
+    with pytest.raises(ValidationError, match="游标"):
+        uniform_api_query._build_cached_catalog_data(
+            space_id=1,
+            source_key="sops",
+            request_data={"cursor": "invalid"},
+            config_key=LIST_KEY,
+        )
+
+
+@pytest.mark.django_db
 def test_build_cached_categories_uses_visible_plugin_groups():
-    plugins = [
-        build_cached_plugin(category="JOB", category_name="作业平台"),
-        build_cached_plugin(
-            plugin_id="builtin__cc_update_host",
-            name="更新主机",
-            category="CC",
-            category_name="配置平台",
-        ),
-        build_cached_plugin(plugin_id="builtin__disabled", name="停用", category="MONITOR", enabled=False),
-    ]
+    create_cached_plugin(category="JOB", category_name="作业平台")
+    create_cached_plugin(
+        plugin_id="builtin__cc_update_host",
+        name="更新主机",
+        category="CC",
+        category_name="配置平台",
+    )
+    create_cached_plugin(plugin_id="builtin__disabled", name="停用", category="MONITOR", enabled=False)
 
     result = uniform_api_query._build_cached_catalog_data(
-        plugins=plugins,
+        space_id=1,
+        source_key="sops",
         request_data={},
         config_key=CATEGORY_KEY,
         plugin_source="builtin",
@@ -118,18 +179,19 @@ def test_build_cached_categories_uses_visible_plugin_groups():
     ]
 
 
-def test_remote_mode_preserves_remote_query():
+def test_remote_mode_falls_back_to_remote_and_requests_sync_when_catalog_stale():
     client = MagicMock()
     remote_data = {"total": 1, "apis": [{"id": "builtin__job_execute_task"}]}
     client.request.return_value = MagicMock(result=True, json_resp={"data": remote_data})
     catalog_service = MagicMock()
+    catalog_service.is_catalog_fresh.return_value = False
     patches = configure_query("remote", client, catalog_service)
 
     with patches[0], patches[1], patches[2], patch.object(
         uniform_api_query,
         "_get_api_credential",
         return_value={"bk_app_code": "app", "bk_app_secret": "secret"},
-    ):
+    ), patch.object(uniform_api_query, "_dispatch_catalog_sync") as mock_dispatch_sync:
         result = uniform_api_query._get_space_uniform_api_list_info(
             space_id=1,
             request_data={"api_name": "sops_builtin", "limit": 50, "offset": 0},
@@ -143,22 +205,50 @@ def test_remote_mode_preserves_remote_query():
         "apis": [{"id": "builtin__job_execute_task", "source_key": "sops"}],
     }
     client.request.assert_called_once()
-    catalog_service.is_catalog_initialized.assert_not_called()
+    catalog_service.is_catalog_fresh.assert_called_once_with(space_id=1, source_key="sops")
+    mock_dispatch_sync.assert_called_once_with(space_id=1, source_key="sops")
+
+
+def test_remote_mode_uses_fresh_local_catalog_without_remote_request():
+    client = MagicMock()
+    catalog_service = MagicMock()
+    catalog_service.is_catalog_fresh.return_value = True
+    catalog_service.is_catalog_initialized.return_value = True
+    catalog_service.search_visible_plugins.return_value = ([build_cached_plugin()], 1, None)
+    patches = configure_query("remote", client, catalog_service)
+
+    with patches[0], patches[1], patches[2], patch.object(uniform_api_query, "_get_api_credential") as mock_credential:
+        result = uniform_api_query._get_space_uniform_api_list_info(
+            space_id=1,
+            request_data={"api_name": "sops_builtin", "key": "执行", "limit": 50, "offset": 0},
+            config_key=LIST_KEY,
+            username="dannydeng",
+            template_id=1,
+        )
+
+    assert result["total"] == 1
+    assert result["apis"][0]["id"] == "builtin__job_execute_task"
+    catalog_service.is_catalog_initialized.assert_called_once_with(
+        space_id=1, source_key="sops", plugin_source="builtin"
+    )
+    mock_credential.assert_not_called()
+    client.request.assert_not_called()
 
 
 def test_default_mode_queries_remote_without_extra_admission():
-    """未显式配置 catalog_mode 的存量空间必须照常直连远端取列表。"""
+    """未显式配置 catalog_mode 的存量空间按 remote 处理，本地目录未同步时照常直连远端取列表。"""
     client = MagicMock()
     remote_data = {"total": 1, "apis": [{"id": "builtin__job_execute_task"}]}
     client.request.return_value = MagicMock(result=True, json_resp={"data": remote_data})
     catalog_service = MagicMock()
+    catalog_service.is_catalog_fresh.return_value = False
     patches = configure_query(None, client, catalog_service)
 
     with patches[0], patches[1], patches[2], patch.object(
         uniform_api_query,
         "_get_api_credential",
         return_value={"bk_app_code": "app", "bk_app_secret": "secret"},
-    ):
+    ), patch.object(uniform_api_query, "_dispatch_catalog_sync"):
         result = uniform_api_query._get_space_uniform_api_list_info(
             space_id=1,
             request_data={"api_name": "sops_builtin", "limit": 50, "offset": 0},
@@ -193,7 +283,7 @@ def test_cache_first_uses_initialized_cache_without_remote_request():
     client = MagicMock()
     catalog_service = MagicMock()
     catalog_service.is_catalog_initialized.return_value = True
-    catalog_service.list_space_plugins.return_value = [build_cached_plugin()]
+    catalog_service.search_visible_plugins.return_value = ([build_cached_plugin()], 1, None)
     patches = configure_query("cache_first", client, catalog_service)
 
     with patches[0], patches[1], patches[2], patch.object(
@@ -216,7 +306,16 @@ def test_cache_first_uses_initialized_cache_without_remote_request():
         source_key="sops",
         plugin_source="builtin",
     )
-    catalog_service.list_space_plugins.assert_called_once_with(space_id=1, source_key="sops")
+    catalog_service.search_visible_plugins.assert_called_once_with(
+        space_id=1,
+        source_key="sops",
+        plugin_source="builtin",
+        category="JOB",
+        keyword=None,
+        limit=50,
+        offset=0,
+        cursor=None,
+    )
     client.request.assert_not_called()
 
 
@@ -224,7 +323,7 @@ def test_cache_first_does_not_fallback_for_filtered_empty_result():
     client = MagicMock()
     catalog_service = MagicMock()
     catalog_service.is_catalog_initialized.return_value = True
-    catalog_service.list_space_plugins.return_value = [build_cached_plugin(category="JOB")]
+    catalog_service.search_visible_plugins.return_value = ([], 0, None)
     patches = configure_query("cache_first", client, catalog_service)
 
     with patches[0], patches[1], patches[2], patch.object(uniform_api_query, "_get_request_scope", create=True):
@@ -236,7 +335,7 @@ def test_cache_first_does_not_fallback_for_filtered_empty_result():
             template_id=1,
         )
 
-    assert result == {"total": 0, "apis": []}
+    assert result == {"total": 0, "apis": [], "next_cursor": None}
     client.request.assert_not_called()
 
 
@@ -21,11 +21,21 @@ from unittest import mock
 
 import pytest
 from django.conf import settings
+from django.utils import timezone
+from webhook.models import Event, History, Subscription
+from webhook.models import Webhook as WebhookModel
 
+from bkflow.space.models import WebhookDelivery, WebhookOutboxEvent, WebhookOutboxStatus
 from bkflow.utils.webhook import (
     apply_webhook_configs,
+    broadcast_webhook_event,
+    clean_webhook_outbox,
     clear_scope_webhooks,
+    deliver_webhooks,
+    dispatch_webhook_events,
+    enqueue_webhook_event,
     get_webhook_configs,
+    get_webhook_delivery_histories,
     get_webhook_delivery_history_by_delivery_id,
 )
 
@@ -78,6 +88,7 @@ class TestGetWebhookDeliveryHistory:
         mock_history.event_code = "task_finished"
         mock_history.success = True
         mock_history.status_code = 200
+        mock_history.delivery_id = "delivery_123"
         mock_history.extra_info = {"response": {"message": "ok"}}
 
         mock_events = [("task_finished", "任务完成")]
@@ -109,6 +120,7 @@ class TestGetWebhookDeliveryHistory:
         mock_history.event_code = "task_failed"
         mock_history.success = False
         mock_history.status_code = 500
+        mock_history.delivery_id = "delivery_456"
         mock_history.extra_info = {"response": "raw string"}
 
         event_mapping = {"task_failed": "任务失败"}
@@ -148,6 +160,7 @@ class TestGetWebhookDeliveryHistory:
         mock_history.event_code = "unknown_event"
         mock_history.success = True
         mock_history.status_code = 200
+        mock_history.delivery_id = "delivery_999"
         mock_history.extra_info = {"response": {}}
 
         event_mapping = {"other_event": "其他事件"}
@@ -320,3 +333,150 @@ class TestApplyWebhookConfigs:
 
         # 确认原始配置未被修改
         assert original_config == original_copy
+
+
+@pytest.mark.django_db
+class TestWebhookOutbox:
+    """测试 webhook 事件队列的分发与投递"""
+
+    def setup_method(self):
+        Event.objects.update_or_create(code="task_finished", defaults={"name": "任务完成", "info": {"source": "bkflow"}})
+        for code in ["hook_a", "hook_b", "hook_c"]:
+            WebhookModel.objects.create(
+                code=code,
+                name=code,
+                endpoint=f"http://example.com/{code}",
+                scope_type="space",
+                scope_code="1",
+                extra_info={"retry_times": 1, "interval": 3},
+            )
+        Subscription.objects.create(
+            webhook_code="hook_a", event_code="task_finished", scope_type="space", scope_code="1"
+        )
+        Subscription.objects.create(webhook_code="hook_b", event_code="*", scope_type="space", scope_code="1")
+        Subscription.objects.create(webhook_code="hook_c", event_code="task_failed", scope_type="space", scope_code="1")
+
+    @staticmethod
+    def _request_result(ok):
+        result = mock.MagicMock()
+        result.ok = ok
+        result.response_status_code = 200 if ok else 500
+        result.json_response.return_value = {"message": "ok" if ok else "error"}
+        return result
+
+    def test_dispatch_creates_deliveries_for_subscribers(self):
+        enqueue_webhook_event("task_finished", "space", 1, {"task_id": 10, "delivery_id": 10})
+        enqueue_webhook_event("task_finished", "template", 2, {"task_id": 11})
+
+        assert dispatch_webhook_events() == 2
+
+        deliveries = WebhookDelivery.objects.order_by("webhook_code")
+        assert [d.webhook_code for d in deliveries] == ["hook_a", "hook_b"]
+        assert {d.delivery_id for d in deliveries} == {"10"}
+        assert set(WebhookOutboxEvent.objects.values_list("status", flat=True)) == {
+            WebhookOutboxStatus.DISPATCHED.value
+        }
+        assert dispatch_webhook_events() == 0
+
+    def test_broadcast_enqueues_and_dispatches_on_commit(self, django_capture_on_commit_callbacks):
+        with mock.patch("bkflow.space.tasks.dispatch_webhook_events.delay") as mock_delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                events = broadcast_webhook_event("task_finished", [("space", "1"), ("template", "2")], {"task_id": 10})
+                mock_delay.assert_not_called()
+
+        mock_delay.assert_called_once_with()
+        assert [(e.scope_type, e.scope_code, e.extra_info) for e in events] == [
+            ("space", "1", {"task_id": 10}),
+            ("template", "2", {"task_id": 10}),
+        ]
+        assert dispatch_webhook_events() == 2
+        assert [d.webhook_code for d in WebhookDelivery.objects.order_by("webhook_code")] == ["hook_a", "hook_b"]
+
+    def test_dispatch_ignores_duplicated_deliveries(self):
+        event = enqueue_webhook_event("task_finished", "space", 1)
+        WebhookDelivery.objects.create(
+            event_id=event.id,
+            event_code="task_finished",
+            delivery_id=event.delivery_id,
+            webhook_code="hook_a",
+            scope_type="space",
+            scope_code="1",
+        )
+
+        dispatch_webhook_events()
+
+        assert WebhookDelivery.objects.filter(event_id=event.id).count() == 2
+
+    def test_dispatch_reclaims_stale_processing_events(self):
+        event = enqueue_webhook_event("task_finished", "space", 1)
+        WebhookOutboxEvent.objects.filter(id=event.id).update(
+            status=WebhookOutboxStatus.PROCESSING.value,
+            claimed_at=timezone.now() - datetime.timedelta(seconds=settings.WEBHOOK_DELIVERY_CLAIM_TIMEOUT + 1),
+        )
+        assert dispatch_webhook_events() == 1
+
+        event = enqueue_webhook_event("task_finished", "space", 1)
+        WebhookOutboxEvent.objects.filter(id=event.id).update(
+            status=WebhookOutboxStatus.PROCESSING.value, claimed_at=timezone.now()
+        )
+        assert dispatch_webhook_events() == 0
+
+    def test_deliver_success(self, mocker):
+        enqueue_webhook_event("task_finished", "space", 1, {"task_id": 10, "delivery_id": "d1"})
+        dispatch_webhook_events()
+        requester = mocker.patch("bkflow.utils.webhook.Requester")
+        requester.return_value.request.return_value = self._request_result(True)
+
+        assert deliver_webhooks() == 2
+
+        request_config = requester.call_args_list[0].kwargs["config"]
+        assert request_config["json"]["delivery_id"] == "d1"
+        assert request_config["json"]["event"]["info"] == {"source": "bkflow", "task_id": 10}
+        assert request_config["timeout"] == 30
+        assert set(WebhookDelivery.objects.values_list("status", flat=True)) == {WebhookOutboxStatus.SUCCESS.value}
+        histories = get_webhook_delivery_histories(["d1"])["d1"]
+        assert len(histories) == 2
+        assert all(history["is_success"] for history in histories)
+        assert deliver_webhooks() == 0
+
+    def test_deliver_failed_with_backoff(self, mocker):
+        enqueue_webhook_event("task_finished", "space", 1)
+        dispatch_webhook_events()
+        WebhookDelivery.objects.exclude(webhook_code="hook_a").delete()
+        mocker.patch("bkflow.utils.webhook.Requester").return_value.request.return_value = self._request_result(False)
+
+        deliver_webhooks()
+        delivery = WebhookDelivery.objects.get()
+        assert delivery.status == WebhookOutboxStatus.PENDING.value
+        assert delivery.retry_times == 1
+        assert delivery.next_retry_at > timezone.now()
+        # 未到重试时间不会投递
+        assert deliver_webhooks() == 0
+
+        WebhookDelivery.objects.update(next_retry_at=timezone.now())
+        deliver_webhooks()
+        delivery.refresh_from_db()
+        assert delivery.status == WebhookOutboxStatus.FAILED.value
+        assert History.objects.filter(webhook_code="hook_a", success=False).count() == 2
+
+    def test_deliver_dropped_when_webhook_deleted(self, mocker):
+        enqueue_webhook_event("task_finished", "space", 1)
+        dispatch_webhook_events()
+        WebhookModel.objects.filter(code="hook_b").delete()
+        requester = mocker.patch("bkflow.utils.webhook.Requester")
+        requester.return_value.request.return_value = self._request_result(True)
+
+        assert deliver_webhooks() == 1
+        assert WebhookDelivery.objects.get(webhook_code="hook_b").status == WebhookOutboxStatus.FAILED.value
+
+    def test_clean_webhook_outbox(self):
+        enqueue_webhook_event("task_finished", "space", 1)
+        dispatch_webhook_events()
+        WebhookDelivery.objects.update(status=WebhookOutboxStatus.SUCCESS.value)
+        expired_time = timezone.now() - datetime.timedelta(days=settings.WEBHOOK_OUTBOX_RETENTION_DAYS + 1)
+        WebhookOutboxEvent.objects.update(created_at=expired_time)
+        WebhookDelivery.objects.update(updated_at=expired_time)
+
+        assert clean_webhook_outbox() == (1, 2)
+        assert not WebhookOutboxEvent.objects.exists()
+        assert not WebhookDelivery.objects.exists()
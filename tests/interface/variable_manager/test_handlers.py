@@ -0,0 +1,38 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+from unittest import mock
+
+import pytest
+
+from bkflow.constants import VariableType
+from bkflow.variable_manager.models import VariableManager
+
+
+@pytest.mark.django_db
+@mock.patch("bkflow.space.utils.TaskComponentClient")
+def test_variable_change_invalidates_engine_cache(mock_client_cls, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        variable = VariableManager.objects.create(
+            space_id=1, name="var", variable_type=VariableType.SPACE.value, key="var", value="1"
+        )
+    with django_capture_on_commit_callbacks(execute=True):
+        variable.delete()
+
+    assert mock_client_cls.return_value.invalidate_space_cache.call_count == 2
+    mock_client_cls.return_value.invalidate_space_cache.assert_called_with(data={"space_id": 1, "resource": "variable"})
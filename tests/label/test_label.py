@@ -270,6 +270,48 @@ class TestLabelModel:
         ids = {label.id for label in all_descendants}
         assert ids == {child1.id, child2.id, grandchild.id}
 
+    def test_materialized_path_maintained_on_save(self):
+        """path/full_path should be persisted on create and cascade to descendants on rename or move."""
+        root = make_label("root")
+        other_root = make_label("other_root")
+        child = make_label("child", parent_id=root.id)
+        grandchild = make_label("grandchild", parent_id=child.id)
+
+        assert root.path == "/"
+        assert child.path == f"/{root.id}/"
+        assert grandchild.path == f"/{root.id}/{child.id}/"
+
+        # rename root: descendants full_path should be updated
+        root.name = "renamed"
+        root.save(update_fields=["name"])
+        grandchild.refresh_from_db()
+        assert grandchild.full_path == "renamed/child/grandchild"
+
+        # move child under other_root: descendants path should be updated
+        child.parent_id = other_root.id
+        child.save()
+        grandchild.refresh_from_db()
+        assert grandchild.path == f"/{other_root.id}/{child.id}/"
+        assert grandchild.full_path == "other_root/child/grandchild"
+        assert {label.id for label in Label.objects.get_sub_labels(root.id, recursive=True)} == set()
+        assert {label.id for label in Label.objects.get_sub_labels(other_root.id, recursive=True)} == {
+            child.id,
+            grandchild.id,
+        }
+
+    def test_labels_map_and_sub_labels_single_query(self, django_assert_num_queries):
+        """get_labels_map and recursive get_sub_labels should not query per level."""
+        root = make_label("root")
+        child = make_label("child", parent_id=root.id)
+        grandchild = make_label("grandchild", parent_id=child.id)
+
+        with django_assert_num_queries(1):
+            labels_map = Label.objects.get_labels_map([root.id, child.id, grandchild.id])
+        assert labels_map[grandchild.id]["full_path"] == "root/child/grandchild"
+
+        with django_assert_num_queries(1):
+            Label.objects.get_sub_labels(root.id, recursive=True)
+
     def test_get_label_ids_by_names(self):
         """get_label_ids_by_names should return label IDs matching given names."""
         l1 = make_label("apple")
@@ -26,7 +26,7 @@ from requests import HTTPError
 
 from plugin_service import env
 from plugin_service.exceptions import PluginServiceException, PluginServiceNotUse
-from plugin_service.plugin_client import PluginServiceApiClient
+from plugin_service.plugin_client import PluginAppDetailCache, PluginServiceApiClient
 
 
 class TestPluginServiceApiClientInit:
@@ -824,3 +824,120 @@ class TestPluginServiceApiClientHelperMethods:
                     )
 
                     assert result == mock_response
+
+    @mock.patch("plugin_service.plugin_client.time.sleep")
+    @mock.patch("plugin_service.plugin_client.requests.get")
+    def test_request_api_and_error_retry_backoff(self, mock_get, mock_sleep):
+        """Test _request_api_and_error_retry waits with exponential backoff between retries"""
+        with mock.patch.object(env, "BKAPP_INVOKE_PAAS_RETRY_NUM", 4), mock.patch.object(
+            env, "BKAPP_INVOKE_PAAS_RETRY_BACKOFF", 0.5
+        ), mock.patch.object(env, "BKAPP_INVOKE_PAAS_RETRY_BACKOFF_MAX", 1.5):
+            mock_response = mock.Mock()
+            mock_response.raise_for_status.side_effect = HTTPError("500 Server Error")
+            mock_get.return_value = mock_response
+
+            PluginServiceApiClient._request_api_and_error_retry("http://api.example.com", method="get")
+
+            assert [c[0][0] for c in mock_sleep.call_args_list] == [0.5, 1.0, 1.5]
+
+
+class SyncThread:
+    """同步执行后台刷新，便于断言"""
+
+    def __init__(self, target, args, daemon):
+        self.target = target
+        self.args = args
+
+    def start(self):
+        self.target(*self.args)
+
+
+class TestPluginAppDetailCache:
+    DETAIL = {"result": True, "message": None, "data": {"url": "http://plugin.example.com", "apigw_name": "apigw"}}
+
+    @pytest.fixture(autouse=True)
+    def cache_env(self):
+        with mock.patch.object(env, "PLUGIN_APP_DETAIL_CACHE_TTL", 60), mock.patch.object(
+            env, "PLUGIN_APP_DETAIL_STALE_TTL", 600
+        ), mock.patch("plugin_service.plugin_client.threading.Thread", SyncThread):
+            yield
+
+    def test_cached_within_ttl(self):
+        cache = PluginAppDetailCache()
+        loader = mock.Mock(return_value=self.DETAIL)
+
+        assert cache.get("code", loader)["data"] == self.DETAIL["data"]
+        assert cache.get("code", loader)["data"] == self.DETAIL["data"]
+        loader.assert_called_once_with("code")
+
+    def test_cache_disabled(self):
+        cache = PluginAppDetailCache()
+        loader = mock.Mock(return_value=self.DETAIL)
+
+        with mock.patch.object(env, "PLUGIN_APP_DETAIL_CACHE_TTL", 0):
+            cache.get("code", loader)
+            cache.get("code", loader)
+
+        assert loader.call_count == 2
+
+    def test_failed_result_not_cached(self):
+        cache = PluginAppDetailCache()
+        loader = mock.Mock(side_effect=[{"result": False, "data": None, "message": "error"}, self.DETAIL])
+
+        assert cache.get("code", loader)["result"] is False
+        assert cache.get("code", loader)["result"] is True
+
+    @mock.patch("plugin_service.plugin_client.time.monotonic")
+    def test_stale_while_revalidate(self, mock_monotonic):
+        cache = PluginAppDetailCache()
+        new_detail = {"result": True, "message": None, "data": {"url": "http://new.example.com", "apigw_name": ""}}
+        loader = mock.Mock(side_effect=[self.DETAIL, new_detail])
+
+        mock_monotonic.return_value = 0
+        cache.get("code", loader)
+
+        # 过期后返回旧数据，同时刷新缓存
+        mock_monotonic.return_value = 100
+        assert cache.get("code", loader)["data"] == self.DETAIL["data"]
+        assert loader.call_count == 2
+        assert cache.get("code", loader)["data"] == new_detail["data"]
+
+    @mock.patch("plugin_service.plugin_client.time.monotonic")
+    def test_refresh_failure_backoff(self, mock_monotonic):
+        cache = PluginAppDetailCache()
+        failed = {"result": False, "data": None, "message": "error"}
+        loader = mock.Mock(side_effect=[self.DETAIL, failed, failed, self.DETAIL])
+
+        with mock.patch.object(env, "BKAPP_INVOKE_PAAS_RETRY_BACKOFF", 10), mock.patch.object(
+            env, "BKAPP_INVOKE_PAAS_RETRY_BACKOFF_MAX", 100
+        ):
+            mock_monotonic.return_value = 0
+            cache.get("code", loader)
+
+            # 第一次刷新失败，10 秒内不再刷新
+            mock_monotonic.return_value = 100
+            assert cache.get("code", loader)["result"] is True
+            mock_monotonic.return_value = 105
+            assert cache.get("code", loader)["result"] is True
+            assert loader.call_count == 2
+
+            # 第二次刷新失败，等待时间翻倍
+            mock_monotonic.return_value = 111
+            cache.get("code", loader)
+            mock_monotonic.return_value = 125
+            cache.get("code", loader)
+            assert loader.call_count == 3
+
+            mock_monotonic.return_value = 132
+            cache.get("code", loader)
+            assert loader.call_count == 4
+
+    @mock.patch.object(PluginServiceApiClient, "get_plugin_app_detail")
+    def test_clients_share_app_detail(self, mock_get_detail):
+        mock_get_detail.return_value = self.DETAIL
+        with mock.patch.object(env, "USE_PLUGIN_SERVICE", "1"):
+            PluginServiceApiClient("test_plugin")
+            client = PluginServiceApiClient("test_plugin")
+
+        mock_get_detail.assert_called_once_with("test_plugin")
+        assert client.plugin_host == "http://plugin.example.com/bk_plugin/"
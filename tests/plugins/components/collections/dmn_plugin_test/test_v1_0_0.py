@@ -96,7 +96,7 @@ DMN_PLUGIN_SUCCESS_CASE = ComponentTestCase(
     schedule_assertion=None,
     patchers=[
         Patcher(
-            target="bkflow.pipeline_plugins.components.collections.dmn_plugin.v1_0_0.InterfaceModuleClient",
+            target="bkflow.decision_table.table_cache.InterfaceModuleClient",
             return_value=MOCK_SUCCESS_CLIENT,
         )
     ],
@@ -118,7 +118,7 @@ DMN_PLUGIN_FAIL_CASE = ComponentTestCase(
     schedule_assertion=None,
     patchers=[
         Patcher(
-            target="bkflow.pipeline_plugins.components.collections.dmn_plugin.v1_0_0.InterfaceModuleClient",
+            target="bkflow.decision_table.table_cache.InterfaceModuleClient",
             return_value=MOCK_FAIL_CLIENT,
         )
     ],
@@ -0,0 +1,175 @@
+"""
+TencentBlueKing is pleased to support the open source community by making
+蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
+Copyright (C) 2024 THL A29 Limited,
+a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+We undertake not to change the open source license (MIT license) applicable
+
+to the current version of the project delivered to anyone in the future.
+"""
+
+from unittest.mock import Mock, patch
+
+from django.test import TestCase
+
+from bkflow.pipeline_plugins.components.collections.python_code import sandbox, v1_0_0
+from bkflow.pipeline_plugins.components.collections.python_code.sandbox import (
+    SandboxPool,
+    SandboxTimeoutError,
+    SandboxUnavailableError,
+)
+from bkflow.pipeline_plugins.components.collections.python_code.v1_0_0 import (
+    CodeCompileError,
+    PythonCodeExecutor,
+)
+
+SIMPLE_CODE = """
+def main(x):
+    return {"double": x * 2}
+"""
+
+DEAD_LOOP_CODE = """
+def main():
+    while True:
+        pass
+"""
+
+
+class PythonCodeExecutorSandboxTest(TestCase):
+    def setUp(self):
+        self.executor = PythonCodeExecutor(service=Mock(), timeout=5, cpu_limit=1)
+
+    def _run(self, code, timeout=None, **input_args):
+        success, bytecode, error = self.executor.compile_code(code)
+        self.assertTrue(success, error)
+        return self.executor.execute_main(bytecode, input_args=input_args, timeout=timeout)
+
+    def test_execute_in_sandbox(self):
+        success, result, output_info = self._run(SIMPLE_CODE, x=21)
+
+        self.assertTrue(success)
+        self.assertEqual(result, {"double": 42})
+        self.assertEqual(output_info, "")
+
+    def test_bytecode_cache(self):
+        with patch.object(v1_0_0, "compile_restricted", wraps=v1_0_0.compile_restricted) as compile_mock:
+            code = SIMPLE_CODE + "\n# bytecode cache"
+            first = self.executor.compile_code(code)
+            second = self.executor.compile_code(code)
+
+        self.assertEqual(compile_mock.call_count, 1)
+        self.assertEqual(first, second)
+
+    def test_missing_main_raise_compile_error(self):
+        with self.assertRaisesRegex(CodeCompileError, "代码中必须定义main函数"):
+            self._run("x = 1")
+
+    def test_wall_clock_timeout_kills_sandbox(self):
+        success, _, error = self._run(DEAD_LOOP_CODE, timeout=0.5)
+
+        self.assertFalse(success)
+        self.assertEqual(error, "main函数执行超时（0.5秒）")
+        # 被终止的进程会被替换，后续任务不受影响
+        self.assertTrue(self._run(SIMPLE_CODE, x=1)[0])
+
+    def test_cpu_limit_kills_sandbox(self):
+        success, _, error = self._run(DEAD_LOOP_CODE, timeout=10)
+
+        self.assertFalse(success)
+        self.assertEqual(error, "CPU时间超出限制（1秒）")
+
+    def test_memory_limit(self):
+        executor = PythonCodeExecutor(service=Mock(), timeout=5, memory_limit_mb=64)
+        _, bytecode, _ = executor.compile_code("def main():\n    return len('x' * 512 * 1024 * 1024)")
+
+        success, _, error = executor.execute_main(bytecode)
+
+        self.assertFalse(success)
+        self.assertEqual(error, "内存使用超出限制（64MB）")
+
+    def test_fallback_to_thread_when_spawn_failed(self):
+        # 使用独立的进程池，模拟 daemon 进程中无法创建子进程
+        executor = PythonCodeExecutor(service=Mock(), timeout=5, memory_limit_mb=32)
+        _, bytecode, _ = executor.compile_code(SIMPLE_CODE)
+
+        with patch.object(
+            sandbox, "SandboxWorker", side_effect=AssertionError("daemonic processes are not allowed to have children")
+        ) as worker_mock:
+            self.assertEqual(executor.execute_main(bytecode, input_args={"x": 2}), (True, {"double": 4}, ""))
+            self.assertEqual(executor.execute_main(bytecode, input_args={"x": 3}), (True, {"double": 6}, ""))
+
+        # 创建失败后一段时间内不再重复尝试
+        self.assertEqual(worker_mock.call_count, 1)
+
+    def test_unpicklable_result(self):
+        success, _, error = self._run("def main():\n    return {'func': main}")
+
+        self.assertFalse(success)
+        self.assertTrue(error.startswith("执行错误: "))
+
+
+class SandboxPoolTest(TestCase):
+    def test_recycle_worker_after_max_jobs(self):
+        pool = SandboxPool(job_handler=abs, size=1, max_jobs_per_worker=2)
+        pool.warm_up()
+        try:
+            first_worker = pool._idle[0]
+            self.assertEqual(pool.execute(-1, timeout=5), 1)
+            self.assertIs(pool._idle[0], first_worker)
+
+            self.assertEqual(pool.execute(-2, timeout=5), 2)
+            self.assertIsNot(pool._idle[0], first_worker)
+            self.assertFalse(first_worker.is_alive())
+        finally:
+            pool.shutdown()
+
+    def test_use_forkserver_context(self):
+        pool = SandboxPool(job_handler=abs, size=1)
+        try:
+            self.assertEqual(pool._context.get_start_method(), "forkserver")
+            self.assertEqual(pool.execute(-1, timeout=5), 1)
+        finally:
+            pool.shutdown()
+
+    def test_wait_for_slot_counts_toward_timeout(self):
+        pool = SandboxPool(job_handler=abs, size=1, max_size=1)
+        pool._slots.acquire()
+        try:
+            with self.assertRaises(SandboxTimeoutError):
+                pool.execute(-1, timeout=0.1)
+        finally:
+            pool._slots.release()
+            pool.shutdown()
+
+    def test_max_size_and_idle_workers(self):
+        pool = SandboxPool(job_handler=abs, size=1, max_size=2)
+        try:
+            self.assertEqual(pool.max_size, 2)
+            first, second = pool._acquire(), pool._acquire()
+            pool._release(first, True)
+            pool._release(second, True)
+            # 空闲进程数量不超过 size，多余的进程直接回收
+            self.assertEqual(pool._idle, [first])
+            self.assertFalse(second.is_alive())
+        finally:
+            pool.shutdown()
+
+    def test_spawn_unavailable(self):
+        pool = SandboxPool(job_handler=abs, size=1)
+        with patch.object(sandbox, "SandboxWorker", side_effect=OSError("fork failed")):
+            with self.assertRaises(SandboxUnavailableError):
+                pool.execute(-1, timeout=5)
+
+    def test_max_size_default_to_worker_concurrency(self):
+        self.assertEqual(sandbox.get_worker_concurrency(2), 2)
+        with patch.object(sandbox, "_worker_concurrency", 100):
+            self.assertEqual(sandbox.get_worker_concurrency(2), 100)
@@ -1,4 +1,3 @@
-# -*- coding: utf-8 -*-
 """
 TencentBlueKing is pleased to support the open source community by making
 蓝鲸流程引擎服务 (BlueKing Flow Engine Service) available.
@@ -80,3 +79,23 @@ def test_bkflow_database_config(env_insert_fixture, original_value_fixture):
     importlib.reload(env)
     bkflow_module = BKFLOWDatabaseConfig.get_database_config()
     assert bkflow_module == original_value_fixture
+
+
+@pytest.mark.parametrize(
+    "env_insert_fixture, original_value_fixture",
+    [
+        (
+            {
+                "BKAPP_HTTP_ENDPOINT_TIMEOUTS": (
+                    '{"get_task_states": 10, "create_task": [3, 30], "operate_task": [3, null], '
+                    '"bad_list": [3], "bad_value": "10", "bad_bool": true, "bad_zero": 0}'
+                )
+            },
+            {"get_task_states": 10, "create_task": (3, 30), "operate_task": (3, None)},
+        )
+    ],
+    indirect=True,
+)
+def test_bkflow_http_endpoint_timeouts(env_insert_fixture, original_value_fixture):
+    importlib.reload(env)
+    assert env.BKFLOW_HTTP_ENDPOINT_TIMEOUTS == original_value_fixture